@@ -0,0 +1,200 @@
+"""
+Content-addressed cache for the asset pipeline
+Stage results (zones, POIs, ...) are stored under a key derived from the
+hashes of the GLB chunks they depend on, so re-running the pipeline on an
+unchanged model costs one stat() and re-exporting a model whose geometry
+changed but whose node tree didn't still reuses the zone/POI results.
+JSON-shaped results are stored as .json, bulk numeric ones (BVH arrays) as
+.npz.
+
+Outputs go through write_if_changed(), which leaves files untouched when
+their content is identical so Vite's watcher doesn't trigger reloads.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from glb_reader import CHUNK_BIN, CHUNK_JSON, GLBFile
+
+DEFAULT_CACHE_DIR = '.asset-cache'
+
+CHUNK_NAMES = {
+    'JSON': CHUNK_JSON,
+    'BIN': CHUNK_BIN,
+}
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _default_mode():
+    """Permissions a plain open(path, 'w') would have produced"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _atomic_write(path, data):
+    """Write bytes to a temp file next to `path` and rename it into place"""
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = _default_mode()
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path, content):
+    """
+    Write `content` (str or bytes) to `path` only if it differs from what is
+    already there. Returns True if the file was written.
+    """
+
+    data = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+
+    _atomic_write(path, data)
+    return True
+
+
+class AssetCache:
+    """Stat-keyed chunk hashes plus content-addressed stage results"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stat_dir = os.path.join(cache_dir, 'stat')
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+
+    # ------------------------------------------------------------------
+    # Chunk hashes
+    # ------------------------------------------------------------------
+
+    def _stat_path(self, path):
+        return os.path.join(self.stat_dir, _digest(os.path.abspath(path).encode('utf-8')) + '.json')
+
+    def chunk_hashes(self, path, chunks=('JSON',)):
+        """
+        Hashes of the requested chunks of a GLB file.
+
+        If the file's size and mtime match the last run, stored hashes are
+        returned without opening the file. Otherwise only the requested
+        chunks are hashed (straight from the memory map).
+        """
+
+        stat = os.stat(path)
+        record_path = self._stat_path(path)
+        record = self._read_json(record_path) or {}
+
+        if record.get('size') != stat.st_size or record.get('mtime_ns') != stat.st_mtime_ns:
+            record = {'path': os.path.abspath(path), 'size': stat.st_size,
+                      'mtime_ns': stat.st_mtime_ns, 'chunks': {}}
+
+        missing = [name for name in chunks if name not in record['chunks']]
+        if missing:
+            with GLBFile(path) as glb:
+                for name in missing:
+                    payload = glb.chunk(CHUNK_NAMES[name])
+                    record['chunks'][name] = _digest(payload) if payload is not None else None
+            _atomic_write(record_path, json.dumps(record).encode('utf-8'))
+
+        return {name: record['chunks'][name] for name in chunks}
+
+    def key(self, stage, path, chunks=('JSON',), version=1):
+        """Cache key for a stage that depends on the given chunks of `path`"""
+
+        hashes = self.chunk_hashes(path, chunks)
+        parts = [stage, str(version)] + [f"{name}={hashes[name]}" for name in chunks]
+        return _digest('|'.join(parts).encode('utf-8'))
+
+    # ------------------------------------------------------------------
+    # Stage results
+    # ------------------------------------------------------------------
+
+    def _object_path(self, key, suffix='.json'):
+        return os.path.join(self.objects_dir, key[:2], key + suffix)
+
+    def get(self, key):
+        """Stored result for `key`, or None"""
+        return self._read_json(self._object_path(key))
+
+    def put(self, key, value):
+        _atomic_write(self._object_path(key), json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+    def cached(self, stage, path, compute, chunks=('JSON',), version=1):
+        """
+        Return (result, hit): the cached result of `compute()` for this stage
+        and model content, computing and storing it on a miss.
+        """
+
+        key = self.key(stage, path, chunks, version)
+        result = self.get(key)
+        if result is not None:
+            return result, True
+
+        result = compute()
+        self.put(key, result)
+        return result, False
+
+    # ------------------------------------------------------------------
+    # Array results (numpy .npz, for stages whose output is bulk binary)
+    # ------------------------------------------------------------------
+
+    def get_arrays(self, key):
+        """Stored {name: ndarray} for `key`, or None"""
+
+        try:
+            with np.load(self._object_path(key, '.npz'), allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def put_arrays(self, key, arrays):
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        _atomic_write(self._object_path(key, '.npz'), buffer.getvalue())
+
+    def cached_arrays(self, stage, path, compute, chunks=('JSON',), version=1):
+        """cached() for results that are a dict of numpy arrays"""
+
+        key = self.key(stage, path, chunks, version)
+        result = self.get_arrays(key)
+        if result is not None:
+            return result, True
+
+        result = compute()
+        self.put_arrays(key, result)
+        return result, False
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
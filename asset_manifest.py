@@ -0,0 +1,291 @@
+"""
+Asset manifest for the files the app serves from public/
+Hashes every asset, writes a content-addressed copy of each one under
+public/hashed/<hash>/ and emits a TypeScript manifest (src/data/assetManifest.ts)
+with the hashed URL, byte size, dependencies and load priority of every file.
+Hashed URLs never change content, so firebase.json serves /hashed/ as
+immutable (unhashed paths keep their year-long max-age), and the client uses the priorities to preload what the first frame needs in
+parallel (src/utils/assets.ts).
+
+The external resources a model's glTF JSON references are copied next to
+its hashed copy, so relative URIs keep resolving, and are folded into its
+hash. Its dependencies are the files of a sibling directory named after it,
+e.g. public/SM_MFF/ when the asset pipeline runs with -o public.
+
+Requires: numpy
+
+USAGE:
+    python asset_manifest.py
+    python asset_manifest.py public --ts-output src/data/assetManifest.ts
+    python asset_manifest.py --priority "env/kloppenheim_06_puresky_1k.pmrem=critical"
+    python asset_manifest.py --no-copy      # manifest only, no hashed copies
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from urllib.parse import unquote
+
+from glb_reader import GLBFile
+from ts_codegen import asset_manifest_module, write_module
+
+DEFAULT_PUBLIC_DIR = 'public'
+DEFAULT_TS_OUTPUT = os.path.join('src', 'data', 'assetManifest.ts')
+HASHED_DIR = 'hashed'
+HASH_LENGTH = 12
+MODEL_EXTENSIONS = ('.glb', '.gltf')
+
+# Load priorities, most urgent first: critical assets block the first frame,
+# high ones are preloaded right after, normal ones prefetched when idle and
+# lazy ones only fetched on demand
+PRIORITIES = ('critical', 'high', 'normal', 'lazy')
+
+# (glob relative to public/, priority); the first matching rule wins
+PRIORITY_RULES = [
+    ('*_tiles/tileset.json', 'critical'),
+    ('*_tiles/*', 'lazy'),                  # streamed by camera distance (glb_tiles.py)
+    ('*.glb', 'critical'),
+    ('*.gltf', 'critical'),
+    ('core/*', 'lazy'),                     # stbn.bin: nothing in the app loads it yet
+    ('atmosphere/*', 'lazy'),               # stars.bin: likewise
+    ('env/*.pmrem', 'high'),
+    ('textures/env/kloppenheim_06_puresky_1k.hdr', 'high'),   # default HDRI (appStore)
+    ('textures/env/*', 'normal'),
+    ('textures/*', 'lazy'),                 # grid.png: not loaded by the app either
+    ('schedule.json', 'high'),             # events panel (events_importer.py)
+    ('*.hdr', 'lazy'),
+    ('*.ico', 'lazy'),
+    ('*.svg', 'lazy'),
+]
+DEFAULT_PRIORITY = 'normal'
+
+_CHUNK_SIZE = 1 << 20
+
+
+class ManifestError(ValueError):
+    """Raised when the assets can't be described consistently"""
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_assets(public_dir):
+    """Relative (forward-slash) paths of every served file, skipping hidden files and hashed copies"""
+
+    paths = []
+    for root, dirs, files in os.walk(public_dir):
+        relative_root = os.path.relpath(root, public_dir)
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.')
+                         and not (relative_root == '.' and d == HASHED_DIR))
+        for name in sorted(files):
+            if not name.startswith('.'):
+                paths.append(os.path.normpath(os.path.join(relative_root, name)).replace(os.sep, '/'))
+    return paths
+
+
+def external_uris(path):
+    """Relative URIs a .glb/.gltf references outside itself (buffers and images)"""
+
+    if path.lower().endswith('.glb'):
+        with GLBFile(path) as glb:
+            gltf = glb.json
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            gltf = json.load(f)
+
+    uris = []
+    for item in gltf.get('buffers', []) + gltf.get('images', []):
+        uri = item.get('uri')
+        if uri and not uri.startswith('data:') and '://' not in uri and uri not in uris:
+            uris.append(uri)
+    return uris
+
+
+def model_resources(public_dir, path):
+    """Paths (relative to public/) of the external resources of a model"""
+
+    base = os.path.dirname(path)
+    resources = []
+    for uri in external_uris(os.path.join(public_dir, path)):
+        resource = os.path.normpath(os.path.join(base, unquote(uri))).replace(os.sep, '/')
+        if resource.startswith('..'):
+            raise ManifestError(f"{path}: resource {uri!r} is outside {public_dir}")
+        resources.append(resource)
+    return resources
+
+
+def priority_for(path, rules=PRIORITY_RULES):
+    for pattern, priority in rules:
+        if fnmatch.fnmatchcase(path, pattern):
+            return priority
+    return DEFAULT_PRIORITY
+
+
+def parse_priority_rule(text):
+    """'<glob>=<priority>' from the command line"""
+
+    pattern, sep, priority = text.rpartition('=')
+    if not sep or not pattern or priority not in PRIORITIES:
+        raise ManifestError(f"Invalid priority rule {text!r}; expected GLOB=" + '|'.join(PRIORITIES))
+    return pattern, priority
+
+
+def build_manifest(public_dir=DEFAULT_PUBLIC_DIR, rules=PRIORITY_RULES):
+    """
+    Describe every asset under `public_dir`: path -> {url, bytes, hash,
+    priority, dependencies, resources}. `resources` are the public paths
+    of a model's external files, which write_hashed_copies() places next
+    to the model.
+    """
+
+    paths = scan_assets(public_dir)
+    known = set(paths)
+    hashes = {path: file_hash(os.path.join(public_dir, path)) for path in paths}
+
+    manifest = {}
+    for path in paths:
+        resources, sidecars = [], []
+        if path.lower().endswith(MODEL_EXTENSIONS):
+            resources = model_resources(public_dir, path)
+            for resource in resources:
+                if resource not in known:
+                    raise ManifestError(f"{path}: missing resource {resource}")
+
+            # Outputs of the asset pipeline (<venue>/...) go with <venue>.glb
+            sidecar_dir = os.path.splitext(path)[0] + '/'
+            sidecars = [other for other in paths if other.startswith(sidecar_dir)
+                        and other not in resources and not other.lower().endswith(MODEL_EXTENSIONS)]
+
+        # A model's hash covers its resources, so a changed texture moves the model too
+        digest = hashes[path]
+        if resources:
+            digest = hashlib.sha256(''.join([digest] + [hashes[r] for r in resources]).encode()).hexdigest()
+        digest = digest[:HASH_LENGTH]
+
+        # A model split into tiles is streamed, so the whole file is no longer critical
+        priority = priority_for(path, rules)
+        if priority == 'critical' and f"{os.path.splitext(path)[0]}_tiles/tileset.json" in known:
+            priority = 'lazy'
+
+        manifest[path] = {
+            'url': f"{HASHED_DIR}/{digest}/{path}",
+            'bytes': os.path.getsize(os.path.join(public_dir, path)),
+            'hash': digest,
+            'priority': priority,
+            'dependencies': sidecars,
+            'resources': resources,
+        }
+
+    return manifest
+
+
+def _place(source, target):
+    """
+    Copy `source` to `target` unless it is already there. Copies rather than
+    hard links, so editing a source in place can't change a published URL.
+    """
+
+    if os.path.exists(target) and os.path.getsize(target) == os.path.getsize(source):
+        return False
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+    return True
+
+
+def write_hashed_copies(manifest, public_dir=DEFAULT_PUBLIC_DIR, prune=True):
+    """
+    Place every asset (and a model's resources next to it) at its hashed URL.
+    Returns (written, removed) file counts; with `prune`, stale copies from
+    earlier runs are deleted.
+    """
+
+    wanted = {}
+    for path, entry in manifest.items():
+        for item in [path] + entry['resources']:
+            target = os.path.join(public_dir, HASHED_DIR, entry['hash'], item)
+            wanted[os.path.normpath(target)] = os.path.join(public_dir, item)
+
+    written = sum(_place(source, target) for target, source in sorted(wanted.items()))
+
+    removed = 0
+    hashed_root = os.path.join(public_dir, HASHED_DIR)
+    if prune and os.path.isdir(hashed_root):
+        for root, dirs, files in os.walk(hashed_root, topdown=False):
+            for name in files:
+                target = os.path.normpath(os.path.join(root, name))
+                if target not in wanted:
+                    os.remove(target)
+                    removed += 1
+            if not os.listdir(root):
+                os.rmdir(root)
+
+    return written, removed
+
+
+def print_summary(manifest):
+    total = sum(entry['bytes'] for entry in manifest.values())
+    print(f"📦 {len(manifest)} assets, {total / 1e6:.1f} MB")
+    for priority in PRIORITIES:
+        entries = [entry for entry in manifest.values() if entry['priority'] == priority]
+        if entries:
+            size = sum(entry['bytes'] for entry in entries)
+            print(f"   {priority:<8} {len(entries):>3} files  {size / 1e6:>7.2f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hash the served assets and emit a preload manifest")
+    parser.add_argument('public_dir', nargs='?', default=DEFAULT_PUBLIC_DIR,
+                        help=f"directory the app serves (default: {DEFAULT_PUBLIC_DIR})")
+    parser.add_argument('--ts-output', default=DEFAULT_TS_OUTPUT,
+                        help=f"TypeScript manifest (default: {DEFAULT_TS_OUTPUT})")
+    parser.add_argument('--priority', action='append', default=[], metavar='GLOB=PRIORITY',
+                        help="extra priority rule, checked before the built-in ones "
+                             f"({', '.join(PRIORITIES)}); repeatable")
+    parser.add_argument('--no-copy', action='store_true',
+                        help=f"only write the manifest, not the {HASHED_DIR}/ copies")
+    parser.add_argument('--no-prune', action='store_true',
+                        help=f"keep stale copies from earlier runs in {HASHED_DIR}/")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.public_dir):
+        print(f"❌ Not found: {args.public_dir}")
+        return 1
+
+    started = time.perf_counter()
+    try:
+        rules = [parse_priority_rule(text) for text in args.priority] + PRIORITY_RULES
+        print(f"📂 Hashing assets in {args.public_dir}...")
+        manifest = build_manifest(args.public_dir, rules)
+    except (ManifestError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_summary(manifest)
+
+    if not args.no_copy:
+        written, removed = write_hashed_copies(manifest, args.public_dir, prune=not args.no_prune)
+        print(f"💾 Hashed copies in {os.path.join(args.public_dir, HASHED_DIR)}: "
+              f"{written} written, {removed} removed")
+
+    if args.ts_output and write_module(args.ts_output, asset_manifest_module(manifest)):
+        print(f"📝 TypeScript module written: {args.ts_output}")
+
+    print(f"\n🎉 Manifest ready in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,529 @@
+"""
+Headless asset pipeline for venue models
+Runs zone extraction, POI extraction and TypeScript generation for many GLB
+files at once, fanning models out over a process pool.
+
+USAGE:
+    python asset_pipeline.py public/SM_MFF.glb
+    python asset_pipeline.py venues/ other/Venue.glb -o build/venues -j 8
+    python asset_pipeline.py public/SM_MFF.glb --ts-dir src/data
+    python asset_pipeline.py public/SM_MFF.glb --navgraph
+    python asset_pipeline.py venues/ --routes
+    python asset_pipeline.py public/SM_MFF.glb --visibility
+    python asset_pipeline.py public/SM_MFF.glb --place-cameras
+    python asset_pipeline.py venues/ --lod
+    python asset_pipeline.py venues/ --lod --compress
+    python asset_pipeline.py venues/ --lod --compress --tiles
+    python asset_pipeline.py venues/ --ao --lod --compress --tiles
+    python asset_pipeline.py venues/ --instance --ao --lod --compress
+    python asset_pipeline.py venues/ --instance --merge --merge-cell-size 40 --compress --tiles
+    python asset_pipeline.py venues/ --merge --index-bits 16 --compress
+    python asset_pipeline.py venues/ --lod --textures phone --compress
+
+For every model <name>.glb the pipeline writes <output>/<name>/ (models
+found in a directory keep their sub-directory, e.g. venues/a/SM_MFF.glb ->
+<output>/a/SM_MFF/):
+    zone_coordinates.json   - ZONE_ empties (world-space)
+    poi_cameras_export.json - camera nodes as POI data
+    zones.ts, poiData.ts    - TypeScript modules for src/data
+    zones.bin               - compact binary zone/POI bundle with a spatial
+                              index (zone_bundle.py, spatial_index.py)
+    navgraph.json, navGraph.ts - waypoint graph from floor geometry
+                              (with --navgraph, see navmesh_builder.py)
+    routes.bin              - zone-to-zone route table (with --routes,
+                              see route_table.py; implies --navgraph)
+    visibility.json, visibility.ts - per-zone/POI visible sets (with
+                              --visibility, see visibility_sets.py)
+    poi_camera_placement.json - ray-tested camera per zone (with
+                              --place-cameras, see poi_camera_placement.py)
+    <name>_instanced.glb, instancing.json - the model with repeated meshes
+                              collapsed into GPU-instanced nodes and the
+                              draw call/size report (with --instance, see
+                              glb_instancing.py)
+    <name>_merged.glb, merging.json - the model with static meshes merged
+                              per material and their node range tables,
+                              and the draw call report (with --merge,
+                              --merge-cell-size and --index-bits, see
+                              glb_merge.py)
+    <name>_ao.glb           - the model with baked per-vertex ambient
+                              occlusion (with --ao, see glb_ao.py)
+    <name>_lod.glb          - the model with decimated LOD levels (with
+                              --lod, see glb_lod.py)
+    <name>_textures.glb, textures.json - the model with KTX2/Basis textures
+                              capped for a device tier and the per-texture
+                              memory report (with --textures [TIER], see
+                              glb_textures.py; needs toktx)
+    <name>_compressed.glb, compression.json - quantized, meshopt-compressed
+                              model and its size/decode report (with
+                              --compress, see glb_compress.py)
+    <name>_tiles/           - tileset.json, index.glb and tile_*.glb: the
+                              shipped model split into spatial tiles (with
+                              --tiles, see glb_tiles.py)
+
+The model stages run in the order above, each on the output of the one
+before it that is enabled; the last one is the shipped model.
+
+Results are cached by GLB content hash (see asset_cache.py) and outputs are
+only rewritten when their content changes. Exits with a non-zero status if
+any model fails.
+"""
+
+import argparse
+import base64
+import concurrent.futures
+import json
+import os
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from asset_cache import DEFAULT_CACHE_DIR, AssetCache, write_if_changed
+from extract_pois_from_glb import build_poi_output, extract_pois
+from extract_zones_from_glb import build_zone_output, extract_zones
+from glb_ao import AO_VERSION, bake_ao, bake_ao_bytes
+from glb_compress import COMPRESS_VERSION, compress_glb_bytes, compress_model
+from glb_instancing import INSTANCING_VERSION, instance_model, instance_model_bytes
+from glb_merge import MERGE_VERSION, merge_model, merge_model_bytes
+from glb_textures import DEFAULT_TIER, TEXTURES_VERSION, TIERS, transcode_textures, transcode_textures_bytes
+from glb_lod import LOD_VERSION, build_lod_model, build_lod_model_bytes
+from glb_tiles import TILES_VERSION, TILESET_FILE, build_tiles, build_tiles_bytes, remove_stale_tiles
+from glb_scene import load_scene
+from navmesh_builder import NAVGRAPH_VERSION, build_nav_graph_for_file, build_nav_output
+from poi_camera_placement import PLACEMENT_VERSION, build_placement_output, place_cameras_for_file
+from route_table import VERSION as ROUTE_TABLE_VERSION, build_route_table
+from ts_codegen import nav_graph_module, pois_module, visibility_module, zones_module
+from visibility_sets import VISIBILITY_VERSION, build_visibility_for_file, build_visibility_output
+from zone_bundle import encode_bundle, verify_bundle
+
+DEFAULT_OUTPUT_DIR = os.path.join('build', 'venues')
+
+
+def find_models(inputs, extension='.glb'):
+    """Expand files and directories into a sorted, de-duplicated list of model paths"""
+
+    models = []
+    missing = []
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                models.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(extension))
+        elif os.path.isfile(item):
+            models.append(item)
+        else:
+            missing.append(item)
+
+    seen = set()
+    unique = []
+    for path in models:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+
+    return unique, missing
+
+
+def output_names(models, inputs):
+    """
+    Output sub-directory for every model (path -> name): its path relative
+    to the input directory it was found in, without the extension
+    (venues/a/SM_MFF.glb -> a/SM_MFF), or its base name for models given as
+    files. Raises ValueError when two models would write to one directory.
+    """
+
+    roots = [os.path.abspath(item) for item in inputs if os.path.isdir(item)]
+    names = {}
+    for path in models:
+        full = os.path.abspath(path)
+        root = next((r for r in roots if full.startswith(r.rstrip(os.sep) + os.sep)), None)
+        relative = os.path.relpath(full, root) if root else os.path.basename(full)
+        names[path] = os.path.splitext(relative)[0]
+
+    owners = {}
+    for path, name in names.items():
+        key = os.path.normcase(name)
+        if key in owners:
+            raise ValueError(f"{owners[key]} and {path} would both write to {name}/; "
+                             f"pass their directory instead of the files, or rename one")
+        owners[key] = path
+    return names
+
+
+# Bump when extraction logic changes so stale cache entries are ignored
+EXTRACT_VERSION = 1
+
+
+def to_json(data):
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def encode_verified_bundle(zones, pois):
+    """Binary zone/POI bundle, checked to round-trip before it is written"""
+
+    data = encode_bundle(zones, pois)
+    verify_bundle(data, zones, pois)
+    return data
+
+
+def extract_model_data(glb_file):
+    """Zones and POIs for one model (depends on the JSON chunk only)"""
+
+    scene = load_scene(glb_file)
+    return {
+        'zones': extract_zones(scene.gltf, scene=scene),
+        'pois': extract_pois(scene),
+    }
+
+
+def process_model(glb_file, output_dir=DEFAULT_OUTPUT_DIR, output_name=None, cache_dir=DEFAULT_CACHE_DIR, ts_dir=None,
+                  navgraph=False, routes=False, visibility=False, place_cameras=False,
+                  instance=False, merge=False, merge_cell_size=None, index_bits=32, ao=False, lod=False,
+                  textures=None, compress=False, tiles=False):
+    """
+    Run every pipeline stage for one model; returns a result summary.
+    Outputs go to `output_dir`/`output_name` (default: the model's base
+    name). TypeScript modules go to `ts_dir` (e.g. src/data) when given,
+    otherwise next to the other outputs. `navgraph` adds the geometry-based
+    navigation graph stage, which reads the BIN chunk as well; `routes`
+    adds the route table on top of it, `visibility` the ray-cast visible
+    sets, `place_cameras` the line-of-sight camera placement, `instance`
+    collapses repeated meshes into GPU-instanced nodes, `merge` merges static
+    meshes per material (per grid cell of `merge_cell_size` meters when
+    given, with `index_bits`-bit indices), `ao` bakes ambient
+    occlusion into a copy of the model, `lod` the decimated LOD
+    model, `textures` (a device tier name) transcodes the textures to KTX2,
+    `compress` a compressed copy of the shipped model and `tiles`
+    splits the shipped model into spatial tiles. Each model stage starts
+    from the output of the previous one that is enabled.
+    """
+
+    started = time.perf_counter()
+    venue = os.path.splitext(os.path.basename(glb_file))[0]
+    venue_dir = os.path.join(output_dir, output_name or venue)
+
+    if cache_dir:
+        data, cache_hit = AssetCache(cache_dir).cached(
+            'extract', glb_file, lambda: extract_model_data(glb_file), version=EXTRACT_VERSION)
+    else:
+        data, cache_hit = extract_model_data(glb_file), False
+
+    zones, pois = data['zones'], data['pois']
+
+    outputs = {
+        'zone_coordinates.json': lambda: to_json(build_zone_output(glb_file, zones)),
+        'poi_cameras_export.json': lambda: to_json(build_poi_output(pois)),
+        'zones.ts': lambda: zones_module(zones),
+        'poiData.ts': lambda: pois_module(pois),
+        'zones.bin': lambda: encode_verified_bundle(zones, pois),
+    }
+
+    graph = None
+    if navgraph or routes:
+        compute = lambda: build_nav_graph_for_file(glb_file, zones=zones)
+        if cache_dir:
+            graph, _ = AssetCache(cache_dir).cached(
+                'navgraph', glb_file, compute, chunks=('JSON', 'BIN'), version=NAVGRAPH_VERSION)
+        else:
+            graph = compute()
+        outputs['navgraph.json'] = lambda: to_json(build_nav_output(glb_file, graph))
+        outputs['navGraph.ts'] = lambda: nav_graph_module(graph)
+
+    if routes:
+        # Models already run in parallel, so the table is built in-process
+        compute = lambda: base64.b64encode(build_route_table(graph, jobs=1)).decode('ascii')
+        if cache_dir:
+            encoded, _ = AssetCache(cache_dir).cached(
+                'routes', glb_file, compute, chunks=('JSON', 'BIN'),
+                version=f"{NAVGRAPH_VERSION}.{ROUTE_TABLE_VERSION}")
+        else:
+            encoded = compute()
+        outputs['routes.bin'] = lambda: base64.b64decode(encoded)
+
+    if visibility:
+        compute = lambda: build_visibility_for_file(glb_file, zones=zones, pois=pois, jobs=1,
+                                                    cache_dir=cache_dir)
+        if cache_dir:
+            table, _ = AssetCache(cache_dir).cached(
+                'visibility', glb_file, compute, chunks=('JSON', 'BIN'), version=VISIBILITY_VERSION)
+        else:
+            table = compute()
+        outputs['visibility.json'] = lambda: to_json(build_visibility_output(glb_file, table))
+        outputs['visibility.ts'] = lambda: visibility_module(table)
+
+    if place_cameras:
+        compute = lambda: place_cameras_for_file(glb_file, zones=zones, jobs=1, cache_dir=cache_dir)
+        if cache_dir:
+            placed, _ = AssetCache(cache_dir).cached(
+                'poi_placement', glb_file, compute, chunks=('JSON', 'BIN'), version=PLACEMENT_VERSION)
+        else:
+            placed = compute()
+        outputs['poi_camera_placement.json'] = lambda: to_json(build_placement_output(glb_file, placed))
+
+    # Model stages each start from the model the previous enabled one wrote
+    # (`shipped`; None = the source file). Cache entries are named after the
+    # chain of stages so far and versioned by all of them.
+    shipped, shipped_name = None, os.path.basename(glb_file)
+    chain, versions = [], []
+
+    def model_stage(name, version, compute):
+        chain.append(name)
+        versions.append(str(version))
+        if not cache_dir:
+            return compute()
+        arrays, _ = AssetCache(cache_dir).cached_arrays(
+            '_'.join(chain), glb_file, compute, chunks=('JSON', 'BIN'), version='.'.join(versions))
+        return arrays
+
+    def from_shipped(run_file, run_bytes, **options):
+        return run_bytes(shipped, **options) if shipped is not None else run_file(glb_file, **options)
+
+    if instance:
+        def compute():
+            data, report = from_shipped(instance_model, instance_model_bytes)
+            return {'glb': np.frombuffer(data, dtype=np.uint8),
+                    'report': np.frombuffer(json.dumps(report).encode('utf-8'), dtype=np.uint8)}
+        instanced = model_stage('instance', INSTANCING_VERSION, compute)
+        shipped, shipped_name = instanced['glb'].tobytes(), f"{venue}_instanced.glb"
+        outputs[shipped_name] = lambda data=shipped: data
+        outputs['instancing.json'] = lambda: to_json(json.loads(instanced['report'].tobytes()))
+
+    if merge:
+        def compute():
+            data, report = from_shipped(merge_model, merge_model_bytes,
+                                        index_bits=index_bits, cell_size=merge_cell_size)
+            return {'glb': np.frombuffer(data, dtype=np.uint8),
+                    'report': np.frombuffer(json.dumps(report).encode('utf-8'), dtype=np.uint8)}
+        merged = model_stage('merge', f"{MERGE_VERSION}-{index_bits}-{merge_cell_size}", compute)
+        shipped, shipped_name = merged['glb'].tobytes(), f"{venue}_merged.glb"
+        outputs[shipped_name] = lambda data=shipped: data
+        outputs['merging.json'] = lambda: to_json(json.loads(merged['report'].tobytes()))
+
+    if ao:
+        compute = lambda: {'glb': np.frombuffer(
+            from_shipped(bake_ao, bake_ao_bytes, jobs=1, cache_dir=cache_dir)[0], dtype=np.uint8)}
+        shipped, shipped_name = model_stage('ao', AO_VERSION, compute)['glb'].tobytes(), f"{venue}_ao.glb"
+        outputs[shipped_name] = lambda data=shipped: data
+
+    if lod:
+        compute = lambda: {'glb': np.frombuffer(
+            from_shipped(build_lod_model, build_lod_model_bytes, jobs=1)[0], dtype=np.uint8)}
+        shipped, shipped_name = model_stage('lod', LOD_VERSION, compute)['glb'].tobytes(), f"{venue}_lod.glb"
+        outputs[shipped_name] = lambda data=shipped: data
+
+    if textures:
+        def compute():
+            data, report = from_shipped(transcode_textures, transcode_textures_bytes, max_size=TIERS[textures])
+            return {'glb': np.frombuffer(data, dtype=np.uint8),
+                    'report': np.frombuffer(json.dumps(report).encode('utf-8'), dtype=np.uint8)}
+        transcoded = model_stage('textures', f"{TEXTURES_VERSION}-{TIERS[textures]}", compute)
+        shipped, shipped_name = transcoded['glb'].tobytes(), f"{venue}_textures.glb"
+        outputs[shipped_name] = lambda data=shipped: data
+        outputs['textures.json'] = lambda: to_json(json.loads(transcoded['report'].tobytes()))
+
+    if compress:
+        def compute():
+            data, report = from_shipped(compress_model, compress_glb_bytes)
+            return {'glb': np.frombuffer(data, dtype=np.uint8),
+                    'report': np.frombuffer(json.dumps(report).encode('utf-8'), dtype=np.uint8)}
+        compressed = model_stage('compress', COMPRESS_VERSION, compute)
+        shipped, shipped_name = compressed['glb'].tobytes(), f"{venue}_compressed.glb"
+        outputs[shipped_name] = lambda data=shipped: data
+        outputs['compression.json'] = lambda: to_json(json.loads(compressed['report'].tobytes()))
+
+    tile_dir = f"{venue}_tiles"
+    if tiles:
+        def compute():
+            if shipped is not None:
+                files, tileset = build_tiles_bytes(shipped, shipped_name)
+            else:
+                files, tileset = build_tiles(glb_file)
+            arrays = {filename: np.frombuffer(data, dtype=np.uint8) for filename, data in files.items()}
+            arrays[TILESET_FILE] = np.frombuffer(to_json(tileset).encode('utf-8'), dtype=np.uint8)
+            return arrays
+        for filename, data in model_stage('tiles', TILES_VERSION, compute).items():
+            outputs[f"{tile_dir}/{filename}"] = lambda data=data: data.tobytes()
+
+    written = []
+    for filename, render in outputs.items():
+        target_dir = ts_dir if ts_dir and filename.endswith('.ts') else venue_dir
+        if write_if_changed(os.path.join(target_dir, filename), render()):
+            written.append(filename)
+    if tiles:
+        remove_stale_tiles(os.path.join(venue_dir, tile_dir), {os.path.basename(f) for f in outputs})
+
+    return {
+        'model': glb_file,
+        'venue': venue,
+        'output_dir': venue_dir,
+        'zones': len(zones),
+        'pois': len(pois),
+        'nav_nodes': len(graph['nodes']) if graph else None,
+        'cache_hit': cache_hit,
+        'written': written,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def _run_one(glb_file, options):
+    """Worker entry point: never raises, so one bad model can't sink the pool"""
+
+    started = time.perf_counter()
+    try:
+        result = process_model(glb_file, **options)
+        result['ok'] = True
+    except Exception as e:
+        result = {
+            'model': glb_file,
+            'ok': False,
+            'error': f"{type(e).__name__}: {e}",
+            'traceback': traceback.format_exc(),
+            'seconds': time.perf_counter() - started,
+        }
+    return result
+
+
+def run_pipeline(models, jobs=None, on_result=None, names=None, **options):
+    """
+    Process models in parallel (or inline for jobs=1); returns results in
+    input order. `names` maps models to their output sub-directory (see
+    output_names()); `options` are passed through to process_model().
+    """
+
+    results = {}
+    names = names or {}
+    model_options = {glb_file: dict(options, output_name=names.get(glb_file)) for glb_file in models}
+
+    if jobs == 1 or len(models) <= 1:
+        for glb_file in models:
+            results[glb_file] = _run_one(glb_file, model_options[glb_file])
+            if on_result:
+                on_result(results[glb_file])
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_run_one, glb_file, model_options[glb_file]): glb_file
+                       for glb_file in models}
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+                if on_result:
+                    on_result(results[futures[future]])
+
+    return [results[glb_file] for glb_file in models]
+
+
+def print_result(result):
+    if result['ok']:
+        source = "cached" if result['cache_hit'] else "extracted"
+        changes = ", ".join(result['written']) if result['written'] else "no changes"
+        nav = f", {result['nav_nodes']} nav nodes" if result.get('nav_nodes') is not None else ""
+        print(f"✅ {result['model']}: {result['zones']} zones, {result['pois']} POIs{nav} ({source}) "
+              f"-> {result['output_dir']} [{changes}] ({result['seconds']:.2f}s)")
+    else:
+        print(f"❌ {result['model']}: {result['error']} ({result['seconds']:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the venue asset pipeline over many GLB models")
+    parser.add_argument('inputs', nargs='+', help="GLB files and/or directories to scan for *.glb")
+    parser.add_argument('-o', '--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help=f"root directory for per-venue outputs (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--ts-dir', default=None,
+                        help="write the generated .ts modules here (e.g. src/data); single model only")
+    parser.add_argument('--navgraph', action='store_true',
+                        help="also build the navigation graph from floor geometry")
+    parser.add_argument('--routes', action='store_true',
+                        help="also precompute the zone-to-zone route table (implies --navgraph)")
+    parser.add_argument('--visibility', action='store_true',
+                        help="also ray-cast per-zone/POI visible sets from the geometry")
+    parser.add_argument('--place-cameras', action='store_true',
+                        help="also place a POI camera per zone with a clear view of it")
+    parser.add_argument('--instance', action='store_true',
+                        help="also collapse repeated meshes into GPU-instanced nodes")
+    parser.add_argument('--merge', action='store_true',
+                        help="also merge static meshes per material to cut draw calls")
+    parser.add_argument('--merge-cell-size', type=float, default=None, metavar='METERS',
+                        help="with --merge, merge per material and grid cell of this size "
+                             "(default: whole model; needed with --tiles)")
+    parser.add_argument('--index-bits', type=int, choices=(16, 32), default=32,
+                        help="with --merge, 32-bit indices or merged meshes split so 16-bit "
+                             "indices do (default: 32)")
+    parser.add_argument('--ao', action='store_true',
+                        help="also bake per-vertex ambient occlusion into a copy of the model")
+    parser.add_argument('--lod', action='store_true',
+                        help="also write a copy of the model with decimated LOD levels")
+    parser.add_argument('--textures', nargs='?', const=DEFAULT_TIER, choices=sorted(TIERS), default=None,
+                        metavar='TIER',
+                        help=f"also transcode the textures to KTX2, capped for a device tier "
+                             f"({', '.join(TIERS)}; default: {DEFAULT_TIER}; toktx from $TOKTX or PATH)")
+    parser.add_argument('--compress', action='store_true',
+                        help="also write a quantized, meshopt-compressed copy of the model "
+                             "(of the model the earlier stages wrote)")
+    parser.add_argument('--tiles', action='store_true',
+                        help="also split the shipped model into spatial tiles "
+                             "for streamed loading")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"content-addressed result cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="always re-extract every model")
+    parser.add_argument('-v', '--verbose', action='store_true', help="print tracebacks for failures")
+    args = parser.parse_args(argv)
+
+    models, missing = find_models(args.inputs)
+    for item in missing:
+        print(f"❌ Not found: {item}")
+
+    if not models:
+        print("⚠️ No .glb files to process")
+        return 1
+
+    if args.ts_dir and len(models) > 1:
+        print("❌ --ts-dir can only be used with a single model")
+        return 1
+
+    try:
+        names = output_names(models, args.inputs)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.merge_cell_size is not None and args.merge_cell_size <= 0:
+        print("❌ --merge-cell-size must be positive")
+        return 1
+    if args.merge and args.tiles and args.merge_cell_size is None:
+        # One mesh per material spans the whole venue and would land in a single tile
+        print("❌ --merge with --tiles needs --merge-cell-size, or the merged meshes can't be tiled")
+        return 1
+    if args.merge and args.lod:
+        print("⚠️ Merged meshes get no LOD levels (glb_lod.py); only the meshes --merge leaves "
+              "alone are decimated" + ("" if args.merge_cell_size else
+                                       ". Use --merge-cell-size to keep merged meshes small"))
+
+    print(f"📂 Processing {len(models)} model(s)...\n")
+    started = time.perf_counter()
+    cache_dir = None if args.no_cache else args.cache_dir
+    results = run_pipeline(models, jobs=args.jobs, on_result=print_result, names=names,
+                           output_dir=args.output_dir, cache_dir=cache_dir, ts_dir=args.ts_dir,
+                           navgraph=args.navgraph, routes=args.routes, visibility=args.visibility,
+                           place_cameras=args.place_cameras, instance=args.instance, merge=args.merge,
+                           merge_cell_size=args.merge_cell_size, index_bits=args.index_bits, ao=args.ao,
+                           lod=args.lod, textures=args.textures, compress=args.compress, tiles=args.tiles)
+
+    failed = [r for r in results if not r['ok']]
+    if args.verbose:
+        for result in failed:
+            print(f"\n--- {result['model']} ---\n{result['traceback']}")
+
+    print(f"\n{'=' * 70}")
+    print(f"🎉 {len(results) - len(failed)}/{len(results)} models succeeded "
+          f"in {time.perf_counter() - started:.2f}s")
+    print(f"{'=' * 70}")
+
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Batch-run the Blender export scripts over many .blend files
+Starts one headless Blender process per scene (blender -b) and runs several
+of them in parallel. Each scene gets its own output folder; the scripts take
+their output paths from the command line (see blender_headless.py).
+
+USAGE:
+    python blender_batch.py scenes/
+    python blender_batch.py scenes/ other/Venue.blend -o build/blender -j 4
+    python blender_batch.py scenes/ --scripts zones cameras --blender /opt/blender/blender
+
+For every scene <name>.blend the driver writes <output>/<name>/ (scenes
+found in a directory keep their sub-directory, as in asset_pipeline.py):
+    zone_coordinates.json    - blender_extract_zones.py
+    poi_cameras_export.json  - blender_export_all_cameras.py (+ poiData.ts)
+    poi_camera_export.json   - blender_export_poi_cameras.py
+    blender.log              - Blender's stdout/stderr for the run
+
+The Blender binary is taken from --blender, the BLENDER environment variable
+or PATH. Exits with a non-zero status if any scene fails.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import subprocess
+import sys
+import time
+
+from asset_pipeline import find_models, output_names
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join('build', 'blender')
+
+# Script name on the command line -> file next to this driver
+SCRIPTS = {
+    'zones': 'blender_extract_zones.py',
+    'cameras': 'blender_export_all_cameras.py',
+    'pois': 'blender_export_poi_cameras.py',
+}
+
+
+def blender_command(blender, scene, scripts, output_dir):
+    """Command line that runs `scripts` on one scene without a UI"""
+
+    command = [blender, '-b', scene, '--factory-startup', '--python-exit-code', '1']
+    for name in scripts:
+        command.extend(['--python', os.path.join(SCRIPT_DIR, SCRIPTS[name])])
+    command.extend(['--', '--output-dir', output_dir])
+    return command
+
+
+def run_scene(scene, blender, scripts, output_root, timeout=None, output_name=None):
+    """
+    Run Blender on one scene and return a result dict (never raises). Output
+    goes to `output_root`/`output_name` (default: the scene's base name).
+    """
+
+    started = time.perf_counter()
+    name = output_name or os.path.splitext(os.path.basename(scene))[0]
+    output_dir = os.path.join(output_root, name)
+    log_file = os.path.join(output_dir, 'blender.log')
+    result = {'scene': scene, 'output_dir': output_dir, 'log': log_file}
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(log_file, 'w', encoding='utf-8') as log:
+            process = subprocess.run(
+                blender_command(blender, os.path.abspath(scene), scripts, os.path.abspath(output_dir)),
+                stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, timeout=timeout,
+            )
+        result['ok'] = process.returncode == 0
+        if not result['ok']:
+            result['error'] = f"Blender exited with status {process.returncode}"
+    except subprocess.TimeoutExpired:
+        result['ok'] = False
+        result['error'] = f"timed out after {timeout}s"
+    except OSError as e:
+        result['ok'] = False
+        result['error'] = str(e)
+
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def run_batch(scenes, blender, scripts, output_root, jobs=None, timeout=None, on_result=None, names=None):
+    """
+    Run all scenes, `jobs` Blender processes at a time. Blender does the work
+    in its own process, so a thread pool is enough to keep them busy.
+    `names` maps scenes to their output sub-directory (see output_names()).
+    """
+
+    jobs = jobs or os.cpu_count() or 1
+    names = names or {}
+    results = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_scene, scene, blender, scripts, output_root, timeout, names.get(scene))
+                   for scene in scenes]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    order = {scene: i for i, scene in enumerate(scenes)}
+    results.sort(key=lambda r: order[r['scene']])
+    return results
+
+
+def print_result(result):
+    if result['ok']:
+        print(f"✅ {result['scene']} -> {result['output_dir']} ({result['seconds']:.2f}s)")
+    else:
+        print(f"❌ {result['scene']}: {result['error']}, see {result['log']} ({result['seconds']:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Blender export scripts headless over many .blend files")
+    parser.add_argument('inputs', nargs='+', help=".blend files and/or directories to scan for *.blend")
+    parser.add_argument('-o', '--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help=f"root directory for per-scene outputs (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="Blender processes at a time (default: CPU count)")
+    parser.add_argument('--scripts', nargs='+', choices=sorted(SCRIPTS), default=list(SCRIPTS),
+                        help="export scripts to run on every scene (default: all)")
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'),
+                        help="Blender executable (default: $BLENDER or 'blender' on PATH)")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds before a scene is killed")
+    args = parser.parse_args(argv)
+
+    scenes, missing = find_models(args.inputs, extension='.blend')
+    for item in missing:
+        print(f"❌ Not found: {item}")
+
+    if not scenes:
+        print("⚠️ No .blend files to process")
+        return 1
+
+    try:
+        names = output_names(scenes, args.inputs)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"📂 Processing {len(scenes)} scene(s) with {', '.join(args.scripts)}...\n")
+    started = time.perf_counter()
+    results = run_batch(scenes, args.blender, args.scripts, args.output_dir,
+                        jobs=args.jobs, timeout=args.timeout, on_result=print_result, names=names)
+
+    failed = [r for r in results if not r['ok']]
+    print(f"\n{'=' * 70}")
+    print(f"🎉 {len(results) - len(failed)}/{len(results)} scenes succeeded "
+          f"in {time.perf_counter() - started:.2f}s")
+    print(f"{'=' * 70}")
+
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
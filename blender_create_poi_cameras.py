@@ -9,17 +9,56 @@ HOW TO USE:
 4. Click "Open" and select this file
 5. Click "Run Script" button
 6. POI data will be exported to JSON
+
+PLACED CAMERAS (see poi_camera_placement.py):
+    Cameras are put at a fixed offset from each zone unless a placement file
+    is given, in which case the ray-tested positions from it are used:
+    blender -b model.blend --python blender_create_poi_cameras.py -- --placements poi_camera_placement.json
 """
 
 import bpy
+import argparse
 import json
 import os
 import math
+import sys
 from mathutils import Vector
 
 
-def create_camera_targets():
-    """Create camera targets for all zone Empty objects"""
+def load_placements(path):
+    """
+    Camera positions from poi_camera_placement.py keyed by zone object name,
+    converted from glTF axes (Y-up) to Blender axes (Z-up)
+    """
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    placements = {}
+    for poi in data.get("pois", []):
+        x, y, z = poi["camera_position"]
+        placements[poi["blender_target_name"]] = Vector((x, -z, y))
+    return placements
+
+
+def placements_path(argv=None):
+    """--placements PATH from the arguments after "--", if any"""
+
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--placements", default=None)
+    args, _ = parser.parse_known_args(argv[argv.index("--") + 1:] if "--" in argv else [])
+    return args.placements
+
+
+def create_camera_targets(placements=None):
+    """
+    Create camera targets for all zone Empty objects. `placements` maps zone
+    names to camera positions (load_placements()); other zones get the
+    fixed offset.
+    """
+
+    placements = placements or {}
 
     zones = []
     pois = []
@@ -63,15 +102,20 @@ def create_camera_targets():
         # Get zone location
         zone_loc = zone_empty.matrix_world.translation
 
-        # Calculate camera position (offset from zone)
-        # Default offset: 5 units back and 2 units up
-        offset = Vector((-5.0, 0.0, 2.0))
+        if zone_empty.name in placements:
+            # Ray-tested position from poi_camera_placement.py
+            camera_loc = placements[zone_empty.name]
+            offset = camera_loc - zone_loc
+        else:
+            # Calculate camera position (offset from zone)
+            # Default offset: 5 units back and 2 units up
+            offset = Vector((-5.0, 0.0, 2.0))
 
-        # Apply rotation from zone if any
-        if zone_empty.rotation_euler != (0, 0, 0):
-            offset = offset.rotate(zone_empty.rotation_euler)
+            # Apply rotation from zone if any
+            if zone_empty.rotation_euler != (0, 0, 0):
+                offset = offset.rotate(zone_empty.rotation_euler)
 
-        camera_loc = zone_loc + offset
+            camera_loc = zone_loc + offset
 
         # Check if camera already exists for this zone
         camera_name = f"CAMERA_{zone_empty.name.replace('ZONE_', '')}"
@@ -256,7 +300,9 @@ def create_camera_targets():
 # Run the script
 if __name__ == "__main__":
     try:
-        output_lines, output_file = create_camera_targets()
+        placements_file = placements_path()
+        placements = load_placements(placements_file) if placements_file else None
+        output_lines, output_file = create_camera_targets(placements)
 
         # Create new text datablock to show results
         text_name = "POI_CAMERA_TARGETS_RESULTS"
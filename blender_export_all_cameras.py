@@ -7,49 +7,55 @@ Blender Script: Export All Cameras to POI Format
 2. Перейдите на вкладку Scripting
 3. Нажмите "Open" и выберите этот файл
 4. Нажмите "Run Script" (или Alt+P)
-5. Данные будут экспортированы в JSON и показаны в текстовом редакторе
+5. Данные будут экспортированы в JSON и poiData.ts (рядом с .blend файлом)
+   и показаны в текстовом редакторе
+
+БЕЗ ИНТЕРФЕЙСА (см. blender_headless.py / blender_batch.py):
+    blender -b model.blend --python blender_export_all_cameras.py -- \
+        --output poi_cameras_export.json --ts-output src/data/poiData.ts
 """
 
 import bpy
+import importlib
 import json
 import os
-import math
-from mathutils import Vector
-
-
-def calculate_distance(pos1, pos2):
-    """Рассчитать расстояние между двумя точками"""
-    dx = pos1.x - pos2.x
-    dy = pos1.y - pos2.y
-    dz = pos1.z - pos2.z
-    return math.sqrt(dx * dx + dy * dy + dz * dz)
+import sys
 
+import numpy as np
 
-def calculate_azimuth_deg(camera_pos, target_pos):
-    """Рассчитать азимут (угол в горизонтальной плоскости) в градусах"""
-    dx = target_pos.x - camera_pos.x
-    dz = target_pos.z - camera_pos.z
-    angle_rad = math.atan2(dz, dx)
-    angle_deg = math.degrees(angle_rad)
-    if angle_deg < 0:
-        angle_deg += 360
-    return angle_deg
 
-
-def calculate_elevation_deg(camera_pos, target_pos):
-    """Рассчитать возвышение (угол вертикали) в градусах"""
-    dx = target_pos.x - camera_pos.x
-    dy = target_pos.y - camera_pos.y
-    dz = target_pos.z - camera_pos.z
-    horizontal_dist = math.sqrt(dx * dx + dz * dz)
-    angle_rad = math.atan2(dy, horizontal_dist)
-    return math.degrees(angle_rad)
+# Копия blender_extract_zones.import_repo_module(): она выполняется до того, как папка скрипта попадает в sys.path
+def import_repo_module(name):
+    candidates = []
+    if "__file__" in globals():
+        candidates.append(os.path.dirname(os.path.abspath(__file__)))
+    # При запуске из Text Editor путь к скрипту хранится в текстовом блоке
+    candidates.extend(
+        os.path.dirname(bpy.path.abspath(text.filepath))
+        for text in bpy.data.texts
+        if text.filepath
+    )
+    for directory in candidates:
+        if os.path.exists(os.path.join(directory, name + ".py")):
+            if directory not in sys.path:
+                sys.path.insert(0, directory)
+            return importlib.import_module(name)
+    return None
+
+
+def find_camera_target(camera_obj):
+    """Таргет камеры из constraint (TrackTo, LockedTrack, FollowPath) или None"""
+    for constraint_name in ("TrackTo", "LockedTrack", "FollowPath"):
+        if constraint_name in camera_obj.constraints:
+            target_obj = camera_obj.constraints[constraint_name].target
+            if target_obj:
+                return target_obj
+    return None
 
 
-def export_all_cameras():
-    """Экспорт всех камер из сцены"""
+def export_all_cameras(output_file=None, ts_file=None):
+    """Экспорт всех камер из сцены (по умолчанию - рядом с .blend файлом)"""
 
-    pois = []
     output_lines = []
 
     output_lines.append("=" * 80)
@@ -92,98 +98,38 @@ def export_all_cameras():
         "#ffff44",
     ]
 
-    # Получить все таргеты (Empty объекты, Mesh объекты и т.д.)
-    all_objects = {obj.name: obj for obj in bpy.context.scene.objects}
-
-    for i, camera_obj in enumerate(cameras):
-        camera_name = camera_obj.name
-        camera_loc = camera_obj.matrix_world.translation
-
-        # Найти таргет камеры
-        target_loc = None
-        target_name = None
+    # Вся математика считается сразу для всех камер (camera_math.py, NumPy)
+    camera_math = import_repo_module("camera_math")
+    if camera_math is None:
+        raise RuntimeError("camera_math.py не найден рядом со скриптом")
 
-        # 1. Проверить TrackTo constraint
-        if "TrackTo" in camera_obj.constraints:
-            target_obj = camera_obj.constraints["TrackTo"].target
-            if target_obj:
-                target_loc = target_obj.matrix_world.translation
-                target_name = target_obj.name
+    # Матрицы всех камер одним массивом (n, 4, 4)
+    matrices = np.array([camera_obj.matrix_world for camera_obj in cameras], dtype=np.float64)
+    camera_positions = matrices[:, :3, 3]
 
-        # 2. Проверить Locked Track constraint
-        if target_loc is None and "LockedTrack" in camera_obj.constraints:
-            target_obj = camera_obj.constraints["LockedTrack"].target
-            if target_obj:
-                target_loc = target_obj.matrix_world.translation
-                target_name = target_obj.name
+    # По умолчанию таргет - 10 м по направлению взгляда камеры (-Z)
+    target_positions = camera_math.forward_targets(matrices)
+    target_names = ["Вычислено из направления камеры"] * len(cameras)
 
-        # 3. Проверить Follow Path constraint
-        if target_loc is None and "FollowPath" in camera_obj.constraints:
-            target_obj = camera_obj.constraints["FollowPath"].target
-            if target_obj:
-                target_loc = target_obj.matrix_world.translation
-                target_name = target_obj.name
-
-        # 4. Если нет constraint, вычислить таргет из направления камеры
-        if target_loc is None:
-            # Получить матрицу камеры и вычислить направление взгляда
-            forward = camera_obj.matrix_world @ Vector((0, 0, -1))
-            target_loc = camera_loc + (forward - camera_loc).normalized() * 10.0
-            target_name = "Вычислено из направления камеры"
-
-        # Вычислить параметры
-        distance = calculate_distance(camera_loc, target_loc)
-        azimuth_deg = calculate_azimuth_deg(camera_loc, target_loc)
-        elevation_deg = calculate_elevation_deg(camera_loc, target_loc)
-
-        # Определить имя зоны (попробовать извлечь из названия камеры)
-        zone_name = camera_name
-        if "POI_Camera_ZONE_" in camera_name:
-            zone_name = camera_name.replace("POI_Camera_ZONE_", "")
-        elif "CAMERA_" in camera_name:
-            zone_name = camera_name.replace("CAMERA_", "")
-
-        poi_id = f"poi-{i + 1}"
-        color = colors[i % len(colors)]
-
-        # Создать POI данные
-        poi_data = {
-            "id": poi_id,
-            "name": zone_name,
-            "color": color,
-            "camera_position": [
-                round(camera_loc.x, 4),
-                round(camera_loc.y, 4),
-                round(camera_loc.z, 4),
-            ],
-            "target_position": [
-                round(target_loc.x, 4),
-                round(target_loc.y, 4),
-                round(target_loc.z, 4),
-            ],
-            "description": f"POI: {zone_name}",
-            "distance": round(distance, 4),
-            "azimuth_deg": round(azimuth_deg, 2),
-            "elevation_deg": round(elevation_deg, 2),
-            "blender_camera_name": camera_name,
-            "blender_target_name": target_name,
-        }
-
-        pois.append(poi_data)
-
-        output_lines.append(f"✅ Камера #{i + 1}: {camera_name}")
-        output_lines.append(f"   Зона: {zone_name}")
-        output_lines.append(f"   Таргет: {target_name}")
-        output_lines.append(
-            f"   Позиция камеры: ({camera_loc.x:.2f}, {camera_loc.y:.2f}, {camera_loc.z:.2f})"
-        )
-        output_lines.append(
-            f"   Таргет: ({target_loc.x:.2f}, {target_loc.y:.2f}, {target_loc.z:.2f})"
-        )
-        output_lines.append(f"   Дистанция: {distance:.2f} м")
-        output_lines.append(f"   Азимут: {azimuth_deg:.2f}°")
-        output_lines.append(f"   Возвышение: {elevation_deg:.2f}°")
-        output_lines.append("")
+    # Таргеты из constraints перекрывают вычисленные
+    for i, camera_obj in enumerate(cameras):
+        target_obj = find_camera_target(camera_obj)
+        if target_obj:
+            target_positions[i] = target_obj.matrix_world.translation
+            target_names[i] = target_obj.name
+
+    camera_names = [camera_obj.name for camera_obj in cameras]
+    zone_names = [camera_math.poi_name_from_camera(name) for name in camera_names]
+
+    pois = camera_math.poi_records(
+        zone_names,
+        camera_positions,
+        target_positions,
+        colors,
+        camera_names=camera_names,
+        target_names=target_names,
+    )
+    output_lines.extend(camera_math.report_lines(pois, camera_positions, target_positions))
 
     # Сортировать по имени зоны
     pois.sort(key=lambda x: x["name"])
@@ -201,7 +147,10 @@ def export_all_cameras():
     else:
         output_dir = os.path.expanduser("~")
 
-    output_file = os.path.join(output_dir, "poi_cameras_export.json")
+    if output_file is None:
+        output_file = os.path.join(output_dir, "poi_cameras_export.json")
+    if ts_file is None:
+        ts_file = os.path.join(output_dir, "poiData.ts")
 
     # Сохранить JSON
     with open(output_file, "w", encoding="utf-8") as f:
@@ -212,44 +161,27 @@ def export_all_cameras():
     output_lines.append(f"📁 JSON файл: {output_file}")
     output_lines.append("=" * 80)
     output_lines.append("")
-    output_lines.append("=" * 80)
-    output_lines.append("JAVASCRIPT КОД ДЛЯ poiData.ts")
-    output_lines.append("=" * 80)
-    output_lines.append("")
-    output_lines.append("import type { POICamera } from '../types'")
-    output_lines.append("")
-    output_lines.append("export const pois: POICamera[] = [")
-
-    for i, poi in enumerate(pois):
-        output_lines.append(f"  {{")
-        output_lines.append(f"    id: '{poi['id']}',")
-        output_lines.append(f"    name: '{poi['name']}',")
-        output_lines.append(f"    color: '{poi['color']}',")
-        output_lines.append(
-            f"    cameraPosition: [{poi['camera_position'][0]}, {poi['camera_position'][1]}, {poi['camera_position'][2]}],"
-        )
-        output_lines.append(
-            f"    targetPosition: [{poi['target_position'][0]}, {poi['target_position'][1]}, {poi['target_position'][2]}],"
-        )
-        output_lines.append(f"    description: 'POI: {poi['name']}',")
-        output_lines.append(f"    distance: {poi['distance']},")
-        output_lines.append(f"    azimuthDeg: {poi['azimuth_deg']},")
-        output_lines.append(f"    elevationDeg: {poi['elevation_deg']}")
-        output_lines.append(f"  }}{',' if i < len(pois) - 1 else ''}")
+    # Сгенерировать poiData.ts (экранирование строк, стабильный порядок,
+    # файл перезаписывается только при изменении содержимого)
+    ts_codegen = import_repo_module("ts_codegen")
+
+    if ts_codegen is None:
+        output_lines.append("⚠️  ts_codegen.py не найден рядом со скриптом - poiData.ts не создан")
+    elif ts_codegen.write_module(ts_file, ts_codegen.pois_module(pois)):
+        output_lines.append(f"📝 TypeScript модуль: {ts_file}")
+    else:
+        output_lines.append(f"📝 {ts_file} не изменился")
 
-    output_lines.append("]")
-    output_lines.append("")
     output_lines.append("=" * 80)
     output_lines.append("")
     output_lines.append("ИНСТРУКЦИЯ:")
     output_lines.append(
-        "1. Скопируйте весь код выше (от 'import type { POICamera }' до концa)"
+        "1. Скопируйте poiData.ts в forum-nav-app/src/data/poiData.ts"
     )
     output_lines.append(
-        "2. Замените содержимое файла forum-nav-app/src/data/poiData.ts"
+        "   (или запустите asset_pipeline.py --ts-dir src/data для GLB модели)"
     )
-    output_lines.append("3. Сохраните файл")
-    output_lines.append("4. Обновите страницу в браузере")
+    output_lines.append("2. Обновите страницу в браузере")
     output_lines.append("")
 
     return output_lines, output_file
@@ -257,54 +189,24 @@ def export_all_cameras():
 
 # Запуск скрипта
 if __name__ == "__main__":
-    try:
-        output_lines, output_file = export_all_cameras()
-
-        # Создать текстовый блок для отображения результатов
-        text_name = "POI_CAMERAS_EXPORT"
-
-        # Удалить старый текст если есть
-        if text_name in bpy.data.texts:
-            bpy.data.texts.remove(bpy.data.texts[text_name])
+    headless = import_repo_module("blender_headless")
+    if headless is None:
+        raise RuntimeError("blender_headless.py должен лежать рядом со скриптом")
 
-        # Создать новый текст
-        text_block = bpy.data.texts.new(text_name)
-        text_block.write("\n".join(output_lines))
-
-        # Показать в текстовом редакторе
-        for area in bpy.context.screen.areas:
-            if area.type == "TEXT_EDITOR":
-                area.spaces[0].text = text_block
-                break
-
-        # Вывести в консоль
-        print("\n" + "\n".join(output_lines))
-
-        # Показать всплывающее сообщение
-        def show_message(message="", title="Готово", icon="INFO"):
-            def draw(self, context):
-                for line in message.split("\n"):
-                    if line.strip():
-                        self.layout.label(text=line)
-
-            bpy.context.window_manager.popup_menu(draw, title=title, icon=icon)
+    try:
+        paths = headless.output_paths(
+            {"output": "poi_cameras_export.json", "ts_output": "poiData.ts"}
+        )
+        output_lines, output_file = export_all_cameras(paths["output"], paths["ts_output"])
 
-        show_message(
+        headless.show_results(
+            "POI_CAMERAS_EXPORT",
+            output_lines,
             f"Экспорт камер завершен!\n{len(bpy.context.scene.objects)} камер экспортировано\nJSON сохранен:\n{output_file}",
             title="Экспорт камер",
-            icon="CHECKMARK",
         )
 
     except Exception as e:
-        error_msg = f"ОШИБКА: {str(e)}\n\n"
         import traceback
 
-        error_msg += traceback.format_exc()
-
-        print(error_msg)
-
-        # Создать текст ошибки
-        if "POI_ERROR" in bpy.data.texts:
-            bpy.data.texts.remove(bpy.data.texts["POI_ERROR"])
-        error_text = bpy.data.texts.new("POI_ERROR")
-        error_text.write(error_msg)
+        headless.report_error("POI_ERROR", f"ОШИБКА: {str(e)}\n\n{traceback.format_exc()}")
@@ -9,14 +9,44 @@ HOW TO USE:
 4. Click "Open" and select this file
 5. Click "Run Script" button
 6. POI data will be exported to JSON
+
+HEADLESS (no UI, see blender_headless.py / blender_batch.py):
+    blender -b model.blend --python blender_export_poi_cameras.py -- --output poi_camera_export.json
 """
 
 import bpy
+import importlib
 import json
 import os
-
-
-def export_poi_cameras():
+import sys
+from mathutils import Vector
+
+# blender_create_poi_cameras.py places cameras ~5 m from their zone
+CAMERA_ZONE_DISTANCE = 5.0
+# Zones further than this from a camera's look-at point are not matched
+ZONE_MATCH_RADIUS = 10.0
+
+
+# Inline copy of blender_extract_zones.import_repo_module(): it runs before this folder is on sys.path
+def import_repo_module(name):
+    candidates = []
+    if "__file__" in globals():
+        candidates.append(os.path.dirname(os.path.abspath(__file__)))
+    # When run from the Text Editor the script path is stored on the text block
+    candidates.extend(
+        os.path.dirname(bpy.path.abspath(text.filepath))
+        for text in bpy.data.texts
+        if text.filepath
+    )
+    for directory in candidates:
+        if os.path.exists(os.path.join(directory, name + ".py")):
+            if directory not in sys.path:
+                sys.path.insert(0, directory)
+            return importlib.import_module(name)
+    return None
+
+
+def export_poi_cameras(output_file=None):
     """Export all POI cameras and their targets"""
 
     pois = []
@@ -46,7 +76,7 @@ def export_poi_cameras():
         output_lines.append(
             "   Run blender_create_poi_cameras.py first to create cameras"
         )
-        return output_lines
+        return output_lines, None
 
     if not zone_empties:
         output_lines.append("⚠️  No ZONE_* Empty objects found!")
@@ -55,6 +85,17 @@ def export_poi_cameras():
     # Sort cameras by name
     cameras.sort(key=lambda x: x.name)
 
+    # Spatial index over zone empties for matching cameras by proximity
+    zone_list = sorted(zone_empties.values(), key=lambda x: x.name)
+    zone_index = None
+    spatial_index = import_repo_module("spatial_index")
+    if spatial_index is None:
+        output_lines.append("⚠️  spatial_index.py not found next to this script - no proximity matching")
+    elif zone_list:
+        zone_index = spatial_index.SpatialIndex(
+            [tuple(obj.matrix_world.translation) for obj in zone_list]
+        )
+
     for i, camera_obj in enumerate(cameras):
         camera_name = camera_obj.name
         poi_id = f"poi-{i + 1}"
@@ -70,7 +111,7 @@ def export_poi_cameras():
         # Get camera data properties
         camera_data = camera_obj.data
 
-        # Find target (from TrackTo constraint or by name matching)
+        # Find target (TrackTo constraint, zone with the same name, nearest zone)
         target_loc = None
         target_name = None
 
@@ -81,15 +122,19 @@ def export_poi_cameras():
                 target_loc = target_obj.matrix_world.translation
                 target_name = target_obj.name
 
-        # Fallback: try to find matching zone by name
-        if target_loc is None and zone_name_part:
-            zone_candidates = [
-                name
-                for name in zone_empties.keys()
-                if zone_name_part in name.replace("_", " ")
-            ]
-            if zone_candidates:
-                target_obj = zone_empties[zone_candidates[0]]
+        # Fallback: zone with the same name (CAMERA_Hall -> ZONE_Hall)
+        if target_loc is None:
+            target_obj = zone_empties.get("ZONE_" + camera_name[len("CAMERA_"):])
+            if target_obj:
+                target_loc = target_obj.matrix_world.translation
+                target_name = target_obj.name
+
+        # Fallback: zone nearest to the point the camera looks at
+        if target_loc is None and zone_index is not None:
+            look_at = camera_obj.matrix_world @ Vector((0, 0, -CAMERA_ZONE_DISTANCE))
+            found, _ = zone_index.nearest(tuple(look_at), max_distance=ZONE_MATCH_RADIUS)
+            if len(found):
+                target_obj = zone_list[found[0]]
                 target_loc = target_obj.matrix_world.translation
                 target_name = target_obj.name
 
@@ -162,13 +207,13 @@ def export_poi_cameras():
         "note": "POI camera data exported for Three.js application",
     }
 
-    # Get output directory
-    if bpy.data.filepath:
-        output_dir = os.path.dirname(bpy.data.filepath)
-    else:
-        output_dir = os.path.expanduser("~")
-
-    output_file = os.path.join(output_dir, "poi_camera_export.json")
+    # Default: next to the blend file (or home directory if not saved)
+    if output_file is None:
+        if bpy.data.filepath:
+            output_dir = os.path.dirname(bpy.data.filepath)
+        else:
+            output_dir = os.path.expanduser("~")
+        output_file = os.path.join(output_dir, "poi_camera_export.json")
 
     # Write to JSON file
     with open(output_file, "w", encoding="utf-8") as f:
@@ -239,55 +284,22 @@ def export_poi_cameras():
 
 # Run the script
 if __name__ == "__main__":
-    try:
-        output_lines, output_file = export_poi_cameras()
-
-        # Create new text datablock to show results
-        text_name = "POI_EXPORT_RESULTS"
-
-        # Remove old text if exists
-        if text_name in bpy.data.texts:
-            bpy.data.texts.remove(bpy.data.texts[text_name])
-
-        # Create new text
-        text_block = bpy.data.texts.new(text_name)
-        text_block.write("\n".join(output_lines))
-
-        # Try to show in text editor
-        for area in bpy.context.screen.areas:
-            if area.type == "TEXT_EDITOR":
-                area.spaces[0].text = text_block
-                break
+    headless = import_repo_module("blender_headless")
+    if headless is None:
+        raise RuntimeError("blender_headless.py must be next to this script")
 
-        # Also print to console
-        print("\n".join(output_lines))
-
-        # Show popup message
-        def show_message(message="", title="Script Finished", icon="INFO"):
-            def draw(self, context):
-                lines = message.split("\n")
-                for line in lines:
-                    if line.strip():
-                        self.layout.label(text=line)
-
-            bpy.context.window_manager.popup_menu(draw, title=title, icon=icon)
+    try:
+        paths = headless.output_paths({"output": "poi_camera_export.json"})
+        output_lines, output_file = export_poi_cameras(paths["output"])
 
-        show_message(
+        headless.show_results(
+            "POI_EXPORT_RESULTS",
+            output_lines,
             f"POI Export Complete!\n{len(bpy.context.scene.objects)} cameras exported\nJSON saved to:\n{output_file}",
             title="POI Export Complete",
-            icon="CHECKMARK",
         )
 
     except Exception as e:
-        error_msg = f"ERROR: {str(e)}\n\n"
         import traceback
 
-        error_msg += traceback.format_exc()
-
-        # Create error text
-        if "POI_ERROR_LOG" in bpy.data.texts:
-            bpy.data.texts.remove(bpy.data.texts["POI_ERROR_LOG"])
-        error_text = bpy.data.texts.new("POI_ERROR_LOG")
-        error_text.write(error_msg)
-
-        print(error_msg)
+        headless.report_error("POI_ERROR_LOG", f"ERROR: {str(e)}\n\n{traceback.format_exc()}")
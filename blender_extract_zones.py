@@ -8,14 +8,40 @@ HOW TO USE:
 3. Click "Open" and select this file
 4. Click "Run Script" button
 5. Check the new text file in Text Editor with results
+
+HEADLESS (no UI, see blender_headless.py / blender_batch.py):
+    blender -b model.blend --python blender_extract_zones.py -- --output zone_coordinates.json
 """
 
 import bpy
+import importlib
 import json
 import os
 import sys
 
-def extract_zone_coordinates():
+def import_repo_module(name):
+    """
+    Import a pipeline module from the folder this script lives in. Each
+    Blender script keeps its own copy: this is what puts that folder on
+    sys.path, so it can't come from a shared module.
+    """
+    candidates = []
+    if "__file__" in globals():
+        candidates.append(os.path.dirname(os.path.abspath(__file__)))
+    # When run from the Text Editor the script path is stored on the text block
+    candidates.extend(
+        os.path.dirname(bpy.path.abspath(text.filepath))
+        for text in bpy.data.texts
+        if text.filepath
+    )
+    for directory in candidates:
+        if os.path.exists(os.path.join(directory, name + ".py")):
+            if directory not in sys.path:
+                sys.path.insert(0, directory)
+            return importlib.import_module(name)
+    return None
+
+def extract_zone_coordinates(output_file=None):
     """Extract coordinates from all Empty objects in the scene"""
     
     zones = []
@@ -69,13 +95,13 @@ def extract_zone_coordinates():
         'note': 'Coordinates are in Blender world space'
     }
     
-    # Get the directory of the blend file (or home directory if not saved)
-    if bpy.data.filepath:
-        output_dir = os.path.dirname(bpy.data.filepath)
-    else:
-        output_dir = os.path.expanduser('~')
-    
-    output_file = os.path.join(output_dir, 'zone_coordinates.json')
+    # Default: next to the blend file (or home directory if not saved)
+    if output_file is None:
+        if bpy.data.filepath:
+            output_dir = os.path.dirname(bpy.data.filepath)
+        else:
+            output_dir = os.path.expanduser('~')
+        output_file = os.path.join(output_dir, 'zone_coordinates.json')
     
     # Write to JSON file
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -127,49 +153,22 @@ def extract_zone_coordinates():
 
 # Run the extraction
 if __name__ == "__main__":
+    headless = import_repo_module("blender_headless")
+    if headless is None:
+        raise RuntimeError("blender_headless.py must be next to this script")
+    
     try:
-        output_lines, output_file = extract_zone_coordinates()
+        paths = headless.output_paths({'output': 'zone_coordinates.json'})
+        output_lines, output_file = extract_zone_coordinates(paths['output'])
         
-        # Create new text datablock to show results
         text_name = "ZONE_EXTRACTION_RESULTS"
-        
-        # Remove old text if exists
-        if text_name in bpy.data.texts:
-            bpy.data.texts.remove(bpy.data.texts[text_name])
-        
-        # Create new text
-        text_block = bpy.data.texts.new(text_name)
-        text_block.write('\n'.join(output_lines))
-        
-        # Try to show in text editor
-        for area in bpy.context.screen.areas:
-            if area.type == 'TEXT_EDITOR':
-                area.spaces[0].text = text_block
-                break
-        
-        # Also print to console (if visible)
-        print('\n'.join(output_lines))
-        
-        # Show popup message
-        def show_message(message = "", title = "Script Finished", icon = 'INFO'):
-            def draw(self, context):
-                lines = message.split('\n')
-                for line in lines:
-                    self.layout.label(text=line)
-            bpy.context.window_manager.popup_menu(draw, title = title, icon = icon)
-        
-        show_message(f"SUCCESS!\nFound {len(bpy.context.scene.objects)} objects\nResults in Text Editor: {text_name}\nJSON saved to:\n{output_file}", 
-                    title="Zone Extraction Complete", icon='CHECKMARK')
+        headless.show_results(
+            text_name,
+            output_lines,
+            f"SUCCESS!\nFound {len(bpy.context.scene.objects)} objects\nResults in Text Editor: {text_name}\nJSON saved to:\n{output_file}",
+            title="Zone Extraction Complete",
+        )
         
     except Exception as e:
-        error_msg = f"ERROR: {str(e)}"
-        
-        # Create error text
-        if "ERROR_LOG" in bpy.data.texts:
-            bpy.data.texts.remove(bpy.data.texts["ERROR_LOG"])
-        error_text = bpy.data.texts.new("ERROR_LOG")
-        error_text.write(error_msg)
-        
-        print(error_msg)
         import traceback
-        traceback.print_exc()
+        headless.report_error("ERROR_LOG", f"ERROR: {str(e)}\n\n{traceback.format_exc()}")
@@ -0,0 +1,113 @@
+"""
+Background-mode support for the Blender export scripts
+Lets blender_extract_zones.py, blender_export_poi_cameras.py and
+blender_export_all_cameras.py run both interactively (Text Editor, popup)
+and headless (blender -b), where every UI call is skipped and output paths
+come from the command line after "--".
+
+USAGE (inside Blender):
+    blender -b venue.blend --python blender_extract_zones.py -- --output-dir out/venue
+    blender -b venue.blend --python blender_export_all_cameras.py -- --output pois.json
+
+Options after "--" (unknown options are ignored, so several scripts can
+share one command line):
+    --output-dir DIR   write every output into DIR
+    --output PATH      JSON output of the script
+    --ts-output PATH   TypeScript output (scripts that generate one)
+
+blender_batch.py runs these over many .blend files in parallel.
+"""
+
+import argparse
+import os
+import sys
+
+import bpy
+
+
+def script_argv(argv=None):
+    """Arguments after "--" (Blender's own arguments come before it)"""
+
+    argv = sys.argv if argv is None else argv
+    if "--" in argv:
+        return argv[argv.index("--") + 1:]
+    return []
+
+
+def is_background():
+    """True when Blender runs without a UI (blender -b)"""
+    return bool(bpy.app.background)
+
+
+def default_output_dir():
+    """Folder of the .blend file, or the home folder for unsaved files"""
+
+    if bpy.data.filepath:
+        return os.path.dirname(bpy.data.filepath)
+    return os.path.expanduser("~")
+
+
+def output_paths(outputs, argv=None):
+    """
+    Resolve output paths for a script. `outputs` maps option names to
+    default file names, e.g. {"output": "zone_coordinates.json"}.
+    """
+
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--output-dir", default=None)
+    for name in outputs:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=None)
+    args, _ = parser.parse_known_args(script_argv(argv))
+
+    output_dir = args.output_dir or default_output_dir()
+    if args.output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    return {
+        name: getattr(args, name) or os.path.join(output_dir, filename)
+        for name, filename in outputs.items()
+    }
+
+
+def show_results(text_name, output_lines, message, title):
+    """Print results; interactively also show them in the Text Editor and a popup"""
+
+    print("\n".join(output_lines))
+    if is_background():
+        return
+
+    # Remove old text if exists
+    if text_name in bpy.data.texts:
+        bpy.data.texts.remove(bpy.data.texts[text_name])
+
+    text_block = bpy.data.texts.new(text_name)
+    text_block.write("\n".join(output_lines))
+
+    # Try to show in text editor
+    for area in bpy.context.screen.areas:
+        if area.type == "TEXT_EDITOR":
+            area.spaces[0].text = text_block
+            break
+
+    def draw(self, context):
+        for line in message.split("\n"):
+            if line.strip():
+                self.layout.label(text=line)
+
+    bpy.context.window_manager.popup_menu(draw, title=title, icon="CHECKMARK")
+
+
+def report_error(text_name, error_msg):
+    """
+    Print an error; interactively also store it in a text datablock.
+    In background mode Blender exits with status 1 so batch drivers see it.
+    """
+
+    print(error_msg)
+    if is_background():
+        sys.exit(1)
+
+    if text_name in bpy.data.texts:
+        bpy.data.texts.remove(bpy.data.texts[text_name])
+    error_text = bpy.data.texts.new(text_name)
+    error_text.write(error_msg)
@@ -0,0 +1,424 @@
+"""
+Events importer
+Reads a forum's session export (CSV or XLSX, e.g. events_example.csv) row
+by row, checks every row - dates, times and zoneId against the zones
+extracted from the venue - and writes the schedule the client loads
+(src/hooks/useSchedule.ts), instead of events typed into TypeScript by hand.
+
+Columns are matched by the header row, in any order; unknown ones are
+ignored:
+    id, title, date, startTime, endTime, zoneId   - required
+    description, speaker, capacity, tags          - optional
+`speaker` and `tags` hold several values separated by ";". Dates are
+YYYY-MM-DD or DD.MM.YYYY and times HH:MM[:SS] (24:00 ends a day); date and
+time cells of an XLSX sheet (serial numbers) are read as well. Rows that
+fail the checks are reported by line and skipped, or fail the import with
+--strict.
+
+The schedule (public/schedule.json by default) is compact and pre-sorted:
+
+    days, zones   - the dates and zone ids that have events
+    events        - one array per field, events sorted by day, start, end
+                    and zone; `zone` and `day` index the lists above,
+                    `start` and `end` are minutes after midnight
+    index         - per zone id and day, the interval index: `bounds` are
+                    the sorted start and end times and split the day into
+                    segments; events[active[offsets[i]:offsets[i + 1]]]
+                    run during [bounds[i], bounds[i + 1]). "What is on in
+                    zone X at time T" is one binary search over `bounds`.
+
+XLSX files are read with zipfile and an incremental XML parser, so neither
+format is loaded into memory at once.
+
+Requires: numpy (only to read zones from a model)
+
+USAGE:
+    python events_importer.py events_example.csv
+    python events_importer.py sessions.xlsx --zones public/SM_MFF.glb -o public/schedule.json --strict
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+
+from asset_cache import write_if_changed
+from extract_zones_from_glb import extract_zones
+from glb_reader import GLBFile
+
+SCHEDULE_VERSION = 1
+
+DEFAULT_OUTPUT = os.path.join('public', 'schedule.json')
+DEFAULT_ZONES = 'zone_coordinates.json'
+
+REQUIRED_COLUMNS = ('id', 'title', 'date', 'startTime', 'endTime', 'zoneId')
+LIST_SEPARATOR = ';'
+
+MINUTES_PER_DAY = 24 * 60
+
+# Day 0 of Excel's serial dates (with its 1900 leap-year bug folded in)
+EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+# Errors listed before the rest are only counted
+MAX_LISTED_ERRORS = 20
+
+_XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_TIME = re.compile(r'^(\d{1,2}):(\d{2})(?::(\d{2}))?$')
+
+
+class EventError(ValueError):
+    pass
+
+
+# ----------------------------------------------------------------------
+# Readers: (line number, list of cell strings) per row, header included
+# ----------------------------------------------------------------------
+
+def read_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _column_index(reference):
+    """Zero-based column of a cell reference like 'BC12'"""
+
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+def _text(element):
+    """Text of a shared or inline string: its <t>, or the <t> of every rich-text run"""
+
+    plain = element.find(f'{_XLSX_NS}t')
+    if plain is not None:
+        return plain.text or ''
+    return ''.join(run.findtext(f'{_XLSX_NS}t', default='') for run in element.findall(f'{_XLSX_NS}r'))
+
+
+def _first_sheet(archive):
+    """Path of the workbook's first worksheet inside the archive"""
+
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{_XLSX_NS}sheets/{_XLSX_NS}sheet')
+    if sheet is None:
+        raise EventError("workbook has no sheets")
+    relations = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for relation in relations.iter(f'{_PACKAGE_REL_NS}Relationship'):
+        if relation.get('Id') == sheet.get(f'{_REL_NS}id'):
+            target = relation.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    raise EventError("first sheet not found in the workbook relationships")
+
+
+def read_xlsx_rows(path):
+    with zipfile.ZipFile(path) as archive:
+        shared = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as f:
+                for _, element in ET.iterparse(f):
+                    if element.tag == f'{_XLSX_NS}si':
+                        shared.append(_text(element))
+                        element.clear()
+
+        with archive.open(_first_sheet(archive)) as f:
+            for _, element in ET.iterparse(f):
+                if element.tag != f'{_XLSX_NS}row':
+                    continue
+                row = []
+                for cell in element.iter(f'{_XLSX_NS}c'):
+                    reference = cell.get('r')
+                    column = _column_index(reference) if reference else len(row)
+                    row.extend([''] * (column - len(row)))
+                    kind, value = cell.get('t'), cell.findtext(f'{_XLSX_NS}v', default='')
+                    if kind == 's':
+                        value = shared[int(value)]
+                    elif kind == 'inlineStr':
+                        value = _text(cell.find(f'{_XLSX_NS}is'))
+                    row.append(value)
+                yield int(element.get('r', 0)), row
+                element.clear()
+
+
+def read_rows(path):
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        return read_xlsx_rows(path)
+    return read_csv_rows(path)
+
+
+# ----------------------------------------------------------------------
+# Validation
+# ----------------------------------------------------------------------
+
+def _serial(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_date(text):
+    text = text.strip()
+    for pattern in ('%Y-%m-%d', '%d.%m.%Y'):
+        try:
+            return datetime.datetime.strptime(text, pattern).date()
+        except ValueError:
+            pass
+    serial = _serial(text)
+    if serial is not None and serial >= 1:
+        return EXCEL_EPOCH + datetime.timedelta(days=int(serial))
+    raise EventError(f"invalid date {text!r}")
+
+
+def parse_time(text):
+    """Minutes after midnight of HH:MM[:SS] or an Excel time (day fraction)"""
+
+    text = text.strip()
+    match = _TIME.match(text)
+    if match:
+        hours, minutes, seconds = int(match[1]), int(match[2]), int(match[3] or 0)
+        total = hours * 60 + minutes + round(seconds / 60)
+        if minutes < 60 and seconds < 60 and total <= MINUTES_PER_DAY:
+            return total
+    serial = _serial(text)
+    if serial is not None and serial >= 0:
+        # Date-time cells carry the day in the integer part
+        fraction = serial - int(serial) if serial > 1 else serial
+        return round(fraction * MINUTES_PER_DAY)
+    raise EventError(f"invalid time {text!r}")
+
+
+def _list(text):
+    return [item.strip() for item in text.split(LIST_SEPARATOR) if item.strip()]
+
+
+def parse_event(record, zone_ids):
+    """Event dict of one row (column name -> cell text); raises EventError"""
+
+    for column in REQUIRED_COLUMNS:
+        if not record.get(column, '').strip():
+            raise EventError(f"{column} is empty")
+
+    zone_id = record['zoneId'].strip()
+    if zone_id not in zone_ids:
+        raise EventError(f"unknown zoneId {zone_id!r}")
+
+    start, end = parse_time(record['startTime']), parse_time(record['endTime'])
+    if start >= MINUTES_PER_DAY or end <= start:
+        raise EventError(f"endTime {record['endTime'].strip()} is not after startTime {record['startTime'].strip()}")
+
+    capacity = None
+    if record.get('capacity', '').strip():
+        capacity = _serial(record['capacity'])
+        if capacity is None or capacity < 0 or capacity != int(capacity):
+            raise EventError(f"invalid capacity {record['capacity']!r}")
+        capacity = int(capacity)
+
+    return {
+        'id': record['id'].strip(),
+        'title': record['title'].strip(),
+        'description': record.get('description', '').strip(),
+        'zone': zone_id,
+        'day': parse_date(record['date']).isoformat(),
+        'start': start,
+        'end': end,
+        'speakers': _list(record.get('speaker', '')),
+        'capacity': capacity,
+        'tags': _list(record.get('tags', '')),
+    }
+
+
+def load_zone_ids(path):
+    """Zone ids from a zone_coordinates.json or straight from a model"""
+
+    if os.path.splitext(path)[1].lower() in ('.glb', '.gltf'):
+        with GLBFile(path) as glb:
+            zone_ids = {zone['id'] for zone in extract_zones(glb.json)}
+    else:
+        with open(path, encoding='utf-8') as f:
+            zone_ids = {zone['id'] for zone in json.load(f)['zones']}
+    if not zone_ids:
+        raise EventError(f"no zones in {path}")
+    return zone_ids
+
+
+def import_events(path, zone_ids):
+    """
+    Read and check every row of an events export: (events, errors), errors
+    as (line, message). Rows with an error are left out.
+    """
+
+    rows = read_rows(path)
+    header = None
+    events, errors, seen = [], [], set()
+    for line, row in rows:
+        if header is None:
+            header = [cell.strip() for cell in row]
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise EventError(f"missing columns: {', '.join(missing)}")
+            continue
+        if not any(cell.strip() for cell in row):
+            continue
+
+        record = dict(zip(header, row))
+        try:
+            event = parse_event(record, zone_ids)
+            if event['id'] in seen:
+                raise EventError(f"duplicate id {event['id']!r}")
+        except EventError as e:
+            errors.append((line, str(e)))
+            continue
+        seen.add(event['id'])
+        events.append(event)
+
+    if header is None:
+        raise EventError("no header row")
+    return events, errors
+
+
+# ----------------------------------------------------------------------
+# Schedule
+# ----------------------------------------------------------------------
+
+def _natural_key(text):
+    """zone-2 sorts before zone-10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', str(text))]
+
+
+def interval_index(events, indices):
+    """
+    Interval index of some events (positions in `events`, sorted by start):
+    {bounds, offsets, active} as described in the module docstring
+    """
+
+    bounds = sorted({events[i]['start'] for i in indices} | {events[i]['end'] for i in indices})
+    starting = {}
+    for i in indices:
+        starting.setdefault(events[i]['start'], []).append(i)
+
+    offsets, active, running = [0], [], []
+    for segment_start in bounds[:-1]:
+        running = [i for i in running if events[i]['end'] > segment_start] + starting.get(segment_start, [])
+        running.sort()
+        active.extend(running)
+        offsets.append(len(active))
+    return {'bounds': bounds, 'offsets': offsets, 'active': active}
+
+
+def build_schedule(events):
+    """The schedule dict written to schedule.json"""
+
+    events = sorted(events, key=lambda e: (e['day'], e['start'], e['end'], _natural_key(e['zone']), e['id']))
+    days = sorted({event['day'] for event in events})
+    zones = sorted({event['zone'] for event in events}, key=_natural_key)
+    day_index = {day: i for i, day in enumerate(days)}
+    zone_index = {zone: i for i, zone in enumerate(zones)}
+
+    groups = {}
+    for i, event in enumerate(events):
+        groups.setdefault(event['zone'], {}).setdefault(event['day'], []).append(i)
+
+    return {
+        'version': SCHEDULE_VERSION,
+        'days': days,
+        'zones': zones,
+        'events': {
+            'id': [event['id'] for event in events],
+            'title': [event['title'] for event in events],
+            'description': [event['description'] for event in events],
+            'zone': [zone_index[event['zone']] for event in events],
+            'day': [day_index[event['day']] for event in events],
+            'start': [event['start'] for event in events],
+            'end': [event['end'] for event in events],
+            'speakers': [event['speakers'] for event in events],
+            'capacity': [event['capacity'] for event in events],
+            'tags': [event['tags'] for event in events],
+        },
+        'index': {zone: {day: interval_index(events, indices) for day, indices in groups[zone].items()}
+                  for zone in zones},
+    }
+
+
+def events_at(schedule, zone, day, minute):
+    """Positions of the events running in a zone at a time; the lookup the client does"""
+
+    index = schedule['index'].get(zone, {}).get(day)
+    if index is None:
+        return []
+    bounds = index['bounds']
+    lo, hi = 0, len(bounds)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if bounds[mid] <= minute:
+            lo = mid + 1
+        else:
+            hi = mid
+    segment = lo - 1
+    if segment < 0 or segment >= len(bounds) - 1:
+        return []
+    return index['active'][index['offsets'][segment]:index['offsets'][segment + 1]]
+
+
+def to_json(schedule):
+    return json.dumps(schedule, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import forum events from CSV/XLSX into the app's schedule")
+    parser.add_argument('events_file', nargs='?', default='events_example.csv')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help=f"schedule JSON (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--zones', default=DEFAULT_ZONES,
+                        help=f"zone_coordinates.json or the venue model to check zoneId against "
+                             f"(default: {DEFAULT_ZONES})")
+    parser.add_argument('--strict', action='store_true', help="fail on any invalid row instead of skipping it")
+    args = parser.parse_args(argv)
+
+    for path in (args.events_file, args.zones):
+        if not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            return 1
+
+    print(f"📂 Importing events from {args.events_file}...")
+    started = time.perf_counter()
+    try:
+        zone_ids = load_zone_ids(args.zones)
+        events, errors = import_events(args.events_file, zone_ids)
+    except (ValueError, KeyError, OSError, zipfile.BadZipFile, ET.ParseError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    for line, message in errors[:MAX_LISTED_ERRORS]:
+        print(f"⚠️ Line {line}: {message}")
+    if len(errors) > MAX_LISTED_ERRORS:
+        print(f"⚠️ ... and {len(errors) - MAX_LISTED_ERRORS} more invalid rows")
+    if errors and args.strict:
+        print(f"❌ {len(errors)} invalid rows")
+        return 1
+
+    schedule = build_schedule(events)
+    segments = sum(len(index['bounds']) - 1 for days in schedule['index'].values() for index in days.values())
+    print(f"✅ {len(events)} events in {len(schedule['zones'])} zones over {len(schedule['days'])} days, "
+          f"{segments} index segments{f', {len(errors)} rows skipped' if errors else ''} "
+          f"({time.perf_counter() - started:.2f}s)")
+
+    if write_if_changed(args.output, to_json(schedule)):
+        print(f"💾 Saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
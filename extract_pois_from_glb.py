@@ -0,0 +1,126 @@
+"""
+Extract POI cameras from GLB file without Blender
+Reads camera nodes exported with the model (e.g. POI_Camera_ZONE_* or
+CAMERA_* objects) and produces the same POI data as
+blender_export_all_cameras.py
+
+USAGE:
+    python extract_pois_from_glb.py [model.glb] [-o poi_cameras_export.json] [--ts-output src/data/poiData.ts]
+
+For many models at once use asset_pipeline.py.
+"""
+
+import argparse
+import json
+import sys
+
+from asset_cache import AssetCache, write_if_changed
+from camera_math import DEFAULT_TARGET_DISTANCE, forward_targets, poi_name_from_camera, poi_records
+from glb_reader import GLBError
+from glb_scene import load_scene
+from ts_codegen import pois_module, write_module
+
+# Same palette as blender_export_all_cameras.py
+POI_COLORS = [
+    "#9933cc",
+    "#33cccc",
+    "#cc6600",
+    "#00ccff",
+    "#4ecdc4",
+    "#0088ff",
+    "#45b7d1",
+    "#96ceb4",
+    "#ff6b35",
+    "#ffd700",
+    "#cc0066",
+    "#ff69b4",
+    "#9b59b6",
+    "#8e44ad",
+    "#e74c3c",
+    "#c0392b",
+    "#ff4444",
+    "#44ff44",
+    "#4444ff",
+    "#ffff44",
+]
+
+def extract_pois(scene, target_distance=DEFAULT_TARGET_DISTANCE):
+    """Build POI records for every camera node in the scene"""
+
+    camera_nodes = [i for i, node in enumerate(scene.nodes) if 'camera' in node]
+    if not camera_nodes:
+        return []
+
+    world = scene.world_matrices[camera_nodes]
+    camera_names = [scene.index.names[i] for i in camera_nodes]
+
+    pois = poi_records(
+        [poi_name_from_camera(name) for name in camera_names],
+        world[:, :3, 3],
+        forward_targets(world, target_distance),
+        POI_COLORS,
+        camera_names=camera_names,
+        target_names=["Вычислено из направления камеры"] * len(camera_nodes),
+    )
+
+    # Sort by zone name, as the Blender exporter does
+    pois.sort(key=lambda x: x["name"])
+    return pois
+
+
+def build_poi_output(pois):
+    """JSON document in the poi_cameras_export.json format"""
+
+    return {
+        "total_pois": len(pois),
+        "pois": pois,
+        "note": "Экспортировано из GLB для Three.js",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract POI cameras from a GLB file")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb',
+                        help="GLB model to read (default: SM_MFF.glb)")
+    parser.add_argument('-o', '--output', default='poi_cameras_export.json',
+                        help="where to write the POI JSON")
+    parser.add_argument('--ts-output', default=None,
+                        help="also write a poiData.ts module to this path")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-read the model even if it has not changed")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else AssetCache()
+    pois = None
+
+    try:
+        if cache:
+            cache_key = cache.key('pois', args.glb_file)
+            pois = cache.get(cache_key)
+            if pois is not None:
+                print(f"♻️ {args.glb_file} unchanged, using cached POIs")
+
+        if pois is None:
+            pois = extract_pois(load_scene(args.glb_file))
+            if cache:
+                cache.put(cache_key, pois)
+    except (OSError, GLBError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not pois:
+        print("⚠️ No camera nodes found in the model!")
+        return 1
+
+    if write_if_changed(args.output, json.dumps(build_poi_output(pois), indent=2, ensure_ascii=False)):
+        print(f"✅ Exported {len(pois)} POI cameras to {args.output}")
+    else:
+        print(f"✅ {args.output} is already up to date ({len(pois)} POI cameras)")
+
+    if args.ts_output and write_module(args.ts_output, pois_module(pois)):
+        print(f"📝 TypeScript module written: {args.ts_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
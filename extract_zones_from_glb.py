@@ -1,162 +1,194 @@
 """
 Extract ZONE_ empties from GLB file without Blender
-Reads SM_MFF.glb and extracts all objects starting with ZONE_
+Reads SM_MFF.glb (or the file given on the command line) and extracts all
+objects starting with ZONE_
+
+USAGE:
+    python extract_zones_from_glb.py [model.glb] [-o zone_coordinates.json] [--ts-output src/data/zones.ts] [-v]
+
+For many models at once use asset_pipeline.py.
 """
 
-import struct
+import argparse
 import json
 import os
+import sys
+
+from asset_cache import AssetCache, write_if_changed
+from glb_reader import GLBFile, GLBError
+from glb_scene import PrefixMatch, SceneGraph
+from ts_codegen import write_module, zones_module
 
 def read_glb_file(filename):
     """Read and parse GLB file structure"""
     
-    with open(filename, 'rb') as f:
-        # Read GLB header
-        magic = f.read(4)
-        if magic != b'glTF':
-            print("❌ Not a valid GLB file!")
-            return None
-        
-        version = struct.unpack('<I', f.read(4))[0]
-        length = struct.unpack('<I', f.read(4))[0]
-        
-        print(f"✅ GLB File Version: {version}")
-        print(f"📦 File Length: {length} bytes")
-        
-        # Read JSON chunk
-        json_chunk_length = struct.unpack('<I', f.read(4))[0]
-        json_chunk_type = f.read(4)
-        
-        if json_chunk_type != b'JSON':
-            print("❌ Invalid chunk type!")
-            return None
+    try:
+        glb = GLBFile(filename)
+    except GLBError as e:
+        print(f"❌ Not a valid GLB file: {e}")
+        return None
+    
+    with glb:
+        print(f"✅ GLB File Version: {glb.version}")
+        print(f"📦 File Length: {glb.length} bytes")
         
-        json_data = f.read(json_chunk_length).decode('utf-8')
-        gltf = json.loads(json_data)
+        if glb.bin is not None:
+            print(f"🧱 Binary Chunk: {len(glb.bin)} bytes")
         
-        return gltf
+        return glb.json
+
+ZONE_PREFIX = 'ZONE_'
+
+# Imported by the app (src/utils/venueZones.ts)
+DEFAULT_TS_OUTPUT = os.path.join('src', 'data', 'zones.ts')
 
-def extract_zones(gltf_data):
-    """Extract all nodes with names starting with ZONE_"""
+# Default selection: empties named ZONE_*. Pass e.g.
+# AnyMatch(PrefixMatch('ZONE_'), ExtrasMatch('zone')) to also pick up
+# nodes tagged {"zone": ...} in glTF extras, or RegexMatch(...) for custom names.
+ZONE_PREDICATE = PrefixMatch(ZONE_PREFIX)
+
+def _clean(values, digits=6):
+    """Round a vector for JSON output (and drop negative zeros)"""
+    return [round(float(v), digits) + 0.0 for v in values]
+
+def iter_zones(gltf_data, predicate=ZONE_PREDICATE, scene=None, verbose=False):
+    """
+    Lazily yield zone records for nodes accepted by `predicate`.
+    
+    Positions, rotations and scales are world-space: transforms of parent
+    nodes (collections, transformed roots) are composed in.
+    """
+    
+    nodes = gltf_data.get('nodes')
+    if not nodes:
+        if verbose:
+            print("❌ No nodes found in GLB file")
+        return
     
-    zones = []
+    if scene is None:
+        scene = SceneGraph(gltf_data)
+    index = scene.index
     
-    if 'nodes' not in gltf_data:
-        print("❌ No nodes found in GLB file")
-        return zones
+    if verbose:
+        print(f"\n📍 Found {len(nodes)} total nodes in scene")
+        print(f"🔍 Looking for {ZONE_PREFIX} objects...\n")
     
-    print(f"\n📍 Found {len(gltf_data['nodes'])} total nodes in scene")
-    print("🔍 Looking for ZONE_ objects...\n")
+    selected = index.select(predicate)
+    if selected:
+        translations, rotations, scales = scene.world_trs
     
-    for i, node in enumerate(gltf_data['nodes']):
-        name = node.get('name', f'Node_{i}')
+    for count, i in enumerate(selected, start=1):
+        name = index.names[i]
+        
+        # World-space translation (position), rotation and scale
+        translation = _clean(translations[i])
+        rotation = _clean(rotations[i])
+        scale = _clean(scales[i])
+        
+        zone_data = {
+            'id': f"zone-{count}",
+            'original_name': name,
+            'display_name': name.replace(ZONE_PREFIX, '').replace('_', ' '),
+            'position': {
+                'x': round(translation[0], 3),
+                'y': round(translation[1], 3),
+                'z': round(translation[2], 3)
+            },
+            'blender_coords': translation,
+            'rotation': rotation,
+            'scale': scale
+        }
         
-        # Check if name starts with ZONE_
-        if name.startswith('ZONE_'):
-            # Get translation (position)
-            translation = node.get('translation', [0, 0, 0])
-            rotation = node.get('rotation', [0, 0, 0, 1])
-            scale = node.get('scale', [1, 1, 1])
-            
-            zone_data = {
-                'id': f"zone-{len(zones)+1}",
-                'original_name': name,
-                'display_name': name.replace('ZONE_', '').replace('_', ' '),
-                'position': {
-                    'x': round(translation[0], 3),
-                    'y': round(translation[1], 3),
-                    'z': round(translation[2], 3)
-                },
-                'blender_coords': translation,
-                'rotation': rotation,
-                'scale': scale
-            }
-            
-            zones.append(zone_data)
+        if verbose:
             print(f"✅ Found: {name}")
             print(f"   Position: X={translation[0]:.3f}, Y={translation[1]:.3f}, Z={translation[2]:.3f}")
-    
-    return zones
+        
+        yield zone_data
 
-def generate_typescript_code(zones):
-    """Generate TypeScript code for mockData.ts"""
-    
-    print("\n" + "="*70)
-    print("📋 TypeScript код для src/data/mockData.ts:")
-    print("="*70 + "\n")
+def extract_zones(gltf_data, predicate=ZONE_PREDICATE, scene=None, verbose=False):
+    """Extract all zone nodes (names starting with ZONE_ by default)"""
     
-    print("export const zones: Zone[] = [")
-    
-    # Default colors for different zone types
-    colors = ['#0066cc', '#00cc66', '#cc6600', '#cc0066', '#ffaa00', '#9933cc', '#33cccc', 
-              '#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#ffeaa7']
+    return list(iter_zones(gltf_data, predicate=predicate, scene=scene, verbose=verbose))
+
+def build_zone_output(glb_file, zones):
+    """JSON document written to zone_coordinates.json"""
     
-    for i, zone in enumerate(zones):
-        color = colors[i % len(colors)]
-        
-        # Convert Blender coords to app coords
-        # Blender: X=right, Y=forward, Z=up
-        # App: X=right, Y=up, Z=forward
-        x = zone['blender_coords'][0]
-        y = zone['blender_coords'][2]  # Blender Z -> App Y
-        z = zone['blender_coords'][1]  # Blender Y -> App Z
-        
-        print(f"  {{")
-        print(f"    id: '{zone['id']}',")
-        print(f"    name: '{zone['display_name']}',")
-        print(f"    color: '{color}',")
-        print(f"    position: [{x}, {y}, {z}],")
-        print(f"    description: 'Описание зоны {zone['display_name']}',")
-        print(f"    type: 'conference'  // Измените тип: conference | exhibition | food | registration | lounge | other")
-        print(f"  }}{(',' if i < len(zones)-1 else '')}")
-    
-    print("];")
-    print("\n" + "="*70 + "\n")
+    return {
+        'model_file': os.path.basename(glb_file),
+        'total_zones': len(zones),
+        'zones': zones,
+        'note': 'Coordinates are world-space (parent transforms applied) and converted from Blender to app coordinate system'
+    }
 
-def main():
-    glb_file = 'SM_MFF.glb'
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract ZONE_ empties from a GLB file")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb',
+                        help="GLB model to read (default: SM_MFF.glb)")
+    parser.add_argument('-o', '--output', default='zone_coordinates.json',
+                        help="where to write the zone JSON (default: zone_coordinates.json)")
+    parser.add_argument('--ts-output', default=DEFAULT_TS_OUTPUT,
+                        help=f"where to write the generated zones TypeScript module (default: {DEFAULT_TS_OUTPUT})")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="print every zone as it is found")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-read the model even if it has not changed")
+    args = parser.parse_args(argv)
+    
+    glb_file = args.glb_file
     
     if not os.path.exists(glb_file):
         print(f"❌ File {glb_file} not found!")
         print("📁 Current directory:", os.getcwd())
-        return
-    
-    print(f"📂 Reading {glb_file}...\n")
+        return 1
     
-    # Read GLB file
-    gltf_data = read_glb_file(glb_file)
+    cache = None if args.no_cache else AssetCache()
+    zones = None
     
-    if not gltf_data:
-        return
+    if cache:
+        cache_key = cache.key('zones', glb_file)
+        zones = cache.get(cache_key)
+        if zones is not None:
+            print(f"♻️ {glb_file} unchanged, using cached zones")
     
-    # Extract zones
-    zones = extract_zones(gltf_data)
+    if zones is None:
+        print(f"📂 Reading {glb_file}...\n")
+        
+        # Read GLB file
+        gltf_data = read_glb_file(glb_file)
+        
+        if not gltf_data:
+            return 1
+        
+        # Extract zones
+        zones = extract_zones(gltf_data, verbose=args.verbose)
+        
+        if cache:
+            cache.put(cache_key, zones)
     
     if not zones:
         print("\n⚠️ No ZONE_ objects found in the model!")
         print("Make sure your empty objects are named like: ZONE_MainHall, ZONE_HallA, etc.")
-        return
+        return 1
     
     print(f"\n🎉 SUCCESS! Found {len(zones)} zones!")
     
     # Save to JSON
-    output_data = {
-        'model_file': glb_file,
-        'total_zones': len(zones),
-        'zones': zones,
-        'note': 'Coordinates are converted from Blender to app coordinate system'
-    }
-    
-    output_file = 'zone_coordinates.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"💾 Saved to: {output_file}")
-    
-    # Generate TypeScript code
-    generate_typescript_code(zones)
-    
-    print("✅ Done! Copy the TypeScript code above into src/data/mockData.ts")
+    output_data = build_zone_output(glb_file, zones)
+    
+    output_file = args.output
+    if write_if_changed(output_file, json.dumps(output_data, indent=2, ensure_ascii=False)):
+        print(f"💾 Saved to: {output_file}")
+    else:
+        print(f"💾 {output_file} is already up to date")
+    
+    # Generate TypeScript module
+    if write_module(args.ts_output, zones_module(zones)):
+        print(f"📝 TypeScript module written: {args.ts_output}")
+    else:
+        print(f"📝 {args.ts_output} is already up to date")
+    
+    print("✅ Done!")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Baked per-vertex ambient occlusion for venue models
+Casts a cosine-weighted hemisphere of rays from every vertex through the
+scene BVH (glb_bvh.py) and stores the unoccluded share as a custom
+_OCCLUSION vertex attribute (UNSIGNED_BYTE, normalized; 1 = open) in a copy
+of the model. The client darkens indirect light with it
+(src/utils/bakedOcclusion.ts), which replaces the per-frame SSAO pass.
+
+A ray hitting geometry at distance t within AO_RADIUS occludes with weight
+1 - t / AO_RADIUS, so contact shadows are dark and the falloff is smooth.
+Each vertex gets its own random rotation of a fixed set of AO_RAYS
+directions, which trades banding for fine noise that vertex interpolation
+smooths out. Meshes drawn by several nodes or GPU instances get the
+average over all of them.
+
+Venue exports often have flipped normals (VenueModel renders them
+double-sided). Before baking, one ray per vertex is cast each way along the
+normal: a node whose normals mostly run into its own far side, while the
+reversed ones leave it, is a closed mesh turned inside out (a booth or a
+column) and is baked against its normals. --trust-normals skips the check.
+
+Vertices are spread over a process pool; the BVH is cached per model
+(glb_bvh.load_scene_bvh). Draco-compressed primitives can't be decoded
+here: they are neither baked nor occlude, so export the model without
+Draco before baking.
+
+Requires: numpy
+
+USAGE:
+    python glb_ao.py public/SM_MFF.glb                  # -> public/SM_MFF_ao.glb
+    python glb_ao.py venue.glb -o venue_ao.glb --rays 128 --radius 3 -j 8
+"""
+
+import argparse
+import concurrent.futures
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from asset_cache import DEFAULT_CACHE_DIR, write_if_changed
+from glb_bvh import load_scene_bvh
+from glb_geometry import instance_matrices, is_draco_compressed, primitive_triangles
+from glb_lod import check_zones
+from glb_reader import GLBFile
+from glb_scene import SceneGraph
+from glb_writer import TARGET_ARRAY_BUFFER, GLBBuilder
+
+# Bump when baking changes so cached models are rebuilt
+AO_VERSION = 1
+
+AO_ATTRIBUTE = '_OCCLUSION'
+
+# Rays per hemisphere and the distance (meters) beyond which nothing occludes
+AO_RAYS = 64
+AO_RADIUS = 2.0
+
+# Ray origins are lifted this far (meters) off the surface to avoid self-hits
+RAY_BIAS = 0.005
+
+# A node is baked flipped when more than this share of its normals hit the
+# node itself, and twice as many as the reversed normals do
+FLIP_HIT_SHARE = 0.5
+
+# Vertices per worker task
+_BATCH = 2048
+
+_GOLDEN_ANGLE = math.pi * (3.0 - math.sqrt(5.0))
+
+
+def hemisphere_directions(count):
+    """(count, 3) cosine-weighted directions around +Z, spread on a spiral"""
+
+    u = (np.arange(count) + 0.5) / count
+    phi = np.arange(count) * _GOLDEN_ANGLE
+    r = np.sqrt(u)
+    return np.stack([r * np.cos(phi), r * np.sin(phi), np.sqrt(1.0 - u)], axis=1)
+
+
+def tangent_frames(normals):
+    """Two unit tangents (n, 3) perpendicular to each unit normal"""
+
+    helper = np.where(np.abs(normals[:, 1:2]) < 0.9, [[0.0, 1.0, 0.0]], [[1.0, 0.0, 0.0]])
+    tangent = np.cross(helper, normals)
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    return tangent, np.cross(normals, tangent)
+
+
+def vertex_normals(positions, triangles):
+    """Area-weighted vertex normals for primitives without a NORMAL attribute"""
+
+    corners = positions[triangles]
+    face = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals = np.zeros_like(positions)
+    for k in range(3):
+        np.add.at(normals, triangles[:, k], face)
+    return normals
+
+
+def _normalized(vectors):
+    length = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(length > 0, length, 1.0)
+
+
+_WORKER = None
+
+
+def _init_worker(bvh, directions, radius):
+    global _WORKER
+    _WORKER = {'bvh': bvh, 'directions': directions, 'radius': radius}
+
+
+def _occlusion_batch(task):
+    """Unoccluded share (0..1) for a batch of (points, unit normals, rotation angles)"""
+
+    points, normals, angles = task
+    w = _WORKER
+    tangent, bitangent = tangent_frames(normals)
+    local = w['directions']
+    cos, sin = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    x = local[None, :, 0] * cos - local[None, :, 1] * sin
+    y = local[None, :, 0] * sin + local[None, :, 1] * cos
+    directions = (x[..., None] * tangent[:, None] + y[..., None] * bitangent[:, None]
+                  + local[None, :, 2, None] * normals[:, None])
+
+    origins = np.repeat(points + normals * RAY_BIAS, len(local), axis=0)
+    t, _ = w['bvh'].intersect(origins, directions.reshape(-1, 3), t_max=w['radius'])
+    weight = np.where(np.isfinite(t), 1.0 - t / w['radius'], 0.0)
+    return 1.0 - weight.reshape(len(points), len(local)).mean(axis=1)
+
+
+def inside_out(bvh, soup, node, points, normals):
+    """True when a node's normals point into its own volume rather than out of it"""
+
+    normals = _normalized(normals)
+
+    def self_hits(directions):
+        _, triangles = bvh.intersect(points + directions * RAY_BIAS, directions)
+        hit = triangles >= 0
+        return (hit & (soup.node_ids[np.where(hit, triangles, 0)] == node)).mean()
+
+    ahead, behind = self_hits(normals), self_hits(-normals)
+    return bool(ahead > FLIP_HIT_SHARE and ahead > 2 * behind)
+
+
+def ambient_occlusion(bvh, points, normals, rays=AO_RAYS, radius=AO_RADIUS, jobs=None, seed=0):
+    """Per-point ambient occlusion (1 = fully open) for world-space points and normals"""
+
+    angles = np.random.default_rng(seed).uniform(0.0, 2.0 * math.pi, len(points))
+    normals = _normalized(normals)
+    tasks = [(points[i:i + _BATCH], normals[i:i + _BATCH], angles[i:i + _BATCH])
+             for i in range(0, len(points), _BATCH)]
+    init = (bvh, hemisphere_directions(rays), radius)
+
+    if jobs == 1 or len(tasks) <= 1:
+        _init_worker(*init)
+        results = [_occlusion_batch(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                    initargs=init) as pool:
+            results = list(pool.map(_occlusion_batch, tasks))
+    return np.concatenate(results) if results else np.zeros(0)
+
+
+def bake_targets(glb, graph):
+    """
+    Primitives to bake and where they are drawn: {(mesh, primitive): [(node,
+    positions, normals)] in world space, one entry per node (and GPU
+    instance) drawing it}, plus the number of Draco primitives skipped
+    """
+
+    targets = {}
+    skipped = set()
+    for node_index in graph.reachable_nodes():
+        node = graph.nodes[node_index]
+        if 'mesh' not in node or 'skin' in node:
+            continue
+
+        matrices = instance_matrices(glb, node, graph.world_matrices[node_index])
+        for p, primitive in enumerate(glb.json['meshes'][node['mesh']]['primitives']):
+            key = (node['mesh'], p)
+            if is_draco_compressed(primitive):
+                skipped.add(key)
+                continue
+            triangles = primitive_triangles(glb, primitive)
+            if not len(triangles):
+                continue
+
+            attributes = primitive['attributes']
+            positions = glb.accessor_float(attributes['POSITION']).astype(np.float64)
+            if 'NORMAL' in attributes:
+                normals = glb.accessor_float(attributes['NORMAL']).astype(np.float64)
+            else:
+                normals = vertex_normals(positions, triangles)
+            for matrix in matrices:
+                normal_matrix = np.linalg.inv(matrix[:3, :3]).T
+                targets.setdefault(key, []).append((node_index, positions @ matrix[:3, :3].T + matrix[:3, 3],
+                                                    normals @ normal_matrix.T))
+    return targets, len(skipped)
+
+
+def bake_ao(glb_file, rays=AO_RAYS, radius=AO_RADIUS, check_normals=True, jobs=None,
+            cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Bake ambient occlusion into a copy of a model. Returns (GLB bytes, summary).
+    Every baked primitive gets an _OCCLUSION accessor; everything else is
+    left as it was.
+    """
+
+    bvh, soup, _ = load_scene_bvh(glb_file, cache_dir)
+    with GLBFile(glb_file) as glb:
+        graph = SceneGraph(glb.json)
+        targets, skipped_draco = bake_targets(glb, graph)
+        if not targets:
+            if skipped_draco:
+                raise ValueError(f"no decodable geometry: {skipped_draco} primitive(s) use "
+                                 f"KHR_draco_mesh_compression; export the model without Draco")
+            raise ValueError("model has no triangle geometry")
+
+        flipped = 0
+        if check_normals:
+            for instances in targets.values():
+                for i, (node, positions, normals) in enumerate(instances):
+                    if inside_out(bvh, soup, node, positions, normals):
+                        instances[i] = (node, positions, -normals)
+                        flipped += 1
+
+        # One ray batch for every instance of every primitive
+        points = np.concatenate([positions for instances in targets.values() for _, positions, _ in instances])
+        normals = np.concatenate([normals for instances in targets.values() for _, _, normals in instances])
+        started = time.perf_counter()
+        ao = ambient_occlusion(bvh, points, normals, rays, radius, jobs)
+        seconds = time.perf_counter() - started
+
+        builder = GLBBuilder.from_glb(glb)
+        offset = 0
+        shared = 0
+        for (mesh, p), instances in targets.items():
+            count = len(instances[0][1])
+            values = ao[offset:offset + count * len(instances)].reshape(len(instances), count).mean(axis=0)
+            offset += count * len(instances)
+            shared += len(instances) > 1
+
+            encoded = np.round(np.clip(values, 0.0, 1.0) * 255).astype(np.uint8)
+            accessor = builder.add_accessor(encoded, TARGET_ARRAY_BUFFER, normalized=True)
+            builder.json['meshes'][mesh]['primitives'][p]['attributes'][AO_ATTRIBUTE] = accessor
+
+        check_zones(glb.json, builder.json)
+
+    summary = {
+        'primitives': len(targets),
+        'vertices': int(sum(len(instances[0][1]) for instances in targets.values())),
+        'shared_meshes': shared,
+        'skipped_draco': skipped_draco,
+        'flipped': flipped,
+        'rays': int(len(points) * rays),
+        'ray_seconds': seconds,
+        'mean_ao': float(ao.mean()),
+        'triangles': len(soup),
+    }
+    return builder.to_bytes(), summary
+
+
+def bake_ao_bytes(data, rays=AO_RAYS, radius=AO_RADIUS, check_normals=True, jobs=None,
+                  cache_dir=DEFAULT_CACHE_DIR):
+    """bake_ao() for a model held in memory"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return bake_ao(path, rays, radius, check_normals, jobs, cache_dir)
+    finally:
+        os.unlink(path)
+
+
+def default_output(glb_file):
+    root, ext = os.path.splitext(glb_file)
+    return f"{root}_ao{ext or '.glb'}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bake per-vertex ambient occlusion into a GLB model")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default=None, help="output GLB (default: <model>_ao.glb)")
+    parser.add_argument('--rays', type=int, default=AO_RAYS,
+                        help=f"rays per vertex (default: {AO_RAYS})")
+    parser.add_argument('--radius', type=float, default=AO_RADIUS,
+                        help=f"occlusion distance in meters (default: {AO_RADIUS})")
+    parser.add_argument('--trust-normals', action='store_true',
+                        help="bake the side the normals point to, even on inside-out nodes")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"where the scene BVH is cached (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="always rebuild the BVH")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+    if args.rays < 1 or args.radius <= 0:
+        print("❌ --rays and --radius must be positive")
+        return 1
+
+    output = args.output or default_output(args.glb_file)
+    print(f"📂 Baking ambient occlusion for {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        data, summary = bake_ao(args.glb_file, args.rays, args.radius, not args.trust_normals, args.jobs,
+                                None if args.no_cache else args.cache_dir)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if summary['skipped_draco']:
+        print(f"⚠️ {summary['skipped_draco']} Draco-compressed primitive(s) not baked and not occluding")
+    if summary['flipped']:
+        print(f"⚠️ {summary['flipped']} inside-out node(s) baked against their normals")
+    if summary['shared_meshes']:
+        print(f"⚠️ {summary['shared_meshes']} primitive(s) drawn several times got their average occlusion")
+    print(f"✅ {summary['vertices']} vertices in {summary['primitives']} primitives, "
+          f"{summary['rays'] / 1e6:.1f}M rays in {summary['ray_seconds']:.2f}s "
+          f"({summary['rays'] / max(summary['ray_seconds'], 1e-9) / 1e6:.2f}M rays/s), "
+          f"mean AO {summary['mean_ao']:.2f} ({time.perf_counter() - started:.2f}s)")
+
+    if write_if_changed(output, data):
+        print(f"💾 Saved to: {output} ({len(data) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,661 @@
+"""
+Bounding volume hierarchy and batched ray casting over GLB triangles
+Builds a flat-array BVH over world-space triangles (glb_geometry) and traces
+whole batches of rays through it. Build and traversal both work one tree
+level at a time, so each level costs a handful of vectorized NumPy
+operations regardless of how many nodes or rays it holds; rays are traced
+in chunks of RAY_CHUNK, so millions per call are fine.
+
+Nodes are split with a binned surface area heuristic (SAH); the median
+split it replaced is kept as method='median' for comparison. Trees for a
+model are cached on disk under the hash of its JSON and BIN chunks (see
+asset_cache.py), so re-running a stage on an unchanged venue skips the
+build.
+
+Used by visibility_sets.py. From the command line it snaps ZONE_ empties
+to the floor below them, checks that POI cameras can see their targets and
+benchmarks the build and ray throughput.
+
+Requires: numpy
+
+USAGE:
+    from glb_bvh import load_scene_bvh
+    bvh, soup, _ = load_scene_bvh('venue.glb')
+    t, triangle = bvh.intersect(origins, directions)
+    blocked = bvh.occluded(origins, targets - origins, t_max=0.999)
+
+    python glb_bvh.py public/SM_MFF.glb --snap-zones --check-pois
+    python glb_bvh.py --benchmark
+    python glb_bvh.py venue.glb --benchmark --rays 2000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from asset_cache import DEFAULT_CACHE_DIR, AssetCache
+from extract_pois_from_glb import extract_pois
+from extract_zones_from_glb import extract_zones
+from glb_geometry import TriangleSoup, scene_triangles
+from glb_reader import GLBFile
+from glb_scene import SceneGraph
+
+# Bump when the build changes so cached trees are rebuilt
+BVH_VERSION = 2
+
+# Triangles per leaf
+LEAF_SIZE = 8
+
+# Centroid bins per axis for the SAH split search
+SAH_BINS = 16
+
+# Rays traced together; bounds the size of the (ray, node) pair arrays
+RAY_CHUNK = 1 << 16
+
+# Hits closer than this (in ray parameter units) are ignored to avoid self-hits
+T_EPSILON = 1e-6
+
+_DET_EPSILON = 1e-12
+
+# glTF is Y-up
+UP = np.array([0.0, 1.0, 0.0])
+
+
+def _cross(a, b):
+    """np.cross for (..., 3) arrays without its per-call axis bookkeeping"""
+    ax, ay, az = a[..., 0], a[..., 1], a[..., 2]
+    bx, by, bz = b[..., 0], b[..., 1], b[..., 2]
+    return np.stack([ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx], axis=-1)
+
+
+def _half_area(lo, hi):
+    """Half surface area of boxes; 0 for empty (inverted) boxes"""
+    d = np.maximum(hi - lo, 0.0)
+    return d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2] + d[..., 2] * d[..., 0]
+
+
+def _segment_positions(starts, sizes):
+    """Concatenated ranges start .. start + size of every segment"""
+    offsets = np.cumsum(sizes) - sizes
+    return np.arange(sizes.sum()) - np.repeat(offsets - starts, sizes)
+
+
+def _segment_bounds(values, segment, count):
+    lo = np.full((count, 3), np.inf)
+    hi = np.full((count, 3), -np.inf)
+    np.minimum.at(lo, segment, values)
+    np.maximum.at(hi, segment, values)
+    return lo, hi
+
+
+def _sah_split(cent, tri_lo, tri_hi, segment, count, bins):
+    """
+    Binned SAH over all three axes for `count` nodes at once: (side per
+    triangle, split found per node, split axis per node)
+    """
+
+    cmin, cmax = _segment_bounds(cent, segment, count)
+    extent = cmax - cmin
+    scale = np.where(extent > 0, bins / np.where(extent > 0, extent, 1.0), 0.0)
+    b = np.minimum(((cent - cmin[segment]) * scale[segment]).astype(np.int64), bins - 1)
+
+    # Triangle count and bounds per (node, axis, bin)
+    keys = (segment[:, None] * 3 + np.arange(3)) * bins + b
+    size = count * 3 * bins
+    counts = np.bincount(keys.ravel(), minlength=size).reshape(count, 3, bins)
+    bin_lo = np.full((size, 3), np.inf)
+    bin_hi = np.full((size, 3), -np.inf)
+    for axis in range(3):
+        np.minimum.at(bin_lo, keys[:, axis], tri_lo)
+        np.maximum.at(bin_hi, keys[:, axis], tri_hi)
+    bin_lo = bin_lo.reshape(count, 3, bins, 3)
+    bin_hi = bin_hi.reshape(count, 3, bins, 3)
+
+    # Splitting after bin i puts bins 0..i left and the rest right
+    left_n = np.cumsum(counts, axis=2)[..., :-1]
+    right_n = counts.sum(axis=2, keepdims=True) - left_n
+    left_area = _half_area(np.minimum.accumulate(bin_lo, axis=2),
+                           np.maximum.accumulate(bin_hi, axis=2))[..., :-1]
+    right_area = _half_area(np.minimum.accumulate(bin_lo[:, :, ::-1], axis=2),
+                            np.maximum.accumulate(bin_hi[:, :, ::-1], axis=2))[:, :, ::-1][..., 1:]
+    cost = np.where((left_n > 0) & (right_n > 0),
+                    left_area * left_n + right_area * right_n, np.inf).reshape(count, -1)
+
+    best = np.argmin(cost, axis=1)
+    found = np.isfinite(cost[np.arange(count), best])
+    split_axis, split_bin = best // (bins - 1), best % (bins - 1)
+    sides = b[np.arange(len(segment)), split_axis[segment]] > split_bin[segment]
+    return sides.astype(np.int64), found, split_axis
+
+
+def _median_split(cent, segment, sizes):
+    """Halve each node at the median centroid along its longest axis"""
+
+    count = len(sizes)
+    cmin, cmax = _segment_bounds(cent, segment, count)
+    split_axis = np.argmax(cmax - cmin, axis=1)
+    along = cent[np.arange(len(segment)), split_axis[segment]]
+    ranked = np.lexsort((along, segment))
+    rank = np.arange(len(segment)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    sides = np.empty(len(segment), dtype=np.int64)
+    sides[ranked] = rank >= (sizes // 2)[segment]
+    return sides, np.ones(count, dtype=bool), split_axis
+
+
+def build_tree(corners, leaf_size=LEAF_SIZE, method='sah', bins=SAH_BINS):
+    """
+    Top-down build, one tree level at a time: every node of a level is split
+    by the same few array operations. `method` is 'sah' (binned surface area
+    heuristic) or 'median' (median centroid on the longest axis).
+
+    Returns flat arrays (lo, hi, left, right, axis, first, count, order);
+    node 0 is the root and leaves have left == -1.
+    """
+
+    if method not in ('sah', 'median'):
+        raise ValueError(f"unknown BVH build method: {method}")
+
+    total = len(corners)
+    cent = corners.mean(axis=1)
+    tri_lo = corners.min(axis=1)
+    tri_hi = corners.max(axis=1)
+    order = np.arange(total, dtype=np.int64)
+
+    if total:
+        lo, hi = [tri_lo.min(axis=0)[None]], [tri_hi.max(axis=0)[None]]
+    else:
+        lo, hi = [np.zeros((1, 3))], [np.zeros((1, 3))]
+    first = [np.zeros(1, dtype=np.int64)]
+    count = [np.full(1, total, dtype=np.int64)]
+    splits = []  # (parent ids, first child id, split axes) per level
+    node_count = 1
+
+    # Nodes still to split: ids, first triangle, triangle count
+    active = np.zeros(1, dtype=np.int64)
+    starts = np.zeros(1, dtype=np.int64)
+    sizes = np.full(1, total, dtype=np.int64)
+
+    while True:
+        keep = sizes > leaf_size
+        active, starts, sizes = active[keep], starts[keep], sizes[keep]
+        if not len(active):
+            break
+
+        k = len(active)
+        positions = _segment_positions(starts, sizes)
+        segment = np.repeat(np.arange(k), sizes)
+        members = order[positions]
+
+        if method == 'sah':
+            sides, found, split_axis = _sah_split(cent[members], tri_lo[members], tri_hi[members],
+                                                  segment, k, bins)
+        else:
+            sides, found, split_axis = _median_split(cent[members], segment, sizes)
+
+        # Coinciding centroids leave no split; halve those nodes by list
+        # position so leaves never exceed leaf_size
+        stuck = ~found[segment]
+        rank = positions - starts[segment]
+        sides[stuck] = rank[stuck] >= (sizes // 2)[segment[stuck]]
+
+        # Stable partition of every node's range: left children first
+        order[positions] = members[np.lexsort((sides, segment))]
+        left_sizes = sizes - np.bincount(segment, weights=sides, minlength=k).astype(np.int64)
+
+        child_starts = np.column_stack([starts, starts + left_sizes]).ravel()
+        child_sizes = np.column_stack([left_sizes, sizes - left_sizes]).ravel()
+        child_segment = np.repeat(np.arange(2 * k), child_sizes)
+        child_members = order[_segment_positions(child_starts, child_sizes)]
+        child_lo, _ = _segment_bounds(tri_lo[child_members], child_segment, 2 * k)
+        _, child_hi = _segment_bounds(tri_hi[child_members], child_segment, 2 * k)
+
+        lo.append(child_lo)
+        hi.append(child_hi)
+        first.append(child_starts)
+        count.append(child_sizes)
+        splits.append((active, node_count, split_axis))
+
+        active = node_count + np.arange(2 * k)
+        starts, sizes = child_starts, child_sizes
+        node_count += 2 * k
+
+    left = np.full(node_count, -1, dtype=np.int64)
+    right = np.full(node_count, -1, dtype=np.int64)
+    axis = np.zeros(node_count, dtype=np.int64)
+    count = np.concatenate(count)
+    for parents, first_child, split_axis in splits:
+        children = first_child + 2 * np.arange(len(parents))
+        left[parents] = children
+        right[parents] = children + 1
+        axis[parents] = split_axis
+        count[parents] = 0
+
+    return np.concatenate(lo), np.concatenate(hi), left, right, axis, np.concatenate(first), count, order
+
+
+class BVH:
+    """
+    Flat BVH: node i covers [lo[i], hi[i]]; inner nodes have children
+    left[i]/right[i] split along axis[i], leaves (left[i] == -1) own
+    triangles first[i] .. first[i] + count[i] of the reordered arrays.
+    """
+
+    # Everything needed to rebuild the tree without the source triangles
+    ARRAYS = ('lo', 'hi', 'left', 'right', 'axis', 'first', 'count', 'order', 'v0', 'e1', 'e2')
+
+    def __init__(self, corners, leaf_size=LEAF_SIZE, method='sah'):
+        corners = np.asarray(corners, dtype=np.float64).reshape(-1, 3, 3)
+        self.triangle_count = len(corners)
+        self.leaf_size = leaf_size
+
+        (self.lo, self.hi, self.left, self.right, self.axis,
+         self.first, self.count, self.order) = build_tree(corners, leaf_size, method)
+
+        ordered = corners[self.order]
+        self.v0 = ordered[:, 0]
+        self.e1 = ordered[:, 1] - ordered[:, 0]
+        self.e2 = ordered[:, 2] - ordered[:, 0]
+
+    def to_arrays(self):
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays['leaf_size'] = np.array(self.leaf_size)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a BVH from to_arrays() output (e.g. read back from the cache)"""
+
+        bvh = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(bvh, name, np.asarray(arrays[name]))
+        bvh.leaf_size = int(arrays['leaf_size'])
+        bvh.triangle_count = len(bvh.order)
+        return bvh
+
+    def __len__(self):
+        return self.triangle_count
+
+    @property
+    def node_count(self):
+        return len(self.lo)
+
+    def corners(self):
+        """(T, 3, 3) triangle corners in the order the BVH was built from"""
+        corners = np.empty((self.triangle_count, 3, 3))
+        corners[self.order] = np.stack([self.v0, self.v0 + self.e1, self.v0 + self.e2], axis=1)
+        return corners
+
+    def sah_cost(self):
+        """Expected boxes plus triangles tested by a random ray (lower is better)"""
+
+        root = _half_area(self.lo[0], self.hi[0])
+        if not self.triangle_count or root <= 0:
+            return float(self.triangle_count)
+        area = _half_area(self.lo, self.hi) / root
+        leaves = self.left < 0
+        return float(area[~leaves].sum() + (area[leaves] * self.count[leaves]).sum())
+
+    def _test_triangles(self, rays, triangles, origins, directions, t_max):
+        """t of ray/triangle pairs (Moller-Trumbore), inf where they miss"""
+
+        d = directions[rays]
+        e1, e2 = self.e1[triangles], self.e2[triangles]
+        p = _cross(d, e2)
+        det = np.einsum('ij,ij->i', e1, p)
+        ok = np.abs(det) > _DET_EPSILON
+        inv_det = np.where(ok, 1.0 / np.where(ok, det, 1.0), 0.0)
+
+        s = origins[rays] - self.v0[triangles]
+        u = np.einsum('ij,ij->i', s, p) * inv_det
+        q = _cross(s, e1)
+        v = np.einsum('ij,ij->i', d, q) * inv_det
+        t = np.einsum('ij,ij->i', e2, q) * inv_det
+
+        valid = ok & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > T_EPSILON) & (t < t_max[rays])
+        return np.where(valid, t, np.inf)
+
+    def _trace_chunk(self, origins, directions, best_t, any_hit):
+        """
+        Wavefront traversal: every (ray, node) pair of a tree level is slab
+        tested at once, inner hits fan out to both children and leaf hits
+        are tested triangle slot by triangle slot across all pairs. Updates
+        best_t in place and returns the hit triangle (reordered index) per ray.
+        """
+
+        count = len(origins)
+        best_tri = np.full(count, -1, dtype=np.int64)
+
+        # Zero direction components become tiny ones so slab tests stay finite
+        safe = np.where(np.abs(directions) < 1e-30, np.copysign(1e-30, directions), directions)
+        inv = 1.0 / safe
+
+        rays = np.arange(count)
+        nodes = np.zeros(count, dtype=np.int64)
+        while len(rays):
+            o, r_inv = origins[rays], inv[rays]
+            t0 = (self.lo[nodes] - o) * r_inv
+            t1 = (self.hi[nodes] - o) * r_inv
+            t_near = np.minimum(t0, t1).max(axis=1)
+            t_far = np.maximum(t0, t1).min(axis=1)
+            keep = (t_near <= t_far) & (t_far >= 0) & (t_near < best_t[rays])
+            if any_hit:
+                keep &= best_tri[rays] < 0
+            rays, nodes = rays[keep], nodes[keep]
+
+            leaf = self.left[nodes] < 0
+            leaf_rays, leaf_nodes = rays[leaf], nodes[leaf]
+            for slot in range(self.leaf_size):
+                live = self.count[leaf_nodes] > slot
+                if not live.any():
+                    break
+                pair_rays = leaf_rays[live]
+                triangles = self.first[leaf_nodes[live]] + slot
+                t = self._test_triangles(pair_rays, triangles, origins, directions, best_t)
+                closer = t < best_t[pair_rays]
+                if not closer.any():
+                    continue
+                pair_rays, triangles, t = pair_rays[closer], triangles[closer], t[closer]
+                np.minimum.at(best_t, pair_rays, t)
+                won = t == best_t[pair_rays]
+                best_tri[pair_rays[won]] = triangles[won]
+
+            inner_rays, inner_nodes = rays[~leaf], nodes[~leaf]
+            rays = np.concatenate([inner_rays, inner_rays])
+            nodes = np.concatenate([self.left[inner_nodes], self.right[inner_nodes]])
+
+        return best_tri
+
+    def _trace(self, origins, directions, t_max, any_hit):
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        count = len(origins)
+
+        best_t = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (count,)).copy()
+        best_tri = np.full(count, -1, dtype=np.int64)
+        if not count or not self.triangle_count:
+            return np.full(count, np.inf), best_tri
+
+        for start in range(0, count, RAY_CHUNK):
+            chunk = slice(start, start + RAY_CHUNK)
+            chunk_t = best_t[chunk].copy()
+            best_tri[chunk] = self._trace_chunk(origins[chunk], directions[chunk], chunk_t, any_hit)
+            best_t[chunk] = chunk_t
+
+        hit = best_tri >= 0
+        triangles = np.where(hit, self.order[np.maximum(best_tri, 0)], -1)
+        return np.where(hit, best_t, np.inf), triangles
+
+    def intersect(self, origins, directions, t_max=np.inf):
+        """
+        Nearest hit per ray: (t, triangle) with hit point origin + t * direction
+        and triangle indexing the corners the BVH was built from; inf / -1 for
+        rays that hit nothing before t_max
+        """
+        return self._trace(origins, directions, t_max, any_hit=False)
+
+    def occluded(self, origins, directions, t_max=np.inf):
+        """True for rays that hit any triangle before t_max"""
+        _, triangles = self._trace(origins, directions, t_max, any_hit=True)
+        return triangles >= 0
+
+
+# ----------------------------------------------------------------------
+# Cached per-model trees
+# ----------------------------------------------------------------------
+
+def _scene_arrays(glb_file):
+    with GLBFile(glb_file) as glb:
+        soup = scene_triangles(glb, SceneGraph(glb.json))
+
+    arrays = BVH(soup.corners()).to_arrays()
+    arrays.update({
+        'soup_vertices': soup.vertices,
+        'soup_triangles': soup.triangles,
+        'soup_node_ids': soup.node_ids,
+        'soup_materials': soup.materials,
+        'soup_skipped_draco': np.array(soup.skipped_draco),
+    })
+    return arrays
+
+
+def load_scene_bvh(glb_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    BVH over every mesh triangle of a GLB plus the TriangleSoup it indexes,
+    as (bvh, soup, cache_hit). With a cache_dir both are stored under the
+    hash of the model's JSON and BIN chunks and reused while they match.
+    """
+
+    if cache_dir:
+        arrays, hit = AssetCache(cache_dir).cached_arrays(
+            'bvh', glb_file, lambda: _scene_arrays(glb_file), chunks=('JSON', 'BIN'), version=BVH_VERSION)
+    else:
+        arrays, hit = _scene_arrays(glb_file), False
+
+    soup = TriangleSoup(arrays['soup_vertices'], arrays['soup_triangles'], arrays['soup_node_ids'],
+                        arrays['soup_materials'], int(arrays['soup_skipped_draco']))
+    return BVH.from_arrays(arrays), soup, hit
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+
+def drop_to_surface(bvh, points, max_drop=np.inf):
+    """
+    First surface straight below each point: (surface points, found mask).
+    Points with nothing below them within max_drop are returned unchanged.
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    # Start a little above so a point lying exactly on the floor still finds it
+    origins = points + UP * 1e-3
+    down = np.broadcast_to(-UP, points.shape)
+    t, _ = bvh.intersect(origins, down, t_max=max_drop + 1e-3)
+    found = np.isfinite(t)
+    surface = np.where(found[:, None], origins + down * np.where(found, t, 0.0)[:, None], points)
+    return surface, found
+
+
+def segments_clear(bvh, starts, ends):
+    """True where no triangle lies between each start and end point"""
+
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+    return ~bvh.occluded(starts, ends - starts, t_max=1 - 1e-4)
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+def _box(lo, hi):
+    """12 triangles of an axis-aligned box"""
+    p = np.array([[x, y, z] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+    faces = [[0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+             [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]]
+    return p[np.array(faces)]
+
+
+def synthetic_venue(halls=6, booths=400, floor_cells=40, seed=0):
+    """
+    Triangle corners of a row of 60 m halls: tessellated floor, roof, a
+    dividing wall with a doorway and randomly placed booth boxes
+    """
+
+    rng = np.random.default_rng(seed)
+    size = 60.0
+    step = size / floor_cells
+    gx, gz = np.meshgrid(np.arange(floor_cells) * step, np.arange(floor_cells) * step)
+    quad = np.stack([gx.ravel(), np.zeros(gx.size), gz.ravel()], axis=1)
+
+    parts = []
+    for h in range(halls):
+        x0 = h * size
+        a = quad + [x0, 0, 0]
+        b, c, d = a + [step, 0, 0], a + [step, 0, step], a + [0, 0, step]
+        parts.append(np.stack([a, c, b], axis=1))
+        parts.append(np.stack([a, d, c], axis=1))
+        parts.append(_box((x0, 8, 0), (x0 + size, 8.3, size)))
+        parts.append(_box((x0 + size - 0.2, 0, 0), (x0 + size, 8, size * 0.4)))
+        parts.append(_box((x0 + size - 0.2, 0, size * 0.6), (x0 + size, 8, size)))
+        booth_lo = rng.uniform([x0 + 2, 0, 2], [x0 + size - 5, 0, size - 5], (booths, 3))
+        booth_size = rng.uniform([1, 1, 1], [3, 3, 3], (booths, 3))
+        parts.extend(_box(l, l + e) for l, e in zip(booth_lo, booth_size))
+    return np.concatenate(parts)
+
+
+def _brute_force(bvh, origins, directions):
+    """Nearest hit testing every triangle (reference for the benchmark)"""
+
+    triangles = np.arange(bvh.triangle_count)
+    best = np.full(len(origins), np.inf)
+    for ray in range(len(origins)):
+        rays = np.full(len(triangles), ray)
+        t = bvh._test_triangles(rays, triangles, origins, directions, np.full(len(origins), np.inf))
+        best[ray] = t.min()
+    return best
+
+
+def benchmark(corners, rays=1000000, check=500, seed=0):
+    """
+    Build times and SAH cost for both build methods, then closest-hit and
+    any-hit throughput for `rays` random eye-level rays, checked against
+    brute force on the first `check` of them
+    """
+
+    rng = np.random.default_rng(seed)
+    lo, hi = corners.reshape(-1, 3).min(axis=0), corners.reshape(-1, 3).max(axis=0)
+    origins = rng.uniform(lo, hi, (rays, 3))
+    origins[:, 1] = rng.uniform(lo[1] + 0.5, lo[1] + 3.0, rays)
+    directions = rng.normal(size=(rays, 3))
+    sample = min(rays, 20000)
+
+    result = {'triangles': len(corners), 'rays': rays, 'methods': {}}
+    for method in ('median', 'sah'):
+        started = time.perf_counter()
+        bvh = BVH(corners, method=method)
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        bvh.intersect(origins[:sample], directions[:sample])
+        result['methods'][method] = {
+            'build_seconds': build,
+            'nodes': bvh.node_count,
+            'sah_cost': bvh.sah_cost(),
+            'rays_per_second': sample / (time.perf_counter() - started),
+        }
+
+    started = time.perf_counter()
+    t, _ = bvh.intersect(origins, directions)
+    result['intersect_seconds'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    blocked = bvh.occluded(origins, directions, t_max=10.0)
+    result['occluded_seconds'] = time.perf_counter() - started
+
+    reference = _brute_force(bvh, origins[:check], directions[:check])
+    result['mismatches'] = int(np.sum(~np.isclose(reference, t[:check])) +
+                               np.sum((reference < 10.0) != blocked[:check]))
+    result['hit_fraction'] = float(np.isfinite(t).mean())
+    return result
+
+
+def print_benchmark(result):
+    print(f"📐 {result['triangles']} triangles, {result['rays']} rays "
+          f"({result['hit_fraction'] * 100:.0f}% hit something)")
+    for method, stats in result['methods'].items():
+        print(f"   {method:>6}: build {stats['build_seconds']:.2f}s, {stats['nodes']} nodes, "
+              f"SAH cost {stats['sah_cost']:.1f}, {stats['rays_per_second'] / 1e3:.0f}k rays/s")
+    rays = result['rays']
+    print(f"   closest hit: {result['intersect_seconds']:.2f}s "
+          f"({rays / result['intersect_seconds'] / 1e3:.0f}k rays/s)")
+    print(f"   any hit within 10 m: {result['occluded_seconds']:.2f}s "
+          f"({rays / result['occluded_seconds'] / 1e3:.0f}k rays/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ray-cast queries over GLB geometry through a BVH")
+    parser.add_argument('glb_file', nargs='?', help="model (a synthetic venue is used for --benchmark if omitted)")
+    parser.add_argument('--snap-zones', action='store_true',
+                        help="report each ZONE_ empty's height above the surface below it")
+    parser.add_argument('--check-pois', action='store_true',
+                        help="report POI cameras whose line of sight to the target is blocked")
+    parser.add_argument('--benchmark', action='store_true', help="time tree builds and batched ray queries")
+    parser.add_argument('--rays', type=int, default=1000000, help="rays for --benchmark (default: 1000000)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"where built trees are cached (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="always rebuild the tree")
+    args = parser.parse_args(argv)
+
+    if args.glb_file and not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+
+    if args.benchmark:
+        if args.glb_file:
+            with GLBFile(args.glb_file) as glb:
+                corners = scene_triangles(glb, SceneGraph(glb.json)).corners()
+        else:
+            corners = synthetic_venue()
+        if not len(corners):
+            print("❌ No triangle geometry to benchmark")
+            return 1
+
+        result = benchmark(corners, args.rays)
+        print_benchmark(result)
+        if result['mismatches']:
+            print(f"❌ {result['mismatches']} rays disagree with brute force")
+            return 1
+        print("✅ Sampled hits match brute force")
+        return 0
+
+    if not args.glb_file:
+        parser.error("a GLB file is required unless --benchmark is given")
+
+    started = time.perf_counter()
+    bvh, soup, hit = load_scene_bvh(args.glb_file, None if args.no_cache else args.cache_dir)
+    if not len(soup):
+        if soup.skipped_draco:
+            print(f"❌ No decodable geometry: {soup.skipped_draco} primitive(s) use KHR_draco_mesh_compression")
+        else:
+            print("❌ Model has no triangle geometry")
+        return 1
+    print(f"✅ {len(soup)} triangles, {bvh.node_count} BVH nodes "
+          f"({'cached' if hit else 'built'} in {time.perf_counter() - started:.2f}s)")
+
+    with GLBFile(args.glb_file) as glb:
+        scene = SceneGraph(glb.json)
+
+    if args.snap_zones:
+        zones = extract_zones(scene.gltf, scene=scene)
+        if zones:
+            points = np.array([z['blender_coords'] for z in zones], dtype=np.float64)
+            surface, found = drop_to_surface(bvh, points)
+            print(f"\n📍 {len(zones)} zone(s), height above the surface below:")
+            for zone, point, floor, ok in zip(zones, points, surface, found):
+                if ok:
+                    print(f"   {zone['original_name']}: {point[1] - floor[1]:+.3f} m")
+                else:
+                    print(f"   ⚠️ {zone['original_name']}: no surface below")
+        else:
+            print("⚠️ No ZONE_ empties found")
+
+    if args.check_pois:
+        pois = extract_pois(scene)
+        if pois:
+            clear = segments_clear(bvh, [p['camera_position'] for p in pois],
+                                   [p['target_position'] for p in pois])
+            print(f"\n📷 {int(clear.sum())}/{len(pois)} POI camera(s) see their target")
+            for poi, ok in zip(pois, clear):
+                if not ok:
+                    print(f"   ⚠️ {poi['blender_camera_name']}: line of sight blocked")
+        else:
+            print("⚠️ No camera nodes found")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,716 @@
+"""
+Geometry compression for venue models
+Rewrites the meshes of a GLB so the client downloads less and decodes it
+off the main thread:
+
+- positions become 16-bit integers (KHR_mesh_quantization). The
+  dequantization - a power-of-two scale, plus an offset for nodes without
+  children - is folded into the transforms of the nodes drawing the mesh
+  and children get the inverse, so ZONE_ empties keep their exact world
+  transforms. Meshes that share accessors or are switched as LOD levels
+  (glb_lod.py) share one quantization grid.
+- normals and tangents become 8-bit, UVs in [0, 1] 16-bit and baked
+  occlusion (glb_ao.py) 8-bit normalized integers.
+- triangles are sorted along a Morton curve and vertices renumbered in
+  first-use order, which keeps the GPU's post-transform vertex cache warm
+  and turns index and vertex deltas into small numbers. The original order
+  is kept when it already scores better. Merged primitives (glb_merge.py)
+  are reordered within each node range, so their range tables stay valid.
+- every vertex and index buffer is stored with EXT_meshopt_compression
+  (meshopt_codec.py); three.js decodes it with MeshoptDecoder, which drei's
+  useGLTF sets up.
+
+Accessors are rewritten in place, so mesh, node and accessor indices, names
+and extras stay valid. Skinned, morphed, animated and Draco-compressed
+meshes keep float positions; their other attributes are still compressed.
+
+The report compares file size (raw and gzipped), vertex cache misses per
+triangle (ACMR) and an estimate of the client's MeshoptDecoder time (decoded
+bytes over CLIENT_DECODE_RATES - nothing here runs the real decoder),
+before and after. --python-read-time adds how long glb_reader.py takes to
+read the geometry back, which is what the offline Python stages pay.
+
+Requires: numpy
+
+USAGE:
+    python glb_compress.py public/SM_MFF.glb               # -> public/SM_MFF_compressed.glb
+    python glb_compress.py venue.glb -o venue.min.glb --position-bits 12 --report report.json
+    python glb_compress.py venue.glb --python-read-time     # also time glb_reader.py on both files
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from glb_ao import AO_ATTRIBUTE
+from glb_geometry import MODE_TRIANGLES, is_draco_compressed
+from glb_lod import check_zones
+from glb_reader import MESHOPT_EXTENSION, GLBFile
+from glb_scene import SceneGraph, animated_nodes, quaternions_to_matrices
+from glb_writer import COMPONENT_TYPES, TARGET_ARRAY_BUFFER, TARGET_ELEMENT_ARRAY_BUFFER, GLBBuilder, index_dtype
+from meshopt_codec import encode_index_sequence, encode_vertex_buffer
+
+# Bump when the encoding or the report changes so cached compressed models are rebuilt
+COMPRESS_VERSION = 2
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+
+# Position precision: 14 bits spans a 160 m hall in 1 cm steps
+POSITION_BITS = 14
+
+# FIFO cache used to score triangle orders; a conservative GPU size
+VERTEX_CACHE_SIZE = 16
+ACMR_SAMPLE_TRIANGLES = 50000
+
+MORTON_BITS = 21
+
+# Rough MeshoptDecoder throughput (decoded bytes per second) in WebAssembly
+# on a mid-range phone, for the report's client decode estimate; desktop
+# browsers decode several times faster
+CLIENT_DECODE_RATES = {'ATTRIBUTES': 1.0e9, 'INDICES': 0.5e9}
+
+FLOAT = 5126
+
+
+def morton_codes(points):
+    """64-bit Morton codes of (n, 3) points on a 2^21 grid over their bounds"""
+
+    points = np.asarray(points, dtype=np.float64)
+    lo = points.min(axis=0)
+    extent = max(float((points.max(axis=0) - lo).max()), 1e-12)
+    cells = ((points - lo) / extent * ((1 << MORTON_BITS) - 1)).astype(np.uint64)
+
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for axis in range(3):
+        x = cells[:, axis]
+        x = (x | (x << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+        x = (x | (x << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+        x = (x | (x << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+        x = (x | (x << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+        x = (x | (x << np.uint64(2))) & np.uint64(0x1249249249249249)
+        codes |= x << np.uint64(axis)
+    return codes
+
+
+def acmr(triangles, cache_size=VERTEX_CACHE_SIZE, sample=ACMR_SAMPLE_TRIANGLES):
+    """
+    Average cache miss ratio (vertex shader runs per triangle, 0.5-3) of a
+    FIFO post-transform cache over the first `sample` triangles: (misses,
+    triangles)
+    """
+
+    triangles = np.asarray(triangles)[:sample]
+    cache, fifo, misses = set(), collections.deque(), 0
+    for vertex in triangles.reshape(-1).tolist():
+        if vertex in cache:
+            continue
+        misses += 1
+        cache.add(vertex)
+        fifo.append(vertex)
+        if len(fifo) > cache_size:
+            cache.discard(fifo.popleft())
+    return misses, len(triangles)
+
+
+def spatial_order(positions, triangles):
+    """Triangles sorted along a Morton curve through their centroids"""
+
+    centroids = positions[triangles].mean(axis=1)
+    return triangles[np.argsort(morton_codes(centroids), kind='stable')]
+
+
+def first_use_order(triangles, vertex_count):
+    """
+    Vertex permutation in order of first use: (new_to_old, remapped
+    triangles). Unused vertices keep their relative order at the end.
+    """
+
+    flat = triangles.reshape(-1)
+    used, first = np.unique(flat, return_index=True)
+    unused = np.ones(vertex_count, dtype=bool)
+    unused[used] = False
+    new_to_old = np.concatenate([used[np.argsort(first)], np.flatnonzero(unused)])
+
+    old_to_new = np.empty(vertex_count, dtype=np.int64)
+    old_to_new[new_to_old] = np.arange(vertex_count)
+    return new_to_old, old_to_new[triangles]
+
+
+def _ratio(score):
+    misses, triangles = score
+    return misses / triangles if triangles else 0.0
+
+
+def optimize_triangles(positions, triangles):
+    """
+    Cache-friendly order for an indexed triangle list: (triangles, scores
+    before and after); the Morton order is only used when it scores better
+    """
+
+    before = acmr(triangles)
+    ordered = spatial_order(positions, triangles)
+    after = acmr(ordered)
+    if _ratio(after) < _ratio(before):
+        return ordered, before, after
+    return triangles, before, before
+
+
+def optimize_ranges(positions, triangles, ranges):
+    """
+    optimize_triangles() within each range of a merged primitive (glb_merge.py),
+    so every node keeps its own slice of the index buffer
+    """
+
+    parts, before_total, after_total = [], [0, 0], [0, 0]
+    for item in sorted(ranges, key=lambda r: r['start']):
+        part = triangles[item['start'] // 3:(item['start'] + item['count']) // 3]
+        part, before, after = optimize_triangles(positions, part) if len(part) else (part, (0, 0), (0, 0))
+        parts.append(part)
+        for totals, score in ((before_total, before), (after_total, after)):
+            totals[0] += score[0]
+            totals[1] += score[1]
+    return np.concatenate(parts), tuple(before_total), tuple(after_total)
+
+
+# ----------------------------------------------------------------------
+# Quantization
+# ----------------------------------------------------------------------
+
+def position_grid(lo, hi, bits=POSITION_BITS, centered=True):
+    """
+    Quantization grid covering [lo, hi]: (scale, offset) with a power-of-two
+    scale, so scaling node transforms by it is exact. The offset is a
+    multiple of the scale, or zero when not `centered`.
+    """
+
+    lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+    limit = (1 << (bits - 1)) - 1
+    center = (lo + hi) / 2 if centered else np.zeros(3)
+    extent = float(np.maximum(np.abs(hi - center), np.abs(lo - center)).max())
+    exponent = math.ceil(math.log2(extent / limit)) if extent > 0 else 0
+
+    while True:
+        scale = 2.0 ** exponent
+        offset = np.round(center / scale) * scale
+        if max(np.abs(np.round((lo - offset) / scale)).max(), np.abs(np.round((hi - offset) / scale)).max()) <= limit:
+            return scale, offset
+        exponent += 1
+
+
+def quantize_attribute(name, values, grid=None):
+    """
+    (array, normalized) to store for a float attribute, or None to keep the
+    original values
+    """
+
+    if name == 'POSITION':
+        if grid is None:
+            return None
+        scale, offset = grid
+        return np.round((values - offset) / scale).astype(np.int16), False
+    if name in ('NORMAL', 'TANGENT'):
+        return np.round(np.clip(values, -1.0, 1.0) * 127).astype(np.int8), True
+    if name.startswith('TEXCOORD_') and len(values) and values.min() >= 0 and values.max() <= 1:
+        return np.round(values * 65535).astype(np.uint16), True
+    if name == AO_ATTRIBUTE:
+        return np.round(np.clip(values, 0.0, 1.0) * 255).astype(np.uint8), True
+    return None
+
+
+def _vertex_bytes(array):
+    """(count, stride) bytes of an attribute, elements padded to 4 bytes"""
+
+    array = np.ascontiguousarray(array)
+    count = len(array)
+    element = array.dtype.itemsize * (array.size // count if count else 1)
+    rows = np.zeros((count, element + (-element % 4)), dtype=np.uint8)
+    rows[:, :element] = array.view(np.uint8).reshape(count, element)
+    return rows
+
+
+class _MeshoptWriter:
+    """Adds EXT_meshopt_compression bufferViews backed by one fallback buffer"""
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.fallback = None
+        self.raw_bytes = 0
+        self.encoded_bytes = 0
+        # Set once an attribute needs KHR_mesh_quantization's integer types
+        self.quantized = False
+
+    def add_view(self, encoded, byte_length, count, stride, mode, target):
+        if self.fallback is None:
+            self.fallback = self.builder.add_buffer(
+                {'byteLength': 0, 'extensions': {MESHOPT_EXTENSION: {'fallback': True}}})
+        fallback = self.builder.json['buffers'][self.fallback]
+        offset = fallback['byteLength'] + (-fallback['byteLength'] % 4)
+        fallback['byteLength'] = offset + byte_length
+
+        view = {
+            'buffer': self.fallback,
+            'byteOffset': offset,
+            'byteLength': byte_length,
+            'target': target,
+            'extensions': {MESHOPT_EXTENSION: {
+                'buffer': 0,
+                'byteOffset': self.builder.append_binary(encoded),
+                'byteLength': len(encoded),
+                'byteStride': stride,
+                'count': count,
+                'mode': mode,
+            }},
+        }
+        if mode == 'ATTRIBUTES':
+            view['byteStride'] = stride
+        self.raw_bytes += byte_length
+        self.encoded_bytes += len(encoded)
+        return self.builder._append('bufferViews', view)
+
+    def rewrite_accessor(self, accessor, array, normalized, mode='ATTRIBUTES'):
+        """Point `accessor` at a compressed copy of `array`"""
+
+        if mode == 'ATTRIBUTES':
+            rows = _vertex_bytes(array)
+            view = self.add_view(encode_vertex_buffer(rows), rows.size, len(rows), rows.shape[1],
+                                 mode, TARGET_ARRAY_BUFFER)
+        else:
+            view = self.add_view(encode_index_sequence(array), array.nbytes, len(array),
+                                 array.dtype.itemsize, mode, TARGET_ELEMENT_ARRAY_BUFFER)
+
+        accessor['bufferView'] = view
+        accessor['componentType'] = COMPONENT_TYPES[array.dtype]
+        accessor['count'] = len(array)
+        accessor.pop('byteOffset', None)
+        if normalized:
+            accessor['normalized'] = True
+        else:
+            accessor.pop('normalized', None)
+        accessor.pop('min', None)
+        accessor.pop('max', None)
+
+
+# ----------------------------------------------------------------------
+# Quantization groups and node transforms
+# ----------------------------------------------------------------------
+
+def mesh_groups(gltf):
+    """
+    Meshes that must share a quantization grid: those sharing a POSITION
+    accessor and every mesh with its LOD levels. List of sorted mesh lists.
+    """
+
+    meshes = gltf.get('meshes', [])
+    parent = list(range(len(meshes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    by_position = {}
+    for m, mesh in enumerate(meshes):
+        for primitive in mesh['primitives']:
+            accessor = primitive.get('attributes', {}).get('POSITION')
+            if accessor is not None:
+                parent[find(m)] = find(by_position.setdefault(accessor, m))
+    for node in gltf.get('nodes', []):
+        if 'mesh' in node:
+            for level in node.get('extras', {}).get('lod', []) or []:
+                if isinstance(level, dict) and isinstance(level.get('mesh'), int) and level['mesh'] < len(meshes):
+                    parent[find(level['mesh'])] = find(node['mesh'])
+
+    groups = collections.defaultdict(list)
+    for m in range(len(meshes)):
+        groups[find(m)].append(m)
+    return list(groups.values())
+
+
+def _group_nodes(gltf, meshes):
+    return [i for i, node in enumerate(gltf.get('nodes', [])) if node.get('mesh') in meshes]
+
+
+def can_quantize_positions(gltf, meshes):
+    """Whether a group's positions can be quantized with a grid folded into its nodes"""
+
+    nodes = gltf.get('nodes', [])
+    group_nodes = _group_nodes(gltf, meshes)
+    if not group_nodes:
+        return False
+
+    animated = animated_nodes(gltf)
+    for i in group_nodes:
+        node = nodes[i]
+        if i in animated or any(k in node for k in ('skin', 'camera', 'weights', 'extensions')):
+            return False
+        if any(child in animated for child in node.get('children', [])):
+            return False
+
+    for m in meshes:
+        for primitive in gltf['meshes'][m]['primitives']:
+            if is_draco_compressed(primitive) or primitive.get('targets'):
+                return False
+            accessor = gltf['accessors'][primitive.get('attributes', {}).get('POSITION', -1)] \
+                if 'POSITION' in primitive.get('attributes', {}) else None
+            if accessor is None or 'bufferView' not in accessor or 'sparse' in accessor or \
+                    accessor['componentType'] != FLOAT:
+                return False
+    return True
+
+
+def _dequantize_matrix(scale, offset):
+    matrix = np.eye(4) * scale
+    matrix[3, 3] = 1.0
+    matrix[:3, 3] = offset
+    return matrix
+
+
+def _set_matrix(node, matrix):
+    # glTF stores matrices column-major
+    node['matrix'] = matrix.T.reshape(-1).tolist()
+
+
+def fold_grid(node, scale, offset):
+    """node transform := node transform * dequantization"""
+
+    if 'matrix' in node:
+        _set_matrix(node, np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T @
+                    _dequantize_matrix(scale, offset))
+        return
+
+    node_scale = np.array(node.get('scale', (1.0, 1.0, 1.0)), dtype=np.float64)
+    if np.any(offset):
+        rotation = quaternions_to_matrices([node.get('rotation', (0.0, 0.0, 0.0, 1.0))])[0]
+        node['translation'] = (np.array(node.get('translation', (0.0, 0.0, 0.0))) +
+                               rotation @ (node_scale * offset)).tolist()
+    node['scale'] = (node_scale * scale).tolist()
+
+
+def unfold_grid(node, scale, offset):
+    """node transform := dequantization^-1 * node transform (for children)"""
+
+    if 'matrix' in node:
+        _set_matrix(node, np.linalg.inv(_dequantize_matrix(scale, offset)) @
+                    np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T)
+        return
+
+    node['translation'] = ((np.array(node.get('translation', (0.0, 0.0, 0.0))) - offset) / scale).tolist()
+    node['scale'] = (np.array(node.get('scale', (1.0, 1.0, 1.0)), dtype=np.float64) / scale).tolist()
+
+
+# ----------------------------------------------------------------------
+# Model
+# ----------------------------------------------------------------------
+
+def _accessor_uses(gltf):
+    uses = collections.Counter()
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            uses.update(primitive.get('attributes', {}).values())
+            if 'indices' in primitive:
+                uses[primitive['indices']] += 1
+            for target in primitive.get('targets', []):
+                uses.update(target.values())
+    return uses
+
+
+def _compressible(accessor):
+    return 'bufferView' in accessor and 'sparse' not in accessor
+
+
+def client_decode_seconds(gltf):
+    """
+    Estimated time MeshoptDecoder spends on a model's EXT_meshopt_compression
+    bufferViews on the client (CLIENT_DECODE_RATES); 0 for plain buffers
+    """
+
+    seconds = 0.0
+    for view in gltf.get('bufferViews', []):
+        ext = view.get('extensions', {}).get(MESHOPT_EXTENSION)
+        if ext:
+            rate = CLIENT_DECODE_RATES['ATTRIBUTES' if ext.get('mode') == 'ATTRIBUTES' else 'INDICES']
+            seconds += ext['count'] * ext['byteStride'] / rate
+    return seconds
+
+
+def python_read_seconds(glb_file):
+    """
+    Time to open a model and read every mesh accessor with glb_reader.py,
+    i.e. what the offline Python stages pay, not the client
+    """
+
+    started = time.perf_counter()
+    with GLBFile(glb_file) as glb:
+        seen = set()
+        for mesh in glb.json.get('meshes', []):
+            for primitive in mesh['primitives']:
+                accessors = list(primitive.get('attributes', {}).values()) + \
+                    ([primitive['indices']] if 'indices' in primitive else [])
+                for accessor in accessors:
+                    if accessor not in seen and 'bufferView' in glb.json['accessors'][accessor]:
+                        seen.add(accessor)
+                        np.ascontiguousarray(glb.accessor_float(accessor))
+    return time.perf_counter() - started
+
+
+def compress_model(glb_file, position_bits=POSITION_BITS, measure=False):
+    """
+    Compressed model for a GLB file: (GLB bytes, report). Raises ValueError
+    when the output would change the zones extract_zones() finds.
+    """
+
+    with GLBFile(glb_file) as glb:
+        builder = GLBBuilder.from_glb(glb)
+        gltf = builder.json
+        original = SceneGraph(glb.json)
+        accessors = gltf.get('accessors', [])
+        uses = _accessor_uses(gltf)
+        writer = _MeshoptWriter(builder)
+
+        grids, quantized_meshes = {}, 0
+        for meshes in mesh_groups(gltf):
+            if not can_quantize_positions(gltf, meshes):
+                continue
+            positions = [glb.accessor_float(p['attributes']['POSITION'])
+                         for m in meshes for p in gltf['meshes'][m]['primitives']]
+            positions = [p for p in positions if len(p)]
+            if not positions:
+                continue
+            centered = not any(gltf['nodes'][i].get('children') for i in _group_nodes(gltf, meshes))
+            grid = position_grid(np.min([p.min(axis=0) for p in positions], axis=0),
+                                 np.max([p.max(axis=0) for p in positions], axis=0),
+                                 position_bits, centered)
+            for m in meshes:
+                grids[m] = grid
+            quantized_meshes += len(meshes)
+
+        done = set()
+        scores = {'before': [0, 0], 'after': [0, 0]}
+        reordered = skipped_draco = 0
+
+        for m, mesh in enumerate(gltf.get('meshes', [])):
+            for primitive in mesh['primitives']:
+                if is_draco_compressed(primitive):
+                    skipped_draco += 1
+                    continue
+                attributes = primitive.get('attributes', {})
+                indices = primitive.get('indices')
+                vertex_count = accessors[attributes['POSITION']]['count'] if 'POSITION' in attributes else 0
+
+                # Reorder only what nobody else reads
+                new_to_old, triangles = None, None
+                if (indices is not None and primitive.get('mode', MODE_TRIANGLES) == MODE_TRIANGLES and
+                        'POSITION' in attributes and uses[indices] == 1 and
+                        _compressible(accessors[indices]) and accessors[indices]['count'] % 3 == 0):
+                    positions = glb.accessor_float(attributes['POSITION']).astype(np.float64)
+                    triangles = glb.accessor(indices).astype(np.int64).reshape(-1, 3)
+                    if len(triangles):
+                        ranges = primitive.get('extras', {}).get('ranges')
+                        if ranges:
+                            triangles, before, after = optimize_ranges(positions, triangles, ranges)
+                        else:
+                            triangles, before, after = optimize_triangles(positions, triangles)
+                        for key, score in (('before', before), ('after', after)):
+                            scores[key][0] += score[0]
+                            scores[key][1] += score[1]
+                        if not primitive.get('targets') and all(
+                                uses[a] == 1 and _compressible(accessors[a]) for a in attributes.values()):
+                            new_to_old, triangles = first_use_order(triangles, vertex_count)
+                            reordered += 1
+
+                for name, accessor_index in sorted(attributes.items()):
+                    accessor = accessors[accessor_index]
+                    if accessor_index in done or not _compressible(accessor):
+                        continue
+                    done.add(accessor_index)
+
+                    if accessor['componentType'] == FLOAT:
+                        values = glb.accessor(accessor_index)
+                        encoded = quantize_attribute(name, values.astype(np.float64), grids.get(m))
+                    else:
+                        values, encoded = glb.accessor(accessor_index), None
+                    if encoded is None:
+                        encoded = (np.array(values), accessor.get('normalized', False))
+                    elif name in ('POSITION', 'NORMAL', 'TANGENT'):
+                        writer.quantized = True
+                    array, normalized = encoded
+                    if new_to_old is not None:
+                        array = array[new_to_old]
+
+                    writer.rewrite_accessor(accessor, array, normalized)
+                    if name == 'POSITION' and len(array):
+                        values = array.reshape(len(array), -1)
+                        accessor['min'] = values.min(axis=0).tolist()
+                        accessor['max'] = values.max(axis=0).tolist()
+
+                if indices is not None and indices not in done and _compressible(accessors[indices]):
+                    done.add(indices)
+                    if triangles is None:
+                        values = glb.accessor(indices).astype(np.int64).reshape(-1)
+                    else:
+                        values = triangles.reshape(-1)
+                    writer.rewrite_accessor(accessors[indices],
+                                            values.astype(index_dtype(max(vertex_count, int(values.max(initial=0)) + 1))),
+                                            False, mode='INDICES')
+
+    # Fold the dequantization into every node drawing a quantized mesh
+    nodes = gltf.get('nodes', [])
+    position_error = 0.0
+    for i, node in enumerate(nodes):
+        if node.get('mesh') not in grids:
+            continue
+        scale, offset = grids[node['mesh']]
+        world_scale = float(np.linalg.norm(original.world_matrices[i][:3, :3], axis=0).max())
+        position_error = max(position_error, scale / 2 * world_scale)
+        for child in node.get('children', []):
+            unfold_grid(nodes[child], scale, offset)
+        fold_grid(node, scale, offset)
+
+    dropped_views = builder.compact()
+
+    used = gltf.setdefault('extensionsUsed', [])
+    required = gltf.setdefault('extensionsRequired', [])
+    for extension, active in ((QUANTIZATION_EXTENSION, writer.quantized),
+                              (MESHOPT_EXTENSION, writer.fallback is not None)):
+        if active:
+            for names in (used, required):
+                if extension not in names:
+                    names.append(extension)
+    for key in ('extensionsUsed', 'extensionsRequired'):
+        if not gltf[key]:
+            del gltf[key]
+    gltf.setdefault('asset', {}).setdefault('extras', {})['compression'] = {
+        'position_bits': position_bits, 'version': COMPRESS_VERSION}
+
+    check_zones(original.gltf, gltf)
+    data = builder.to_bytes()
+
+    input_bytes = os.path.getsize(glb_file)
+    with open(glb_file, 'rb') as f:
+        gzip_input = len(zlib.compress(f.read(), 6))
+    report = {
+        'input_bytes': input_bytes,
+        'output_bytes': len(data),
+        'gzip_input_bytes': gzip_input,
+        'gzip_output_bytes': len(zlib.compress(data, 6)),
+        'geometry_bytes': writer.raw_bytes,
+        'encoded_geometry_bytes': writer.encoded_bytes,
+        'quantized_meshes': quantized_meshes,
+        'meshes': len(gltf.get('meshes', [])),
+        'reordered_primitives': reordered,
+        'dropped_buffer_views': dropped_views,
+        'skipped_draco': skipped_draco,
+        'position_bits': position_bits,
+        'position_error': round(position_error, 6),
+        'acmr_input': round(_ratio(scores['before']), 4),
+        'acmr_output': round(_ratio(scores['after']), 4),
+        'client_decode_ms_input': round(client_decode_seconds(original.gltf) * 1000, 2),
+        'client_decode_ms_output': round(client_decode_seconds(gltf) * 1000, 2),
+    }
+    if measure:
+        report.update(measure_python_read_times(glb_file, data))
+    return data, report
+
+
+def measure_python_read_times(glb_file, data):
+    """python_read_seconds() of the original file and of `data` (compressed)"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return {
+            'python_read_seconds_input': round(python_read_seconds(glb_file), 4),
+            'python_read_seconds_output': round(python_read_seconds(path), 4),
+        }
+    finally:
+        os.unlink(path)
+
+
+def compress_glb_bytes(data, position_bits=POSITION_BITS, measure=False):
+    """compress_model() for a model held in memory (e.g. a freshly built LOD model)"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return compress_model(path, position_bits, measure)
+    finally:
+        os.unlink(path)
+
+
+def default_output(glb_file):
+    root, ext = os.path.splitext(glb_file)
+    return f"{root}_compressed{ext or '.glb'}"
+
+
+def print_report(report):
+    def mb(n):
+        return f"{n / 1e6:.2f} MB"
+
+    print(f"📐 File: {mb(report['input_bytes'])} -> {mb(report['output_bytes'])} "
+          f"({report['output_bytes'] / max(report['input_bytes'], 1):.0%}), "
+          f"gzip {mb(report['gzip_input_bytes'])} -> {mb(report['gzip_output_bytes'])}")
+    print(f"📐 Geometry: {mb(report['geometry_bytes'])} quantized -> {mb(report['encoded_geometry_bytes'])} encoded, "
+          f"{report['quantized_meshes']}/{report['meshes']} meshes with {report['position_bits']}-bit positions "
+          f"(max error {report['position_error'] * 1000:.2f} mm)")
+    print(f"📐 Vertex cache: ACMR {report['acmr_input']:.3f} -> {report['acmr_output']:.3f} "
+          f"({report['reordered_primitives']} primitives renumbered)")
+    print(f"📐 Client decode (MeshoptDecoder, estimated for a phone): {report['client_decode_ms_input']:.1f} ms -> "
+          f"{report['client_decode_ms_output']:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize, reorder and meshopt-compress the meshes of a GLB model")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default=None, help="output GLB (default: <model>_compressed.glb)")
+    parser.add_argument('--position-bits', type=int, default=POSITION_BITS,
+                        help=f"position precision in bits, 8-16 (default: {POSITION_BITS})")
+    parser.add_argument('--report', default=None, help="also write the size/decode report as JSON")
+    parser.add_argument('--python-read-time', action='store_true',
+                        help="also time reading the geometry back with glb_reader.py (offline stages only)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+    if not 8 <= args.position_bits <= 16:
+        print("❌ Position bits must be between 8 and 16")
+        return 1
+
+    output = args.output or default_output(args.glb_file)
+    print(f"📂 Compressing {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        data, report = compress_model(args.glb_file, args.position_bits, measure=args.python_read_time)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if report['skipped_draco']:
+        print(f"⚠️ {report['skipped_draco']} Draco-compressed primitive(s) kept as they are")
+    print_report(report)
+    if args.python_read_time:
+        print(f"⏱️ Offline Python read (glb_reader.py, not the client): "
+              f"{report['python_read_seconds_input'] * 1000:.0f} ms -> {report['python_read_seconds_output'] * 1000:.0f} ms")
+    print(f"✅ Done in {time.perf_counter() - started:.2f}s")
+
+    if write_if_changed(output, data):
+        print(f"💾 Saved to: {output}")
+    if args.report and write_if_changed(args.report, json.dumps(report, indent=2) + '\n'):
+        print(f"📝 Report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+World-space triangle extraction from GLB files
+Collects the triangles of every mesh node in a scene into flat NumPy arrays
+(vertices, triangle indices, owning node and material per triangle), with
+node transforms from glb_scene applied. Nodes instanced with
+EXT_mesh_gpu_instancing (glb_instancing.py) contribute one copy of their
+triangles per instance.
+
+Draco-compressed primitives (KHR_draco_mesh_compression) cannot be decoded
+here; they are skipped and counted in TriangleSoup.skipped_draco.
+"""
+
+import numpy as np
+
+from glb_scene import compose_trs
+
+DRACO_EXTENSION = 'KHR_draco_mesh_compression'
+INSTANCING_EXTENSION = 'EXT_mesh_gpu_instancing'
+
+MODE_TRIANGLES = 4
+MODE_TRIANGLE_STRIP = 5
+MODE_TRIANGLE_FAN = 6
+
+
+def is_draco_compressed(primitive):
+    return DRACO_EXTENSION in primitive.get('extensions', {})
+
+
+def primitive_triangles(glb, primitive):
+    """(T, 3) int64 vertex indices for a primitive (lists, strips and fans)"""
+
+    mode = primitive.get('mode', MODE_TRIANGLES)
+    if 'indices' in primitive:
+        indices = glb.accessor(primitive['indices']).astype(np.int64)
+    else:
+        count = glb.json['accessors'][primitive['attributes']['POSITION']]['count']
+        indices = np.arange(count, dtype=np.int64)
+
+    if mode == MODE_TRIANGLES:
+        usable = len(indices) - len(indices) % 3
+        return indices[:usable].reshape(-1, 3)
+
+    if mode == MODE_TRIANGLE_STRIP and len(indices) >= 3:
+        a, b, c = indices[:-2], indices[1:-1], indices[2:]
+        # Every other strip triangle is flipped to keep a consistent winding
+        odd = np.arange(len(a)) % 2 == 1
+        return np.stack([a, np.where(odd, c, b), np.where(odd, b, c)], axis=1)
+
+    if mode == MODE_TRIANGLE_FAN and len(indices) >= 3:
+        first = np.full(len(indices) - 2, indices[0])
+        return np.stack([first, indices[1:-1], indices[2:]], axis=1)
+
+    # Points and lines carry no surface
+    return np.zeros((0, 3), dtype=np.int64)
+
+
+def instance_matrices(glb, node, matrix):
+    """
+    (n, 4, 4) world matrices a mesh node is drawn with: `matrix` (its world
+    transform) times each EXT_mesh_gpu_instancing instance, or just `matrix`
+    """
+
+    instancing = node.get('extensions', {}).get(INSTANCING_EXTENSION)
+    if not instancing:
+        return np.asarray(matrix, dtype=np.float64)[None]
+
+    attributes = instancing.get('attributes', {})
+    values = {name: glb.accessor_float(accessor).astype(np.float64) for name, accessor in attributes.items()
+              if name in ('TRANSLATION', 'ROTATION', 'SCALE')}
+    if not values:
+        return np.asarray(matrix, dtype=np.float64)[None]
+    count = min(len(v) for v in values.values())
+    local = compose_trs(values.get('TRANSLATION', np.zeros((count, 3)))[:count],
+                        values.get('ROTATION', np.tile([0.0, 0.0, 0.0, 1.0], (count, 1)))[:count],
+                        values.get('SCALE', np.ones((count, 3)))[:count])
+    return np.matmul(matrix, local)
+
+
+def transform_points(points, matrix):
+    """Apply a 4x4 affine matrix to (n, 3) points"""
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+class TriangleSoup:
+    """Flat world-space triangle arrays for a set of mesh nodes"""
+
+    def __init__(self, vertices, triangles, node_ids, materials, skipped_draco=0):
+        self.vertices = vertices        # (V, 3) float64
+        self.triangles = triangles      # (T, 3) int64 into vertices
+        self.node_ids = node_ids        # (T,) int32 owning node
+        self.materials = materials      # (T,) int32 material index, -1 = default
+        self.skipped_draco = skipped_draco
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def corners(self):
+        """(T, 3, 3) triangle corner positions"""
+        return self.vertices[self.triangles]
+
+    def normals(self):
+        """(T, 3) unit face normals (zero for degenerate triangles)"""
+        corners = self.corners()
+        n = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        length = np.linalg.norm(n, axis=1, keepdims=True)
+        return n / np.where(length > 0, length, 1.0)
+
+    def subset(self, mask):
+        """Soup restricted to the triangles selected by a boolean mask"""
+        return TriangleSoup(self.vertices, self.triangles[mask], self.node_ids[mask],
+                            self.materials[mask], self.skipped_draco)
+
+    def bounds(self):
+        used = self.vertices[np.unique(self.triangles)] if len(self.triangles) else self.vertices[:0]
+        if not len(used):
+            return np.zeros(3), np.zeros(3)
+        return used.min(axis=0), used.max(axis=0)
+
+
+def scene_triangles(glb, scene, node_indices=None):
+    """
+    Gather world-space triangles for mesh nodes.
+
+    `node_indices` restricts the gather to specific nodes; by default every
+    mesh node reachable from the default scene is used.
+    """
+
+    if node_indices is None:
+        node_indices = scene.reachable_nodes()
+
+    world = scene.world_matrices
+    vertices, triangles, node_ids, materials = [], [], [], []
+    vertex_count = 0
+    skipped = 0
+
+    for node_index in node_indices:
+        node = scene.nodes[node_index]
+        if 'mesh' not in node:
+            continue
+
+        matrices = instance_matrices(glb, node, world[node_index])
+
+        for primitive in glb.json['meshes'][node['mesh']]['primitives']:
+            if is_draco_compressed(primitive):
+                skipped += 1
+                continue
+            if 'POSITION' not in primitive.get('attributes', {}):
+                continue
+
+            tris = primitive_triangles(glb, primitive)
+            if not len(tris):
+                continue
+
+            positions = glb.accessor_float(primitive['attributes']['POSITION']).astype(np.float64)
+            for matrix in matrices:
+                mirrored = np.linalg.det(matrix[:3, :3]) < 0
+                vertices.append(transform_points(positions, matrix))
+                triangles.append((tris[:, ::-1] if mirrored else tris) + vertex_count)
+                node_ids.append(np.full(len(tris), node_index, dtype=np.int32))
+                materials.append(np.full(len(tris), primitive.get('material', -1), dtype=np.int32))
+                vertex_count += len(positions)
+
+    if not triangles:
+        return TriangleSoup(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64),
+                            np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), skipped)
+
+    return TriangleSoup(np.concatenate(vertices), np.concatenate(triangles),
+                        np.concatenate(node_ids), np.concatenate(materials), skipped)
@@ -0,0 +1,408 @@
+"""
+GPU instancing for repeated venue meshes
+Finds mesh nodes that draw the same geometry - nodes sharing a mesh, or
+copies exported as separate meshes, moved, rotated or with their transform
+applied - and collapses every group into one node with
+EXT_mesh_gpu_instancing. The copies become one instanced draw call per
+primitive and share one copy of the vertex data; three.js' GLTFLoader turns
+such nodes into InstancedMeshes.
+
+Nodes are compared in world space. Candidates are bucketed by everything
+that has to match exactly (materials, primitive layout, index buffers,
+UVs, colors and other attributes); inside a bucket each node is fitted to
+the groups found so far with a rigid transform (Kabsch, vertices in
+order) and joins the first one where every vertex lands within TOLERANCE
+meters and the rotated normals agree. Mirrored copies don't match, their
+winding is reversed.
+
+The copies keep their nodes - names, extras, children and transforms stay,
+only `mesh` goes - so extract_zones() reads the output like the input and
+ZONE_ empties parented to furniture stay put. Each group becomes a new
+scene root named after its mesh, with the copies' node names in
+extras.instances; the app culls a group once visibility hides all of
+those nodes (VenueModel.tsx). Meshes, accessors and bufferViews nothing
+draws any more are dropped.
+
+Skinned, morphed, animated and Draco-compressed nodes, nodes with LOD
+levels and nodes whose transform shears are left alone; run glb_lod.py
+after this stage, not before.
+
+    node = {"name": "Chair_instances", "mesh": 4,
+            "extensions": {"EXT_mesh_gpu_instancing": {"attributes": {
+                "TRANSLATION": 51, "ROTATION": 52}}},
+            "extras": {"instances": ["Chair.001", "Chair.002", ...]}}
+
+Requires: numpy
+
+USAGE:
+    python glb_instancing.py public/SM_MFF.glb          # -> public/SM_MFF_instanced.glb
+    python glb_instancing.py venue.glb -o venue_inst.glb --min-instances 4 --tolerance 0.001
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from glb_geometry import INSTANCING_EXTENSION, is_draco_compressed
+from glb_lod import check_zones
+from glb_reader import GLBFile
+from glb_scene import SceneGraph, animated_nodes, decompose_matrices, node_name
+from glb_writer import GLBBuilder
+
+# Bump when grouping or the output changes so cached models are rebuilt
+INSTANCING_VERSION = 1
+
+# Smallest group worth an instanced node
+MIN_INSTANCES = 2
+
+# Largest vertex deviation (meters) and normal deviation (unit vectors) a
+# copy may have from the fitted transform
+TOLERANCE = 1e-4
+NORMAL_TOLERANCE = 0.02
+
+# Attributes that turn with the copy; every other one has to match exactly
+_DIRECTIONS = ('NORMAL', 'TANGENT')
+
+
+def _shears(matrix, tolerance=1e-5):
+    """Whether a transform can't be written as translation * rotation * scale"""
+
+    basis = np.asarray(matrix, dtype=np.float64)[:3, :3]
+    gram = basis.T @ basis
+    scale = np.sqrt(np.diag(gram))
+    if np.any(scale < 1e-12):
+        return True
+    cosines = gram / np.outer(scale, scale)
+    return bool(np.abs(cosines - np.eye(3)).max() > tolerance)
+
+
+def candidate_nodes(gltf, graph):
+    """Mesh nodes of the default scene that may be instanced"""
+
+    animated = animated_nodes(gltf)
+    parents = graph.parents
+    world = graph.world_matrices
+    candidates = []
+    for index in graph.reachable_nodes():
+        node = graph.nodes[index]
+        if 'mesh' not in node or any(key in node for key in ('skin', 'weights', 'extensions')):
+            continue
+        extras = node.get('extras')
+        if isinstance(extras, dict) and extras.get('lod'):
+            continue
+
+        ancestor = index
+        while ancestor >= 0 and ancestor not in animated:
+            ancestor = int(parents[ancestor])
+        if ancestor >= 0:
+            continue
+
+        primitives = gltf['meshes'][node['mesh']].get('primitives', [])
+        if not primitives or any(is_draco_compressed(p) or p.get('targets') or 'POSITION' not in p['attributes']
+                                 for p in primitives):
+            continue
+        if _shears(world[index]):
+            continue
+        candidates.append(index)
+    return candidates
+
+
+def _digest(array):
+    array = np.ascontiguousarray(array)
+    return hashlib.sha1(array.dtype.str.encode('ascii') + repr(array.shape).encode('ascii')
+                        + array.tobytes()).hexdigest()
+
+
+class _MeshData:
+    """Local geometry of one mesh and the key copies of it must share"""
+
+    def __init__(self, glb, mesh_index):
+        self.positions = []
+        self.directions = []
+        key = []
+        for primitive in glb.json['meshes'][mesh_index]['primitives']:
+            attributes = primitive['attributes']
+            self.positions.append(glb.accessor_float(attributes['POSITION']).astype(np.float64))
+            for name in _DIRECTIONS:
+                if name in attributes:
+                    self.directions.append(glb.accessor_float(attributes[name])[:, :3].astype(np.float64))
+
+            exact = sorted((name, _digest(glb.accessor(accessor))) for name, accessor in attributes.items()
+                           if name != 'POSITION' and name not in _DIRECTIONS)
+            indices = _digest(glb.accessor(primitive['indices'])) if 'indices' in primitive else None
+            key.append((primitive.get('material'), primitive.get('mode', 4), len(self.positions[-1]),
+                        indices, tuple(exact), tuple(name in attributes for name in _DIRECTIONS)))
+        self.key = tuple(key)
+
+    def world(self, matrix):
+        """(positions, unit directions) in world space"""
+
+        positions = np.concatenate(self.positions) @ matrix[:3, :3].T + matrix[:3, 3]
+        if not self.directions:
+            return positions, None
+        directions = np.concatenate(self.directions) @ np.linalg.inv(matrix[:3, :3])
+        length = np.linalg.norm(directions, axis=1, keepdims=True)
+        return positions, directions / np.where(length > 0, length, 1.0)
+
+
+def rigid_fit(source, target):
+    """
+    Rotation and translation (R, t) that best move `source` points onto
+    `target` points, in order (Kabsch); proper rotations only
+    """
+
+    source_center, target_center = source.mean(axis=0), target.mean(axis=0)
+    u, _, vt = np.linalg.svd((source - source_center).T @ (target - target_center))
+    d = 1.0 if np.linalg.det(vt.T @ u.T) >= 0 else -1.0
+    rotation = vt.T @ np.diag([1.0, 1.0, d]) @ u.T
+    return rotation, target_center - rotation @ source_center
+
+
+def _fits(source, target, rotation, translation, tolerance, normal_tolerance):
+    positions, directions = source
+    if np.abs(positions @ rotation.T + translation - target[0]).max() > tolerance:
+        return False
+    return directions is None or np.abs(directions @ rotation.T - target[1]).max() <= normal_tolerance
+
+
+def find_instances(glb, graph, tolerance=TOLERANCE, normal_tolerance=NORMAL_TOLERANCE,
+                   min_instances=MIN_INSTANCES):
+    """
+    Groups of nodes drawing the same geometry: [{mesh, nodes, matrices}]
+    with the mesh to instance and the world matrix of every copy (the node
+    order of the scene)
+    """
+
+    meshes = {}
+    buckets = {}
+    for index in candidate_nodes(glb.json, graph):
+        mesh_index = graph.nodes[index]['mesh']
+        if mesh_index not in meshes:
+            meshes[mesh_index] = _MeshData(glb, mesh_index)
+        buckets.setdefault(meshes[mesh_index].key, []).append(index)
+
+    world = graph.world_matrices
+    groups = []
+    for nodes in buckets.values():
+        if len(nodes) < min_instances:
+            continue
+        found = []
+        for index in nodes:
+            mesh = meshes[graph.nodes[index]['mesh']]
+            geometry = mesh.world(world[index])
+            for group in found:
+                rotation, translation = rigid_fit(group['geometry'][0], geometry[0])
+                if _fits(group['geometry'], geometry, rotation, translation, tolerance, normal_tolerance):
+                    move = np.eye(4)
+                    move[:3, :3], move[:3, 3] = rotation, translation
+                    group['nodes'].append(index)
+                    group['matrices'].append(move @ group['matrices'][0])
+                    break
+            else:
+                found.append({'mesh': graph.nodes[index]['mesh'], 'nodes': [index],
+                              'matrices': [world[index]], 'geometry': geometry})
+        groups.extend({key: group[key] for key in ('mesh', 'nodes', 'matrices')}
+                      for group in found if len(group['nodes']) >= min_instances)
+    return groups
+
+
+def _accessor_references(gltf):
+    """(container, key) of every accessor index in a glTF document"""
+
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            yield from ((primitive['attributes'], name) for name in primitive.get('attributes', {}))
+            if 'indices' in primitive:
+                yield primitive, 'indices'
+            for target in primitive.get('targets', []):
+                yield from ((target, name) for name in target)
+    for skin in gltf.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            yield skin, 'inverseBindMatrices'
+    for animation in gltf.get('animations', []):
+        for sampler in animation.get('samplers', []):
+            yield sampler, 'input'
+            yield sampler, 'output'
+    for node in gltf.get('nodes', []):
+        attributes = node.get('extensions', {}).get(INSTANCING_EXTENSION, {}).get('attributes', {})
+        yield from ((attributes, name) for name in attributes)
+
+
+def prune_unused(gltf):
+    """Drop meshes and accessors nothing refers to; returns how many of each"""
+
+    nodes = gltf.get('nodes', [])
+    lod_levels = [level for node in nodes if isinstance(node.get('extras'), dict)
+                  for level in (node['extras'].get('lod') or [])]
+    mesh_holders = [node for node in nodes if 'mesh' in node] + lod_levels
+    used = sorted({holder['mesh'] for holder in mesh_holders})
+    remap = {old: new for new, old in enumerate(used)}
+    meshes = gltf.get('meshes', [])
+    dropped_meshes = len(meshes) - len(used)
+    for holder in mesh_holders:
+        holder['mesh'] = remap[holder['mesh']]
+    if meshes:
+        gltf['meshes'] = [meshes[i] for i in used]
+
+    references = list(_accessor_references(gltf))
+    used = sorted({container[key] for container, key in references})
+    remap = {old: new for new, old in enumerate(used)}
+    accessors = gltf.get('accessors', [])
+    for container, key in references:
+        container[key] = remap[container[key]]
+    if accessors:
+        gltf['accessors'] = [accessors[i] for i in used]
+    return dropped_meshes, len(accessors) - len(used)
+
+
+def draw_calls(gltf):
+    """Draw calls for the default scene: one per primitive of every drawn mesh node"""
+
+    graph = SceneGraph(gltf)
+    return sum(len(gltf['meshes'][graph.nodes[i]['mesh']].get('primitives', []))
+               for i in graph.reachable_nodes() if 'mesh' in graph.nodes[i])
+
+
+def _unique_name(name, taken):
+    candidate, n = name, 1
+    while candidate in taken:
+        candidate = f"{name}.{n:03d}"
+        n += 1
+    taken.add(candidate)
+    return candidate
+
+
+def instance_model(glb_file, tolerance=TOLERANCE, min_instances=MIN_INSTANCES):
+    """
+    Copy of a model with its repeated meshes GPU-instanced: (GLB bytes,
+    report). Raises ValueError when the output would change the zones
+    extract_zones() finds.
+    """
+
+    with GLBFile(glb_file) as glb:
+        graph = SceneGraph(glb.json)
+        groups = find_instances(glb, graph, tolerance, min_instances=min_instances)
+        builder = GLBBuilder.from_glb(glb)
+        gltf = builder.json
+        meshes_before = len(gltf.get('meshes', []))
+
+        taken = {node_name(node, i) for i, node in enumerate(gltf.get('nodes', []))}
+        roots = gltf['scenes'][gltf.get('scene', 0)].setdefault('nodes', [])
+        for group in groups:
+            translations, rotations, scales = decompose_matrices(np.array(group['matrices']))
+            attributes = {'TRANSLATION': builder.add_accessor(translations.astype(np.float32))}
+            if not np.allclose(rotations, [0.0, 0.0, 0.0, 1.0], atol=1e-7):
+                attributes['ROTATION'] = builder.add_accessor(rotations.astype(np.float32))
+            if not np.allclose(scales, 1.0, atol=1e-7):
+                attributes['SCALE'] = builder.add_accessor(scales.astype(np.float32))
+
+            mesh_name = gltf['meshes'][group['mesh']].get('name', f"mesh_{group['mesh']}")
+            names = [node_name(gltf['nodes'][i], i) for i in group['nodes']]
+            roots.append(builder.add_node({
+                'name': _unique_name(f"{mesh_name}_instances", taken),
+                'mesh': group['mesh'],
+                'extensions': {INSTANCING_EXTENSION: {'attributes': attributes}},
+                'extras': {'instances': names},
+            }))
+            for i in group['nodes']:
+                del gltf['nodes'][i]['mesh']
+
+        if groups:
+            for key in ('extensionsUsed', 'extensionsRequired'):
+                if INSTANCING_EXTENSION not in gltf.setdefault(key, []):
+                    gltf[key].append(INSTANCING_EXTENSION)
+        dropped_meshes, dropped_accessors = prune_unused(gltf)
+        builder.compact()
+        check_zones(glb.json, gltf)
+        data = builder.to_bytes()
+
+        report = {
+            'groups': len(groups),
+            'instanced_nodes': sum(len(group['nodes']) for group in groups),
+            'largest_group': max((len(group['nodes']) for group in groups), default=0),
+            'draw_calls_input': draw_calls(glb.json),
+            'draw_calls_output': draw_calls(gltf),
+            'meshes_input': meshes_before,
+            'meshes_output': meshes_before - dropped_meshes,
+            'dropped_accessors': dropped_accessors,
+            'input_bytes': os.path.getsize(glb_file),
+            'output_bytes': len(data),
+            'tolerance': tolerance,
+        }
+    return data, report
+
+
+def instance_model_bytes(data, tolerance=TOLERANCE, min_instances=MIN_INSTANCES):
+    """instance_model() for a model held in memory"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return instance_model(path, tolerance, min_instances)
+    finally:
+        os.unlink(path)
+
+
+def default_output(glb_file):
+    root, ext = os.path.splitext(glb_file)
+    return f"{root}_instanced{ext or '.glb'}"
+
+
+def print_report(report):
+    print(f"📐 Draw calls: {report['draw_calls_input']} -> {report['draw_calls_output']}, "
+          f"meshes: {report['meshes_input']} -> {report['meshes_output']}")
+    print(f"📐 File: {report['input_bytes'] / 1e6:.2f} MB -> {report['output_bytes'] / 1e6:.2f} MB "
+          f"({report['output_bytes'] / max(report['input_bytes'], 1):.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collapse repeated meshes of a GLB model into GPU-instanced nodes")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default=None, help="output GLB (default: <model>_instanced.glb)")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f"largest vertex deviation of a copy in meters (default: {TOLERANCE})")
+    parser.add_argument('--min-instances', type=int, default=MIN_INSTANCES,
+                        help=f"smallest group to instance (default: {MIN_INSTANCES})")
+    parser.add_argument('--report', default=None, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+    if args.tolerance <= 0 or args.min_instances < 2:
+        print("❌ --tolerance must be positive and --min-instances at least 2")
+        return 1
+
+    output = args.output or default_output(args.glb_file)
+    print(f"📂 Looking for repeated meshes in {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        data, report = instance_model(args.glb_file, args.tolerance, args.min_instances)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not report['groups']:
+        print("⚠️ No repeated meshes found")
+    else:
+        print(f"✅ {report['instanced_nodes']} nodes in {report['groups']} instanced groups "
+              f"(largest {report['largest_group']}) ({time.perf_counter() - started:.2f}s)")
+    print_report(report)
+
+    if write_if_changed(output, data):
+        print(f"💾 Saved to: {output}")
+    if args.report and write_if_changed(args.report, json.dumps(report, indent=2) + '\n'):
+        print(f"📝 Report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,505 @@
+"""
+LOD chain generation for venue models
+Decimates every mesh of a GLB into a chain of coarser levels and writes
+them back into a copy of the model. The original nodes, meshes and
+bufferViews are left exactly as they were (ZONE_ empties, names and extras
+included, so extract_zones() reads the output like the input); each level
+is an extra mesh and every node that uses a decimated mesh lists its levels
+in extras:
+
+    node.extras.lod = [{"mesh": 12, "triangles": 5120, "ratio": 0.5,
+                        "error": 0.004, "distance": 18.2}, ...]
+
+`error` is the RMS distance (meters, world scale) between a level and the
+full-detail surface and `distance` the camera distance from which that
+error stays under PIXEL_ERROR pixels on a 1080p screen; the client switches
+geometry at those distances (src/hooks/useLodLevels.ts).
+
+Decimation is quadric error clustering (Lindstrom 2000): vertices are
+snapped to a uniform grid, every cell sums the plane quadrics of the
+triangles touching it and is replaced by the point that minimizes them,
+collapsed triangles are dropped. Everything is a handful of NumPy passes
+over the arrays (about 3.5 s per million triangles for the whole chain on
+one core, 4M-triangle scans included); the grid
+size is searched per primitive to hit each level's triangle ratio, and each
+level is decimated from the previous one. Meshes are spread over a process
+pool.
+
+Skinned, morphed, Draco-compressed and small primitives are kept as they
+are in every level; meshes of GPU-instanced nodes (glb_instancing.py) and
+merged meshes (glb_merge.py) get no levels.
+
+Requires: numpy
+
+USAGE:
+    python glb_lod.py public/SM_MFF.glb                 # -> public/SM_MFF_lod.glb
+    python glb_lod.py venue.glb -o venue_lod.glb --ratios 0.5 0.2 0.05 -j 4
+"""
+
+import argparse
+import concurrent.futures
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from extract_zones_from_glb import extract_zones
+from glb_geometry import INSTANCING_EXTENSION, is_draco_compressed, primitive_triangles
+from glb_reader import GLBFile
+from glb_scene import SceneGraph
+from glb_writer import TARGET_ARRAY_BUFFER, GLBBuilder
+
+# Bump when decimation changes so cached LOD models are rebuilt
+LOD_VERSION = 1
+
+# Triangle count of each level relative to full detail
+LOD_RATIOS = (0.5, 0.25, 0.1)
+
+# Primitives smaller than this are not decimated
+MIN_TRIANGLES = 128
+
+# A level that keeps more than this share of the previous level's triangles is dropped
+MIN_REDUCTION = 0.9
+
+# Screen-space error budget used to derive switch distances
+PIXEL_ERROR = 2.0
+VIEWPORT_HEIGHT = 1080
+FIELD_OF_VIEW_DEG = 50.0
+
+# Grid search: stop when within this share of the target triangle count
+COUNT_TOLERANCE = 0.1
+MAX_GRID_STEPS = 8
+
+# Attributes averaged per cell, baked occlusion (glb_ao.py) included; anything
+# else (tangents, skin weights, other custom attributes) is dropped from
+# decimated levels
+KEPT_ATTRIBUTES = ('NORMAL', 'TEXCOORD_', 'COLOR_', '_OCCLUSION')
+
+# Quadric components: upper triangle of the symmetric 4x4 plane matrix
+_QUADRIC_PAIRS = [(0, 0), (0, 1), (0, 2), (0, 3), (1, 1), (1, 2), (1, 3), (2, 2), (2, 3), (3, 3)]
+
+
+def switch_distance(error, pixel_error=PIXEL_ERROR):
+    """Camera distance at which `error` meters project to `pixel_error` pixels"""
+    focal = VIEWPORT_HEIGHT / (2 * math.tan(math.radians(FIELD_OF_VIEW_DEG) / 2))
+    return error * focal / pixel_error
+
+
+def _cell_keys(positions, cell_size):
+    """Compact cell index per vertex and the integer grid coordinates per cell"""
+
+    grid = np.floor((positions - positions.min(axis=0)) / cell_size).astype(np.int64)
+    dims = grid.max(axis=0) + 1
+    keys = (grid[:, 0] * dims[1] + grid[:, 1]) * dims[2] + grid[:, 2]
+    cells, vertex_cell = np.unique(keys, return_inverse=True)
+    coords = np.stack([cells // (dims[1] * dims[2]), (cells // dims[2]) % dims[1], cells % dims[2]], axis=1)
+    return vertex_cell.ravel(), coords
+
+
+def _collapsed_mask(t):
+    return (t[:, 0] != t[:, 1]) & (t[:, 1] != t[:, 2]) & (t[:, 0] != t[:, 2])
+
+
+def _collapse(triangles, vertex_cell):
+    """Triangles over cells, without collapsed or duplicate ones (winding kept)"""
+
+    t = vertex_cell[triangles]
+    t = t[_collapsed_mask(t)]
+    if not len(t):
+        return t
+
+    # Rotate each triangle to start at its smallest index so duplicates line up
+    start = np.argmin(t, axis=1)
+    t = np.take_along_axis(t, (start[:, None] + np.arange(3)) % 3, axis=1)
+    cells = int(t.max()) + 1
+    if cells < 1 << 21:
+        _, first = np.unique((t[:, 0] * cells + t[:, 1]) * cells + t[:, 2], return_index=True)
+    else:
+        _, first = np.unique(t, axis=0, return_index=True)
+    return t[np.sort(first)]
+
+
+def find_cell_size(positions, triangles, target, area):
+    """
+    Grid cell size that leaves roughly `target` triangles. Clustering a
+    surface into cells of size s leaves ~2 * area / s^2 triangles, which
+    gives the first guess and the update rule.
+    """
+
+    extent = float(np.max(positions.max(axis=0) - positions.min(axis=0)))
+    if extent <= 0:
+        return None
+    cell = math.sqrt(2 * area / max(target, 1)) if area > 0 else extent / 10
+
+    best = None
+    for _ in range(MAX_GRID_STEPS):
+        cell = min(max(cell, extent * 1e-6), extent)
+        vertex_cell, _ = _cell_keys(positions, cell)
+        # Duplicates are rare enough to leave out of the estimate
+        count = int(_collapsed_mask(vertex_cell[triangles]).sum())
+        if best is None or abs(count - target) < abs(best[1] - target):
+            best = (cell, count)
+        if abs(count - target) <= COUNT_TOLERANCE * target or count == 0 and cell <= extent * 1e-6:
+            break
+        cell *= math.sqrt(max(count, 1) / target)
+    return best[0]
+
+
+def _quadrics(positions, triangles):
+    """Area-weighted plane quadrics (T, 10) and areas (T,) of the triangles"""
+
+    corners = positions[triangles]
+    normal = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    length = np.linalg.norm(normal, axis=1)
+    area = 0.5 * length
+    normal = normal / np.where(length > 0, length, 1.0)[:, None]
+    plane = np.column_stack([normal, -np.einsum('ij,ij->i', normal, corners[:, 0])])
+    quadric = np.stack([plane[:, i] * plane[:, j] for i, j in _QUADRIC_PAIRS], axis=1)
+    return quadric * area[:, None], area
+
+
+def _solve_symmetric(a, b):
+    """Batched 3x3 solve via cofactors (a is symmetric and regularized)"""
+
+    a00, a01, a02 = a[:, 0, 0], a[:, 0, 1], a[:, 0, 2]
+    a11, a12, a22 = a[:, 1, 1], a[:, 1, 2], a[:, 2, 2]
+    c00 = a11 * a22 - a12 * a12
+    c01 = a02 * a12 - a01 * a22
+    c02 = a01 * a12 - a02 * a11
+    c11 = a00 * a22 - a02 * a02
+    c12 = a01 * a02 - a00 * a12
+    c22 = a00 * a11 - a01 * a01
+    det = a00 * c00 + a01 * c01 + a02 * c02
+    inv_det = np.where(det > 0, 1.0 / np.where(det > 0, det, 1.0), 0.0)
+    x = np.column_stack([
+        c00 * b[:, 0] + c01 * b[:, 1] + c02 * b[:, 2],
+        c01 * b[:, 0] + c11 * b[:, 1] + c12 * b[:, 2],
+        c02 * b[:, 0] + c12 * b[:, 1] + c22 * b[:, 2],
+    ])
+    return x * inv_det[:, None]
+
+
+def cluster_decimate(positions, triangles, attributes, cell_size, quadrics=None):
+    """
+    One level of quadric error clustering. `quadrics` are the triangles'
+    (quadric, area) from _quadrics() when the caller already has them.
+
+    Returns (positions, triangles, attributes, rms_error): every non-empty
+    cell becomes one vertex placed where the summed quadric of the cell's
+    triangles is smallest (clamped to the cell), attributes are averaged
+    per cell.
+    """
+
+    vertex_cell, coords = _cell_keys(positions, cell_size)
+    cells = len(coords)
+
+    # Quadrics of every triangle go to the cells of all three corners
+    quadric, area = quadrics if quadrics is not None else _quadrics(positions, triangles)
+    corner_cells = vertex_cell[triangles].ravel()
+    q = np.column_stack([np.bincount(corner_cells, weights=np.repeat(quadric[:, k], 3), minlength=cells)
+                         for k in range(10)])
+    weight = np.bincount(corner_cells, weights=np.repeat(area, 3), minlength=cells)
+
+    counts = np.bincount(vertex_cell, minlength=cells)
+    mean = np.column_stack([np.bincount(vertex_cell, weights=positions[:, k], minlength=cells)
+                            for k in range(3)]) / np.maximum(counts, 1)[:, None]
+
+    # Minimize v^T Q v: solve A x = b around the cell mean, regularized so
+    # flat and edge cells (rank-deficient A) stay at the mean along their
+    # free directions
+    a = np.stack([q[:, [0, 1, 2]], q[:, [1, 4, 5]], q[:, [2, 5, 7]]], axis=1)
+    b = -q[:, [3, 6, 8]]
+    regularized = a + (1e-3 * np.trace(a, axis1=1, axis2=2) + 1e-30)[:, None, None] * np.eye(3)
+    step = _solve_symmetric(regularized, b - np.einsum('cij,cj->ci', a, mean))
+    origin = positions.min(axis=0)
+    new_positions = np.clip(mean + step, origin + coords * cell_size, origin + (coords + 1) * cell_size)
+
+    x = new_positions
+    error = (np.einsum('ci,cij,cj->c', x, a, x) - 2 * np.einsum('ci,ci->c', b, x) + q[:, 9])
+    rms = math.sqrt(max(error.sum(), 0.0) / max(weight.sum(), 1e-30))
+
+    new_triangles = _collapse(triangles, vertex_cell)
+
+    new_attributes = {}
+    for name, values in attributes.items():
+        averaged = np.column_stack([np.bincount(vertex_cell, weights=values[:, k], minlength=cells)
+                                    for k in range(values.shape[1])]) / np.maximum(counts, 1)[:, None]
+        if name == 'NORMAL':
+            length = np.linalg.norm(averaged, axis=1, keepdims=True)
+            averaged = averaged / np.where(length > 0, length, 1.0)
+        new_attributes[name] = averaged
+
+    # Drop cells no triangle uses any more
+    used, remap = np.unique(new_triangles, return_inverse=True)
+    return (new_positions[used], remap.reshape(-1, 3), {k: v[used] for k, v in new_attributes.items()}, rms)
+
+
+def _kept_attributes(glb, primitive):
+    attributes = {}
+    for name, accessor in primitive['attributes'].items():
+        if name != 'POSITION' and name.startswith(KEPT_ATTRIBUTES):
+            values = glb.accessor_float(accessor).astype(np.float64)
+            attributes[name] = values.reshape(len(values), -1)
+    return attributes
+
+
+def decimate_primitive(glb, primitive, ratios=LOD_RATIOS):
+    """
+    Levels for one primitive: a list with one entry per ratio, each either
+    None (keep the previous level) or (positions, triangles, attributes,
+    error) with the error accumulated over the chain
+    """
+
+    levels = [None] * len(ratios)
+    if (is_draco_compressed(primitive) or primitive.get('targets') or
+            'POSITION' not in primitive.get('attributes', {})):
+        return levels
+
+    triangles = primitive_triangles(glb, primitive)
+    full = len(triangles)
+    if full < MIN_TRIANGLES:
+        return levels
+
+    positions = glb.accessor_float(primitive['attributes']['POSITION']).astype(np.float64)
+    attributes = _kept_attributes(glb, primitive)
+    current = (positions, triangles, attributes, 0.0)
+
+    for i, ratio in enumerate(ratios):
+        positions, triangles, attributes, error = current
+        target = max(int(full * ratio), 1)
+        if len(triangles) <= target or len(triangles) < MIN_TRIANGLES:
+            continue
+        quadrics = _quadrics(positions, triangles)
+        cell = find_cell_size(positions, triangles, target, quadrics[1].sum())
+        if cell is None:
+            break
+        p, t, attrs, step_error = cluster_decimate(positions, triangles, attributes, cell, quadrics)
+        if not len(t) or len(t) > MIN_REDUCTION * len(triangles):
+            continue
+        current = (p, t, attrs, error + step_error)
+        levels[i] = current
+    return levels
+
+
+_WORKER = None
+
+
+def _init_worker(glb_file, ratios):
+    global _WORKER
+    _WORKER = {'glb': GLBFile(glb_file), 'ratios': ratios}
+
+
+def _decimate_mesh(mesh_index):
+    glb = _WORKER['glb']
+    return [decimate_primitive(glb, primitive, _WORKER['ratios'])
+            for primitive in glb.json['meshes'][mesh_index]['primitives']]
+
+
+def lod_candidates(gltf):
+    """
+    Meshes that may get levels: not used by skinned nodes, nor by GPU-instanced
+    ones, whose instances are spread out while levels switch per node, nor
+    merged ones (glb_merge.py), whose range tables index the full geometry
+    """
+
+    excluded = {node['mesh'] for node in gltf.get('nodes', []) if 'mesh' in node and
+                ('skin' in node or INSTANCING_EXTENSION in node.get('extensions', {}))}
+    excluded.update(i for i, mesh in enumerate(gltf.get('meshes', []))
+                    if any('ranges' in p.get('extras', {}) for p in mesh['primitives']))
+    return [i for i in range(len(gltf.get('meshes', []))) if i not in excluded]
+
+
+def _write_levels(builder, mesh_index, primitive_levels, ratios):
+    """
+    Append the LOD meshes of one mesh. Returns one record per written level:
+    {level, mesh, counts (triangles per primitive, None = unchanged), error}
+    """
+
+    mesh = builder.json['meshes'][mesh_index]
+    name = mesh.get('name', f"mesh_{mesh_index}")
+
+    # Per primitive: the primitive dict in use, its triangle count and error
+    current = [(p, None, 0.0) for p in mesh['primitives']]
+    written = []
+    for level in range(len(ratios)):
+        changed = False
+        for p, levels in enumerate(primitive_levels):
+            if levels[level] is None:
+                continue
+            positions, triangles, attributes, error = levels[level]
+            primitive = {k: v for k, v in mesh['primitives'][p].items()
+                         if k not in ('attributes', 'indices', 'mode', 'targets', 'extensions')}
+            primitive['attributes'] = {
+                'POSITION': builder.add_accessor(positions.astype(np.float32), TARGET_ARRAY_BUFFER, bounds=True)}
+            for attribute, values in sorted(attributes.items()):
+                primitive['attributes'][attribute] = builder.add_accessor(values.astype(np.float32),
+                                                                          TARGET_ARRAY_BUFFER)
+            primitive['indices'] = builder.add_indices(triangles, len(positions))
+            current[p] = (primitive, len(triangles), error)
+            changed = True
+        if not changed:
+            continue
+
+        index = builder.add_mesh({'name': f"{name}_LOD{level + 1}",
+                                  'primitives': [primitive for primitive, _, _ in current]})
+        written.append({'level': level, 'mesh': index, 'counts': [count for _, count, _ in current],
+                        'error': max(error for _, _, error in current)})
+    return written
+
+
+def _triangles_at(levels, full_counts, level):
+    """Triangles of a mesh as drawn at `level` (its last written level at or below it)"""
+
+    counts = full_counts
+    for record in levels:
+        if record['level'] <= level:
+            counts = [full if c is None else c for c, full in zip(record['counts'], full_counts)]
+    return sum(counts)
+
+
+def build_lod_model(glb_file, ratios=LOD_RATIOS, pixel_error=PIXEL_ERROR, jobs=None):
+    """
+    LOD model for a GLB file: (GLB bytes, summary). Raises ValueError when
+    the output would change the zones extract_zones() finds.
+    """
+
+    ratios = tuple(sorted(ratios, reverse=True))
+    with GLBFile(glb_file) as glb:
+        builder = GLBBuilder.from_glb(glb)
+        scene = SceneGraph(glb.json)
+        full_counts = [[len(primitive_triangles(glb, p))
+                        if 'POSITION' in p.get('attributes', {}) and not is_draco_compressed(p) else 0
+                        for p in mesh['primitives']]
+                       for mesh in glb.json.get('meshes', [])]
+        skipped_draco = sum(is_draco_compressed(p) for m in glb.json.get('meshes', []) for p in m['primitives'])
+
+    meshes = lod_candidates(builder.json)
+    if jobs == 1 or len(meshes) <= 1:
+        _init_worker(glb_file, ratios)
+        try:
+            results = [_decimate_mesh(i) for i in meshes]
+        finally:
+            _WORKER['glb'].close()
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                    initargs=(glb_file, ratios)) as pool:
+            results = list(pool.map(_decimate_mesh, meshes))
+
+    levels_by_mesh = {}
+    for mesh_index, primitive_levels in zip(meshes, results):
+        written = _write_levels(builder, mesh_index, primitive_levels, ratios)
+        if written:
+            levels_by_mesh[mesh_index] = written
+
+    # World scale per node turns mesh-space errors into meters
+    world = scene.world_matrices
+    lod_nodes = 0
+    for node_index, node in enumerate(builder.json.get('nodes', [])):
+        if node.get('mesh') not in levels_by_mesh:
+            continue
+        full = sum(full_counts[node['mesh']])
+        scale = float(np.linalg.norm(world[node_index][:3, :3], axis=0).max())
+        levels, distance = [], 0.0
+        for record in levels_by_mesh[node['mesh']]:
+            triangles = _triangles_at([record], full_counts[node['mesh']], record['level'])
+            # Switch distances must grow along the chain
+            distance = max(switch_distance(record['error'] * scale, pixel_error), distance * 1.01 + 1e-3)
+            levels.append({
+                'mesh': record['mesh'],
+                'triangles': int(triangles),
+                'ratio': round(triangles / max(full, 1), 4),
+                'error': round(record['error'] * scale, 6),
+                'distance': round(distance, 3),
+            })
+        node.setdefault('extras', {})['lod'] = levels
+        lod_nodes += 1
+
+    builder.json.setdefault('asset', {}).setdefault('extras', {})['lod'] = {
+        'ratios': list(ratios), 'pixel_error': pixel_error, 'version': LOD_VERSION}
+
+    check_zones(scene.gltf, builder.json)
+
+    summary = {
+        'meshes': len(full_counts),
+        'lod_meshes': len(levels_by_mesh),
+        'lod_nodes': lod_nodes,
+        'triangles': sum(map(sum, full_counts)),
+        'level_triangles': [sum(_triangles_at(levels_by_mesh.get(m, []), counts, level)
+                                for m, counts in enumerate(full_counts))
+                            for level in range(len(ratios))],
+        'skipped_draco': skipped_draco,
+    }
+    return builder.to_bytes(), summary
+
+
+def build_lod_model_bytes(data, ratios=LOD_RATIOS, pixel_error=PIXEL_ERROR, jobs=None):
+    """build_lod_model() for a model held in memory (e.g. a freshly baked AO model)"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return build_lod_model(path, ratios, pixel_error, jobs)
+    finally:
+        os.unlink(path)
+
+
+def check_zones(original, rewritten):
+    """The rewritten model must yield exactly the zones of the original"""
+
+    before = list(extract_zones(original, scene=SceneGraph(original)))
+    after = list(extract_zones(rewritten, scene=SceneGraph(rewritten)))
+    if before != after:
+        raise ValueError("rewritten model changed the ZONE_ empties; refusing to write it")
+
+
+def default_output(glb_file):
+    root, ext = os.path.splitext(glb_file)
+    return f"{root}_lod{ext or '.glb'}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate LOD levels for every mesh of a GLB model")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default=None, help="output GLB (default: <model>_lod.glb)")
+    parser.add_argument('--ratios', type=float, nargs='+', default=list(LOD_RATIOS),
+                        help="triangle ratio of each level (default: 0.5 0.25 0.1)")
+    parser.add_argument('--pixel-error', type=float, default=PIXEL_ERROR,
+                        help="screen-space error in pixels that sets the switch distances")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+    if any(not 0 < r < 1 for r in args.ratios):
+        print("❌ Ratios must be between 0 and 1")
+        return 1
+
+    output = args.output or default_output(args.glb_file)
+    print(f"📂 Building LOD levels for {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        data, summary = build_lod_model(args.glb_file, args.ratios, args.pixel_error, jobs=args.jobs)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if summary['skipped_draco']:
+        print(f"⚠️ {summary['skipped_draco']} Draco-compressed primitive(s) kept at full detail")
+    levels = ", ".join(f"{count}" for count in summary['level_triangles'])
+    print(f"✅ {summary['lod_meshes']}/{summary['meshes']} meshes decimated ({summary['lod_nodes']} nodes): "
+          f"{summary['triangles']} -> {levels} triangles ({time.perf_counter() - started:.2f}s)")
+
+    if write_if_changed(output, data):
+        print(f"💾 Saved to: {output} ({len(data) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Static geometry merge for venue models
+Bakes the world transforms of static mesh nodes into their vertex data and
+merges every primitive that shares a material (and attribute layout) into
+one large primitive, so a venue split into thousands of small meshes over a
+handful of materials draws in a handful of calls.
+
+Merged primitives use 32-bit indices, or with --index-bits 16 are split into
+chunks of at most 65535 vertices so 16-bit indices do. With --cell-size the
+merge is done per material and grid cell instead of over the whole model,
+which keeps merged meshes small enough for spatial tiling (glb_tiles.py) and
+culling. Each merged mesh goes into a new scene root placed at the centre of
+its bounds, vertices relative to it.
+
+Every merged primitive keeps a range table in its extras - which index
+range came from which node - so the client can still hide individual
+nodes, e.g. for culling (src/utils/mergedGeometry.ts):
+
+    primitive.extras.ranges = [{"node": "SM_MFF.377", "start": 0, "count": 3072},
+                               {"node": "SM_MFF.378", "start": 3072, "count": 912}, ...]
+
+`start` and `count` are in indices (three triangles = 9 indices), as
+three.js' drawRange and geometry groups count them. The source nodes keep
+their names, extras, children and transforms and only lose `mesh`, so
+extract_zones() reads the output like the input.
+
+Skinned, morphed, animated, instanced (glb_instancing.py) and
+Draco-compressed nodes, nodes with LOD levels and primitives that aren't
+triangles are left alone. Later stages keep range tables valid: glb_lod.py
+gives merged meshes no levels, and glb_compress.py reorders triangles only
+within each range.
+
+Requires: numpy
+
+USAGE:
+    python glb_merge.py public/SM_MFF.glb               # -> public/SM_MFF_merged.glb
+    python glb_merge.py venue.glb -o venue_merged.glb --index-bits 16 --cell-size 40
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from glb_geometry import is_draco_compressed, primitive_triangles
+from glb_instancing import draw_calls, prune_unused
+from glb_lod import check_zones
+from glb_reader import GLBFile
+from glb_scene import SceneGraph, animated_nodes, node_name
+from glb_writer import TARGET_ARRAY_BUFFER, GLBBuilder
+
+# Bump when merging or the output changes so cached models are rebuilt
+MERGE_VERSION = 1
+
+MAX_16BIT_VERTICES = 0xFFFF
+
+RANGES_KEY = 'ranges'
+
+
+def is_merged(primitive):
+    """Whether a primitive was written by this stage (carries a range table)"""
+    extras = primitive.get('extras')
+    return isinstance(extras, dict) and RANGES_KEY in extras
+
+
+def static_nodes(gltf, graph):
+    """Mesh nodes of the default scene whose geometry can be baked and merged"""
+
+    animated = animated_nodes(gltf)
+    parents = graph.parents
+    nodes = []
+    for index in graph.reachable_nodes():
+        node = graph.nodes[index]
+        if 'mesh' not in node or any(key in node for key in ('skin', 'weights', 'extensions')):
+            continue
+        extras = node.get('extras')
+        if isinstance(extras, dict) and extras.get('lod'):
+            continue
+
+        ancestor = index
+        while ancestor >= 0 and ancestor not in animated:
+            ancestor = int(parents[ancestor])
+        if ancestor >= 0:
+            continue
+
+        primitives = gltf['meshes'][node['mesh']].get('primitives', [])
+        if not primitives or any(is_draco_compressed(p) or p.get('targets') or is_merged(p)
+                                 or 'POSITION' not in p.get('attributes', {})
+                                 or p.get('mode', 4) not in (4, 5, 6) for p in primitives):
+            continue
+        nodes.append(index)
+    return nodes
+
+
+def _layout(glb, primitive):
+    """Attribute names and component counts; primitives merge only with equal layouts"""
+
+    layout = []
+    for name, accessor in sorted(primitive['attributes'].items()):
+        layout.append((name, glb.json['accessors'][accessor]['type']))
+    return tuple(layout)
+
+
+def _world_attributes(glb, primitive, matrix, origin):
+    """Float attributes of a primitive with `matrix` applied, positions relative to `origin`"""
+
+    basis = matrix[:3, :3]
+    normal_matrix = np.linalg.inv(basis).T
+    mirrored = np.linalg.det(basis) < 0
+    values = {}
+    for name, accessor in primitive['attributes'].items():
+        data = glb.accessor_float(accessor).astype(np.float64)
+        data = data.reshape(len(data), -1)
+        if name == 'POSITION':
+            data = data @ basis.T + (matrix[:3, 3] - origin)
+        elif name in ('NORMAL', 'TANGENT'):
+            turned = data[:, :3] @ (normal_matrix if name == 'NORMAL' else basis).T
+            length = np.linalg.norm(turned, axis=1, keepdims=True)
+            turned = turned / np.where(length > 0, length, 1.0)
+            data = np.column_stack([turned, data[:, 3:] * (-1 if mirrored else 1)]) if name == 'TANGENT' else turned
+        values[name] = data
+    return values, mirrored
+
+
+def _chunks(members, vertex_counts, max_vertices):
+    """Split a group's members into runs of at most `max_vertices` vertices (one member may exceed it)"""
+
+    chunks, current, count = [], [], 0
+    for member, vertices in zip(members, vertex_counts):
+        if current and count + vertices > max_vertices:
+            chunks.append(current)
+            current, count = [], 0
+        current.append(member)
+        count += vertices
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_groups(glb, graph, cell_size=None):
+    """
+    Static primitives grouped for merging: {(material, layout, cell):
+    [(node, primitive index)]}, in scene order. A primitive alone in its
+    group is baked all the same, so every static node loses its mesh.
+    """
+
+    world = graph.world_matrices
+    groups = {}
+    for index in static_nodes(glb.json, graph):
+        node = graph.nodes[index]
+        cell = None
+        if cell_size:
+            center = world[index][:3, 3]
+            cell = tuple(np.floor(center / cell_size).astype(int).tolist())
+        for p, primitive in enumerate(glb.json['meshes'][node['mesh']]['primitives']):
+            key = (primitive.get('material'), _layout(glb, primitive), cell)
+            groups.setdefault(key, []).append((index, p))
+    return groups
+
+
+def merge_model(glb_file, index_bits=32, cell_size=None):
+    """
+    Copy of a model with its static meshes merged per material: (GLB bytes,
+    report). Raises ValueError when the output would change the zones
+    extract_zones() finds.
+    """
+
+    max_vertices = MAX_16BIT_VERTICES if index_bits == 16 else np.inf
+    with GLBFile(glb_file) as glb:
+        graph = SceneGraph(glb.json)
+        groups = merge_groups(glb, graph, cell_size)
+        builder = GLBBuilder.from_glb(glb)
+        gltf = builder.json
+        world = graph.world_matrices
+        materials = gltf.get('materials', [])
+        roots = gltf['scenes'][gltf.get('scene', 0)].setdefault('nodes', [])
+        meshes_before = len(gltf.get('meshes', []))
+        merged_nodes = set()
+        merged_primitives = 0
+        largest_primitive = 0
+
+        for number, ((material, _, cell), members) in enumerate(groups.items()):
+            triangles = [primitive_triangles(glb, gltf['meshes'][graph.nodes[i]['mesh']]['primitives'][p])
+                         for i, p in members]
+            primitives = [gltf['meshes'][graph.nodes[i]['mesh']]['primitives'][p] for i, p in members]
+            counts = [glb.json['accessors'][primitive['attributes']['POSITION']]['count'] for primitive in primitives]
+
+            lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+            for (i, _), primitive in zip(members, primitives):
+                positions = glb.accessor_float(primitive['attributes']['POSITION']).astype(np.float64)
+                if len(positions):
+                    placed = positions @ world[i][:3, :3].T + world[i][:3, 3]
+                    lo, hi = np.minimum(lo, placed.min(axis=0)), np.maximum(hi, placed.max(axis=0))
+            origin = (lo + hi) / 2 if np.all(np.isfinite(lo)) else np.zeros(3)
+
+            new_primitives = []
+            for chunk in _chunks(list(range(len(members))), counts, max_vertices):
+                attributes, indices, ranges = {}, [], []
+                offset = 0
+                for k in chunk:
+                    node_index, _ = members[k]
+                    values, mirrored = _world_attributes(glb, primitives[k], world[node_index], origin)
+                    for name, data in values.items():
+                        attributes.setdefault(name, []).append(data)
+                    tris = triangles[k][:, ::-1] if mirrored else triangles[k]
+                    start = sum(len(t) for t in indices) * 3
+                    indices.append(tris + offset)
+                    offset += counts[k]
+
+                    name = node_name(graph.nodes[node_index], node_index)
+                    if ranges and ranges[-1]['node'] == name and ranges[-1]['start'] + ranges[-1]['count'] == start:
+                        ranges[-1]['count'] += len(tris) * 3
+                    elif len(tris):
+                        ranges.append({'node': name, 'start': start, 'count': len(tris) * 3})
+
+                primitive = {'attributes': {}, 'mode': 4}
+                for name, parts in sorted(attributes.items()):
+                    data = np.concatenate(parts).astype(np.float32)
+                    data = data[:, 0] if data.shape[1] == 1 else data
+                    primitive['attributes'][name] = builder.add_accessor(data, TARGET_ARRAY_BUFFER,
+                                                                         bounds=name == 'POSITION')
+                primitive['indices'] = builder.add_indices(np.concatenate(indices), offset)
+                if material is not None:
+                    primitive['material'] = material
+                primitive['extras'] = {RANGES_KEY: ranges}
+                new_primitives.append(primitive)
+                largest_primitive = max(largest_primitive, offset)
+
+            label = materials[material].get('name', f"material_{material}") if material is not None else 'default'
+            suffix = f"_{'_'.join(str(c) for c in cell)}" if cell is not None else ''
+            mesh_index = builder.add_mesh({'name': f"merged_{label}{suffix}", 'primitives': new_primitives})
+            node = {'name': f"merged_{number}_{label}{suffix}", 'mesh': mesh_index}
+            if np.any(origin):
+                node['translation'] = origin.tolist()
+            roots.append(builder.add_node(node))
+            merged_primitives += len(members)
+            merged_nodes.update(i for i, _ in members)
+
+        for index in merged_nodes:
+            del gltf['nodes'][index]['mesh']
+        dropped_meshes, dropped_accessors = prune_unused(gltf)
+        builder.compact()
+        check_zones(glb.json, gltf)
+        data = builder.to_bytes()
+
+        report = {
+            'groups': len(groups),
+            'merged_nodes': len(merged_nodes),
+            'merged_primitives': merged_primitives,
+            'draw_calls_input': draw_calls(glb.json),
+            'draw_calls_output': draw_calls(gltf),
+            'meshes_input': meshes_before,
+            'meshes_output': len(gltf.get('meshes', [])),
+            'dropped_accessors': dropped_accessors,
+            'index_bits': (16 if largest_primitive <= MAX_16BIT_VERTICES else 32) if groups else None,
+            'cell_size': cell_size,
+            'input_bytes': os.path.getsize(glb_file),
+            'output_bytes': len(data),
+        }
+    return data, report
+
+
+def merge_model_bytes(data, index_bits=32, cell_size=None):
+    """merge_model() for a model held in memory"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return merge_model(path, index_bits, cell_size)
+    finally:
+        os.unlink(path)
+
+
+def default_output(glb_file):
+    root, ext = os.path.splitext(glb_file)
+    return f"{root}_merged{ext or '.glb'}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the static meshes of a GLB model per material")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default=None, help="output GLB (default: <model>_merged.glb)")
+    parser.add_argument('--index-bits', type=int, choices=(16, 32), default=32,
+                        help="32-bit indices, or split merged meshes so 16-bit indices do (default: 32)")
+    parser.add_argument('--cell-size', type=float, default=None,
+                        help="merge per material and grid cell of this size in meters (default: whole model)")
+    parser.add_argument('--report', default=None, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+    if args.cell_size is not None and args.cell_size <= 0:
+        print("❌ --cell-size must be positive")
+        return 1
+
+    output = args.output or default_output(args.glb_file)
+    print(f"📂 Merging static meshes of {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        data, report = merge_model(args.glb_file, args.index_bits, args.cell_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not report['groups']:
+        print("⚠️ Nothing to merge")
+    else:
+        print(f"✅ {report['merged_primitives']} primitives of {report['merged_nodes']} nodes merged into "
+              f"{report['groups']} meshes ({time.perf_counter() - started:.2f}s)")
+        print(f"📐 Draw calls: {report['draw_calls_input']} -> {report['draw_calls_output']}, "
+              f"meshes: {report['meshes_input']} -> {report['meshes_output']}, "
+              f"up to {report['index_bits']}-bit indices")
+        print(f"📐 File: {report['input_bytes'] / 1e6:.2f} MB -> {report['output_bytes'] / 1e6:.2f} MB")
+
+    if write_if_changed(output, data):
+        print(f"💾 Saved to: {output}")
+    if args.report and write_if_changed(args.report, json.dumps(report, indent=2) + '\n'):
+        print(f"📝 Report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+Memory-mapped GLB reader
+Validates every chunk of a GLB container and exposes bufferViews and
+accessors as zero-copy NumPy views over the mapped file, so geometry can be
+inspected without loading the whole model into Python objects.
+EXT_meshopt_compression bufferViews (glb_compress.py) are decoded into
+memory on first access, so every stage reads compressed models as well.
+
+Requires: numpy
+
+USAGE:
+    with GLBFile('public/SM_MFF.glb') as glb:
+        print(glb.json['asset'])
+        positions = glb.accessor(0)   # (count, 3) float32 view, no copy
+"""
+
+import base64
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from meshopt_codec import MeshoptError, decode_index_sequence, decode_vertex_buffer
+
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+CHUNK_JSON = b'JSON'
+CHUNK_BIN = b'BIN\x00'
+
+COMPONENT_DTYPES = {
+    5120: np.dtype(np.int8),
+    5121: np.dtype(np.uint8),
+    5122: np.dtype(np.int16),
+    5123: np.dtype(np.uint16),
+    5125: np.dtype(np.uint32),
+    5126: np.dtype(np.float32),
+}
+
+TYPE_SIZES = {
+    'SCALAR': 1,
+    'VEC2': 2,
+    'VEC3': 3,
+    'VEC4': 4,
+    'MAT2': 4,
+    'MAT3': 9,
+    'MAT4': 16,
+}
+
+# Divisors used to map normalized integer components back to floats
+NORMALIZED_DIVISORS = {
+    5120: 127.0,
+    5121: 255.0,
+    5122: 32767.0,
+    5123: 65535.0,
+}
+
+MESHOPT_EXTENSION = 'EXT_meshopt_compression'
+
+
+class GLBError(ValueError):
+    """Raised when a file is not a valid GLB container"""
+
+
+class GLBFile:
+    """Read-only, memory-mapped view of a GLB file"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.base_dir = os.path.dirname(os.path.abspath(filename))
+        self._file = open(filename, 'rb')
+        self._mmaps = []
+        self._buffers = {}
+        self._decoded_views = {}
+
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < 12:
+                raise GLBError(f"{filename}: file too small to be a GLB ({size} bytes)")
+
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps.append(self._mmap)
+            self.data = memoryview(self._mmap)
+
+            self._parse_header(size)
+            self._parse_chunks()
+        except Exception:
+            self.close()
+            raise
+
+    # ------------------------------------------------------------------
+    # Container parsing
+    # ------------------------------------------------------------------
+
+    def _parse_header(self, size):
+        magic, version, length = struct.unpack_from('<4sII', self.data, 0)
+
+        if magic != GLB_MAGIC:
+            raise GLBError(f"{self.filename}: bad magic {magic!r}, not a GLB file")
+        if version != GLB_VERSION:
+            raise GLBError(f"{self.filename}: unsupported GLB version {version}")
+        if length > size:
+            raise GLBError(f"{self.filename}: header length {length} exceeds file size {size}")
+
+        self.version = version
+        self.length = length
+
+    def _parse_chunks(self):
+        """Walk and validate every chunk; JSON must come first, BIN at most once"""
+
+        self.chunks = []
+        offset = 12
+
+        while offset < self.length:
+            if offset + 8 > self.length:
+                raise GLBError(f"{self.filename}: truncated chunk header at offset {offset}")
+
+            chunk_length, chunk_type = struct.unpack_from('<I4s', self.data, offset)
+            start = offset + 8
+            end = start + chunk_length
+
+            if end > self.length:
+                raise GLBError(
+                    f"{self.filename}: chunk {chunk_type!r} at offset {offset} "
+                    f"overruns the file ({end} > {self.length})"
+                )
+            if chunk_length % 4:
+                raise GLBError(f"{self.filename}: chunk {chunk_type!r} is not 4-byte aligned")
+
+            self.chunks.append((chunk_type, start, chunk_length))
+            offset = end
+
+        if not self.chunks or self.chunks[0][0] != CHUNK_JSON:
+            raise GLBError(f"{self.filename}: first chunk must be JSON")
+
+        bin_chunks = [c for c in self.chunks if c[0] == CHUNK_BIN]
+        if len(bin_chunks) > 1:
+            raise GLBError(f"{self.filename}: more than one BIN chunk")
+        if bin_chunks and self.chunks[1][0] != CHUNK_BIN:
+            raise GLBError(f"{self.filename}: BIN chunk must directly follow the JSON chunk")
+
+        _, json_start, json_length = self.chunks[0]
+        try:
+            self.json = json.loads(bytes(self.data[json_start:json_start + json_length]).decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise GLBError(f"{self.filename}: JSON chunk is not valid JSON ({e})")
+
+        if bin_chunks:
+            _, bin_start, bin_length = bin_chunks[0]
+            self.bin = self.data[bin_start:bin_start + bin_length]
+        else:
+            self.bin = None
+
+        self._validate_buffer_views()
+
+    def _validate_buffer_views(self):
+        """Check that every bufferView fits inside the buffer it points to"""
+
+        buffers = self.json.get('buffers', [])
+        for i, view in enumerate(self.json.get('bufferViews', [])):
+            buffer_index = view.get('buffer', 0)
+            if buffer_index >= len(buffers):
+                raise GLBError(f"{self.filename}: bufferView {i} references missing buffer {buffer_index}")
+
+            end = view.get('byteOffset', 0) + view['byteLength']
+            if end > buffers[buffer_index]['byteLength']:
+                raise GLBError(f"{self.filename}: bufferView {i} overruns buffer {buffer_index}")
+
+        if buffers and 'uri' not in buffers[0]:
+            if self.bin is None:
+                raise GLBError(f"{self.filename}: buffer 0 has no uri but the file has no BIN chunk")
+            if len(self.bin) < buffers[0]['byteLength']:
+                raise GLBError(f"{self.filename}: BIN chunk is shorter than buffer 0")
+
+    # ------------------------------------------------------------------
+    # Zero-copy access
+    # ------------------------------------------------------------------
+
+    def chunk(self, chunk_type):
+        """Raw payload of the first chunk of `chunk_type` (e.g. CHUNK_BIN), or None"""
+
+        for kind, start, length in self.chunks:
+            if kind == chunk_type:
+                return self.data[start:start + length]
+        return None
+
+    def buffer(self, index):
+        """Return buffer `index` as a read-only uint8 array"""
+
+        if index in self._buffers:
+            return self._buffers[index]
+
+        desc = self.json['buffers'][index]
+        uri = desc.get('uri')
+
+        if uri is None:
+            raw = self.bin[:desc['byteLength']]
+        elif uri.startswith('data:'):
+            raw = base64.b64decode(uri.split(',', 1)[1])
+        else:
+            with open(os.path.join(self.base_dir, uri), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps.append(mapped)
+            raw = memoryview(mapped)[:desc['byteLength']]
+
+        array = np.frombuffer(raw, dtype=np.uint8)
+        self._buffers[index] = array
+        return array
+
+    def buffer_view(self, index):
+        """Return the raw bytes of bufferView `index` as a uint8 view"""
+
+        view = self.json['bufferViews'][index]
+        if MESHOPT_EXTENSION in view.get('extensions', {}):
+            return self._decode_view(index)
+        start = view.get('byteOffset', 0)
+        return self.buffer(view.get('buffer', 0))[start:start + view['byteLength']]
+
+    def _decode_view(self, index):
+        """
+        Decompressed bytes of an EXT_meshopt_compression bufferView (the view's
+        own buffer is only a fallback placeholder). Decoded once per file.
+        """
+
+        if index in self._decoded_views:
+            return self._decoded_views[index]
+
+        view = self.json['bufferViews'][index]
+        ext = view['extensions'][MESHOPT_EXTENSION]
+        mode = ext.get('mode')
+        if ext.get('filter', 'NONE') != 'NONE' or mode not in ('ATTRIBUTES', 'INDICES'):
+            raise GLBError(f"{self.filename}: bufferView {index} uses meshopt mode {mode} "
+                           f"with filter {ext.get('filter', 'NONE')}, which this reader does not decode")
+
+        start = ext.get('byteOffset', 0)
+        source = self.buffer(ext['buffer'])[start:start + ext['byteLength']]
+        count, stride = ext['count'], ext['byteStride']
+        try:
+            if mode == 'ATTRIBUTES':
+                decoded = decode_vertex_buffer(source, count, stride).reshape(-1)
+            else:
+                dtype = np.dtype(np.uint16) if stride == 2 else np.dtype(np.uint32)
+                decoded = decode_index_sequence(source, count).astype(dtype).view(np.uint8)
+        except MeshoptError as e:
+            raise GLBError(f"{self.filename}: bufferView {index}: {e}") from e
+
+        decoded.flags.writeable = False
+        self._decoded_views[index] = decoded
+        return decoded
+
+    def accessor(self, index):
+        """
+        Return accessor `index` as a NumPy array.
+
+        Dense accessors are strided views straight into the mapped file.
+        Sparse accessors and accessors without a bufferView are materialized,
+        since their values do not exist contiguously in the file.
+        """
+
+        acc = self.json['accessors'][index]
+        dtype = COMPONENT_DTYPES[acc['componentType']]
+        components = TYPE_SIZES[acc['type']]
+        count = acc['count']
+        shape = (count,) if components == 1 else (count, components)
+
+        if 'bufferView' in acc:
+            view = self.json['bufferViews'][acc['bufferView']]
+            element_size = dtype.itemsize * components
+            stride = view.get('byteStride') or element_size
+
+            # Compressed views are decoded into their own array
+            if MESHOPT_EXTENSION in view.get('extensions', {}):
+                buffer, view_start = self._decode_view(acc['bufferView']), 0
+            else:
+                buffer, view_start = self.buffer(view.get('buffer', 0)), view.get('byteOffset', 0)
+            offset = view_start + acc.get('byteOffset', 0)
+
+            if count and offset + stride * (count - 1) + element_size > view_start + view['byteLength']:
+                raise GLBError(f"{self.filename}: accessor {index} overruns its bufferView")
+
+            strides = (stride,) if components == 1 else (stride, dtype.itemsize)
+            array = np.ndarray(
+                shape=shape,
+                dtype=dtype,
+                buffer=buffer,
+                offset=offset,
+                strides=strides,
+            )
+        else:
+            array = np.zeros(shape, dtype=dtype)
+
+        sparse = acc.get('sparse')
+        if sparse:
+            array = self._apply_sparse(array, sparse, dtype, components)
+
+        return array
+
+    def _apply_sparse(self, array, sparse, dtype, components):
+        """Copy a dense array and overwrite the sparse substitutions"""
+
+        array = array.copy()
+        count = sparse['count']
+
+        idx_desc = sparse['indices']
+        idx_dtype = COMPONENT_DTYPES[idx_desc['componentType']]
+        idx_bytes = self.buffer_view(idx_desc['bufferView'])
+        idx_offset = idx_desc.get('byteOffset', 0)
+        indices = np.frombuffer(idx_bytes, dtype=idx_dtype, count=count, offset=idx_offset)
+
+        val_desc = sparse['values']
+        val_bytes = self.buffer_view(val_desc['bufferView'])
+        values = np.frombuffer(val_bytes, dtype=dtype, count=count * components,
+                               offset=val_desc.get('byteOffset', 0))
+
+        array[indices] = values.reshape(array[indices].shape)
+        return array
+
+    def accessor_float(self, index):
+        """Return accessor `index` as float32, decoding normalized integers"""
+
+        acc = self.json['accessors'][index]
+        array = self.accessor(index)
+
+        if acc.get('normalized') and acc['componentType'] in NORMALIZED_DIVISORS:
+            divisor = NORMALIZED_DIVISORS[acc['componentType']]
+            return np.maximum(array.astype(np.float32) / divisor, -1.0)
+
+        return array.astype(np.float32, copy=False)
+
+    # ------------------------------------------------------------------
+    # Lifetime
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """Release the mapping; views still held by callers keep it alive"""
+
+        self._buffers.clear()
+        self._decoded_views.clear()
+
+        for view in (self.__dict__.get('bin'), self.__dict__.get('data')):
+            if view is not None:
+                try:
+                    view.release()
+                except (BufferError, ValueError):
+                    pass
+        self.bin = None
+        self.data = None
+
+        for mapped in self._mmaps:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller still holds a NumPy view; the GC will unmap it later
+                pass
+        self._mmaps = []
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,405 @@
+"""
+Scene graph helpers for glTF/GLB files
+Builds a name index over the node list once per file so lookups like
+"all ZONE_ empties" don't rescan every node, with pluggable predicates
+(name prefix, regex, glTF extras tags), and composes TRS/matrix transforms
+down the node tree into world matrices in one batched NumPy pass.
+
+Requires: numpy (through glb_reader)
+"""
+
+import bisect
+import functools
+import json
+import os
+import re
+
+import numpy as np
+
+from glb_reader import GLBFile
+
+
+def node_name(node, index):
+    """Name used for a node everywhere in the tooling"""
+    return node.get('name', f'Node_{index}')
+
+
+class NodeIndex:
+    """Name/prefix/extras index over a glTF node list"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.names = [node_name(node, i) for i, node in enumerate(nodes)]
+
+        # Sorted (name, index) pairs answer prefix queries with two bisects
+        order = sorted(range(len(self.names)), key=self.names.__getitem__)
+        self._sorted_names = [self.names[i] for i in order]
+        self._sorted_indices = order
+
+        self._by_name = {}
+        for i, name in enumerate(self.names):
+            self._by_name.setdefault(name, []).append(i)
+
+        self._extras = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def by_name(self, name):
+        """Indices of nodes with exactly this name"""
+        return list(self._by_name.get(name, ()))
+
+    def with_prefix(self, prefix):
+        """Indices of nodes whose name starts with `prefix`, in node order"""
+
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        end = start
+        while end < len(self._sorted_names) and self._sorted_names[end].startswith(prefix):
+            end += 1
+
+        return sorted(self._sorted_indices[start:end])
+
+    def matching_regex(self, pattern):
+        """Indices of nodes whose name matches a compiled regex"""
+        return [i for i, name in enumerate(self.names) if pattern.search(name)]
+
+    def with_extras(self, key, value=None):
+        """Indices of nodes tagged with extras[key] (optionally == value)"""
+
+        if self._extras is None:
+            self._build_extras_index()
+
+        values = self._extras.get(key)
+        if not values:
+            return []
+        if value is None:
+            return sorted(i for hits in values.values() for i in hits)
+
+        return list(values.get(_extras_key(value), ()))
+
+    def _build_extras_index(self):
+        self._extras = {}
+        for i, node in enumerate(self.nodes):
+            extras = node.get('extras')
+            if not isinstance(extras, dict):
+                continue
+            for key, value in extras.items():
+                self._extras.setdefault(key, {}).setdefault(_extras_key(value), []).append(i)
+
+    def select(self, predicate):
+        """Indices of nodes accepted by a predicate, in node order"""
+
+        if hasattr(predicate, 'select'):
+            return predicate.select(self)
+
+        # Plain callables get (index, node) and are evaluated per node
+        return [i for i, node in enumerate(self.nodes) if predicate(i, node)]
+
+
+def _extras_key(value):
+    """Hashable key for an arbitrary JSON extras value"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class PrefixMatch:
+    """Select nodes whose name starts with a prefix"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def select(self, index):
+        return index.with_prefix(self.prefix)
+
+
+class RegexMatch:
+    """Select nodes whose name matches a regular expression"""
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = re.compile(pattern, flags)
+
+    def select(self, index):
+        return index.matching_regex(self.pattern)
+
+
+class ExtrasMatch:
+    """Select nodes carrying a glTF extras tag, e.g. {"zone": true}"""
+
+    def __init__(self, key, value=None):
+        self.key = key
+        self.value = value
+
+    def select(self, index):
+        return index.with_extras(self.key, self.value)
+
+
+class AnyMatch:
+    """Union of several predicates"""
+
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def select(self, index):
+        hits = set()
+        for predicate in self.predicates:
+            hits.update(index.select(predicate))
+        return sorted(hits)
+
+
+def quaternions_to_matrices(q):
+    """(n, 4) xyzw quaternions -> (n, 3, 3) rotation matrices"""
+
+    q = np.asarray(q, dtype=np.float64)
+    norm = np.linalg.norm(q, axis=1, keepdims=True)
+    q = q / np.where(norm > 0, norm, 1.0)
+    x, y, z, w = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+
+    m = np.empty((len(q), 3, 3))
+    m[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    m[:, 0, 1] = 2 * (x * y - z * w)
+    m[:, 0, 2] = 2 * (x * z + y * w)
+    m[:, 1, 0] = 2 * (x * y + z * w)
+    m[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    m[:, 1, 2] = 2 * (y * z - x * w)
+    m[:, 2, 0] = 2 * (x * z - y * w)
+    m[:, 2, 1] = 2 * (y * z + x * w)
+    m[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return m
+
+
+def matrices_to_quaternions(m):
+    """(n, 3, 3) rotation matrices -> (n, 4) xyzw quaternions (w >= 0)"""
+
+    m = np.asarray(m, dtype=np.float64)
+    n = len(m)
+    q = np.empty((n, 4))
+
+    m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+    trace = m00 + m11 + m22
+
+    # Pick the numerically safest branch per matrix (Shepperd's method)
+    branch = np.argmax(np.stack([trace, m00, m11, m22], axis=1), axis=1)
+
+    b = branch == 0
+    s = np.sqrt(np.maximum(trace[b] + 1.0, 1e-12)) * 2
+    q[b, 3] = 0.25 * s
+    q[b, 0] = (m[b, 2, 1] - m[b, 1, 2]) / s
+    q[b, 1] = (m[b, 0, 2] - m[b, 2, 0]) / s
+    q[b, 2] = (m[b, 1, 0] - m[b, 0, 1]) / s
+
+    b = branch == 1
+    s = np.sqrt(np.maximum(1.0 + m00[b] - m11[b] - m22[b], 1e-12)) * 2
+    q[b, 3] = (m[b, 2, 1] - m[b, 1, 2]) / s
+    q[b, 0] = 0.25 * s
+    q[b, 1] = (m[b, 0, 1] + m[b, 1, 0]) / s
+    q[b, 2] = (m[b, 0, 2] + m[b, 2, 0]) / s
+
+    b = branch == 2
+    s = np.sqrt(np.maximum(1.0 + m11[b] - m00[b] - m22[b], 1e-12)) * 2
+    q[b, 3] = (m[b, 0, 2] - m[b, 2, 0]) / s
+    q[b, 0] = (m[b, 0, 1] + m[b, 1, 0]) / s
+    q[b, 1] = 0.25 * s
+    q[b, 2] = (m[b, 1, 2] + m[b, 2, 1]) / s
+
+    b = branch == 3
+    s = np.sqrt(np.maximum(1.0 + m22[b] - m00[b] - m11[b], 1e-12)) * 2
+    q[b, 3] = (m[b, 1, 0] - m[b, 0, 1]) / s
+    q[b, 0] = (m[b, 0, 2] + m[b, 2, 0]) / s
+    q[b, 1] = (m[b, 1, 2] + m[b, 2, 1]) / s
+    q[b, 2] = 0.25 * s
+
+    q[q[:, 3] < 0] *= -1
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def compose_trs(translations, rotations, scales):
+    """Batched T * R * S -> (n, 4, 4) matrices"""
+
+    n = len(translations)
+    m = np.zeros((n, 4, 4))
+    m[:, :3, :3] = quaternions_to_matrices(rotations) * np.asarray(scales, dtype=np.float64)[:, None, :]
+    m[:, :3, 3] = translations
+    m[:, 3, 3] = 1.0
+    return m
+
+
+def decompose_matrices(m):
+    """(n, 4, 4) affine matrices -> translations, xyzw rotations, scales"""
+
+    m = np.asarray(m, dtype=np.float64)
+    translations = m[:, :3, 3].copy()
+    basis = m[:, :3, :3]
+
+    scales = np.linalg.norm(basis, axis=1)
+    # A negative determinant means a mirror; fold it into the X scale
+    flip = np.linalg.det(basis) < 0
+    scales[flip, 0] *= -1
+
+    safe = np.where(np.abs(scales) > 1e-12, scales, 1.0)
+    rotations = matrices_to_quaternions(basis / safe[:, None, :])
+    return translations, rotations, scales
+
+
+def local_matrices(nodes):
+    """Local transform of every node as one (n, 4, 4) array"""
+
+    n = len(nodes)
+    translations = np.array([node.get('translation', (0.0, 0.0, 0.0)) for node in nodes],
+                            dtype=np.float64).reshape(n, 3)
+    rotations = np.array([node.get('rotation', (0.0, 0.0, 0.0, 1.0)) for node in nodes],
+                         dtype=np.float64).reshape(n, 4)
+    scales = np.array([node.get('scale', (1.0, 1.0, 1.0)) for node in nodes],
+                      dtype=np.float64).reshape(n, 3)
+
+    local = compose_trs(translations, rotations, scales)
+
+    with_matrix = [i for i, node in enumerate(nodes) if 'matrix' in node]
+    if with_matrix:
+        # glTF stores matrices column-major
+        raw = np.array([nodes[i]['matrix'] for i in with_matrix], dtype=np.float64)
+        local[with_matrix] = raw.reshape(-1, 4, 4).transpose(0, 2, 1)
+
+    return local
+
+
+def parent_indices(nodes):
+    """Parent index of every node (-1 for roots)"""
+
+    parents = np.full(len(nodes), -1, dtype=np.int64)
+    for i, node in enumerate(nodes):
+        children = node.get('children')
+        if children:
+            parents[children] = i
+    return parents
+
+
+def animated_nodes(gltf):
+    """Indices of the nodes an animation channel targets"""
+    return {channel['target']['node'] for animation in gltf.get('animations', [])
+            for channel in animation.get('channels', []) if 'node' in channel.get('target', {})}
+
+
+def node_depths(parents):
+    """Depth of every node below its root, computed level by level"""
+
+    depths = np.zeros(len(parents), dtype=np.int64)
+    current = parents.copy()
+
+    for _ in range(len(parents)):
+        active = current >= 0
+        if not active.any():
+            return depths
+        depths[active] += 1
+        current[active] = parents[current[active]]
+
+    raise ValueError("Node hierarchy contains a cycle")
+
+
+def world_matrices(nodes, parents=None):
+    """
+    World transform of every node as one (n, 4, 4) array.
+
+    Nodes are processed one depth level at a time, so each level is a single
+    batched matmul of parent world matrices with child local matrices.
+    """
+
+    if not nodes:
+        return np.zeros((0, 4, 4))
+
+    if parents is None:
+        parents = parent_indices(nodes)
+
+    world = local_matrices(nodes)
+    depths = node_depths(parents)
+
+    order = np.argsort(depths, kind='stable')
+    boundaries = np.searchsorted(depths[order], np.arange(1, depths.max() + 2))
+
+    for level in range(len(boundaries) - 1):
+        level_nodes = order[boundaries[level]:boundaries[level + 1]]
+        world[level_nodes] = np.matmul(world[parents[level_nodes]], world[level_nodes])
+
+    return world
+
+
+class SceneGraph:
+    """Lazily built, per-file view of a glTF scene graph"""
+
+    def __init__(self, gltf):
+        self.gltf = gltf
+        self.nodes = gltf.get('nodes', [])
+        self._index = None
+        self._parents = None
+        self._world = None
+        self._world_trs = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = NodeIndex(self.nodes)
+        return self._index
+
+    @property
+    def parents(self):
+        if self._parents is None:
+            self._parents = parent_indices(self.nodes)
+        return self._parents
+
+    @property
+    def world_matrices(self):
+        """(n, 4, 4) world matrices, computed once per scene"""
+        if self._world is None:
+            self._world = world_matrices(self.nodes, self.parents)
+        return self._world
+
+    @property
+    def world_trs(self):
+        """World (translations, xyzw rotations, scales), computed once per scene"""
+        if self._world_trs is None:
+            self._world_trs = decompose_matrices(self.world_matrices)
+        return self._world_trs
+
+    def reachable_nodes(self, scene=None):
+        """
+        Node indices reachable from a scene's roots (default scene when
+        `scene` is None), in depth-first order. Files without scenes fall back
+        to every node.
+        """
+
+        scenes = self.gltf.get('scenes', [])
+        if scene is None:
+            scene = self.gltf.get('scene', 0)
+        if not scenes or scene >= len(scenes):
+            return list(range(len(self.nodes)))
+
+        order = []
+        seen = set()
+        stack = list(reversed(scenes[scene].get('nodes', [])))
+        while stack:
+            i = stack.pop()
+            if i in seen or i >= len(self.nodes):
+                continue
+            seen.add(i)
+            order.append(i)
+            stack.extend(reversed(self.nodes[i].get('children', [])))
+        return order
+
+
+@functools.lru_cache(maxsize=32)
+def _load_scene_cached(path, mtime_ns, size):
+    with GLBFile(path) as glb:
+        return SceneGraph(glb.json)
+
+
+def load_scene(filename):
+    """
+    Return the SceneGraph for a GLB file.
+
+    Results are cached per (path, mtime, size), so repeated queries against
+    an unchanged file reuse the parsed JSON and any indexes built on it.
+    """
+
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    return _load_scene_cached(path, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,366 @@
+"""
+Texture transcoding for venue models
+Pulls the PNG/JPEG images embedded in a GLB, caps their resolution for a
+device tier and re-encodes them as KTX2 with Basis Universal
+supercompression and a full mip chain (KHR_texture_basisu). The GPU keeps
+those textures block-compressed (ASTC, BC7, ETC2... whatever the device
+supports, transcoded by three.js' KTX2Loader in a worker) instead of
+decoding them on the main thread into full RGBA8.
+
+    tier      largest side
+    phone     1024
+    tablet    2048
+    desktop   4096
+
+Colour textures (base colour, emissive) are encoded as sRGB ETC1S; data
+textures (metallic-roughness, occlusion) as linear ETC1S; normal maps as
+linear UASTC with Zstandard supercompression, since ETC1S artefacts show
+up in lighting. Sizes are rounded to multiples of 4, the block size of the
+GPU formats, and never scaled up.
+
+Resizing, mip generation and encoding are done by toktx from KTX-Software
+(https://github.com/KhronosGroup/KTX-Software), one process per image, in
+parallel. The binary is taken from --toktx, the TOKTX environment variable
+or PATH.
+
+The report lists every texture with its file size and the GPU memory it
+takes before (RGBA8 with mipmaps, as three.js uploads PNG/JPEG) and after
+(8 bits per texel with mipmaps: ASTC 4x4, BC7 or ETC2 RGBA; opaque ETC1S
+textures may transcode to 4-bit formats and take half of that).
+
+Requires: numpy, toktx (KTX-Software 4.x)
+
+USAGE:
+    python glb_textures.py public/SM_MFF.glb                  # -> public/SM_MFF_textures.glb
+    python glb_textures.py venue.glb --tier phone -o venue_phone.glb --report textures.json
+    python glb_textures.py venue.glb --max-size 512 --toktx /opt/ktx/bin/toktx -j 8
+"""
+
+import argparse
+import base64
+import concurrent.futures
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from asset_cache import write_if_changed
+from glb_lod import check_zones
+from glb_reader import GLBFile
+from glb_writer import GLBBuilder, texture_infos
+
+# Bump when the encoding changes, to invalidate cached pipeline results
+TEXTURES_VERSION = 1
+
+BASISU_EXTENSION = 'KHR_texture_basisu'
+KTX2_MIME_TYPE = 'image/ktx2'
+
+# Largest texture side per device tier
+TIERS = {'phone': 1024, 'tablet': 2048, 'desktop': 4096}
+DEFAULT_TIER = 'desktop'
+
+# Block size of the GPU formats Basis Universal transcodes to
+BLOCK_SIZE = 4
+
+# toktx options per texture role
+ENCODER_OPTIONS = {
+    'color': ['--encode', 'etc1s', '--clevel', '1', '--qlevel', '128', '--assign_oetf', 'srgb'],
+    'data': ['--encode', 'etc1s', '--clevel', '1', '--qlevel', '128', '--assign_oetf', 'linear',
+             '--assign_primaries', 'none'],
+    'normal': ['--encode', 'uastc', '--uastc_quality', '2', '--zcmp', '18', '--assign_oetf', 'linear',
+               '--assign_primaries', 'none'],
+}
+
+# An image used in several roles is encoded for the last one listed here
+_ROLE_PRIORITY = ('data', 'normal', 'color')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8'
+# JPEG start-of-frame markers (all but DHT, JPG and DAC)
+_JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class TextureError(ValueError):
+    pass
+
+
+def image_size(data):
+    """(mime type, width, height) of PNG or JPEG bytes, from their headers"""
+
+    if data[:8] == PNG_SIGNATURE and data[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', data[16:24])
+        return 'image/png', width, height
+
+    if data[:2] == JPEG_SIGNATURE:
+        pos = 2
+        while pos + 4 <= len(data):
+            if data[pos] != 0xFF:
+                raise TextureError("corrupt JPEG: expected a marker")
+            marker = data[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+            if marker in _JPEG_SOF:
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return 'image/jpeg', width, height
+            pos += 2 + length
+        raise TextureError("corrupt JPEG: no frame header")
+
+    raise TextureError("not a PNG or JPEG image")
+
+
+def target_size(width, height, max_size):
+    """Size capped at `max_size` on the longer side, aspect kept, rounded to whole blocks"""
+
+    scale = min(1.0, max_size / max(width, height, 1))
+
+    def fit(value):
+        blocks = max(1, round(value * scale / BLOCK_SIZE))
+        return blocks * BLOCK_SIZE
+    return fit(width), fit(height)
+
+
+def mip_sizes(width, height):
+    """(width, height) of every level of a full mip chain"""
+
+    sizes = [(width, height)]
+    while width > 1 or height > 1:
+        width, height = max(1, width // 2), max(1, height // 2)
+        sizes.append((width, height))
+    return sizes
+
+
+def rgba8_bytes(width, height):
+    """GPU memory of an RGBA8 texture with mipmaps"""
+    return sum(w * h * 4 for w, h in mip_sizes(width, height))
+
+
+def block_compressed_bytes(width, height):
+    """GPU memory of a 16-byte-per-4x4-block texture with mipmaps"""
+    return sum(-(-w // BLOCK_SIZE) * -(-h // BLOCK_SIZE) * 16 for w, h in mip_sizes(width, height))
+
+
+def texture_roles(gltf):
+    """
+    image index -> 'color', 'normal' or 'data', for the images of core
+    textures (those with a `source`). An image used as colour anywhere is
+    colour; otherwise one used as a normal map is a normal map.
+    """
+
+    roles = {}
+    textures = gltf.get('textures', [])
+    for material in gltf.get('materials', []):
+        for slot, info in texture_infos(material):
+            texture = textures[info['index']]
+            if 'source' not in texture:
+                continue
+            role = ('color' if slot.endswith('ColorTexture') or slot == 'emissiveTexture' else
+                    'normal' if slot == 'normalTexture' or slot.endswith('NormalTexture') else 'data')
+            current = roles.get(texture['source'], role)
+            roles[texture['source']] = max(current, role, key=_ROLE_PRIORITY.index)
+    return roles
+
+
+def image_bytes(glb, image):
+    """Bytes of an embedded image (bufferView or data: URI), None for external files"""
+
+    if 'bufferView' in image:
+        return glb.buffer_view(image['bufferView']).tobytes()
+    uri = image.get('uri', '')
+    if uri.startswith('data:'):
+        return base64.b64decode(uri.split(',', 1)[1])
+    return None
+
+
+def find_toktx(toktx=None):
+    """Path of the toktx binary: `toktx`, $TOKTX or PATH"""
+
+    candidate = toktx or os.environ.get('TOKTX') or 'toktx'
+    path = shutil.which(candidate)
+    if path is None:
+        raise TextureError(f"toktx not found ({candidate}); install KTX-Software or pass --toktx")
+    return path
+
+
+def encode_ktx2(toktx, data, role, size, extension):
+    """KTX2 bytes of one image: resized to `size`, mipmapped and Basis-encoded"""
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, f"image{extension}")
+        output = os.path.join(directory, 'image.ktx2')
+        with open(source, 'wb') as f:
+            f.write(data)
+        command = [toktx, '--t2', '--genmipmap', '--resize', f"{size[0]}x{size[1]}",
+                   *ENCODER_OPTIONS[role], output, source]
+        process = subprocess.run(command, capture_output=True, stdin=subprocess.DEVNULL)
+        if process.returncode != 0 or not os.path.exists(output):
+            message = process.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise TextureError(f"toktx exited with status {process.returncode}"
+                               f"{': ' + message[-1] if message else ''}")
+        with open(output, 'rb') as f:
+            return f.read()
+
+
+def transcode_textures(glb_file, max_size=TIERS[DEFAULT_TIER], toktx=None, jobs=None):
+    """
+    Copy of a model with its PNG/JPEG textures as KTX2 (KHR_texture_basisu):
+    (GLB bytes, report). Images that are external files or used by no
+    material are left alone. Raises ValueError when toktx is missing or
+    fails, or when the output would change the zones extract_zones() finds.
+    """
+
+    with GLBFile(glb_file) as glb:
+        builder = GLBBuilder.from_glb(glb)
+        gltf = builder.json
+        images = gltf.get('images', [])
+        roles = texture_roles(gltf)
+
+        work, skipped = [], 0
+        for index, image in enumerate(images):
+            data = image_bytes(glb, image) if index in roles else None
+            if data is None or image.get('mimeType') == KTX2_MIME_TYPE:
+                skipped += 1
+                continue
+            mime_type, width, height = image_size(data)
+            work.append((index, data, mime_type, width, height))
+
+        if work:
+            toktx = find_toktx(toktx)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            encoded = list(pool.map(
+                lambda item: encode_ktx2(toktx, item[1], roles[item[0]], target_size(item[3], item[4], max_size),
+                                         '.png' if item[2] == 'image/png' else '.jpg'),
+                work))
+
+        textures = []
+        for (index, data, mime_type, width, height), ktx2 in zip(work, encoded):
+            image = images[index]
+            image.pop('uri', None)
+            image['bufferView'] = builder.add_buffer_view(ktx2)
+            image['mimeType'] = KTX2_MIME_TYPE
+            size = target_size(width, height, max_size)
+            textures.append({
+                'image': index,
+                'name': image.get('name', f"image_{index}"),
+                'role': roles[index],
+                'mime_type': mime_type,
+                'width': width,
+                'height': height,
+                'output_width': size[0],
+                'output_height': size[1],
+                'input_bytes': len(data),
+                'output_bytes': len(ktx2),
+                'gpu_bytes_input': rgba8_bytes(width, height),
+                'gpu_bytes_output': block_compressed_bytes(*size),
+            })
+
+        converted = {item['image'] for item in textures}
+        for texture in gltf.get('textures', []):
+            if texture.get('source') in converted:
+                texture.setdefault('extensions', {})[BASISU_EXTENSION] = {'source': texture.pop('source')}
+        if converted:
+            for key in ('extensionsUsed', 'extensionsRequired'):
+                if BASISU_EXTENSION not in gltf.setdefault(key, []):
+                    gltf[key].append(BASISU_EXTENSION)
+
+        builder.compact()
+        check_zones(glb.json, gltf)
+        data = builder.to_bytes()
+
+        report = {
+            'textures': textures,
+            'converted': len(textures),
+            'skipped': skipped,
+            'max_size': max_size,
+            'gpu_bytes_input': sum(item['gpu_bytes_input'] for item in textures),
+            'gpu_bytes_output': sum(item['gpu_bytes_output'] for item in textures),
+            'input_bytes': os.path.getsize(glb_file),
+            'output_bytes': len(data),
+        }
+    return data, report
+
+
+def transcode_textures_bytes(data, max_size=TIERS[DEFAULT_TIER], toktx=None, jobs=None):
+    """transcode_textures() for a model held in memory"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return transcode_textures(path, max_size, toktx, jobs)
+    finally:
+        os.unlink(path)
+
+
+def default_output(glb_file):
+    root, ext = os.path.splitext(glb_file)
+    return f"{root}_textures{ext or '.glb'}"
+
+
+def print_report(report):
+    for item in report['textures']:
+        saved = item['gpu_bytes_input'] - item['gpu_bytes_output']
+        print(f"   {item['name']} ({item['role']}): {item['width']}x{item['height']} -> "
+              f"{item['output_width']}x{item['output_height']}, "
+              f"file {item['input_bytes'] / 1e3:.0f} KB -> {item['output_bytes'] / 1e3:.0f} KB, "
+              f"GPU {item['gpu_bytes_input'] / 1e6:.1f} MB -> {item['gpu_bytes_output'] / 1e6:.1f} MB "
+              f"(-{saved / 1e6:.1f} MB)")
+    print(f"📐 GPU memory: {report['gpu_bytes_input'] / 1e6:.1f} MB -> {report['gpu_bytes_output'] / 1e6:.1f} MB")
+    print(f"📐 File: {report['input_bytes'] / 1e6:.2f} MB -> {report['output_bytes'] / 1e6:.2f} MB "
+          f"({report['output_bytes'] / max(report['input_bytes'], 1):.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcode the textures of a GLB model to KTX2/Basis Universal")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default=None, help="output GLB (default: <model>_textures.glb)")
+    parser.add_argument('--tier', choices=sorted(TIERS), default=DEFAULT_TIER,
+                        help=f"device tier whose size cap to use (default: {DEFAULT_TIER})")
+    parser.add_argument('--max-size', type=int, default=None,
+                        help="largest texture side in pixels (overrides --tier)")
+    parser.add_argument('--toktx', default=None, help="toktx binary (default: $TOKTX or PATH)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="images encoded at once (default: CPU count)")
+    parser.add_argument('--report', default=None, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+    max_size = args.max_size or TIERS[args.tier]
+    if max_size < BLOCK_SIZE:
+        print(f"❌ --max-size must be at least {BLOCK_SIZE}")
+        return 1
+
+    output = args.output or default_output(args.glb_file)
+    print(f"📂 Transcoding textures of {args.glb_file} (up to {max_size}px)...")
+    started = time.perf_counter()
+    try:
+        data, report = transcode_textures(args.glb_file, max_size, args.toktx, args.jobs)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not report['converted']:
+        print("⚠️ No embedded PNG/JPEG textures found")
+    else:
+        print(f"✅ {report['converted']} textures transcoded ({time.perf_counter() - started:.2f}s)")
+    print_report(report)
+
+    if write_if_changed(output, data):
+        print(f"💾 Saved to: {output}")
+    if args.report and write_if_changed(args.report, json.dumps(report, indent=2) + '\n'):
+        print(f"📝 Report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
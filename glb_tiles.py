@@ -0,0 +1,514 @@
+"""
+Spatial tiling of venue models for streamed loading
+Splits a GLB into an adaptive octree of tiles, each a self-contained GLB
+with its own bounding box, plus a mesh-free index model that keeps every
+empty (ZONE_ markers), camera and their parents, so extract_zones() and
+the POI tools read the index like the original. A tileset.json lists the
+tiles and their bounds, and the viewer loads the tiles nearest to the camera
+first (src/hooks/useTileStreaming.ts).
+
+Every mesh node goes, with its world transform baked in and its name,
+extras and LOD levels (glb_lod.py) kept, into the tile that holds the centre
+of its bounding box; a GPU-instanced node (glb_instancing.py) goes whole,
+with the bounds of all its instances. A cell is split while its meshes need more than
+MAX_TILE_BYTES; only axes at least half as long as the longest one are
+halved, so flat venues become a quadtree instead of thin slabs. Bounds come
+from accessor min/max, so Draco- and meshopt-compressed models are tiled
+without decoding them and their bufferViews are copied as they are.
+
+    tileset.json = {"version": 1, "model": "SM_MFF.glb", "index": "index.glb",
+                    "min": [...], "max": [...],
+                    "tiles": [{"id": "t03", "file": "tile_t03.glb", "min": [...],
+                               "max": [...], "bytes": 48213, "triangles": 9120,
+                               "nodes": ["SM_MFF.377", ...]}, ...]}
+
+Requires: numpy
+
+USAGE:
+    python glb_tiles.py public/SM_MFF.glb                # -> public/SM_MFF_tiles/
+    python glb_tiles.py venue.glb -o public/venue_tiles --max-tile-kb 512
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from glb_lod import check_zones
+from glb_geometry import INSTANCING_EXTENSION, instance_matrices
+from glb_reader import GLBFile
+from glb_scene import SceneGraph
+from glb_writer import GLBBuilder, texture_infos, view_references
+
+# Bump when tiling changes so cached tilesets are rebuilt
+TILES_VERSION = 1
+
+# A tile is split while its meshes need more bytes than this
+MAX_TILE_BYTES = 1 << 20
+MAX_DEPTH = 6
+
+TILESET_FILE = 'tileset.json'
+INDEX_FILE = 'index.glb'
+TILE_PREFIX = 'tile_'
+
+# Extensions that don't show up as an `extensions` key in the document
+_IMPLICIT_EXTENSIONS = ('KHR_mesh_quantization',)
+
+_NODE_TRANSFORM = ('matrix', 'translation', 'rotation', 'scale')
+
+
+class TileError(ValueError):
+    """Raised when a model can't be split into tiles"""
+
+
+def _used_extensions(value, found=None):
+    """Names of every extension a glTF document uses"""
+
+    found = set() if found is None else found
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == 'extensions' and isinstance(item, dict):
+                found.update(item)
+            if key != 'extras':
+                _used_extensions(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _used_extensions(item, found)
+    return found
+
+
+def _copy_extension_lists(source, target):
+    used = _used_extensions(target)
+    for key in ('extensionsUsed', 'extensionsRequired'):
+        kept = [name for name in source.get(key, [])
+                if name in used or (name in _IMPLICIT_EXTENSIONS and target.get('meshes'))]
+        if kept:
+            target[key] = kept
+
+
+def _lod_meshes(node):
+    lod = node.get('extras', {}).get('lod')
+    return [level['mesh'] for level in lod] if isinstance(lod, list) else []
+
+
+def _mesh_accessors(mesh):
+    for primitive in mesh.get('primitives', []):
+        yield from primitive.get('attributes', {}).values()
+        if 'indices' in primitive:
+            yield primitive['indices']
+        for target in primitive.get('targets', []):
+            yield from target.values()
+
+
+def _accessor_views(gltf, accessor_index):
+    accessor = gltf['accessors'][accessor_index]
+    return [container[key] for container, key in view_references(accessor)]
+
+
+def _mesh_views(gltf, mesh_index):
+    """bufferViews a mesh reads, compressed geometry (Draco) included"""
+
+    mesh = gltf['meshes'][mesh_index]
+    views = {container[key] for container, key in view_references(mesh)}
+    for accessor in _mesh_accessors(mesh):
+        views.update(_accessor_views(gltf, accessor))
+    return views
+
+
+def _mesh_triangles(gltf, mesh_index):
+    triangles = 0
+    for primitive in gltf['meshes'][mesh_index].get('primitives', []):
+        if primitive.get('mode', 4) != 4:
+            continue
+        source = primitive.get('indices', primitive.get('attributes', {}).get('POSITION'))
+        if source is not None:
+            triangles += gltf['accessors'][source]['count'] // 3
+    return triangles
+
+
+def _mesh_bounds(glb, mesh_index):
+    """Local (lo, hi) of a mesh from its POSITION accessors' min/max"""
+
+    lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+    for primitive in glb.json['meshes'][mesh_index].get('primitives', []):
+        position = primitive.get('attributes', {}).get('POSITION')
+        if position is None:
+            continue
+        accessor = glb.json['accessors'][position]
+        if 'min' in accessor and 'max' in accessor:
+            a_lo, a_hi = np.asarray(accessor['min'], float), np.asarray(accessor['max'], float)
+        else:
+            values = glb.accessor_float(position)
+            a_lo, a_hi = values.min(axis=0), values.max(axis=0)
+        lo, hi = np.minimum(lo, a_lo), np.maximum(hi, a_hi)
+    return lo, hi
+
+
+def _world_bounds(lo, hi, matrix):
+    corners = np.array([[x, y, z, 1.0] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+    points = corners @ matrix.T
+    return points[:, :3].min(axis=0), points[:, :3].max(axis=0)
+
+
+def mesh_nodes(glb, graph):
+    """
+    One record per mesh node of the default scene: {node, lo, hi (world
+    bounds), views (bufferView -> byte length), triangles}. `views` covers
+    the node's LOD meshes too.
+    """
+
+    gltf = glb.json
+    view_bytes = [view['byteLength'] for view in gltf.get('bufferViews', [])]
+    items = []
+    for index in graph.reachable_nodes():
+        node = gltf['nodes'][index]
+        if 'mesh' not in node:
+            continue
+        if 'skin' in node:
+            raise TileError(f"node {node.get('name', index)!r} is skinned; skinned meshes can't be tiled")
+
+        local_lo, local_hi = _mesh_bounds(glb, node['mesh'])
+        if not np.all(np.isfinite(local_lo)):
+            continue
+        matrices = instance_matrices(glb, node, graph.world_matrices[index])
+        bounds = [_world_bounds(local_lo, local_hi, matrix) for matrix in matrices]
+        lo, hi = np.min([b[0] for b in bounds], axis=0), np.max([b[1] for b in bounds], axis=0)
+
+        views = set()
+        for mesh_index in [node['mesh']] + _lod_meshes(node):
+            views |= _mesh_views(gltf, mesh_index)
+        for accessor in node.get('extensions', {}).get(INSTANCING_EXTENSION, {}).get('attributes', {}).values():
+            views.update(_accessor_views(gltf, accessor))
+        items.append({
+            'node': index,
+            'lo': lo,
+            'hi': hi,
+            'views': {view: view_bytes[view] for view in views},
+            'triangles': _mesh_triangles(gltf, node['mesh']) * len(matrices),
+        })
+    return items
+
+
+def build_octree(items, max_bytes=MAX_TILE_BYTES, max_depth=MAX_DEPTH):
+    """
+    Group mesh nodes into tiles: [{id, nodes (item indices)}]. A cell splits
+    while its nodes need more than `max_bytes` (shared bufferViews counted
+    once), along every axis at least half as long as its longest one.
+    """
+
+    if not items:
+        return []
+
+    centers = np.array([(item['lo'] + item['hi']) / 2 for item in items])
+    tiles = []
+
+    def cell_bytes(indices):
+        views = {}
+        for i in indices:
+            views.update(items[i]['views'])
+        return sum(views.values())
+
+    def split(indices, lo, hi, depth, key):
+        if len(indices) == 1 or depth >= max_depth or cell_bytes(indices) <= max_bytes:
+            tiles.append({'id': key, 'nodes': indices})
+            return
+
+        extent = hi - lo
+        axes = [axis for axis in range(3) if extent[axis] >= extent.max() / 2]
+        mid = (lo + hi) / 2
+        codes = np.zeros(len(indices), dtype=np.int64)
+        for bit, axis in enumerate(axes):
+            codes |= (centers[indices, axis] >= mid[axis]).astype(np.int64) << bit
+
+        for code in np.unique(codes):
+            child_lo, child_hi = lo.copy(), hi.copy()
+            for bit, axis in enumerate(axes):
+                if (code >> bit) & 1:
+                    child_lo[axis] = mid[axis]
+                else:
+                    child_hi[axis] = mid[axis]
+            split(indices[codes == code], child_lo, child_hi, depth + 1, f"{key}{code:x}")
+
+    split(np.arange(len(items)), centers.min(axis=0), centers.max(axis=0), 0, 't')
+    return tiles
+
+
+def _matrix_list(matrix):
+    """Column-major glTF matrix"""
+    return [float(v) for v in np.asarray(matrix, dtype=float).T.reshape(-1)]
+
+
+def tile_model(glb, graph, node_indices):
+    """
+    GLB bytes of a tile: the given mesh nodes as scene roots with their world
+    transforms, and everything they draw with (meshes and LOD meshes,
+    accessors, materials, textures, images, samplers, bufferViews)
+    """
+
+    source = glb.json
+    gltf = {'asset': copy.deepcopy(source['asset'])}
+    builder = GLBBuilder(gltf)
+    gltf = builder.json
+
+    maps = {key: {} for key in ('meshes', 'accessors', 'materials', 'textures', 'images', 'samplers',
+                                'bufferViews')}
+
+    def take(collection, index):
+        remap = maps[collection]
+        if index not in remap:
+            remap[index] = len(remap)
+            gltf.setdefault(collection, []).append(copy.deepcopy(source[collection][index]))
+        return remap[index]
+
+    def take_views(item):
+        for container, key in view_references(item):
+            if container[key] not in maps['bufferViews']:
+                maps['bufferViews'][container[key]] = builder.copy_buffer_view(glb, container[key])
+            container[key] = maps['bufferViews'][container[key]]
+
+    def take_texture(index):
+        known = index in maps['textures']
+        new = take('textures', index)
+        texture = gltf['textures'][new]
+        if not known:
+            for holder in [texture] + list(texture.get('extensions', {}).values()):
+                if isinstance(holder, dict) and 'source' in holder:
+                    holder['source'] = take_image(holder['source'])
+            if 'sampler' in texture:
+                texture['sampler'] = take('samplers', texture['sampler'])
+        return new
+
+    def take_image(index):
+        known = index in maps['images']
+        new = take('images', index)
+        image = gltf['images'][new]
+        if not known:
+            uri = image.get('uri')
+            if uri is not None and not uri.startswith('data:'):
+                raise TileError(f"image {index} is an external file ({uri}); embed it before tiling")
+            take_views(image)
+        return new
+
+    def take_material(index):
+        known = index in maps['materials']
+        new = take('materials', index)
+        if not known:
+            for _, info in texture_infos(gltf['materials'][new]):
+                info['index'] = take_texture(info['index'])
+        return new
+
+    def take_accessor(index):
+        known = index in maps['accessors']
+        new = take('accessors', index)
+        if not known:
+            take_views(gltf['accessors'][new])
+        return new
+
+    def take_mesh(index):
+        known = index in maps['meshes']
+        new = take('meshes', index)
+        if known:
+            return new
+        for primitive in gltf['meshes'][new].get('primitives', []):
+            attributes = primitive.get('attributes', {})
+            for name in attributes:
+                attributes[name] = take_accessor(attributes[name])
+            if 'indices' in primitive:
+                primitive['indices'] = take_accessor(primitive['indices'])
+            for target in primitive.get('targets', []):
+                for name in target:
+                    target[name] = take_accessor(target[name])
+            if 'material' in primitive:
+                primitive['material'] = take_material(primitive['material'])
+            take_views(primitive.get('extensions', {}))
+        return new
+
+    roots = []
+    for index in node_indices:
+        node = {key: copy.deepcopy(value) for key, value in source['nodes'][index].items()
+                if key not in _NODE_TRANSFORM and key not in ('children', 'camera')}
+        node['mesh'] = take_mesh(node['mesh'])
+        for level in (node.get('extras', {}).get('lod') or []):
+            level['mesh'] = take_mesh(level['mesh'])
+        instancing = node.get('extensions', {}).get(INSTANCING_EXTENSION, {})
+        for name, accessor in instancing.get('attributes', {}).items():
+            instancing['attributes'][name] = take_accessor(accessor)
+        matrix = graph.world_matrices[index]
+        if not np.allclose(matrix, np.eye(4)):
+            node['matrix'] = _matrix_list(matrix)
+        roots.append(builder.add_node(node))
+
+    gltf['scenes'] = [{'nodes': roots}]
+    gltf['scene'] = 0
+    _copy_extension_lists(source, gltf)
+    return builder.to_bytes()
+
+
+def index_model(gltf):
+    """
+    glTF JSON of the index model: every node without a mesh (empties,
+    cameras, lights) and their ancestors, with the original transforms and
+    hierarchy, and no geometry
+    """
+
+    nodes = gltf.get('nodes', [])
+    parents = SceneGraph(gltf).parents
+    keep = set()
+    for index, node in enumerate(nodes):
+        if 'mesh' not in node:
+            while index >= 0 and index not in keep:
+                keep.add(index)
+                index = int(parents[index])
+
+    remap = {old: new for new, old in enumerate(sorted(keep))}
+    index = {key: copy.deepcopy(value) for key, value in gltf.items()
+             if key not in ('nodes', 'scenes', 'meshes', 'accessors', 'bufferViews', 'buffers', 'materials',
+                            'textures', 'images', 'samplers', 'skins', 'animations',
+                            'extensionsUsed', 'extensionsRequired')}
+
+    index['nodes'] = []
+    for old in sorted(keep):
+        node = {key: copy.deepcopy(value) for key, value in nodes[old].items()
+                if key not in ('mesh', 'skin', 'weights')}
+        if isinstance(node.get('extras'), dict):
+            node['extras'].pop('lod', None)
+        children = [remap[child] for child in node.pop('children', []) if child in remap]
+        if children:
+            node['children'] = children
+        index['nodes'].append(node)
+
+    index['scenes'] = []
+    for scene in gltf.get('scenes', []):
+        scene = copy.deepcopy(scene)
+        scene['nodes'] = [remap[root] for root in scene.get('nodes', []) if root in remap]
+        index['scenes'].append(scene)
+
+    _copy_extension_lists(gltf, index)
+    return index
+
+
+def build_tiles(glb_file, max_bytes=MAX_TILE_BYTES, max_depth=MAX_DEPTH, model=None):
+    """
+    Split a model into tiles. Returns (files, tileset): file name -> bytes
+    for the index model and every tile, and the tileset description
+    (`model` names the source in it; default: the file's name).
+    """
+
+    with GLBFile(glb_file) as glb:
+        graph = SceneGraph(glb.json)
+        items = mesh_nodes(glb, graph)
+        tiles = build_octree(items, max_bytes, max_depth)
+
+        index = index_model(glb.json)
+        check_zones(glb.json, index)
+        files = {INDEX_FILE: GLBBuilder(index).to_bytes()}
+
+        entries = []
+        for tile in tiles:
+            members = [items[i] for i in tile['nodes']]
+            filename = f"{TILE_PREFIX}{tile['id']}.glb"
+            files[filename] = tile_model(glb, graph, [item['node'] for item in members])
+            entries.append({
+                'id': tile['id'],
+                'file': filename,
+                'min': np.min([item['lo'] for item in members], axis=0).round(4).tolist(),
+                'max': np.max([item['hi'] for item in members], axis=0).round(4).tolist(),
+                'bytes': len(files[filename]),
+                'triangles': sum(item['triangles'] for item in members),
+                'nodes': [glb.json['nodes'][item['node']].get('name', f"node_{item['node']}")
+                          for item in members],
+            })
+
+    tileset = {
+        'version': TILES_VERSION,
+        'model': model or os.path.basename(glb_file),
+        'index': INDEX_FILE,
+        'min': np.min([entry['min'] for entry in entries], axis=0).tolist() if entries else [0, 0, 0],
+        'max': np.max([entry['max'] for entry in entries], axis=0).tolist() if entries else [0, 0, 0],
+        'tiles': entries,
+    }
+    return files, tileset
+
+
+def build_tiles_bytes(data, model, max_bytes=MAX_TILE_BYTES, max_depth=MAX_DEPTH):
+    """build_tiles() for a model held in memory (e.g. a freshly compressed model)"""
+
+    handle, path = tempfile.mkstemp(suffix='.glb')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        return build_tiles(path, max_bytes, max_depth, model=model)
+    finally:
+        os.unlink(path)
+
+
+def remove_stale_tiles(output_dir, files):
+    """Delete tiles of an earlier split that are not in `files`; returns how many"""
+
+    removed = 0
+    if os.path.isdir(output_dir):
+        for name in os.listdir(output_dir):
+            if name.startswith(TILE_PREFIX) and name.endswith('.glb') and name not in files:
+                os.remove(os.path.join(output_dir, name))
+                removed += 1
+    return removed
+
+
+def write_tiles(output_dir, files, tileset):
+    """Write a tileset and drop tiles left over from an earlier split; returns the files written"""
+
+    written = [name for name, data in sorted(files.items())
+               if write_if_changed(os.path.join(output_dir, name), data)]
+    if write_if_changed(os.path.join(output_dir, TILESET_FILE), json.dumps(tileset, indent=2)):
+        written.append(TILESET_FILE)
+    remove_stale_tiles(output_dir, files)
+    return written
+
+
+def default_output(glb_file):
+    return f"{os.path.splitext(glb_file)[0]}_tiles"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a GLB model into spatial tiles for streamed loading")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="directory for tileset.json, index.glb and the tiles (default: <model>_tiles)")
+    parser.add_argument('--max-tile-kb', type=int, default=MAX_TILE_BYTES // 1024,
+                        help=f"split tiles larger than this (default: {MAX_TILE_BYTES // 1024})")
+    parser.add_argument('--max-depth', type=int, default=MAX_DEPTH,
+                        help=f"deepest octree level (default: {MAX_DEPTH})")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+
+    output_dir = args.output_dir or default_output(args.glb_file)
+    print(f"📂 Tiling {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        files, tileset = build_tiles(args.glb_file, args.max_tile_kb * 1024, args.max_depth)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    tiles = tileset['tiles']
+    sizes = [tile['bytes'] for tile in tiles]
+    print(f"✅ {sum(len(tile['nodes']) for tile in tiles)} mesh nodes in {len(tiles)} tiles "
+          f"({min(sizes, default=0) / 1e3:.0f}-{max(sizes, default=0) / 1e3:.0f} KB), "
+          f"index {len(files[INDEX_FILE]) / 1e3:.1f} KB ({time.perf_counter() - started:.2f}s)")
+
+    written = write_tiles(output_dir, files, tileset)
+    print(f"💾 {output_dir}: {len(written)} file(s) written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
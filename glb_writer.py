@@ -0,0 +1,238 @@
+"""
+GLB writer
+Builds GLB containers from a glTF JSON document and a binary buffer. Stages
+that rewrite a model (glb_lod.py) start from an existing file, keep every
+original bufferView where it is and append their own data to the end of the
+BIN chunk, so nodes, names and extras they don't touch come out unchanged.
+Stages that replace data (glb_compress.py) call compact() afterwards to drop
+the bufferViews nothing references any more, and stages that split a model
+(glb_tiles.py) copy only the bufferViews they keep into a fresh builder.
+
+Requires: numpy
+
+USAGE:
+    with GLBFile('venue.glb') as glb:
+        builder = GLBBuilder.from_glb(glb)
+    accessor = builder.add_accessor(positions, target=TARGET_ARRAY_BUFFER, bounds=True)
+    write_if_changed('venue_lod.glb', builder.to_bytes())
+"""
+
+import copy
+import json
+import struct
+
+import numpy as np
+
+from glb_reader import CHUNK_BIN, CHUNK_JSON, GLB_MAGIC, GLB_VERSION, MESHOPT_EXTENSION, GLBError
+
+# bufferView targets
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+
+COMPONENT_TYPES = {
+    np.dtype(np.int8): 5120,
+    np.dtype(np.uint8): 5121,
+    np.dtype(np.int16): 5122,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.float32): 5126,
+}
+
+ACCESSOR_TYPES = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4', 16: 'MAT4'}
+
+
+def _padded(data, alignment, fill):
+    return data + fill * (-len(data) % alignment)
+
+
+def view_references(value):
+    """(container, key) of every bufferView index in a glTF document, extras excluded"""
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == 'bufferView' and isinstance(item, int):
+                yield value, key
+            elif key != 'extras':
+                yield from view_references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from view_references(item)
+
+
+def texture_infos(value, key=None):
+    """(slot name, textureInfo) of every `...Texture: {index}` in a material, extensions included"""
+
+    if isinstance(value, dict):
+        if key is not None and key.endswith('Texture') and 'index' in value:
+            yield key, value
+        for child_key, item in value.items():
+            if child_key != 'extras':
+                yield from texture_infos(item, child_key)
+    elif isinstance(value, list):
+        for item in value:
+            yield from texture_infos(item, key)
+
+
+def index_dtype(vertex_count):
+    """Smallest index type that can address `vertex_count` vertices"""
+    return np.dtype(np.uint16) if vertex_count <= 0xFFFF else np.dtype(np.uint32)
+
+
+class GLBBuilder:
+    """glTF JSON plus a growing BIN chunk (buffer 0)"""
+
+    def __init__(self, gltf=None, binary=b''):
+        self.json = copy.deepcopy(gltf) if gltf else {'asset': {'version': '2.0'}}
+        self.bin = bytearray(binary)
+
+        buffers = self.json.setdefault('buffers', [])
+        if not buffers:
+            buffers.append({'byteLength': 0})
+        elif 'uri' in buffers[0]:
+            raise GLBError("buffer 0 is an external file; only the embedded BIN chunk can be extended")
+
+    @classmethod
+    def from_glb(cls, glb):
+        """Builder holding a copy of an open GLBFile's JSON and BIN chunk"""
+        return cls(glb.json, bytes(glb.bin) if glb.bin is not None else b'')
+
+    def _append(self, collection, item):
+        items = self.json.setdefault(collection, [])
+        items.append(item)
+        return len(items) - 1
+
+    def append_binary(self, data):
+        """Append raw bytes (4-byte aligned) to the BIN chunk; returns their offset"""
+
+        self.bin.extend(b'\x00' * (-len(self.bin) % 4))
+        offset = len(self.bin)
+        self.bin.extend(data)
+        return offset
+
+    def add_buffer_view(self, data, target=None, byte_stride=None):
+        """Append raw bytes (4-byte aligned) as a new bufferView; returns its index"""
+
+        data = bytes(data)
+        view = {'buffer': 0, 'byteOffset': self.append_binary(data), 'byteLength': len(data)}
+        if byte_stride:
+            view['byteStride'] = byte_stride
+        if target:
+            view['target'] = target
+        return self._append('bufferViews', view)
+
+    def add_buffer(self, buffer):
+        """Add a buffer after the BIN chunk (e.g. a compression fallback); returns its index"""
+        return self._append('buffers', buffer)
+
+    def meshopt_fallback(self):
+        """Index of the EXT_meshopt_compression fallback buffer, added on first use"""
+
+        for index, buffer in enumerate(self.json['buffers']):
+            if buffer.get('extensions', {}).get(MESHOPT_EXTENSION, {}).get('fallback'):
+                return index
+        return self.add_buffer({'byteLength': 0, 'extensions': {MESHOPT_EXTENSION: {'fallback': True}}})
+
+    def copy_buffer_view(self, glb, index):
+        """
+        Append bufferView `index` of an open GLBFile, bytes included, and
+        return its new index. Compressed views keep their encoded bytes and
+        get a slot in this builder's fallback buffer.
+        """
+
+        view = copy.deepcopy(glb.json['bufferViews'][index])
+        compressed = view.get('extensions', {}).get(MESHOPT_EXTENSION)
+        if compressed is not None:
+            start = compressed.get('byteOffset', 0)
+            encoded = glb.buffer(compressed['buffer'])[start:start + compressed['byteLength']]
+            compressed['buffer'] = 0
+            compressed['byteOffset'] = self.append_binary(encoded.tobytes())
+            view['buffer'] = self.meshopt_fallback()
+            fallback = self.json['buffers'][view['buffer']]
+            view['byteOffset'] = fallback['byteLength'] + (-fallback['byteLength'] % 4)
+            fallback['byteLength'] = view['byteOffset'] + view['byteLength']
+        else:
+            view['buffer'] = 0
+            view['byteOffset'] = self.append_binary(glb.buffer_view(index).tobytes())
+        return self._append('bufferViews', view)
+
+    def add_accessor(self, array, target=None, normalized=False, bounds=False):
+        """
+        Append a (count,) or (count, components) array as a tightly packed
+        accessor; `bounds` adds min/max (required for POSITION)
+        """
+
+        array = np.ascontiguousarray(array)
+        if array.dtype not in COMPONENT_TYPES:
+            raise ValueError(f"unsupported accessor dtype: {array.dtype}")
+        components = 1 if array.ndim == 1 else array.shape[1]
+
+        accessor = {
+            'bufferView': self.add_buffer_view(array.tobytes(), target),
+            'componentType': COMPONENT_TYPES[array.dtype],
+            'count': len(array),
+            'type': ACCESSOR_TYPES[components],
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if bounds and len(array):
+            values = array.reshape(len(array), components)
+            accessor['min'] = values.min(axis=0).tolist()
+            accessor['max'] = values.max(axis=0).tolist()
+        return self._append('accessors', accessor)
+
+    def add_indices(self, triangles, vertex_count):
+        """Triangle list indices in the smallest type that fits"""
+        indices = np.asarray(triangles).reshape(-1).astype(index_dtype(vertex_count))
+        return self.add_accessor(indices, target=TARGET_ELEMENT_ARRAY_BUFFER)
+
+    def add_mesh(self, mesh):
+        return self._append('meshes', mesh)
+
+    def add_node(self, node):
+        return self._append('nodes', node)
+
+    def compact(self):
+        """
+        Drop bufferViews nothing references and repack the BIN chunk with the
+        rest, in their original order. Compressed views keep their place in
+        their fallback buffer; their encoded bytes move with the BIN chunk.
+        """
+
+        references = list(view_references({k: v for k, v in self.json.items() if k != 'bufferViews'}))
+        used = sorted({container[key] for container, key in references})
+        views = self.json.get('bufferViews', [])
+        old = bytes(self.bin)
+        self.bin = bytearray()
+
+        remap = {}
+        for index in used:
+            view = views[index]
+            for desc in (view, view.get('extensions', {}).get(MESHOPT_EXTENSION)):
+                if desc is not None and desc.get('buffer', 0) == 0:
+                    start = desc.get('byteOffset', 0)
+                    desc['byteOffset'] = self.append_binary(old[start:start + desc['byteLength']])
+            remap[index] = len(remap)
+
+        for container, key in references:
+            container[key] = remap[container[key]]
+        if views:
+            self.json['bufferViews'] = [views[i] for i in used]
+        return len(views) - len(used)
+
+    def to_bytes(self):
+        """The complete GLB file"""
+
+        binary = _padded(bytes(self.bin), 4, b'\x00')
+        self.json['buffers'][0]['byteLength'] = len(self.bin)
+
+        gltf = self.json
+        if not self.bin and gltf['buffers'] == [{'byteLength': 0}]:
+            gltf = dict(gltf)
+            del gltf['buffers']
+
+        payload = _padded(json.dumps(gltf, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                          4, b' ')
+        chunks = struct.pack('<I4s', len(payload), CHUNK_JSON) + payload
+        if binary:
+            chunks += struct.pack('<I4s', len(binary), CHUNK_BIN) + binary
+        return struct.pack('<4sII', GLB_MAGIC, GLB_VERSION, 12 + len(chunks)) + chunks
@@ -0,0 +1,532 @@
+"""
+HDRI prefiltering for the environment lighting
+Turns Radiance .hdr panoramas into ready-to-use prefiltered environment
+maps, so switching HDRIs in the app is one small fetch and no PMREM pass on
+the GPU.
+
+For every .hdr the tool builds the texture three.js's PMREMGenerator would
+render - the "cubeUV" atlas (cube faces at every roughness level, plus the
+six extra blurred 16x16 levels) - and writes it as a compact container:
+
+    header  'PMRM', version, encoding, cube size, atlas width and height
+    sh      9 x RGB float32 spherical-harmonic radiance coefficients
+            (three.js SphericalHarmonics3 order and basis, usable as a
+            LightProbe for diffuse irradiance)
+    tiles   every face of every level, rows bottom-up, as RGB9E5 (4 bytes
+            per texel) or RGB half floats (6 bytes)
+
+The client (src/utils/prefilteredEnvironment.ts) copies the tiles into an
+atlas texture with CubeUVReflectionMapping, which three.js samples
+directly. Levels are Gaussian blurs of the panorama with the sigmas
+PMREMGenerator uses, evaluated per texel from a box-filtered mip pyramid of
+the source (about a second per 1k HDRI).
+
+Also writes a TypeScript manifest (src/data/environments.ts) mapping each
+source .hdr (path under public/) to its container and SH coefficients. The
+app lights the scene with a LightProbe built from the coefficients while the
+container loads; HDRIs without an entry are still prefiltered at runtime.
+
+Requires: numpy
+
+USAGE:
+    python hdri_prefilter.py public/textures/env -o public/env --ts-output src/data/environments.ts
+    python hdri_prefilter.py public/studio_small_01_1k.hdr --size 64 --encoding half
+"""
+
+import argparse
+import concurrent.futures
+import math
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from ts_codegen import environments_module, write_module
+
+CONTAINER_MAGIC = b'PMRM'
+CONTAINER_VERSION = 1
+
+ENCODINGS = {'rgb9e5': 0, 'half': 1}
+
+# Face size of the sharpest level (PMREMGenerator uses width / 4 = 256 for 1k maps)
+DEFAULT_CUBE_SIZE = 128
+
+# PMREMGenerator constants (three.js r170)
+LOD_MIN = 4
+EXTRA_LOD_SIGMA = (0.125, 0.215, 0.35, 0.446, 0.526, 0.582)
+
+# Gaussian taps per axis in the tangent plane, covering +-3 sigma
+BLUR_TAPS = 9
+
+# RGB9E5 (EXT_texture_shared_exponent)
+RGB9E5_MANTISSA_BITS = 9
+RGB9E5_EXP_BIAS = 15
+RGB9E5_MAX = (511 / 512) * 2.0 ** 16
+
+HALF_MAX = 65504.0
+
+# Direction of each cube face texel, as PMREMGenerator's getDirection():
+# (s, t) in [-1, 1] -> direction
+_FACE_DIRECTIONS = (
+    lambda s, t: (np.ones_like(s), t, s),     # +x
+    lambda s, t: (-s, np.ones_like(s), -t),   # +y
+    lambda s, t: (-s, t, np.ones_like(s)),    # +z
+    lambda s, t: (-np.ones_like(s), t, -s),   # -x
+    lambda s, t: (-s, -np.ones_like(s), t),   # -y
+    lambda s, t: (s, t, -np.ones_like(s)),    # -z
+)
+
+
+class HDRError(ValueError):
+    """Raised when a file is not a readable Radiance HDR image"""
+
+
+# ----------------------------------------------------------------------
+# Radiance .hdr
+# ----------------------------------------------------------------------
+
+def _read_rle_scanline(data, pos, width):
+    """One new-style run-length encoded scanline: ((width, 4) RGBE, new pos)"""
+
+    scanline = np.empty((4, width), dtype=np.uint8)
+    for channel in range(4):
+        row = bytearray()
+        while len(row) < width:
+            count = data[pos]
+            pos += 1
+            if count > 128:
+                row.extend(data[pos:pos + 1] * (count - 128))
+                pos += 1
+            else:
+                if count == 0:
+                    raise HDRError("bad scanline data (zero-length run)")
+                row.extend(data[pos:pos + count])
+                pos += count
+        if len(row) != width:
+            raise HDRError("bad scanline data (run overflows the scanline)")
+        scanline[channel] = np.frombuffer(bytes(row), dtype=np.uint8)
+    return scanline.T, pos
+
+
+def read_hdr(path):
+    """Radiance RGBE image as (height, width, 3) float32, top row first"""
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith((b'#?RADIANCE', b'#?RGBE')):
+        raise HDRError(f"{path}: not a Radiance HDR file")
+    header_end = data.find(b'\n\n')
+    if header_end < 0:
+        raise HDRError(f"{path}: header is not terminated")
+    for line in data[:header_end].split(b'\n'):
+        if line.startswith(b'FORMAT=') and line.strip() != b'FORMAT=32-bit_rle_rgbe':
+            raise HDRError(f"{path}: unsupported pixel format {line[7:].decode(errors='replace')}")
+
+    size_end = data.find(b'\n', header_end + 2)
+    size = data[header_end + 2:size_end].split()
+    if len(size) != 4 or size[0] != b'-Y' or size[2] != b'+X':
+        raise HDRError(f"{path}: unsupported orientation {b' '.join(size).decode(errors='replace')}")
+    height, width = int(size[1]), int(size[3])
+
+    pos = size_end + 1
+    rgbe = np.empty((height, width, 4), dtype=np.uint8)
+    try:
+        for y in range(height):
+            rle = (8 <= width <= 0x7FFF and data[pos] == 2 and data[pos + 1] == 2 and
+                   (data[pos + 2] << 8 | data[pos + 3]) == width)
+            if rle:
+                rgbe[y], pos = _read_rle_scanline(data, pos + 4, width)
+            else:
+                # Flat scanline; old-style run-length encoding is not supported
+                rgbe[y] = np.frombuffer(data, dtype=np.uint8, count=width * 4, offset=pos).reshape(width, 4)
+                pos += width * 4
+    except (IndexError, ValueError) as e:
+        raise HDRError(f"{path}: truncated or corrupt pixel data ({e})") from e
+
+    # Same decoding as three.js's HDRLoader: channel * 2^(e - 128) / 255
+    exponent = rgbe[..., 3].astype(np.int32)
+    scale = np.where(exponent > 0, np.ldexp(1.0, exponent - 128) / 255.0, 0.0)
+    return (rgbe[..., :3] * scale[..., None]).astype(np.float32)
+
+
+# ----------------------------------------------------------------------
+# Panorama sampling
+# ----------------------------------------------------------------------
+
+def mip_pyramid(image, min_height=4):
+    """Box-filtered halvings of an equirectangular image, full size first"""
+
+    levels = [np.asarray(image, dtype=np.float32)]
+    while levels[-1].shape[0] >= 2 * min_height and levels[-1].shape[1] % 2 == 0 and levels[-1].shape[0] % 2 == 0:
+        h, w, _ = levels[-1].shape
+        levels.append(levels[-1].reshape(h // 2, 2, w // 2, 2, 3).mean(axis=(1, 3)))
+    return levels
+
+
+def equirect_directions(height, width):
+    """Unit direction of every texel center (three.js equirectUv convention)"""
+
+    latitude = (0.5 - (np.arange(height) + 0.5) / height) * math.pi
+    longitude = ((np.arange(width) + 0.5) / width - 0.5) * 2 * math.pi
+    lat, lon = np.meshgrid(latitude, longitude, indexing='ij')
+    return np.stack([np.cos(lat) * np.cos(lon), np.sin(lat), np.cos(lat) * np.sin(lon)], axis=-1)
+
+
+def sample_equirect(image, directions):
+    """Bilinear lookup of (..., 3) unit directions; longitude wraps"""
+
+    h, w, _ = image.shape
+    x, y, z = directions[..., 0], directions[..., 1], directions[..., 2]
+    u = np.arctan2(z, x) / (2 * math.pi) + 0.5
+    v = np.arcsin(np.clip(y, -1.0, 1.0)) / math.pi + 0.5
+
+    col = u * w - 0.5
+    row = np.clip((1.0 - v) * h - 0.5, 0.0, h - 1.0)
+    c0 = np.floor(col).astype(np.int64)
+    r0 = np.minimum(np.floor(row).astype(np.int64), h - 2) if h > 1 else np.zeros_like(c0)
+    fc = (col - c0)[..., None]
+    fr = (row - r0)[..., None]
+    c0, c1 = c0 % w, (c0 + 1) % w
+    r1 = np.minimum(r0 + 1, h - 1)
+
+    top = image[r0, c0] * (1 - fc) + image[r0, c1] * fc
+    bottom = image[r1, c0] * (1 - fc) + image[r1, c1] * fc
+    return top * (1 - fr) + bottom * fr
+
+
+def _pyramid_level(pyramid, texel_angle):
+    """Coarsest level whose texels are no larger than `texel_angle` radians"""
+
+    for level in range(len(pyramid) - 1, -1, -1):
+        if math.pi / pyramid[level].shape[0] <= texel_angle:
+            return pyramid[level]
+    return pyramid[0]
+
+
+def blur_directions(pyramid, directions, sigma, texel_angle):
+    """
+    Radiance around each direction under a spherical Gaussian of `sigma`
+    radians: taps on a grid in the tangent plane, mapped onto the sphere
+    """
+
+    directions = directions / np.linalg.norm(directions, axis=-1, keepdims=True)
+    if sigma <= texel_angle / 2:
+        return sample_equirect(_pyramid_level(pyramid, texel_angle), directions)
+
+    spacing = 6 * sigma / (BLUR_TAPS - 1)
+    source = _pyramid_level(pyramid, max(spacing, texel_angle))
+
+    # Tangent frame per direction
+    helper = np.where(np.abs(directions[..., 1:2]) < 0.999, [0.0, 1.0, 0.0], [1.0, 0.0, 0.0])
+    tangent = np.cross(helper, directions)
+    tangent /= np.linalg.norm(tangent, axis=-1, keepdims=True)
+    bitangent = np.cross(directions, tangent)
+
+    offsets = (np.arange(BLUR_TAPS) - (BLUR_TAPS - 1) / 2) * spacing
+    total = np.zeros(directions.shape, dtype=np.float64)
+    weight_sum = 0.0
+    for a in offsets:
+        for b in offsets:
+            angle = math.hypot(a, b)
+            weight = math.exp(-angle * angle / (2 * sigma * sigma))
+            if angle > 0:
+                tap = (math.cos(angle) * directions +
+                       math.sin(angle) / angle * (a * tangent + b * bitangent))
+            else:
+                tap = directions
+            total += weight * sample_equirect(source, tap)
+            weight_sum += weight
+    return total / weight_sum
+
+
+# ----------------------------------------------------------------------
+# cubeUV atlas
+# ----------------------------------------------------------------------
+
+def cube_uv_layout(cube_size):
+    """
+    Levels of PMREMGenerator's atlas: (atlas width, height, levels) with one
+    {size, sigma, x, y} per level; faces 0-2 sit in the bottom row of a
+    level's 3x2 block, faces 3-5 above them
+    """
+
+    lod_max = int(math.log2(cube_size))
+    if 2 ** lod_max != cube_size or lod_max < LOD_MIN:
+        raise ValueError(f"cube size must be a power of two >= {2 ** LOD_MIN}, got {cube_size}")
+
+    levels = []
+    for i in range(lod_max - LOD_MIN + 1):
+        size = 2 ** (lod_max - i)
+        levels.append({'size': size, 'sigma': 0.0 if i == 0 else 1.0 / size,
+                       'x': 0, 'y': 4 * (cube_size - size)})
+    for extra, sigma in enumerate(EXTRA_LOD_SIGMA, start=1):
+        size = 2 ** LOD_MIN
+        levels.append({'size': size, 'sigma': sigma, 'x': 3 * size * extra, 'y': 4 * (cube_size - size)})
+
+    width = 3 * max(cube_size, 2 ** LOD_MIN * (len(EXTRA_LOD_SIGMA) + 1))
+    return width, 4 * cube_size, levels
+
+
+def face_directions(size):
+    """
+    (6, size, size, 3) directions of every face texel, rows bottom-up. Tiles
+    carry a one-texel border continuing the face, as PMREMGenerator renders
+    them, so bilinear lookups never bleed between faces.
+    """
+
+    coords = ((np.arange(size) + 0.5 - 1) / (size - 2)) * 2 - 1
+    t, s = np.meshgrid(coords, coords, indexing='ij')
+    return np.stack([np.stack(face(s, t), axis=-1) for face in _FACE_DIRECTIONS])
+
+
+def prefilter_levels(image, cube_size=DEFAULT_CUBE_SIZE):
+    """Radiance of every level's faces: list of (6, size, size, 3) float arrays"""
+
+    pyramid = mip_pyramid(image)
+    _, _, layout = cube_uv_layout(cube_size)
+    levels = []
+    for level in layout:
+        size = level['size']
+        texel_angle = (math.pi / 2) / (size - 2)
+        levels.append(blur_directions(pyramid, face_directions(size), level['sigma'], texel_angle))
+    return levels
+
+
+def assemble_atlas(levels, cube_size):
+    """Levels placed in the (height, width, 3) cubeUV atlas, row 0 at the bottom"""
+
+    width, height, layout = cube_uv_layout(cube_size)
+    atlas = np.zeros((height, width, 3), dtype=np.float32)
+    for faces, level in zip(levels, layout):
+        size = level['size']
+        for face in range(6):
+            x = level['x'] + (face % 3) * size
+            y = level['y'] + (face // 3) * size
+            atlas[y:y + size, x:x + size] = faces[face]
+    return atlas
+
+
+# ----------------------------------------------------------------------
+# Spherical harmonics
+# ----------------------------------------------------------------------
+
+def sh_basis(directions):
+    """three.js SphericalHarmonics3.getBasisAt for (..., 3) directions -> (..., 9)"""
+
+    x, y, z = directions[..., 0], directions[..., 1], directions[..., 2]
+    return np.stack([
+        np.full_like(x, 0.282095),
+        0.488603 * y,
+        0.488603 * z,
+        0.488603 * x,
+        1.092548 * x * y,
+        1.092548 * y * z,
+        0.315392 * (3 * z * z - 1),
+        1.092548 * x * z,
+        0.546274 * (x * x - y * y),
+    ], axis=-1)
+
+
+def sh_coefficients(image, max_height=64):
+    """9 x RGB radiance projection, normalized like LightProbeGenerator"""
+
+    source = _pyramid_level(mip_pyramid(image), math.pi / max_height)
+    h, w, _ = source.shape
+    directions = equirect_directions(h, w)
+    solid_angle = np.cos((0.5 - (np.arange(h) + 0.5) / h) * math.pi)[:, None] * np.ones(w)
+    solid_angle *= 4 * math.pi / solid_angle.sum()
+    return np.einsum('hwk,hwc,hw->kc', sh_basis(directions), source.astype(np.float64), solid_angle)
+
+
+# ----------------------------------------------------------------------
+# Container
+# ----------------------------------------------------------------------
+
+def encode_rgb9e5(rgb):
+    """(..., 3) linear floats -> uint32 shared-exponent texels"""
+
+    rgb = np.clip(np.nan_to_num(np.asarray(rgb, dtype=np.float64)), 0.0, RGB9E5_MAX)
+    largest = rgb.max(axis=-1)
+    exponent = np.maximum(-RGB9E5_EXP_BIAS - 1, np.floor(np.log2(np.maximum(largest, 1e-30)))) + 1 + RGB9E5_EXP_BIAS
+    scale = np.exp2(exponent - RGB9E5_EXP_BIAS - RGB9E5_MANTISSA_BITS)
+    exponent = np.where(np.floor(largest / scale + 0.5) >= 1 << RGB9E5_MANTISSA_BITS, exponent + 1, exponent)
+    scale = np.exp2(exponent - RGB9E5_EXP_BIAS - RGB9E5_MANTISSA_BITS)
+
+    mantissa = np.minimum(np.floor(rgb / scale[..., None] + 0.5), 511).astype(np.uint32)
+    return (mantissa[..., 0] | mantissa[..., 1] << 9 | mantissa[..., 2] << 18 |
+            exponent.astype(np.uint32) << 27)
+
+
+def decode_rgb9e5(packed):
+    packed = np.asarray(packed, dtype=np.uint32)
+    scale = np.exp2((packed >> 27).astype(np.float64) - RGB9E5_EXP_BIAS - RGB9E5_MANTISSA_BITS)
+    return np.stack([(packed >> shift) & 0x1FF for shift in (0, 9, 18)], axis=-1) * scale[..., None]
+
+
+def encode_container(levels, sh, cube_size, encoding='rgb9e5'):
+    """Container bytes for prefiltered levels and SH coefficients"""
+
+    width, height, _ = cube_uv_layout(cube_size)
+    header = struct.pack('<4sHHIII', CONTAINER_MAGIC, CONTAINER_VERSION, ENCODINGS[encoding],
+                         cube_size, width, height)
+    parts = [header, np.asarray(sh, dtype='<f4').tobytes()]
+    for faces in levels:
+        if encoding == 'rgb9e5':
+            parts.append(encode_rgb9e5(faces).astype('<u4').tobytes())
+        else:
+            parts.append(np.clip(faces, 0.0, HALF_MAX).astype('<f2').tobytes())
+    return b''.join(parts)
+
+
+def decode_container(data):
+    """(cube size, SH (9, 3), levels) from container bytes"""
+
+    magic, version, encoding, cube_size, width, height = struct.unpack_from('<4sHHIII', data, 0)
+    if magic != CONTAINER_MAGIC or version != CONTAINER_VERSION:
+        raise ValueError("not a prefiltered environment container")
+    offset = struct.calcsize('<4sHHIII')
+    sh = np.frombuffer(data, dtype='<f4', count=27, offset=offset).reshape(9, 3)
+    offset += 27 * 4
+
+    levels = []
+    for level in cube_uv_layout(cube_size)[2]:
+        count = 6 * level['size'] ** 2
+        if encoding == ENCODINGS['rgb9e5']:
+            texels = decode_rgb9e5(np.frombuffer(data, dtype='<u4', count=count, offset=offset))
+            offset += count * 4
+        else:
+            texels = np.frombuffer(data, dtype='<f2', count=count * 3, offset=offset).astype(np.float64)
+            offset += count * 6
+        levels.append(texels.reshape(6, level['size'], level['size'], 3))
+    if offset != len(data):
+        raise ValueError("container has trailing data")
+    return cube_size, sh, levels
+
+
+def prefilter_hdr(path, cube_size=DEFAULT_CUBE_SIZE, encoding='rgb9e5'):
+    """(container bytes, SH coefficients) for one .hdr file"""
+
+    image = read_hdr(path)
+    levels = prefilter_levels(image, cube_size)
+    sh = sh_coefficients(image)
+    return encode_container(levels, sh, cube_size, encoding), sh
+
+
+# ----------------------------------------------------------------------
+# Batch
+# ----------------------------------------------------------------------
+
+def find_hdris(inputs):
+    """.hdr files from file and directory arguments, sorted; plus missing inputs"""
+
+    found, missing = [], []
+    for item in inputs:
+        if os.path.isdir(item):
+            found.extend(os.path.join(item, name) for name in sorted(os.listdir(item))
+                         if name.lower().endswith('.hdr'))
+        elif os.path.isfile(item):
+            found.append(item)
+        else:
+            missing.append(item)
+    return sorted(dict.fromkeys(found)), missing
+
+
+def public_path(path, public_dir='public'):
+    """Path as the app requests it (relative to public/, forward slashes)"""
+
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(public_dir))
+    if relative.startswith('..'):
+        relative = os.path.basename(path)
+    return relative.replace(os.sep, '/')
+
+
+def _process(path, output_dir, cube_size, encoding):
+    started = time.perf_counter()
+    try:
+        data, sh = prefilter_hdr(path, cube_size, encoding)
+    except (OSError, ValueError) as e:
+        return {'source': path, 'ok': False, 'error': str(e)}
+
+    output = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + '.pmrem')
+    return {
+        'source': path,
+        'ok': True,
+        'output': output,
+        'written': write_if_changed(output, data),
+        'bytes': len(data),
+        'source_bytes': os.path.getsize(path),
+        'sh': np.round(sh, 5).tolist(),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefilter HDRI panoramas into compact cubeUV environment maps")
+    parser.add_argument('inputs', nargs='*', default=[os.path.join('public', 'textures', 'env')],
+                        help=".hdr files and/or directories (default: public/textures/env)")
+    parser.add_argument('-o', '--output-dir', default=os.path.join('public', 'env'),
+                        help="where to write the .pmrem containers (default: public/env)")
+    parser.add_argument('--ts-output', default=os.path.join('src', 'data', 'environments.ts'),
+                        help="TypeScript manifest (default: src/data/environments.ts)")
+    parser.add_argument('--public-dir', default='public',
+                        help="directory the app serves, for manifest paths (default: public)")
+    parser.add_argument('--size', type=int, default=DEFAULT_CUBE_SIZE,
+                        help=f"face size of the sharpest level, power of two >= 16 (default: {DEFAULT_CUBE_SIZE})")
+    parser.add_argument('--encoding', choices=sorted(ENCODINGS), default='rgb9e5',
+                        help="texel format: rgb9e5 (4 bytes) or half (6 bytes)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    args = parser.parse_args(argv)
+
+    try:
+        cube_uv_layout(args.size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    files, missing = find_hdris(args.inputs)
+    for item in missing:
+        print(f"❌ Not found: {item}")
+    if not files:
+        print("⚠️ No .hdr files to process")
+        return 1
+
+    print(f"📂 Prefiltering {len(files)} HDRI(s) at {args.size}px ({args.encoding})...\n")
+    started = time.perf_counter()
+    task = (args.output_dir, args.size, args.encoding)
+    if args.jobs == 1 or len(files) == 1:
+        results = [_process(path, *task) for path in files]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_process, files, *[[value] * len(files) for value in task]))
+
+    entries = {}
+    for result in results:
+        if not result['ok']:
+            print(f"❌ {result['source']}: {result['error']}")
+            continue
+        print(f"✅ {result['source']}: {result['source_bytes'] / 1e6:.2f} MB -> {result['bytes'] / 1e6:.2f} MB"
+              f"{'' if result['written'] else ' (unchanged)'} ({result['seconds']:.2f}s)")
+        entries[public_path(result['source'], args.public_dir)] = {
+            'file': public_path(result['output'], args.public_dir),
+            'cubeSize': args.size,
+            'sh': result['sh'],
+        }
+
+    if args.ts_output and write_module(args.ts_output, environments_module(entries)):
+        print(f"📝 TypeScript module written: {args.ts_output}")
+
+    failed = len(results) - len(entries)
+    total_in = sum(r['source_bytes'] for r in results if r['ok'])
+    total_out = sum(r['bytes'] for r in results if r['ok'])
+    print(f"\n🎉 {len(entries)}/{len(results)} HDRIs: {total_in / 1e6:.1f} MB -> {total_out / 1e6:.1f} MB "
+          f"in {time.perf_counter() - started:.2f}s")
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+meshoptimizer buffer codecs
+Encoder and decoder for the two bitstreams EXT_meshopt_compression uses
+here: the vertex codec (mode ATTRIBUTES, format version 0) and the index
+sequence codec (mode INDICES). The client decodes them with three.js's
+MeshoptDecoder (drei's useGLTF enables it); the Python decoders let
+glb_reader.py and the other stages read compressed models too.
+
+Vertex codec: vertices are cut into blocks, every byte of a vertex becomes
+a column of zigzag-encoded deltas to the previous vertex, and each group of
+16 deltas is stored in 0, 2, 4 or 8 bits per value (2-bit selectors in a
+header, larger values as exceptions after the packed group). Encoding is a
+few NumPy passes over the whole buffer; decoding walks the byte columns in
+order (where a group ends depends on its exceptions) and unpacks all groups
+with NumPy afterwards.
+
+Index codec: every index is stored as a zigzag varint delta to a baseline.
+The format allows two baselines; the encoder always uses the first one, so
+it is a single vectorized pass and still decodes with the reference decoder.
+
+Layout follows meshoptimizer's vertexcodec.cpp / indexcodec.cpp and the
+EXT_meshopt_compression specification.
+
+Requires: numpy
+
+USAGE:
+    encoded = encode_vertex_buffer(vertices)          # (count, stride) uint8
+    vertices = decode_vertex_buffer(encoded, count, stride)
+    encoded = encode_index_sequence(indices)
+    indices = decode_index_sequence(encoded, count)
+"""
+
+import numpy as np
+
+VERTEX_HEADER = 0xA0
+SEQUENCE_HEADER = 0xD1
+
+BYTE_GROUP_SIZE = 16
+VERTEX_BLOCK_MAX_SIZE = 256
+VERTEX_BLOCK_SIZE_BYTES = 8192
+TAIL_MIN_SIZE = 32
+INDEX_TAIL_SIZE = 4
+
+# Bits per delta of each 2-bit group selector
+SELECTOR_BITS = (0, 2, 4, 8)
+
+# Largest encoded group: 8 packed bytes (4 bits) plus 16 exceptions
+_GROUP_MAX_BYTES = 24
+_HEADER_MAX_BYTES = (VERTEX_BLOCK_MAX_SIZE // BYTE_GROUP_SIZE + 3) // 4
+
+
+class MeshoptError(ValueError):
+    """Raised when a buffer cannot be encoded or is not a valid meshopt stream"""
+
+
+def vertex_block_size(stride):
+    """Vertices per block; must match the decoder's choice exactly"""
+    return min((VERTEX_BLOCK_SIZE_BYTES // stride) & ~(BYTE_GROUP_SIZE - 1), VERTEX_BLOCK_MAX_SIZE)
+
+
+def _check_stride(stride):
+    if stride <= 0 or stride > 256 or stride % 4:
+        raise MeshoptError(f"vertex stride must be a multiple of 4 up to 256, got {stride}")
+
+
+def _zigzag8(deltas):
+    return ((deltas << 1) ^ (deltas.view(np.int8) >> 7).view(np.uint8)).astype(np.uint8)
+
+
+def _unzigzag8(values):
+    return (values >> 1) ^ (0 - (values & 1)).astype(np.uint8)
+
+
+def _pack_groups(groups, bits):
+    """
+    Encoded bytes of 16-value groups at 2 or 4 bits: (n, 24) buffer and
+    lengths. Values at or above the sentinel are stored as exceptions.
+    """
+
+    n = len(groups)
+    sentinel = (1 << bits) - 1
+    per_byte = 8 // bits
+    packed_size = BYTE_GROUP_SIZE // per_byte
+
+    exception = groups >= sentinel
+    codes = np.where(exception, sentinel, groups).astype(np.uint8).reshape(n, packed_size, per_byte)
+    packed = np.zeros((n, packed_size), dtype=np.uint8)
+    for k in range(per_byte):
+        # First value of a byte goes into its highest bits
+        packed |= codes[:, :, k] << (bits * (per_byte - 1 - k))
+
+    out = np.zeros((n, _GROUP_MAX_BYTES), dtype=np.uint8)
+    out[:, :packed_size] = packed
+    rows, cols = np.nonzero(exception)
+    slots = packed_size + np.cumsum(exception, axis=1)[rows, cols] - 1
+    out[rows, slots] = groups[rows, cols]
+    return out, packed_size + exception.sum(axis=1)
+
+
+def encode_vertex_buffer(vertices):
+    """Encode a (count, stride) uint8 array of interleaved vertices"""
+
+    vertices = np.ascontiguousarray(vertices, dtype=np.uint8)
+    if vertices.ndim != 2:
+        raise MeshoptError("vertices must be a (count, stride) byte array")
+    count, stride = vertices.shape
+    _check_stride(stride)
+
+    out = [bytes([VERTEX_HEADER])]
+    block = vertex_block_size(stride)
+    blocks = -(-count // block)
+
+    if count:
+        # Deltas to the previous vertex; the first one is relative to itself,
+        # the decoder seeds its "previous vertex" from the tail
+        previous = np.concatenate([vertices[:1], vertices[:-1]])
+        deltas = _zigzag8(vertices - previous)
+        padded = np.zeros((blocks * block, stride), dtype=np.uint8)
+        padded[:count] = deltas
+
+        groups_per_block = block // BYTE_GROUP_SIZE
+        # (blocks, stride, groups, 16): byte columns of each block
+        columns = padded.reshape(blocks, block, stride).transpose(0, 2, 1)
+        groups = np.ascontiguousarray(columns).reshape(-1, BYTE_GROUP_SIZE)
+
+        # Cost of each selector; ties keep the earlier one, 8 bits first
+        sizes = np.stack([
+            np.full(len(groups), BYTE_GROUP_SIZE),
+            np.where(groups.any(axis=1), 1 << 30, 0),
+            4 + (groups >= 3).sum(axis=1),
+            8 + (groups >= 15).sum(axis=1),
+        ], axis=1)
+        selector = np.array([3, 0, 1, 2])[np.argmin(sizes, axis=1)]
+
+        encoded = np.zeros((len(groups), _GROUP_MAX_BYTES), dtype=np.uint8)
+        lengths = np.zeros(len(groups), dtype=np.int64)
+        raw = selector == 3
+        encoded[raw, :BYTE_GROUP_SIZE] = groups[raw]
+        lengths[raw] = BYTE_GROUP_SIZE
+        for code, bits in ((1, 2), (2, 4)):
+            chosen = selector == code
+            if chosen.any():
+                encoded[chosen], lengths[chosen] = _pack_groups(groups[chosen], bits)
+
+        # Groups past the end of the last block are not written
+        last_groups = -(-(count - (blocks - 1) * block) // BYTE_GROUP_SIZE)
+        valid = np.ones((blocks, stride, groups_per_block), dtype=bool)
+        valid[-1, :, last_groups:] = False
+        valid = valid.reshape(-1)
+        lengths[~valid] = 0
+        selector = np.where(valid, selector, 0)
+
+        # Per (block, column): 2-bit selectors, four groups per header byte
+        selector = selector.reshape(blocks * stride, groups_per_block)
+        header_groups = -(-groups_per_block // 4) * 4
+        padded_selector = np.zeros((blocks * stride, header_groups), dtype=np.uint8)
+        padded_selector[:, :groups_per_block] = selector
+        shifts = np.tile(np.arange(4, dtype=np.uint8) * 2, header_groups // 4)
+        header = np.bitwise_or.reduce((padded_selector << shifts).reshape(blocks * stride, -1, 4), axis=2)
+
+        header_lengths = np.full(blocks * stride, (groups_per_block + 3) // 4)
+        header_lengths.reshape(blocks, stride)[-1] = (last_groups + 3) // 4
+
+        # Lay out header + groups per (block, column) and keep the used bytes
+        rows = blocks * stride
+        layout = np.zeros((rows, _HEADER_MAX_BYTES + groups_per_block * _GROUP_MAX_BYTES), dtype=np.uint8)
+        layout[:, :header.shape[1]] = header
+        layout[:, _HEADER_MAX_BYTES:] = encoded.reshape(rows, -1)
+
+        used = np.zeros(layout.shape, dtype=bool)
+        used[:, :_HEADER_MAX_BYTES] = np.arange(_HEADER_MAX_BYTES) < header_lengths[:, None]
+        used[:, _HEADER_MAX_BYTES:] = (np.arange(_GROUP_MAX_BYTES) <
+                                       lengths.reshape(rows, groups_per_block, 1)).reshape(rows, -1)
+        out.append(layout[used].tobytes())
+
+    # Tail: zero padding, then the first vertex (the decoder's initial baseline)
+    first = vertices[0].tobytes() if count else bytes(stride)
+    out.append(bytes(max(TAIL_MIN_SIZE - stride, 0)) + first)
+    return b''.join(out)
+
+
+# Exceptions in one packed byte: 2-bit fields / nibbles at their sentinel
+_SENTINELS_2 = np.array([sum((b >> shift) & 3 == 3 for shift in (0, 2, 4, 6)) for b in range(256)], dtype=np.uint8)
+_SENTINELS_4 = np.array([((b & 15) == 15) + ((b >> 4) == 15) for b in range(256)], dtype=np.uint8)
+
+# Non-zero selectors of a header byte, in group order (zero groups take no bytes)
+_HEADER_SELECTORS = [tuple(s for s in ((b >> shift) & 3 for shift in (0, 2, 4, 6)) if s) for b in range(256)]
+
+
+def _group_lengths(data, packed_size, sentinels):
+    """Encoded length of a 2- or 4-bit group starting at every position of `data`"""
+
+    counts = np.zeros(len(data) + packed_size, dtype=np.uint8)
+    counts[:len(data)] = sentinels[data]
+    lengths = np.full(len(data), packed_size, dtype=np.uint8)
+    for k in range(packed_size):
+        lengths += counts[k:k + len(data)]
+    return lengths
+
+
+def _unpack_groups(data, starts, bits):
+    """(n, 16) values of the 2- or 4-bit groups at `starts`, exceptions filled in"""
+
+    per_byte = 8 // bits
+    packed_size = BYTE_GROUP_SIZE // per_byte
+    sentinel = (1 << bits) - 1
+    packed = data[starts[:, None] + np.arange(packed_size)]
+    # First value of a byte sits in its highest bits
+    shifts = bits * np.arange(per_byte - 1, -1, -1, dtype=np.uint8)
+    values = ((packed[:, :, None] >> shifts) & sentinel).reshape(len(starts), BYTE_GROUP_SIZE)
+
+    exception = values == sentinel
+    rows, cols = np.nonzero(exception)
+    slots = starts[rows] + packed_size + np.cumsum(exception, axis=1)[rows, cols] - 1
+    values[rows, cols] = data[slots]
+    return values
+
+
+def decode_vertex_buffer(data, count, stride):
+    """Decode a vertex stream into a (count, stride) uint8 array"""
+
+    _check_stride(stride)
+    data = np.frombuffer(bytes(data), dtype=np.uint8)
+    tail_size = max(TAIL_MIN_SIZE, stride)
+    if len(data) < 1 + tail_size or data[0] != VERTEX_HEADER:
+        raise MeshoptError("not a version 0 meshopt vertex stream")
+
+    block = vertex_block_size(stride)
+    blocks = -(-count // block)
+    groups_per_block = block // BYTE_GROUP_SIZE
+    header_size = (groups_per_block + 3) // 4
+    last_groups = -(-(count - (blocks - 1) * block) // BYTE_GROUP_SIZE) if count else 0
+    columns = blocks * stride
+    end = len(data) - tail_size
+
+    # A group's length depends on its exceptions, so byte columns can only be
+    # found one after another: walk them with the length of a group starting
+    # at every position precomputed, then find the groups and unpack them
+    # over all columns at once
+    lengths = (None, _group_lengths(data, 4, _SENTINELS_2), _group_lengths(data, 8, _SENTINELS_4))
+    short = (lengths[1].tobytes(), lengths[2].tobytes())
+    raw = data.tobytes()
+    header_starts = np.empty(columns, dtype=np.int64)
+    pos = 1
+    for column in range(columns):
+        size = header_size if column < columns - stride else (last_groups + 3) // 4
+        header_starts[column] = pos
+        header = raw[pos:pos + size]
+        pos += size
+        for byte in header:
+            for selector in _HEADER_SELECTORS[byte]:
+                if selector == 3:
+                    pos += BYTE_GROUP_SIZE
+                elif pos < end:
+                    pos += short[selector - 1][pos]
+                else:
+                    raise MeshoptError("vertex stream is truncated")
+        if pos > end:
+            raise MeshoptError("vertex stream is truncated")
+    if pos != end:
+        raise MeshoptError("vertex stream has trailing data")
+    if not count:
+        return np.empty((0, stride), dtype=np.uint8)
+
+    # Selectors and start of every group, stepping through all columns together
+    groups = np.full(columns, groups_per_block)
+    groups[columns - stride:] = last_groups
+    sizes = (groups + 3) // 4
+    header_bytes = data[np.minimum(header_starts[:, None] + np.arange(header_size), end)]
+    selectors = (header_bytes[:, :, None] >> np.arange(0, 8, 2, dtype=np.uint8)) & 3
+    selectors = selectors.reshape(columns, -1)[:, :groups_per_block]
+    selectors[np.arange(groups_per_block) >= groups[:, None]] = 0
+    group_lengths = np.stack([np.zeros(len(data), dtype=np.uint8), lengths[1], lengths[2],
+                              np.full(len(data), BYTE_GROUP_SIZE, dtype=np.uint8)])
+    starts = np.empty((columns, groups_per_block), dtype=np.int64)
+    pos = header_starts + sizes
+    for g in range(groups_per_block):
+        starts[:, g] = pos
+        pos = pos + group_lengths[selectors[:, g], np.minimum(pos, len(data) - 1)]
+
+    values = np.zeros((columns, groups_per_block, BYTE_GROUP_SIZE), dtype=np.uint8)
+    raw_groups = selectors == 3
+    values[raw_groups] = data[starts[raw_groups][:, None] + np.arange(BYTE_GROUP_SIZE)]
+    for selector in (1, 2):
+        chosen = selectors == selector
+        if chosen.any():
+            values[chosen] = _unpack_groups(data, starts[chosen], SELECTOR_BITS[selector])
+
+    # (block, byte column, vertex) -> (vertex, byte column)
+    deltas = values.reshape(blocks, stride, block).transpose(0, 2, 1).reshape(-1, stride)[:count]
+
+    # Every vertex is a delta to the previous one, the first to the tail's baseline
+    return np.cumsum(_unzigzag8(deltas), axis=0, dtype=np.uint8) + data[-stride:]
+
+
+def encode_index_sequence(indices):
+    """Encode a sequence of uint32-range indices"""
+
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+    deltas = np.diff(indices, prepend=0)
+    zigzag = (deltas << 1) ^ (deltas >> 63)
+    # Low bit selects the baseline; always baseline 0
+    values = (zigzag << 1) & 0xFFFFFFFF
+
+    # 7 bits per byte, high bit set on all but the last byte of a value
+    sizes = 1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21) + (values >= 1 << 28)
+    chunks = (values[:, None] >> (7 * np.arange(5))) & 0x7F
+    more = np.arange(5) < (sizes[:, None] - 1)
+    chunks |= more * 0x80
+    used = np.arange(5) < sizes[:, None]
+    body = chunks[used].astype(np.uint8).tobytes()
+    return bytes([SEQUENCE_HEADER]) + body + bytes(INDEX_TAIL_SIZE)
+
+
+def decode_index_sequence(data, count):
+    """Decode an index sequence stream into a uint32 array"""
+
+    data = np.frombuffer(bytes(data), dtype=np.uint8)
+    if len(data) < 1 + INDEX_TAIL_SIZE or data[0] & 0xF0 != 0xD0 or data[0] & 0x0F > 1:
+        raise MeshoptError("not a meshopt index sequence stream")
+
+    body = data[1:len(data) - INDEX_TAIL_SIZE]
+    ends = np.flatnonzero(body < 0x80)
+    if len(ends) != count or (count and ends[-1] != len(body) - 1):
+        raise MeshoptError(f"index stream holds {len(ends)} values, expected {count}")
+
+    # Varints are 1-5 bytes: add up byte k of every value that has one
+    starts = np.concatenate([[0], ends[:-1] + 1]) if count else ends
+    values = (body[starts] & 0x7F).astype(np.int64)
+    longer = np.flatnonzero(ends > starts)
+    for k in range(1, 5):
+        values[longer] |= (body[starts[longer] + k] & 0x7F).astype(np.int64) << (7 * k)
+        longer = longer[ends[longer] > starts[longer] + k]
+
+    baseline = values & 1
+    zigzag = values >> 1
+    deltas = (zigzag >> 1) ^ -(zigzag & 1)
+
+    if not baseline.any():
+        indices = np.cumsum(deltas)
+    else:
+        indices = np.empty(count, dtype=np.int64)
+        for b in (0, 1):
+            mask = baseline == b
+            indices[mask] = np.cumsum(deltas[mask])
+    return (indices & 0xFFFFFFFF).astype(np.uint32)
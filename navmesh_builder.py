@@ -0,0 +1,589 @@
+"""
+Navigation graph generation from GLB floor geometry
+Rasterizes walkable floor triangles into a height grid, blocks cells under
+walls and furniture, erodes by the agent radius and extracts a sparse
+waypoint graph. ZONE_ empties are linked into the graph, so the app can
+route to every zone without hand-placed nav nodes. Zone nodes name their
+ZONE_ node (`zone`), which the app's zones carry as `node`.
+
+Floors are meshes named FLOOR_* or with extras {"walkable": true}. If the
+model has none, every upward-facing triangle (within the slope limit) is a
+floor candidate. Only one level is supported: the lowest walkable surface
+under each cell wins.
+
+Requires: numpy
+
+USAGE:
+    python navmesh_builder.py public/SM_MFF.glb
+    python navmesh_builder.py venue.glb -o navgraph.json
+    python navmesh_builder.py venue.glb --cell-size 0.5 --spacing 6
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from asset_cache import write_if_changed
+from extract_zones_from_glb import extract_zones
+from glb_geometry import scene_triangles
+from glb_reader import GLBFile
+from glb_scene import AnyMatch, ExtrasMatch, PrefixMatch, SceneGraph
+from ts_codegen import nav_graph_module, write_module
+
+FLOOR_PREFIX = 'FLOOR_'
+FLOOR_PREDICATE = AnyMatch(PrefixMatch(FLOOR_PREFIX), ExtrasMatch('walkable', True))
+
+# Bump when the graph algorithm changes so cached graphs are rebuilt
+NAVGRAPH_VERSION = 2
+
+# The module the app imports
+DEFAULT_TS_OUTPUT = os.path.join('src', 'data', 'navGraph.ts')
+
+# Upper bound on expanded (triangle, cell) pairs held in memory at once
+_CHUNK_BUDGET = 1 << 22
+
+
+class NavSettings:
+    """Agent and grid parameters (meters / degrees)"""
+
+    def __init__(self, cell_size=0.25, agent_radius=0.3, agent_height=1.8,
+                 step_height=0.4, max_slope_deg=35.0, waypoint_spacing=4.0):
+        self.cell_size = cell_size
+        self.agent_radius = agent_radius
+        self.agent_height = agent_height
+        self.step_height = step_height
+        self.max_slope_deg = max_slope_deg
+        self.waypoint_spacing = waypoint_spacing
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class NavGrid:
+    """Single-level walkability grid over the XZ plane (glTF is Y-up)"""
+
+    def __init__(self, origin, cell_size, nx, nz):
+        self.origin = origin            # (x, z) of the grid corner
+        self.cell_size = cell_size
+        self.nx = nx
+        self.nz = nz
+        self.height = np.full((nz, nx), np.inf)
+        self.walkable = np.zeros((nz, nx), dtype=bool)
+
+    def cell_of(self, x, z):
+        """Integer (ix, iz) for world coordinates (may fall outside the grid)"""
+        ix = np.floor((np.asarray(x) - self.origin[0]) / self.cell_size).astype(np.int64)
+        iz = np.floor((np.asarray(z) - self.origin[1]) / self.cell_size).astype(np.int64)
+        return ix, iz
+
+    def center_of(self, ix, iz):
+        x = self.origin[0] + (np.asarray(ix) + 0.5) * self.cell_size
+        z = self.origin[1] + (np.asarray(iz) + 0.5) * self.cell_size
+        return x, z
+
+    def inside(self, ix, iz):
+        return (ix >= 0) & (ix < self.nx) & (iz >= 0) & (iz < self.nz)
+
+
+# ----------------------------------------------------------------------
+# Vectorized rasterization
+# ----------------------------------------------------------------------
+
+def _chunks(counts, budget=_CHUNK_BUDGET):
+    """Split triangles into (start, stop) runs whose expanded size fits the budget"""
+
+    totals = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        base = totals[start - 1] if start else 0
+        stop = int(np.searchsorted(totals, base + budget, side='right'))
+        stop = max(stop, start + 1)
+        yield start, stop
+        start = stop
+
+
+def _expand(counts):
+    """For ranges of the given sizes: (owner index, position within range)"""
+
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    local = np.arange(owner.size) - starts[owner]
+    return owner, local
+
+
+def rasterize_floor(corners, grid):
+    """
+    Record the lowest floor height per cell.
+
+    Every cell whose center falls inside a triangle's XZ projection takes
+    the triangle's interpolated height. Cells containing a triangle's
+    centroid are always covered, so slivers smaller than a cell still count.
+    """
+
+    if not len(corners):
+        return
+
+    cs = grid.cell_size
+    x, y, z = corners[..., 0], corners[..., 1], corners[..., 2]
+
+    ix0, iz0 = grid.cell_of(x.min(axis=1) - 0.5 * cs, z.min(axis=1) - 0.5 * cs)
+    ix1, iz1 = grid.cell_of(x.max(axis=1) - 0.5 * cs, z.max(axis=1) - 0.5 * cs)
+    ix0 = np.clip(ix0 + 1, 0, grid.nx - 1)
+    iz0 = np.clip(iz0 + 1, 0, grid.nz - 1)
+    ix1 = np.clip(ix1, 0, grid.nx - 1)
+    iz1 = np.clip(iz1, 0, grid.nz - 1)
+    width = np.maximum(ix1 - ix0 + 1, 0)
+    counts = width * np.maximum(iz1 - iz0 + 1, 0)
+
+    # Signed doubled area in XZ; vertical triangles have none
+    area = (x[:, 1] - x[:, 0]) * (z[:, 2] - z[:, 0]) - (x[:, 2] - x[:, 0]) * (z[:, 1] - z[:, 0])
+    counts = np.where(np.abs(area) > 1e-12, counts, 0)
+
+    flat = grid.height.reshape(-1)
+
+    for start, stop in _chunks(counts):
+        owner, local = _expand(counts[start:stop])
+        if not owner.size:
+            continue
+        t = owner + start
+        cx = ix0[t] + local % width[t]
+        cz = iz0[t] + local // width[t]
+        px, pz = grid.center_of(cx, cz)
+
+        xa, xb, xc = x[t, 0], x[t, 1], x[t, 2]
+        za, zb, zc = z[t, 0], z[t, 1], z[t, 2]
+        w0 = ((xb - px) * (zc - pz) - (xc - px) * (zb - pz)) / area[t]
+        w1 = ((xc - px) * (za - pz) - (xa - px) * (zc - pz)) / area[t]
+        w2 = 1.0 - w0 - w1
+
+        eps = -1e-9
+        inside = (w0 >= eps) & (w1 >= eps) & (w2 >= eps)
+        h = w0 * y[t, 0] + w1 * y[t, 1] + w2 * y[t, 2]
+        np.minimum.at(flat, (cz * grid.nx + cx)[inside], h[inside])
+
+    cx, cz = grid.cell_of(x.mean(axis=1), z.mean(axis=1))
+    ok = grid.inside(cx, cz)
+    np.minimum.at(flat, (cz * grid.nx + cx)[ok], y.mean(axis=1)[ok])
+
+
+def sample_triangles(corners, spacing, max_divisions=256):
+    """
+    Yield (n, 3) batches of points on a barycentric lattice over each
+    triangle, dense enough that neighbouring samples are <= `spacing` apart.
+    """
+
+    if not len(corners):
+        return
+
+    edges = np.stack([
+        np.linalg.norm(corners[:, 1] - corners[:, 0], axis=1),
+        np.linalg.norm(corners[:, 2] - corners[:, 1], axis=1),
+        np.linalg.norm(corners[:, 0] - corners[:, 2], axis=1),
+    ], axis=1)
+    k = np.clip(np.ceil(edges.max(axis=1) / spacing), 1, max_divisions).astype(np.int64)
+    counts = (k + 1) * (k + 2) // 2
+
+    for start, stop in _chunks(counts):
+        owner, local = _expand(counts[start:stop])
+        t = owner + start
+        kt = k[t]
+
+        # Unrank `local` into lattice coordinates (i, j) with i + j <= k:
+        # row i holds k - i + 1 points, so rows start at i*(k+1) - i*(i-1)/2
+        a = 2 * kt + 3
+        i = np.floor((a - np.sqrt(np.maximum(a * a - 8 * local, 0))) / 2).astype(np.int64)
+        row_start = i * (kt + 1) - i * (i - 1) // 2
+        # Guard against floating point landing one row off
+        over = local < row_start
+        i[over] -= 1
+        row_start = i * (kt + 1) - i * (i - 1) // 2
+        under = local - row_start > kt - i
+        i[under] += 1
+        row_start = i * (kt + 1) - i * (i - 1) // 2
+        j = local - row_start
+
+        u = (i / kt)[:, None]
+        v = (j / kt)[:, None]
+        c = corners[t]
+        yield c[:, 0] + u * (c[:, 1] - c[:, 0]) + v * (c[:, 2] - c[:, 0])
+
+
+def block_obstacles(corners, grid, settings):
+    """
+    Mark cells where geometry sits between step height and head height
+    above the floor (walls, furniture, columns) as unwalkable.
+    """
+
+    blocked = np.zeros(grid.nx * grid.nz, dtype=bool)
+    height = grid.height.reshape(-1)
+    floor = height[np.isfinite(height)]
+    if not floor.size:
+        return blocked.reshape(grid.nz, grid.nx)
+
+    # Flat floors and ceilings can never land in the band; skip sampling them
+    y = corners[..., 1]
+    band = (y.max(axis=1) > floor.min() + settings.step_height) & \
+           (y.min(axis=1) < floor.max() + settings.agent_height)
+    corners = corners[band]
+
+    for points in sample_triangles(corners, 0.5 * grid.cell_size):
+        ix, iz = grid.cell_of(points[:, 0], points[:, 2])
+        ok = grid.inside(ix, iz)
+        cell = (iz * grid.nx + ix)[ok]
+        rise = points[ok, 1] - height[cell]
+        hit = (rise > settings.step_height) & (rise < settings.agent_height)
+        blocked[cell[hit]] = True
+
+    return blocked.reshape(grid.nz, grid.nx)
+
+
+def erode(mask, radius):
+    """Square erosion of a boolean grid by `radius` cells (separable)"""
+
+    if radius <= 0:
+        return mask.copy()
+
+    out = mask.copy()
+    for d in range(1, radius + 1):
+        out[:, d:] &= mask[:, :-d]
+        out[:, :-d] &= mask[:, d:]
+        out[:, :d] = False
+        out[:, -d:] = False
+
+    rows = out.copy()
+    for d in range(1, radius + 1):
+        out[d:, :] &= rows[:-d, :]
+        out[:-d, :] &= rows[d:, :]
+        out[:d, :] = False
+        out[-d:, :] = False
+
+    return out
+
+
+def clearance(mask, limit):
+    """Cells' distance to the nearest unwalkable cell, in cells, capped at `limit`"""
+
+    result = np.zeros(mask.shape, dtype=np.int32)
+    current = mask
+    for _ in range(limit):
+        if not current.any():
+            break
+        result += current
+        current = erode(current, 1)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Waypoint graph
+# ----------------------------------------------------------------------
+
+def pick_waypoints(grid, block):
+    """
+    One waypoint per `block` x `block` tile of the grid: the walkable cell
+    farthest from obstacles, ties broken by closeness to the tile center.
+    Returns (ix, iz) arrays.
+    """
+
+    iz, ix = np.nonzero(grid.walkable)
+    if not ix.size:
+        return ix, iz
+
+    free = clearance(grid.walkable, block)[iz, ix]
+    nbx = (grid.nx + block - 1) // block
+    tile = (iz // block) * nbx + ix // block
+    center = (block - 1) / 2.0
+    offcenter = (ix % block - center) ** 2 + (iz % block - center) ** 2
+
+    order = np.lexsort((offcenter, -free, tile))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = tile[order][1:] != tile[order][:-1]
+    chosen = order[first]
+    return ix[chosen], iz[chosen]
+
+
+def line_of_sight(grid, a, b, step_height):
+    """
+    For cell pairs a[k] -> b[k] ((n, 2) arrays of (ix, iz)), True where the
+    straight segment stays on walkable cells without a height jump larger
+    than `step_height` between consecutive samples.
+    """
+
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    result = np.ones(len(a), dtype=bool)
+    if not len(a):
+        return result
+
+    length = np.abs(b - a).max(axis=1)
+    samples = (np.ceil(length * 2).astype(np.int64) + 1)
+
+    for start, stop in _chunks(samples):
+        owner, local = _expand(samples[start:stop])
+        p = owner + start
+        frac = (local / np.maximum(samples[p] - 1, 1))[:, None]
+        pts = a[p] + frac * (b[p] - a[p])
+        cx = np.floor(pts[:, 0] + 0.5).astype(np.int64)
+        cz = np.floor(pts[:, 1] + 0.5).astype(np.int64)
+
+        ok = grid.inside(cx, cz)
+        cx = np.clip(cx, 0, grid.nx - 1)
+        cz = np.clip(cz, 0, grid.nz - 1)
+        ok &= grid.walkable[cz, cx]
+
+        h = grid.height[cz, cx]
+        same = np.zeros(owner.size, dtype=bool)
+        same[1:] = owner[1:] == owner[:-1]
+        jump = np.zeros(owner.size, dtype=bool)
+        jump[1:] = np.abs(h[1:] - h[:-1]) > step_height
+        ok &= ~(jump & same)
+
+        bad = np.bincount(owner[~ok], minlength=stop - start) > 0
+        result[start:stop] &= ~bad
+
+    return result
+
+
+def connect_waypoints(grid, wx, wz, block, step_height, reach=2):
+    """Edges between waypoints in tiles up to `reach` apart that can see each other"""
+
+    if not wx.size:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    nbx = (grid.nx + block - 1) // block
+    nbz = (grid.nz + block - 1) // block
+    tiles = np.full((nbz, nbx), -1, dtype=np.int64)
+    tx, tz = wx // block, wz // block
+    tiles[tz, tx] = np.arange(wx.size)
+
+    pairs = []
+    for dz in range(0, reach + 1):
+        for dx in range(-reach, reach + 1):
+            if dz == 0 and dx <= 0:
+                continue
+            nx_, nz_ = tx + dx, tz + dz
+            ok = (nx_ >= 0) & (nx_ < nbx) & (nz_ < nbz)
+            other = np.full(wx.size, -1, dtype=np.int64)
+            other[ok] = tiles[nz_[ok], nx_[ok]]
+            src = np.nonzero(other >= 0)[0]
+            pairs.append(np.stack([src, other[src]], axis=1))
+
+    pairs = np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.int64)
+    cells = np.stack([wx, wz], axis=1)
+    visible = line_of_sight(grid, cells[pairs[:, 0]], cells[pairs[:, 1]], step_height)
+    return pairs[visible]
+
+
+def count_components(node_count, edges):
+    """Number of connected components (union-find with path halving)"""
+
+    parent = list(range(node_count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in edges:
+        ra, rb = find(int(a)), find(int(b))
+        if ra != rb:
+            parent[ra] = rb
+
+    return len({find(i) for i in range(node_count)})
+
+
+# ----------------------------------------------------------------------
+# Graph building
+# ----------------------------------------------------------------------
+
+def build_grid(soup, floor_mask, settings):
+    """Walkability grid from a triangle soup and a mask of floor triangles"""
+
+    cs = settings.cell_size
+    corners = soup.corners()
+    normals = soup.normals()
+    walkable_slope = normals[:, 1] >= math.cos(math.radians(settings.max_slope_deg))
+    floors = corners[floor_mask & walkable_slope]
+    if not len(floors):
+        raise ValueError("no walkable floor triangles found")
+
+    lo = floors.reshape(-1, 3).min(axis=0)
+    hi = floors.reshape(-1, 3).max(axis=0)
+    origin = (lo[0] - cs, lo[2] - cs)
+    nx = int(math.ceil((hi[0] - lo[0]) / cs)) + 2
+    nz = int(math.ceil((hi[2] - lo[2]) / cs)) + 2
+
+    grid = NavGrid(origin, cs, nx, nz)
+    rasterize_floor(floors, grid)
+
+    has_floor = np.isfinite(grid.height)
+    blocked = block_obstacles(corners, grid, settings)
+    grid.walkable = erode(has_floor & ~blocked, int(settings.agent_radius / cs))
+    return grid
+
+
+def link_zones(grid, zones, wx, wz, settings, candidates=4):
+    """
+    Place a node on the walkable cell nearest each zone and connect it to
+    up to two nearby visible waypoints (falling back to the nearest one).
+    Returns (zone cells (n, 2), edges [(zone k, waypoint i)], unlinked count).
+    """
+
+    iz, ix = np.nonzero(grid.walkable)
+    if not ix.size or not wx.size:
+        return np.zeros((0, 2), dtype=np.int64), [], len(zones)
+
+    cx, cz = grid.center_of(ix, iz)
+    cells, edges, unlinked = [], [], 0
+
+    for k, zone in enumerate(zones):
+        x, _, z = zone['blender_coords']
+        nearest = int(np.argmin((cx - x) ** 2 + (cz - z) ** 2))
+        cell = (ix[nearest], iz[nearest])
+        cells.append(cell)
+
+        d = (wx - cell[0]) ** 2 + (wz - cell[1]) ** 2
+        near = np.argsort(d)[:candidates]
+        src = np.tile(np.array(cell), (len(near), 1))
+        visible = near[line_of_sight(grid, src, np.stack([wx[near], wz[near]], axis=1), settings.step_height)]
+        if len(visible):
+            edges.extend((k, int(i)) for i in visible[:2])
+        else:
+            edges.append((k, int(near[0])))
+            unlinked += 1
+
+    return np.array(cells, dtype=np.int64), edges, unlinked
+
+
+def _node_position(grid, ix, iz):
+    x, z = grid.center_of(ix, iz)
+    return [round(float(x), 3), round(float(grid.height[iz, ix]), 3), round(float(z), 3)]
+
+
+def build_nav_graph(glb, scene, zones=None, settings=None, predicate=FLOOR_PREDICATE):
+    """
+    Build the navigation graph for an open GLBFile and its SceneGraph.
+
+    Returns a JSON-ready dict: nodes [{id, position, zone?}], edges
+    [[id, id]] plus grid statistics.
+    """
+
+    settings = settings or NavSettings()
+    if zones is None:
+        zones = extract_zones(scene.gltf, scene=scene)
+
+    soup = scene_triangles(glb, scene)
+    if not len(soup):
+        if soup.skipped_draco:
+            raise ValueError(f"no decodable geometry: {soup.skipped_draco} primitive(s) use "
+                             f"KHR_draco_mesh_compression; export the model without Draco")
+        raise ValueError("model has no triangle geometry")
+
+    floor_nodes = set(scene.index.select(predicate))
+    if floor_nodes:
+        floor_mask = np.isin(soup.node_ids, list(floor_nodes))
+    else:
+        floor_mask = np.ones(len(soup), dtype=bool)
+
+    grid = build_grid(soup, floor_mask, settings)
+
+    block = max(1, int(round(settings.waypoint_spacing / settings.cell_size)))
+    wx, wz = pick_waypoints(grid, block)
+    edges = connect_waypoints(grid, wx, wz, block, settings.step_height)
+    zone_cells, zone_edges, unlinked = link_zones(grid, zones, wx, wz, settings)
+
+    ids = [f"nav-{i + 1}" for i in range(wx.size)]
+    nodes = [{'id': ids[i], 'position': _node_position(grid, wx[i], wz[i])} for i in range(wx.size)]
+    for zone, (ix, iz) in zip(zones, zone_cells):
+        nodes.append({'id': f"zone:{zone['original_name']}", 'position': _node_position(grid, ix, iz),
+                      'zone': zone['original_name']})
+
+    edge_list = [[ids[a], ids[b]] for a, b in edges.tolist()]
+    edge_list += [[f"zone:{zones[k]['original_name']}", ids[i]] for k, i in zone_edges]
+
+    index = {node['id']: n for n, node in enumerate(nodes)}
+    components = count_components(len(nodes), [(index[a], index[b]) for a, b in edge_list])
+
+    return {
+        'settings': settings.as_dict(),
+        'grid': {
+            'origin': [round(float(v), 6) for v in grid.origin],
+            'size': [grid.nx, grid.nz],
+            'walkable_cells': int(grid.walkable.sum()),
+        },
+        'floor_nodes': len(floor_nodes),
+        'triangles': len(soup),
+        'skipped_draco': soup.skipped_draco,
+        'components': components,
+        'unlinked_zones': unlinked,
+        'nodes': nodes,
+        'edges': edge_list,
+    }
+
+
+def build_nav_graph_for_file(glb_file, settings=None, zones=None):
+    with GLBFile(glb_file) as glb:
+        return build_nav_graph(glb, SceneGraph(glb.json), zones=zones, settings=settings)
+
+
+def build_nav_output(glb_file, graph):
+    return dict(graph, model_file=os.path.basename(glb_file))
+
+
+def main(argv=None):
+    defaults = NavSettings()
+    parser = argparse.ArgumentParser(description="Generate a navigation graph from GLB floor geometry")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default='navgraph.json', help="graph JSON (default: navgraph.json)")
+    parser.add_argument('--ts-output', default=DEFAULT_TS_OUTPUT,
+                        help=f"TypeScript module (default: {DEFAULT_TS_OUTPUT})")
+    parser.add_argument('--cell-size', type=float, default=defaults.cell_size)
+    parser.add_argument('--agent-radius', type=float, default=defaults.agent_radius)
+    parser.add_argument('--agent-height', type=float, default=defaults.agent_height)
+    parser.add_argument('--step-height', type=float, default=defaults.step_height)
+    parser.add_argument('--max-slope', type=float, default=defaults.max_slope_deg)
+    parser.add_argument('--spacing', type=float, default=defaults.waypoint_spacing,
+                        help="approximate distance between waypoints in meters")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+
+    settings = NavSettings(args.cell_size, args.agent_radius, args.agent_height,
+                           args.step_height, args.max_slope, args.spacing)
+
+    print(f"📂 Building navigation graph for {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        graph = build_nav_graph_for_file(args.glb_file, settings)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    nx, nz = graph['grid']['size']
+    print(f"✅ {graph['triangles']} triangles -> {nx}x{nz} grid, "
+          f"{graph['grid']['walkable_cells']} walkable cells")
+    print(f"✅ {len(graph['nodes'])} nodes, {len(graph['edges'])} edges "
+          f"({time.perf_counter() - started:.2f}s)")
+    if graph['components'] > 1:
+        print(f"⚠️ Graph has {graph['components']} disconnected parts; "
+              f"try a smaller --cell-size or --spacing")
+    if graph['unlinked_zones']:
+        print(f"⚠️ {graph['unlinked_zones']} zone(s) have no clear line to a waypoint")
+
+    output = build_nav_output(args.glb_file, graph)
+    if write_if_changed(args.output, json.dumps(output, indent=2, ensure_ascii=False)):
+        print(f"💾 Saved to: {args.output}")
+    if write_module(args.ts_output, nav_graph_module(graph)):
+        print(f"📝 TypeScript module: {args.ts_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+POI camera placement with line-of-sight checks
+blender_create_poi_cameras.py puts every camera at the same fixed offset
+from its zone (5 m back, 2 m up), which regularly lands inside a wall or a
+booth. This solver works on the exported GLB instead: for every ZONE_ empty
+it samples candidate camera positions on rings around the zone, ray-tests
+them against the venue geometry (glb_bvh.py) and keeps the best one.
+
+A candidate is rejected when it sits inside geometry (most clearance rays
+hit back faces), closer than min_clearance to a surface, or has no floor
+below it. The rest are scored on:
+    visibility  - share of target samples (points around the marker) with
+                  a clear line of sight
+    clearance   - free space around the camera, capped at 2 x min_clearance
+    framing     - closeness to the preferred distance and elevation angle
+    convention  - closeness to the direction of the old fixed offset, so
+                  cameras in open space stay where designers expect them
+The fixed offset itself is always a candidate and is kept unless another
+one sees more of the target or scores clearly better.
+
+Zones are independent and are spread over a process pool. Output is the
+poi_cameras_export.json format plus a per-POI placement report; pass it to
+blender_create_poi_cameras.py (--placements) to create the cameras there.
+
+Requires: numpy
+
+USAGE:
+    python poi_camera_placement.py public/SM_MFF.glb
+    python poi_camera_placement.py venue.glb -o poi_camera_placement.json --ts-output src/data/poiData.ts -j 4
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from asset_cache import DEFAULT_CACHE_DIR, write_if_changed
+from camera_math import poi_records
+from extract_pois_from_glb import POI_COLORS
+from extract_zones_from_glb import ZONE_PREFIX, extract_zones
+from glb_bvh import UP, drop_to_surface, load_scene_bvh
+from glb_scene import load_scene
+from ts_codegen import pois_module, write_module
+from visibility_sets import sphere_directions
+
+# Bump when candidate generation or scoring changes so cached placements are rebuilt
+PLACEMENT_VERSION = 1
+
+# blender_create_poi_cameras.py's Vector((-5, 0, 2)) in glTF axes (Y-up)
+DEFAULT_OFFSET = (-5.0, 2.0, 0.0)
+
+# Score weights (each term is in [0, 1])
+WEIGHTS = {'visibility': 0.6, 'clearance': 0.15, 'framing': 0.15, 'convention': 0.1}
+
+# The default offset is kept unless the best candidate sees more of the
+# target or beats it by this much
+KEEP_DEFAULT_MARGIN = 0.05
+
+# Rays per candidate for the clearance / inside test
+CLEARANCE_RAYS = 26
+
+# Zones per worker task
+_BATCH = 4
+
+
+class PlacementSettings:
+    """Candidate rings and scoring parameters (meters / degrees)"""
+
+    def __init__(self, distances=(4.0, 6.0, 8.0, 12.0), heights=(1.5, 3.0, 5.0), azimuths=16,
+                 target_height=1.0, target_radius=0.75, target_samples=9, min_clearance=0.5,
+                 preferred_distance=6.0, preferred_elevation=20.0, max_floor_drop=50.0):
+        self.distances = tuple(distances)
+        self.heights = tuple(heights)
+        self.azimuths = azimuths
+        self.target_height = target_height
+        self.target_radius = target_radius
+        self.target_samples = target_samples
+        self.min_clearance = min_clearance
+        self.preferred_distance = preferred_distance
+        self.preferred_elevation = preferred_elevation
+        self.max_floor_drop = max_floor_drop
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def candidate_offsets(settings):
+    """
+    Camera offsets from the zone: the fixed default first, then every
+    (distance, height, azimuth) ring point
+    """
+
+    angles = 2 * np.pi * np.arange(settings.azimuths) / settings.azimuths
+    d, h, a = np.meshgrid(settings.distances, settings.heights, angles, indexing='ij')
+    rings = np.stack([d * np.cos(a), h, d * np.sin(a)], axis=-1).reshape(-1, 3)
+    return np.vstack([np.asarray(DEFAULT_OFFSET, dtype=np.float64), rings])
+
+
+def target_offsets(settings):
+    """Marker center plus points on a sphere of target_radius around it"""
+
+    around = sphere_directions(max(settings.target_samples - 1, 0)) * settings.target_radius
+    return np.vstack([np.zeros(3), around])
+
+
+def score_candidates(bvh, normals, zone_position, offsets, targets, directions, settings):
+    """
+    Per-candidate arrays for one zone: positions, score (-inf when
+    rejected), visible fraction and clearance
+    """
+
+    zone_position = np.asarray(zone_position, dtype=np.float64)
+    target = zone_position + UP * settings.target_height
+    cameras = zone_position + offsets
+    count = len(cameras)
+
+    # Clearance: nearest surface in any direction; mostly back faces means inside a solid
+    origins = np.repeat(cameras, len(directions), axis=0)
+    rays = np.tile(directions, (count, 1))
+    t, hit = bvh.intersect(origins, rays)
+    backface = (hit >= 0) & (np.einsum('ij,ij->i', normals[np.maximum(hit, 0)], rays) > 0)
+    clearance = t.reshape(count, -1).min(axis=1)
+    inside = backface.reshape(count, -1).sum(axis=1) > len(directions) // 2
+
+    _, floor = drop_to_surface(bvh, cameras, max_drop=settings.max_floor_drop)
+
+    # Line of sight to every target sample
+    points = target + targets
+    starts = np.repeat(cameras, len(points), axis=0)
+    ends = np.tile(points, (count, 1))
+    blocked = bvh.occluded(starts, ends - starts, t_max=1 - 1e-4)
+    visible = 1.0 - blocked.reshape(count, -1).mean(axis=1)
+
+    delta = target - cameras
+    distance = np.linalg.norm(delta, axis=1)
+    horizontal = np.hypot(delta[:, 0], delta[:, 2])
+    elevation = np.degrees(np.arctan2(-delta[:, 1], horizontal))  # looking down is positive
+    framing = (np.exp(-((distance - settings.preferred_distance) / settings.preferred_distance) ** 2) *
+               np.exp(-((elevation - settings.preferred_elevation) / 30.0) ** 2))
+
+    default = np.asarray(DEFAULT_OFFSET)[[0, 2]]
+    flat = offsets[:, [0, 2]]
+    cosine = flat @ default / np.maximum(np.linalg.norm(flat, axis=1) * np.linalg.norm(default), 1e-9)
+    convention = (1 + cosine) / 2
+
+    score = (WEIGHTS['visibility'] * visible +
+             WEIGHTS['clearance'] * np.minimum(clearance / (2 * settings.min_clearance), 1.0) +
+             WEIGHTS['framing'] * framing +
+             WEIGHTS['convention'] * convention)
+    rejected = inside | (clearance < settings.min_clearance) | ~floor
+    return cameras, np.where(rejected, -np.inf, score), visible, clearance
+
+
+_WORKER = None
+
+
+def _init_worker(bvh, normals, offsets, targets, directions, settings):
+    global _WORKER
+    _WORKER = {
+        'bvh': bvh,
+        'normals': normals,
+        'offsets': offsets,
+        'targets': targets,
+        'directions': directions,
+        'settings': settings,
+    }
+
+
+def _place(zone_position):
+    """Best candidate for one zone, with the default offset's numbers for comparison"""
+
+    w = _WORKER
+    cameras, score, visible, clearance = score_candidates(
+        w['bvh'], w['normals'], zone_position, w['offsets'], w['targets'], w['directions'], w['settings'])
+
+    # Every candidate rejected: fall back to the default at index 0
+    best = int(np.argmax(score)) if np.isfinite(score).any() else 0
+    if (np.isfinite(score[0]) and visible[0] >= visible[best] and
+            score[0] >= score[best] - KEEP_DEFAULT_MARGIN):
+        best = 0
+    return {
+        'camera': cameras[best],
+        'candidate': best,
+        'score': float(score[best]) if np.isfinite(score[best]) else None,
+        'visible_fraction': float(visible[best]),
+        'clearance': float(min(clearance[best], 1e6)),
+        'default_score': float(score[0]) if np.isfinite(score[0]) else None,
+        'default_visible_fraction': float(visible[0]),
+        'candidates_rejected': int(np.sum(~np.isfinite(score))),
+    }
+
+
+def _place_batch(positions):
+    return [_place(position) for position in positions]
+
+
+def place_cameras(bvh, soup, zones, settings=None, jobs=None):
+    """
+    One placed camera per zone: (POI records in the poi_cameras_export.json
+    shape with a 'placement' report each, settings used)
+    """
+
+    settings = settings or PlacementSettings()
+    if not len(soup):
+        if soup.skipped_draco:
+            raise ValueError(f"no decodable geometry: {soup.skipped_draco} primitive(s) use "
+                             f"KHR_draco_mesh_compression; export the model without Draco")
+        raise ValueError("model has no triangle geometry")
+
+    positions = [np.asarray(z['blender_coords'], dtype=np.float64) for z in zones]
+    init = (bvh, soup.normals(), candidate_offsets(settings), target_offsets(settings),
+            sphere_directions(CLEARANCE_RAYS), settings)
+
+    batches = [positions[i:i + _BATCH] for i in range(0, len(positions), _BATCH)]
+    if jobs == 1 or len(batches) <= 1:
+        _init_worker(*init)
+        results = map(_place_batch, batches)
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                      initargs=init)
+        results = pool.map(_place_batch, batches)
+
+    placements = []
+    try:
+        for batch in results:
+            placements.extend(batch)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    names = [z['original_name'][len(ZONE_PREFIX):] if z['original_name'].startswith(ZONE_PREFIX)
+             else z['original_name'] for z in zones]
+    targets = [p + UP * settings.target_height for p in positions]
+    pois = poi_records(
+        [z['display_name'] for z in zones],
+        [p['camera'] for p in placements],
+        targets,
+        POI_COLORS,
+        camera_names=[f"CAMERA_{name}" for name in names],
+        target_names=[z['original_name'] for z in zones],
+    )
+
+    for poi, placement in zip(pois, placements):
+        poi['placement'] = {
+            'score': None if placement['score'] is None else round(placement['score'], 4),
+            'visible_fraction': round(placement['visible_fraction'], 4),
+            'clearance': round(placement['clearance'], 3),
+            'moved': placement['candidate'] != 0,
+            'default_score': (None if placement['default_score'] is None
+                              else round(placement['default_score'], 4)),
+            'default_visible_fraction': round(placement['default_visible_fraction'], 4),
+            'candidates_rejected': placement['candidates_rejected'],
+        }
+
+    pois.sort(key=lambda x: x['name'])
+    return pois
+
+
+def place_cameras_for_file(glb_file, settings=None, zones=None, jobs=None, cache_dir=DEFAULT_CACHE_DIR):
+    if zones is None:
+        scene = load_scene(glb_file)
+        zones = extract_zones(scene.gltf, scene=scene)
+    bvh, soup, _ = load_scene_bvh(glb_file, cache_dir)
+    return place_cameras(bvh, soup, zones, settings, jobs)
+
+
+def build_placement_output(glb_file, pois, settings=None):
+    """JSON document in the poi_cameras_export.json format plus the settings used"""
+
+    return {
+        'model_file': os.path.basename(glb_file),
+        'total_pois': len(pois),
+        'pois': pois,
+        'settings': (settings or PlacementSettings()).as_dict(),
+        'note': "Camera positions chosen by poi_camera_placement.py (glTF / Three.js axes)",
+    }
+
+
+def main(argv=None):
+    defaults = PlacementSettings()
+    parser = argparse.ArgumentParser(description="Place POI cameras around zones with clear line of sight")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default='poi_camera_placement.json',
+                        help="placement JSON (default: poi_camera_placement.json)")
+    parser.add_argument('--ts-output', default=None, help="also write a poiData.ts module to this path")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--distances', type=float, nargs='+', default=defaults.distances,
+                        help="candidate ring radii in meters")
+    parser.add_argument('--heights', type=float, nargs='+', default=defaults.heights,
+                        help="candidate heights above the zone in meters")
+    parser.add_argument('--azimuths', type=int, default=defaults.azimuths, help="candidates per ring")
+    parser.add_argument('--min-clearance', type=float, default=defaults.min_clearance,
+                        help="reject candidates closer than this to any surface")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"where built BVHs are cached (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="always rebuild the BVH")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+
+    settings = PlacementSettings(distances=args.distances, heights=args.heights, azimuths=args.azimuths,
+                                 min_clearance=args.min_clearance)
+
+    print(f"📂 Placing POI cameras for {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        pois = place_cameras_for_file(args.glb_file, settings, jobs=args.jobs,
+                                      cache_dir=None if args.no_cache else args.cache_dir)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not pois:
+        print("⚠️ No ZONE_ empties found in the model!")
+        return 1
+
+    moved = 0
+    for poi in pois:
+        report = poi['placement']
+        if report['score'] is None:
+            print(f"⚠️ {poi['name']}: no valid position, keeping the default offset")
+        elif report['moved']:
+            moved += 1
+            print(f"📍 {poi['name']}: moved, target {report['default_visible_fraction'] * 100:.0f}% -> "
+                  f"{report['visible_fraction'] * 100:.0f}% visible")
+    print(f"✅ {len(pois)} cameras placed, {moved} moved away from the default offset "
+          f"({time.perf_counter() - started:.2f}s)")
+
+    output = build_placement_output(args.glb_file, pois, settings)
+    if write_if_changed(args.output, json.dumps(output, indent=2, ensure_ascii=False)):
+        print(f"💾 Saved to: {args.output}")
+    if args.ts_output and write_module(args.ts_output, pois_module(pois)):
+        print(f"📝 TypeScript module: {args.ts_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""
+Precomputed zone-to-zone route table
+Runs Dijkstra from every zone node of a navigation graph (navmesh_builder.py)
+over a process pool and stores the result as a compact binary table: a
+next-hop matrix that routes any graph node to any zone, zone-to-zone
+distances and simplified zone-to-zone polylines. src/utils/routeTable.ts
+decodes it, so the client only does table lookups.
+
+A* would not help here: every search needs the whole tree towards its
+target anyway, which is exactly what one Dijkstra run per target gives.
+
+LAYOUT (little-endian, every section 4-byte aligned):
+    header      magic 'ZRT1', u16 version, u16 flags,
+                u32 node_count, u32 zone_count, u32 string_count,
+                u32 string_bytes, u32 polyline_points               (28 bytes)
+    strings     u32 offsets[string_count + 1], UTF-8 bytes
+    nodes       f32 position[n*3]
+    zones       u32 zone[z] (ZONE_ node names), u32 zone_node[z]
+                f32 distance[z*z]                 (Infinity = unreachable)
+    next hop    idx[n*z]: next node from node v towards zone t at [v*z + t],
+                NONE when v is the zone's node or t is unreachable
+    polylines   u32 offsets[pairs + 1], idx points[polyline_points]
+                (FLAG_POLYLINES) for zone pairs s < t in row-major order
+
+idx is u16 (NONE = 0xFFFF) unless FLAG_WIDE_INDEX, then u32 (0xFFFFFFFF).
+
+USAGE:
+    python route_table.py navgraph.json -o routes.bin -j 8
+    python route_table.py --dump routes.bin
+"""
+
+import argparse
+import concurrent.futures
+import heapq
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b'ZRT1'
+VERSION = 1
+
+FLAG_WIDE_INDEX = 1 << 0
+FLAG_POLYLINES = 1 << 1
+
+HEADER = struct.Struct('<4sHHIIIII')
+
+NONE_U16 = 0xFFFF
+NONE_U32 = 0xFFFFFFFF
+
+# Turn threshold used when dropping collinear polyline points (matches
+# simplifyPath() in navigation.ts)
+COLLINEAR_TOLERANCE = 0.05
+
+
+class RouteTableError(ValueError):
+    """Raised for malformed route tables or failed round-trip checks"""
+
+
+def _pad4(buf):
+    buf.extend(b'\0' * (-len(buf) % 4))
+
+
+# ----------------------------------------------------------------------
+# Graph search
+# ----------------------------------------------------------------------
+
+def graph_arrays(graph):
+    """Node positions, undirected edge array and zone targets of a nav graph"""
+
+    nodes = graph['nodes']
+    index = {node['id']: i for i, node in enumerate(nodes)}
+    positions = np.array([node['position'] for node in nodes], dtype=np.float64).reshape(-1, 3)
+
+    edges = []
+    for a, b in graph['edges']:
+        if a not in index or b not in index:
+            raise RouteTableError(f"edge {a} -> {b} references an unknown node")
+        edges.append((index[a], index[b]))
+    edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+    zones = [(node['zone'], i) for i, node in enumerate(nodes) if node.get('zone')]
+    zone_ids = [zone_id for zone_id, _ in zones]
+    zone_nodes = np.array([i for _, i in zones], dtype=np.int64)
+    return positions, edges, zone_ids, zone_nodes
+
+
+def adjacency(node_count, edges, positions):
+    """CSR adjacency (indptr, indices, weights) with Euclidean edge lengths"""
+
+    both = np.concatenate([edges, edges[:, ::-1]])
+    weights = np.linalg.norm(positions[both[:, 0]] - positions[both[:, 1]], axis=1)
+    order = np.argsort(both[:, 0], kind='stable')
+    both, weights = both[order], weights[order]
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(both[:, 0], minlength=node_count), out=indptr[1:])
+    return indptr, both[:, 1].copy(), weights
+
+
+def dijkstra(indptr, indices, weights, source):
+    """
+    Single-source shortest paths over CSR adjacency given as plain lists
+    (much faster than NumPy element access in this loop). Returns (dist,
+    pred) lists where pred[v] is the node before v on the path from
+    `source` -- in an undirected graph that is v's next hop towards
+    `source`. Unreached nodes have dist inf, pred -1.
+    """
+
+    n = len(indptr) - 1
+    dist = [float('inf')] * n
+    pred = [-1] * n
+    done = [False] * n
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+
+    while heap:
+        d, v = heapq.heappop(heap)
+        if done[v]:
+            continue
+        done[v] = True
+        for k in range(indptr[v], indptr[v + 1]):
+            u = indices[k]
+            alt = d + weights[k]
+            if alt < dist[u]:
+                dist[u] = alt
+                pred[u] = v
+                heapq.heappush(heap, (alt, u))
+
+    return dist, pred
+
+
+def trace_path(next_hop, start, target_node):
+    """Node indices from `start` to `target_node` following a next-hop list"""
+
+    path = [start]
+    v = start
+    while v != target_node:
+        v = int(next_hop[v])
+        if v < 0 or len(path) > len(next_hop):
+            return []
+        path.append(v)
+    return path
+
+
+def simplify_polyline(positions, path, tolerance=COLLINEAR_TOLERANCE):
+    """Drop interior points where the XZ direction barely changes between segments"""
+
+    if len(path) <= 2:
+        return list(path)
+
+    points = positions[path]
+    seg = np.diff(points, axis=0)
+    flat = seg[:, [0, 2]]
+    length = np.hypot(flat[:, 0], flat[:, 1])
+    d1, d2 = flat[:-1], flat[1:]
+    l1, l2 = length[:-1], length[1:]
+    short = (l1 < 0.01) | (l2 < 0.01)
+    cross = np.abs(d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]) / np.where(short, 1.0, l1 * l2)
+    climb = np.abs(seg[:-1, 1]) > 0.01
+
+    keep = np.ones(len(path), dtype=bool)
+    keep[1:-1] = short | (cross > tolerance) | climb
+    return np.asarray(path)[keep].tolist()
+
+
+_WORKER = None
+
+
+def _init_worker(indptr, indices, weights, positions, zone_nodes, polylines):
+    global _WORKER
+    _WORKER = {
+        'csr': (indptr.tolist(), indices.tolist(), weights.tolist()),
+        'positions': positions,
+        'zone_nodes': zone_nodes.tolist(),
+        'polylines': polylines,
+    }
+
+
+def _search_targets(targets):
+    """
+    Worker task: Dijkstra from each target zone t, returning its next-hop
+    column, distances from every zone and (optionally) the simplified
+    polylines from zones s < t, traced through the same search tree.
+    """
+
+    zone_nodes = _WORKER['zone_nodes']
+    results = []
+    for t in targets:
+        dist, pred = dijkstra(*_WORKER['csr'], source=zone_nodes[t])
+        lines = None
+        if _WORKER['polylines']:
+            lines = [simplify_polyline(_WORKER['positions'], trace_path(pred, zone_nodes[s], zone_nodes[t]))
+                     for s in range(t)]
+        results.append((pred, [dist[v] for v in zone_nodes], lines))
+    return results
+
+
+def compute_route_table(graph, jobs=None, polylines=True):
+    """
+    Shortest-path tables for every zone of a nav graph.
+
+    Returns a dict: positions (n, 3), zone_ids, zone_nodes (z,), next_hop
+    (n, z) with -1 for none, distances (z, z) and polylines -- simplified
+    node paths for every zone pair s < t in row-major order ([] when
+    unreachable), or None.
+    """
+
+    positions, edges, zone_ids, zone_nodes = graph_arrays(graph)
+    n, z = len(positions), len(zone_nodes)
+    indptr, indices, weights = adjacency(n, edges, positions)
+    init = (indptr, indices, weights, positions, zone_nodes, polylines)
+
+    next_hop = np.full((n, z), -1, dtype=np.int64)
+    distances = np.full((z, z), np.inf)
+    columns = [None] * z
+
+    batches = [list(range(i, min(i + 8, z))) for i in range(0, z, 8)]
+    if jobs == 1 or len(batches) <= 1:
+        _init_worker(*init)
+        results = map(_search_targets, batches)
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                      initargs=init)
+        results = pool.map(_search_targets, batches)
+
+    try:
+        for batch, searches in zip(batches, results):
+            for t, (pred, dist, lines) in zip(batch, searches):
+                next_hop[:, t] = pred
+                distances[:, t] = dist
+                columns[t] = lines
+    finally:
+        if pool:
+            pool.shutdown()
+
+    lines = None
+    if polylines:
+        # Pair (s, t), s < t, was traced in column t; emit them row-major
+        lines = [columns[t][s] for s in range(z) for t in range(s + 1, z)]
+
+    return {
+        'positions': positions,
+        'zone_ids': zone_ids,
+        'zone_nodes': zone_nodes,
+        'next_hop': next_hop,
+        'distances': distances,
+        'polylines': lines,
+    }
+
+
+# ----------------------------------------------------------------------
+# Binary encoding
+# ----------------------------------------------------------------------
+
+def encode_route_table(table):
+    """Encode a compute_route_table() result into bytes"""
+
+    positions = table['positions']
+    zone_nodes = table['zone_nodes']
+    polylines = table.get('polylines')
+    n, z = len(positions), len(zone_nodes)
+
+    flags = 0
+    wide = n >= NONE_U16
+    if wide:
+        flags |= FLAG_WIDE_INDEX
+    if polylines is not None:
+        flags |= FLAG_POLYLINES
+    idx_dtype, none = ('<u4', NONE_U32) if wide else ('<u2', NONE_U16)
+
+    strings = [s.encode('utf-8') for s in table['zone_ids']]
+    offsets = np.zeros(len(strings) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(b) for b in strings])
+
+    flat_polylines = [v for line in (polylines or []) for v in line]
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, flags, n, z, len(strings),
+                                int(offsets[-1]), len(flat_polylines)))
+    out.extend(offsets.tobytes())
+    out.extend(b''.join(strings))
+    _pad4(out)
+
+    out.extend(positions.astype('<f4').tobytes())
+    out.extend(np.arange(z, dtype='<u4').tobytes())
+    out.extend(zone_nodes.astype('<u4').tobytes())
+    out.extend(table['distances'].astype('<f4').tobytes())
+
+    next_hop = table['next_hop']
+    out.extend(np.where(next_hop < 0, none, next_hop).astype(idx_dtype).tobytes())
+    _pad4(out)
+
+    if polylines is not None:
+        line_offsets = np.zeros(len(polylines) + 1, dtype='<u4')
+        line_offsets[1:] = np.cumsum([len(line) for line in polylines])
+        out.extend(line_offsets.tobytes())
+        out.extend(np.array(flat_polylines, dtype=idx_dtype).tobytes())
+        _pad4(out)
+
+    return bytes(out)
+
+
+class _Reader:
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+
+    def take(self, dtype, count):
+        dtype = np.dtype(dtype)
+        end = self.offset + dtype.itemsize * count
+        if end > len(self.data):
+            raise RouteTableError(f"route table truncated at byte {self.offset}")
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset = end
+        return array
+
+    def align(self):
+        self.offset += -self.offset % 4
+
+
+def decode_route_table(data):
+    """Decode route table bytes into the compute_route_table() shape (+ polylines)"""
+
+    if len(data) < HEADER.size:
+        raise RouteTableError("route table too small")
+
+    magic, version, flags, n, z, string_count, string_bytes, points = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise RouteTableError(f"bad magic {magic!r}")
+    if version != VERSION:
+        raise RouteTableError(f"unsupported route table version {version}")
+
+    idx_dtype, none = ('<u4', NONE_U32) if flags & FLAG_WIDE_INDEX else ('<u2', NONE_U16)
+    reader = _Reader(data, HEADER.size)
+
+    offsets = reader.take('<u4', string_count + 1)
+    blob = bytes(reader.take('u1', string_bytes))
+    strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(string_count)]
+    reader.align()
+
+    positions = reader.take('<f4', n * 3).reshape(-1, 3).astype(np.float64)
+    zone_strings = reader.take('<u4', z)
+    zone_nodes = reader.take('<u4', z).astype(np.int64)
+    distances = reader.take('<f4', z * z).reshape(z, z).astype(np.float64)
+    raw = reader.take(idx_dtype, n * z).reshape(n, z).astype(np.int64)
+    next_hop = np.where(raw == none, -1, raw)
+    reader.align()
+
+    table = {
+        'positions': positions,
+        'zone_ids': [strings[i] for i in zone_strings],
+        'zone_nodes': zone_nodes,
+        'next_hop': next_hop,
+        'distances': distances,
+        'polylines': None,
+    }
+
+    if flags & FLAG_POLYLINES:
+        pairs = z * (z - 1) // 2
+        line_offsets = reader.take('<u4', pairs + 1)
+        flat = reader.take(idx_dtype, points).astype(np.int64)
+        table['polylines'] = [flat[line_offsets[i]:line_offsets[i + 1]].tolist() for i in range(pairs)]
+
+    return table
+
+
+def verify_route_table(data, table):
+    """Decode `data` and check it matches the computed table; raises RouteTableError"""
+
+    decoded = decode_route_table(data)
+
+    if decoded['zone_ids'] != list(table['zone_ids']):
+        raise RouteTableError("zone ids differ after round trip")
+    if not np.array_equal(decoded['zone_nodes'], table['zone_nodes']):
+        raise RouteTableError("zone nodes differ after round trip")
+    if not np.array_equal(decoded['next_hop'], table['next_hop']):
+        raise RouteTableError("next-hop matrix differs after round trip")
+
+    expected = table['distances']
+    finite = np.isfinite(expected)
+    if not np.array_equal(finite, np.isfinite(decoded['distances'])) or \
+            not np.allclose(decoded['distances'][finite], expected[finite], rtol=1e-6, atol=1e-3):
+        raise RouteTableError("distances differ after round trip")
+
+    polylines = table.get('polylines')
+    if polylines is not None and decoded['polylines'] != [list(line) for line in polylines]:
+        raise RouteTableError("polylines differ after round trip")
+
+    return decoded
+
+
+def build_route_table(graph, jobs=None, polylines=True):
+    """Compute, encode and verify the route table for a nav graph; returns bytes"""
+
+    table = compute_route_table(graph, jobs=jobs, polylines=polylines)
+    data = encode_route_table(table)
+    verify_route_table(data, table)
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute zone-to-zone routes for a navigation graph")
+    parser.add_argument('input', help="navgraph.json (or a route table with --dump)")
+    parser.add_argument('-o', '--output', default='routes.bin', help="route table to write")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--no-polylines', action='store_true',
+                        help="store only the next-hop matrix and distances")
+    parser.add_argument('--dump', action='store_true', help="print a summary of an existing table")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ File not found: {args.input}")
+        return 1
+
+    if args.dump:
+        with open(args.input, 'rb') as f:
+            table = decode_route_table(f.read())
+        distances = table['distances']
+        reachable = np.isfinite(distances) & ~np.eye(len(distances), dtype=bool)
+        print(f"📍 {len(table['positions'])} nodes, {len(table['zone_ids'])} zones")
+        print(f"🔗 {int(reachable.sum())} reachable zone pairs"
+              + (f", longest route {distances[reachable].max():.1f} m" if reachable.any() else ""))
+        print(f"📝 Polylines: {'yes' if table['polylines'] is not None else 'no'}")
+        return 0
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        graph = json.load(f)
+
+    started = time.perf_counter()
+    data = build_route_table(graph, jobs=args.jobs, polylines=not args.no_polylines)
+    with open(args.output, 'wb') as f:
+        f.write(data)
+
+    zones = sum(1 for node in graph['nodes'] if node.get('zone'))
+    print(f"✅ {zones} zones, {len(graph['nodes'])} nodes -> {args.output} "
+          f"({len(data)} bytes, {time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Uniform-grid spatial index over zone and POI markers
+Answers "which marker is nearest to this point" and "which markers are
+within R metres" without scanning every marker. Points are bucketed into a
+regular grid sized for a couple of markers per cell and stored as two flat
+arrays (cell start offsets + marker indices), the same layout zone_bundle.py
+writes into zones.bin and src/utils/spatialIndex.ts queries in the browser.
+
+Markers are numbered zones first, then POIs (a POI is indexed at its target
+position, the thing the camera looks at).
+
+USAGE:
+    from spatial_index import SpatialIndex
+    index = SpatialIndex(positions)
+    indices, distances = index.nearest(point, k=3)
+    indices, distances = index.within(point, 20.0)
+
+    python spatial_index.py zone_coordinates.json [poi_cameras_export.json] --near X Y Z [--radius R] [-k K]
+    python spatial_index.py --benchmark 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+# Average markers per cell the grid is sized for
+DEFAULT_POINTS_PER_CELL = 2
+
+
+def _vec3(value):
+    """Accept [x, y, z] lists or {'x', 'y', 'z'} dicts"""
+    if isinstance(value, dict):
+        return [value['x'], value['y'], value['z']]
+    return value
+
+
+def marker_positions(zones, pois=()):
+    """(n, 3) marker positions: zones (blender_coords/position), then POI targets"""
+
+    positions = [z['blender_coords'] if 'blender_coords' in z else _vec3(z['position']) for z in zones]
+    positions.extend(_vec3(p['target_position']) for p in pois)
+    return np.array(positions, dtype=np.float64).reshape(-1, 3)
+
+
+def choose_cell_size(extent, count, points_per_cell=DEFAULT_POINTS_PER_CELL):
+    """
+    Cell edge that gives about `points_per_cell` markers per cell for
+    uniformly spread points. Axes thinner than one cell (e.g. the height
+    of a single-floor venue) collapse to one cell and do not count.
+    """
+
+    extent = np.asarray(extent, dtype=np.float64)
+    target_cells = max(count / points_per_cell, 1.0)
+    live = extent[extent > 0]
+
+    while live.size:
+        size = (np.prod(live) / target_cells) ** (1.0 / live.size)
+        thin = live < size
+        if not thin.any():
+            return float(size)
+        live = live[~thin]
+
+    return 1.0
+
+
+class SpatialIndex:
+    """Uniform grid over 3D points with nearest-neighbour and radius queries"""
+
+    def __init__(self, positions, cell_size=None, points_per_cell=DEFAULT_POINTS_PER_CELL):
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if len(positions):
+            lo, hi = positions.min(axis=0), positions.max(axis=0)
+        else:
+            lo = hi = np.zeros(3)
+
+        if cell_size is None:
+            cell_size = choose_cell_size(hi - lo, len(positions), points_per_cell)
+            # Never let float error produce a degenerate cell
+            cell_size = max(cell_size, float(np.abs(hi - lo).max()) * 1e-6, 1e-6)
+
+        # float32-exact so the grid serializes into zones.bin without drift
+        self.origin = lo.astype(np.float32).astype(np.float64)
+        self.cell_size = float(np.float32(cell_size))
+        self.dims = np.maximum(np.floor((hi - self.origin) / self.cell_size).astype(np.int64) + 1, 1)
+        self.positions = positions
+
+        cells = self.cell_ids(positions)
+        self.items = np.argsort(cells, kind='stable').astype(np.int64)
+        counts = np.bincount(cells, minlength=self.cell_count)
+        self.cell_start = np.zeros(self.cell_count + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    @classmethod
+    def from_arrays(cls, positions, origin, cell_size, dims, cell_start, items):
+        """Rebuild an index from its serialized arrays (see to_arrays)"""
+
+        index = cls.__new__(cls)
+        index.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        index.origin = np.asarray(origin, dtype=np.float64)
+        index.cell_size = float(cell_size)
+        index.dims = np.asarray(dims, dtype=np.int64)
+        index.cell_start = np.asarray(cell_start, dtype=np.int64)
+        index.items = np.asarray(items, dtype=np.int64)
+        return index
+
+    def to_arrays(self):
+        return {
+            'origin': self.origin,
+            'cell_size': self.cell_size,
+            'dims': self.dims,
+            'cell_start': self.cell_start,
+            'items': self.items,
+        }
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def cell_count(self):
+        return int(np.prod(self.dims))
+
+    def cell_coords(self, points):
+        """Integer cell coordinates, clamped to the grid"""
+        coords = np.floor((np.asarray(points, dtype=np.float64) - self.origin) / self.cell_size)
+        return np.clip(coords, 0, self.dims - 1).astype(np.int64)
+
+    def cell_ids(self, points):
+        coords = self.cell_coords(points).reshape(-1, 3)
+        return (coords[:, 0] * self.dims[1] + coords[:, 1]) * self.dims[2] + coords[:, 2]
+
+    def _gather(self, lo, hi):
+        """Marker indices stored in the inclusive cell box lo..hi"""
+
+        # Cells along Z are contiguous, so every (x, y) row is one slice
+        xs = np.arange(lo[0], hi[0] + 1)
+        ys = np.arange(lo[1], hi[1] + 1)
+        rows = (xs[:, None] * self.dims[1] + ys[None, :]).ravel() * self.dims[2]
+        starts = self.cell_start[rows + lo[2]]
+        ends = self.cell_start[rows + hi[2] + 1]
+        lengths = ends - starts
+
+        total = int(lengths.sum())
+        if total == 0:
+            return self.items[:0]
+        if len(rows) == 1:
+            return self.items[starts[0]:ends[0]]
+        slots = np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.items[slots]
+
+    def _distances(self, candidates, point):
+        delta = self.positions[candidates] - point
+        return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+    def within(self, point, radius):
+        """(indices, distances) of markers within `radius`, nearest first"""
+
+        point = np.asarray(point, dtype=np.float64)
+        if not len(self) or np.any(point + radius < self.origin) or \
+                np.any(point - radius > self.origin + self.dims * self.cell_size):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        candidates = self._gather(self.cell_coords(point - radius), self.cell_coords(point + radius))
+        distances = self._distances(candidates, point)
+        keep = distances <= radius
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def nearest(self, point, k=1, max_distance=None):
+        """
+        (indices, distances) of the `k` nearest markers, nearest first.
+        Searches growing cell boxes around the point and stops once no
+        unvisited cell can hold anything closer.
+        """
+
+        point = np.asarray(point, dtype=np.float64)
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if not len(self) or k <= 0:
+            return empty
+
+        center = np.floor((point - self.origin) / self.cell_size).astype(np.int64)
+        last = self.dims - 1
+        ring = 0
+
+        while True:
+            lo = np.clip(center - ring, 0, last)
+            hi = np.clip(center + ring, 0, last)
+            candidates = self._gather(lo, hi)
+            covers_grid = np.all(lo == 0) and np.all(hi == last)
+
+            if len(candidates) >= k or covers_grid:
+                distances = self._distances(candidates, point)
+                if len(candidates) > k:
+                    part = np.argpartition(distances, k - 1)[:k]
+                    candidates, distances = candidates[part], distances[part]
+
+                # Anything outside the box is at least this far away
+                below = np.where(lo > 0, point - (self.origin + lo * self.cell_size), np.inf)
+                above = np.where(hi < last, self.origin + (hi + 1) * self.cell_size - point, np.inf)
+                reach = min(below.min(), above.min())
+
+                if covers_grid or distances.max() <= reach:
+                    order = np.argsort(distances, kind='stable')
+                    candidates, distances = candidates[order], distances[order]
+                    if max_distance is not None:
+                        keep = distances <= max_distance
+                        candidates, distances = candidates[keep], distances[keep]
+                    return candidates, distances
+
+                if max_distance is not None and reach > max_distance and distances.min() > max_distance:
+                    return empty
+
+            ring = ring * 2 if ring else 1
+
+    def nearest_many(self, points, max_distance=None):
+        """
+        Nearest marker for each of `points`: (indices, distances), with -1 / inf
+        where nothing lies within `max_distance`
+        """
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        indices = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        for i, point in enumerate(points):
+            found, dist = self.nearest(point, 1, max_distance)
+            if len(found):
+                indices[i], distances[i] = found[0], dist[0]
+        return indices, distances
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+def benchmark(count=100000, queries=1000, radius=20.0, seed=0):
+    """Build an index over `count` venue-like markers and time lookups against brute force"""
+
+    rng = np.random.default_rng(seed)
+    # Spread like a large exhibition hall: 1 km x 1 km, a few floors
+    positions = np.column_stack([
+        rng.uniform(0, 1000, count),
+        rng.integers(0, 4, count) * 5.0,
+        rng.uniform(0, 1000, count),
+    ])
+    points = np.column_stack([rng.uniform(-20, 1020, queries), rng.uniform(0, 15, queries),
+                              rng.uniform(-20, 1020, queries)])
+
+    started = time.perf_counter()
+    index = SpatialIndex(positions)
+    build = time.perf_counter() - started
+
+    def timed(fn):
+        started = time.perf_counter()
+        results = [fn(p) for p in points]
+        return (time.perf_counter() - started) / len(points), results
+
+    nearest_time, nearest = timed(lambda p: index.nearest(p, 1))
+    within_time, within = timed(lambda p: index.within(p, radius))
+
+    mismatches = 0
+    for point, (found, _), (hits, _) in zip(points, nearest, within):
+        distances = np.linalg.norm(positions - point, axis=1)
+        if not np.isclose(distances[found[0]], distances.min()):
+            mismatches += 1
+        if set(hits.tolist()) != set(np.flatnonzero(distances <= radius).tolist()):
+            mismatches += 1
+
+    return {
+        'count': count,
+        'cells': index.cell_count,
+        'build_seconds': build,
+        'nearest_seconds': nearest_time,
+        'within_seconds': within_time,
+        'mismatches': mismatches,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nearest-zone and radius queries over zone/POI markers")
+    parser.add_argument('inputs', nargs='*', help="zone_coordinates.json and optionally a POI export JSON")
+    parser.add_argument('--near', type=float, nargs=3, metavar=('X', 'Y', 'Z'), help="query point")
+    parser.add_argument('--radius', type=float, default=None, help="list every marker within this distance")
+    parser.add_argument('-k', type=int, default=1, help="number of nearest markers (default: 1)")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=100000, default=None, metavar='N',
+                        help="time lookups over N synthetic markers (default: 100000)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark is not None:
+        result = benchmark(args.benchmark)
+        print(f"📍 {result['count']} markers in {result['cells']} cells "
+              f"(built in {result['build_seconds'] * 1000:.1f} ms)")
+        print(f"   nearest:       {result['nearest_seconds'] * 1e6:8.1f} µs/query")
+        print(f"   within 20 m:   {result['within_seconds'] * 1e6:8.1f} µs/query")
+        if result['mismatches']:
+            print(f"❌ {result['mismatches']} queries differ from brute force")
+            return 1
+        print("✅ All queries match brute force")
+        return 0
+
+    if not args.inputs or args.near is None:
+        parser.error("zone JSON and --near are required (or use --benchmark)")
+
+    with open(args.inputs[0], 'r', encoding='utf-8') as f:
+        zones = json.load(f)['zones']
+    pois = []
+    if len(args.inputs) > 1:
+        with open(args.inputs[1], 'r', encoding='utf-8') as f:
+            pois = json.load(f)['pois']
+
+    labels = [f"zone {z['id']}" for z in zones] + [f"POI {p['id']} ({p.get('name', '')})" for p in pois]
+    index = SpatialIndex(marker_positions(zones, pois))
+
+    if args.radius is not None:
+        indices, distances = index.within(args.near, args.radius)
+        print(f"📍 {len(indices)} marker(s) within {args.radius} of {tuple(args.near)}")
+    else:
+        indices, distances = index.nearest(args.near, args.k)
+        print(f"📍 Nearest to {tuple(args.near)}")
+
+    for i, distance in zip(indices.tolist(), distances.tolist()):
+        print(f"   {labels[i]}: {distance:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
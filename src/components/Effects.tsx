@@ -23,7 +23,8 @@ function EffectsPipeline() {
 
   return (
     <R3FEffectComposer multisampling={2} enableNormalPass={ssaaoEnabled}>
-      {/* SSAO - Optimized settings for architectural geometry */}
+      {/* SSAO - Optimized settings for architectural geometry. Models baked
+          with glb_ao.py carry their own occlusion and look right without it */}
       {ssaaoEnabled && (
         <SSAO
           samples={16}
@@ -1,11 +1,15 @@
 import { useEffect, useMemo, useState } from 'react'
 import { useAppStore } from '../store/appStore'
-import { events } from '../data/mockData'
+import { useSchedule } from '../hooks/useSchedule'
+import { eventsAround } from '../utils/schedule'
 import { format, differenceInMinutes } from 'date-fns'
 import { calculateRoute } from '../utils/navigation'
 
 type FilterType = 'all' | 'favorites' | 'now'
 
+// The "now" filter also lists events starting this soon
+const SOON_MINUTES = 30
+
 export default function EventsPanel() {
   const setActivePanel = useAppStore(state => state.setActivePanel)
   const selectedEvent = useAppStore(state => state.selectedEvent)
@@ -16,14 +20,19 @@ export default function EventsPanel() {
   const setRoute = useAppStore(state => state.setRoute)
 
   const [activeFilter, setActiveFilter] = useState<FilterType>('all')
+  const { schedule, events } = useSchedule()
 
   useEffect(() => {
     useAppStore.setState({ events })
-  }, [])
+  }, [events])
 
   const eventsWithStatus = useMemo(() => {
     const now = new Date()
-    let filtered = events.map(event => {
+    // An imported schedule is already sorted and answers "now" from its index
+    const source = schedule && activeFilter === 'now'
+      ? eventsAround(schedule, now, SOON_MINUTES).map(position => events[position])
+      : events
+    let filtered = source.map(event => {
       const minutesToStart = differenceInMinutes(event.startTime, now)
       const minutesToEnd = differenceInMinutes(event.endTime, now)
 
@@ -36,12 +45,12 @@ export default function EventsPanel() {
 
     if (activeFilter === 'favorites') {
       filtered = filtered.filter(e => favoriteEvents.includes(e.id))
-    } else if (activeFilter === 'now') {
-      filtered = filtered.filter(e => e.status === 'ongoing' || (e.status === 'upcoming' && e.minutesToStart <= 30))
+    } else if (activeFilter === 'now' && !schedule) {
+      filtered = filtered.filter(e => e.status === 'ongoing' || (e.status === 'upcoming' && e.minutesToStart <= SOON_MINUTES))
     }
 
-    return filtered.sort((a, b) => a.startTime.getTime() - b.startTime.getTime())
-  }, [activeFilter, favoriteEvents])
+    return schedule ? filtered : filtered.sort((a, b) => a.startTime.getTime() - b.startTime.getTime())
+  }, [activeFilter, favoriteEvents, events, schedule])
 
   const handleNavigateToEvent = (event: typeof events[0]) => {
     const zone = zones.find(z => z.id === event.zoneId)
@@ -54,7 +63,7 @@ export default function EventsPanel() {
       const startPosition = lastRouteDestination || userLocation?.position
       
       if (startPosition) {
-        const route = calculateRoute(startPosition, zone.position)
+        const route = calculateRoute(startPosition, zone.position, zone)
         setRoute(route)
         setLastRouteDestination(zone.position) // Save destination for next route
 
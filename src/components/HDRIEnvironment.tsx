@@ -1,5 +1,11 @@
 import { Environment, useTexture } from '@react-three/drei'
+import { useLoader } from '@react-three/fiber'
+import { Suspense, useMemo } from 'react'
+import type { ComponentProps } from 'react'
 import { useAppStore } from '../store/appStore'
+import { environments } from '../data/environments'
+import { PrefilteredEnvironmentLoader, environmentHarmonics } from '../utils/prefilteredEnvironment'
+import { assetUrl } from '../utils/assets'
 import * as THREE from 'three'
 
 // List of available HDRI files
@@ -64,6 +70,27 @@ const LIGHTING_PRESETS = {
   }
 }
 
+type PrefilteredEnvironmentMapProps = Omit<ComponentProps<typeof Environment>, 'map' | 'files' | 'preset'> & {
+  file: string
+}
+
+// HDRI prefiltered offline (hdri_prefilter.py): already a cubeUV map, so no PMREM pass
+function PrefilteredEnvironmentMap({ file, ...props }: PrefilteredEnvironmentMapProps) {
+  const texture = useLoader(PrefilteredEnvironmentLoader, assetUrl(file))
+  return <Environment map={texture} {...props} />
+}
+
+// Diffuse light from the HDRI's spherical harmonics (hdri_prefilter.py), shown
+// while its prefiltered map loads so switching environments never goes dark
+function EnvironmentProbe({ sh, intensity, rotation }: {
+  sh: [number, number, number][]
+  intensity: number
+  rotation: number
+}) {
+  const harmonics = useMemo(() => environmentHarmonics(sh, rotation), [sh, rotation])
+  return <lightProbe args={[harmonics, intensity]} />
+}
+
 // HDRI Environment component - Only active in HDRI mode
 export function HDRIEnvironment() {
   const hdriFile = useAppStore(state => state.hdriFile)
@@ -114,10 +141,27 @@ export function HDRIEnvironment() {
   // Use custom HDRI file
   // Handle 'neutral' specifically to use local file since it's removed from DREI_PRESETS
   const environmentFile = hdriFile === 'neutral' ? 'textures/env/neutral_HDR.jpg' : hdriFile
+  const prefiltered = environments[environmentFile]
+
+  if (prefiltered) {
+    return (
+      <Suspense fallback={<EnvironmentProbe sh={prefiltered.sh} intensity={hdriIntensity} rotation={rotationRad} />}>
+        <PrefilteredEnvironmentMap
+          file={prefiltered.file}
+          background={showHdriBackground}
+          backgroundIntensity={hdriIntensity * backgroundIntensityMultiplier}
+          backgroundBlurriness={hdriBlur}
+          backgroundRotation={[0, rotationRad, 0]}
+          environmentIntensity={hdriIntensity}
+          environmentRotation={[0, rotationRad, 0]}
+        />
+      </Suspense>
+    )
+  }
 
   return (
     <Environment
-      files={`/${environmentFile}`}
+      files={assetUrl(environmentFile)}
       background={showHdriBackground}
       backgroundIntensity={hdriIntensity * backgroundIntensityMultiplier}
       backgroundBlurriness={hdriBlur}
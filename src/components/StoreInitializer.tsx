@@ -1,6 +1,6 @@
 import { useEffect } from 'react'
 import { useAppStore } from '../store/appStore'
-import { zones } from '../data/mockData'
+import { loadBundledZones, venueZones as zones } from '../utils/venueZones'
 
 export default function StoreInitializer() {
   const setZones = useAppStore(state => state.setZones)
@@ -23,5 +23,14 @@ export default function StoreInitializer() {
     }
   }, [setZones, setUserLocation, currentZones.length])
 
+  // The binary zone bundle, when the build ships one, supersedes the compiled zones
+  useEffect(() => {
+    let active = true
+    loadBundledZones()
+      .then(bundled => { if (active && bundled && bundled.length > 0) setZones(bundled) })
+      .catch(error => console.warn('Zone bundle could not be loaded:', error))
+    return () => { active = false }
+  }, [setZones])
+
   return null
 }
@@ -1,22 +1,23 @@
 import { useEffect, useMemo } from 'react'
 import { useGLTF } from '@react-three/drei'
+import { useThree } from '@react-three/fiber'
+import type { GLTF } from 'three/examples/jsm/loaders/GLTFLoader.js'
 import * as THREE from 'three'
 import { useAppStore } from '../store/appStore'
+import { useVisibleSet, type VisibleSet } from '../hooks/useVisibleSet'
+import { useLodLevels } from '../hooks/useLodLevels'
+import { useTileStreaming } from '../hooks/useTileStreaming'
+import { assetUrl, hasAsset } from '../utils/assets'
+import { applyBakedOcclusion, hasBakedOcclusion } from '../utils/bakedOcclusion'
+import { hideRanges, isMergedGeometry, mergedRanges } from '../utils/mergedGeometry'
+import { ktx2Loader } from '../utils/ktx2'
 
-function LoadedModel() {
-  const gltf = useGLTF('/SM_MFF.glb')
-  const { scene } = gltf
-  
-  // Log loading status
-  useEffect(() => {
-    console.log('GLTF Loading Status:', { hasScene: !!scene })
-    if (scene) {
-      console.log('GLTF Model loaded successfully')
-      // Log scene info
-      console.log('Scene children count:', scene.children?.length)
-    }
-  }, [scene])
-  
+const VENUE_MODEL = 'SM_MFF.glb'
+// Written next to the model by glb_tiles.py; streamed instead of the whole model when present
+const VENUE_TILESET = 'SM_MFF_tiles/tileset.json'
+
+// Apply the store's material settings to every mesh of a model or tile
+function useVenueMaterial(scene: THREE.Object3D) {
   // Get material settings from store
   const materialColor = useAppStore(state => state.materialColor)
   const materialRoughness = useAppStore(state => state.materialRoughness)
@@ -38,32 +39,93 @@ function LoadedModel() {
 
   // Apply materials to loaded model
   useEffect(() => {
-    if (gltf?.scene) {
-      gltf.scene.traverse((child: any) => {
-        if (child.isMesh) {
-          // Clone material for each mesh
-          const mat = material.clone()
-          child.material = mat
-          child.castShadow = true
-          child.receiveShadow = true
+    scene.traverse((child: any) => {
+      if (child.isMesh) {
+        // Clone material for each mesh
+        const mat = material.clone()
+        child.material = mat
+        child.castShadow = true
+        child.receiveShadow = true
+        
+        // Optimize geometry
+        if (child.geometry) {
+          child.geometry.computeBoundingSphere()
+          child.geometry.computeVertexNormals()
+
+          // Ambient occlusion baked by glb_ao.py
+          if (hasBakedOcclusion(child.geometry)) {
+            applyBakedOcclusion(mat)
+          }
           
-          // Optimize geometry
-          if (child.geometry) {
-            child.geometry.computeBoundingSphere()
-            child.geometry.computeVertexNormals()
-            
-            // Enable anisotropic filtering for textures
-            if (child.material.map) {
-              child.material.map.anisotropy = 16
-            }
-            if (child.material.normalMap) {
-              child.material.normalMap.anisotropy = 16
-            }
+          // Enable anisotropic filtering for textures
+          if (child.material.map) {
+            child.material.map.anisotropy = 16
+          }
+          if (child.material.normalMap) {
+            child.material.normalMap.anisotropy = 16
           }
         }
-      })
+      }
+    })
+  }, [scene, material])
+}
+
+// Hide meshes the precomputed visible set says can't be seen from here
+function useHiddenNodes(scene: THREE.Object3D, visibleSet: VisibleSet | null) {
+  useEffect(() => {
+    const isHidden = (object: THREE.Object3D | undefined) => visibleSet !== null && object !== undefined &&
+      (visibleSet.hiddenNodes.has(object.name) || visibleSet.hiddenNodes.has(object.parent?.name ?? ''))
+
+    // Merged meshes (glb_merge.py) hide the ranges of their source nodes,
+    // which stay in the scene as empty nodes; range tables hold the names
+    // as exported, the scene has them sanitized by GLTFLoader
+    const byName = new Map<string, THREE.Object3D>()
+    scene.traverse(object => { if (object.name) byName.set(object.name, object) })
+    const isSourceHidden = (name: string) => isHidden(byName.get(THREE.PropertyBinding.sanitizeNodeName(name)))
+
+    // Instanced meshes (glb_instancing.py) draw the copies of the empty
+    // source nodes listed in extras.instances; hide one once all are hidden
+    const isInstancingHidden = (object: THREE.Object3D | null) => {
+      const sources = object?.userData.instances
+      return Array.isArray(sources) && sources.length > 0 && sources.every(isSourceHidden)
+    }
+
+    scene.traverse((child: any) => {
+      if (!child.isMesh) return
+      if (isMergedGeometry(child.geometry)) {
+        const hidden = new Set(mergedRanges(child.geometry)!
+          .filter(range => isSourceHidden(range.node))
+          .map(range => range.node))
+        hideRanges(child.geometry, hidden)
+      } else {
+        child.visible = !isHidden(child) && !isInstancingHidden(child) && !isInstancingHidden(child.parent)
+      }
+    })
+  }, [scene, visibleSet])
+}
+
+function LoadedModel() {
+  const renderer = useThree(state => state.gl)
+  // KTX2 textures (glb_textures.py) need a transcoder; drei sets up Draco and meshopt itself
+  const gltf = useGLTF(assetUrl(VENUE_MODEL), true, true, loader => loader.setKTX2Loader(ktx2Loader(renderer)))
+  const { scene } = gltf
+  
+  // Log loading status
+  useEffect(() => {
+    console.log('GLTF Loading Status:', { hasScene: !!scene })
+    if (scene) {
+      console.log('GLTF Model loaded successfully')
+      // Log scene info
+      console.log('Scene children count:', scene.children?.length)
     }
-  }, [gltf, material])
+  }, [scene])
+
+  useVenueMaterial(scene)
+
+  // Coarser geometry for distant nodes when the model carries LOD levels (glb_lod.py)
+  useLodLevels(scene, gltf.parser)
+
+  useHiddenNodes(scene, useVisibleSet())
 
   return (
     <>
@@ -78,6 +140,24 @@ function LoadedModel() {
   )
 }
 
+function VenueTile({ gltf, visibleSet }: { gltf: GLTF; visibleSet: VisibleSet | null }) {
+  useVenueMaterial(gltf.scene)
+  useLodLevels(gltf.scene, gltf.parser)
+  useHiddenNodes(gltf.scene, visibleSet)
+  return <primitive object={gltf.scene} />
+}
+
+// Venue split into spatial tiles (glb_tiles.py), streamed nearest-first
+function TiledModel() {
+  const tiles = useTileStreaming(VENUE_TILESET)
+  const visibleSet = useVisibleSet()
+  return (
+    <>
+      {tiles.map(({ tile, gltf }) => <VenueTile key={tile.id} gltf={gltf} visibleSet={visibleSet} />)}
+    </>
+  )
+}
+
 export default function VenueModel() {
-  return <LoadedModel />
+  return hasAsset(VENUE_TILESET) ? <TiledModel /> : <LoadedModel />
 }
@@ -40,7 +40,7 @@ export default function ZoneDetailOverlay() {
     const startPosition = lastRouteDestination || userLocation?.position
     
     if (startPosition) {
-      const route = calculateRoute(startPosition, selectedZone.position)
+      const route = calculateRoute(startPosition, selectedZone.position, selectedZone)
       setRoute(route)
       setLastRouteDestination(selectedZone.position) // Save destination for next route
 
@@ -1,9 +1,10 @@
 import { useEffect } from 'react'
 import { Html } from '@react-three/drei'
 import { useAppStore } from '../store/appStore'
-import { zones } from '../data/mockData'
+import { venueZones as zones } from '../utils/venueZones'
 import ZoneMarkerHighlight from './ZoneMarkerHighlight'
 import { useCameraType } from '../hooks/useCameraType'
+import { useVisibleSet } from '../hooks/useVisibleSet'
 
 export default function ZoneMarkers() {
   const zonesFromStore = useAppStore(state => state.zones)
@@ -12,6 +13,7 @@ export default function ZoneMarkers() {
   const setCameraTarget = useAppStore(state => state.setCameraTarget)
   const showPOI = useAppStore(state => state.showPOI)
   const { isOrthographic } = useCameraType()
+  const visibleSet = useVisibleSet()
 
   // Load zones into store initially
   useEffect(() => {
@@ -33,6 +35,12 @@ export default function ZoneMarkers() {
       {currentZones.map(zone => {
         const isSelected = selectedZone?.id === zone.id
 
+        // Skip markers hidden behind walls (precomputed visible sets, keyed by
+        // ZONE_ node); keep the selected one and zones without a node
+        if (visibleSet && !isSelected && zone.node && !visibleSet.zones.has(zone.node)) {
+          return null
+        }
+
         const handleClick = () => {
           setSelectedZone(zone)
           setCameraTarget(zone.id)
@@ -0,0 +1,5 @@
+// Generated by the asset pipeline. Do not edit by hand.
+
+import type { AssetEntry } from '../types'
+
+export const assets: Record<string, AssetEntry> = {}
@@ -0,0 +1,5 @@
+// Generated by the asset pipeline. Do not edit by hand.
+
+import type { PrefilteredEnvironment } from '../types'
+
+export const environments: Record<string, PrefilteredEnvironment> = {}
@@ -6,6 +6,7 @@ const poiMap = new Map(pois.map(poi => [poi.name, poi]))
 export const zones: Zone[] = [
   {
     id: 'zone-1',
+    node: 'ZONE_VIP_зона',
     name: 'VIP-зал',
     color: '#ffd700',
     position: [52.066, 0.019, 0.779],
@@ -17,6 +18,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-2',
+    node: 'ZONE_Аккредитация',
     name: 'Аккредитация',
     color: '#9933cc',
     position: [-127.695, -0.082, -6.942],
@@ -28,6 +30,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-3',
+    node: 'ZONE_Арт_объект',
     name: 'Арт-объект',
     color: '#96ceb4',
     position: [-17.487, 0.039, 2.465],
@@ -39,6 +42,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-4',
+    node: 'ZONE_ЗОНА ПРЕСС ПОДХОДА_2',
     name: 'Пресс-подход 1',
     color: '#e74c3c',
     position: [-71.147, 0.030, 7.861],
@@ -50,6 +54,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-5',
+    node: 'ZONE_ЗОНА ПРЕСС ПОДХОДА_1',
     name: 'Пресс-подход 2',
     color: '#c0392b',
     position: [-70.494, 0.030, -4.725],
@@ -61,6 +66,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-6',
+    node: 'ZONE_Зал_Пленарного_Заседания',
     name: 'Зал пленарного заседания',
     color: '#ff6b35',
     position: [30.267, 0.456, 1.719],
@@ -73,6 +79,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-7',
+    node: 'ZONE_Инфо-стойка',
     name: 'Инфо-стойка',
     color: '#00ccff',
     position: [-63.039, 0.053, -4.444],
@@ -84,6 +91,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-8',
+    node: 'ZONE_Конференц_зал 2',
     name: 'Конференц-зал I',
     color: '#0088ff',
     position: [-42.434, 0.111, 15.028],
@@ -96,6 +104,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-9',
+    node: 'ZONE_Конференц_зал 1',
     name: 'Конференц-зал II',
     color: '#4ecdc4',
     position: [-38.756, 0.111, -11.400],
@@ -108,6 +117,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-10',
+    node: 'ZONE_Конференц_зал 4',
     name: 'Конференц-зал III',
     color: '#45b7d1',
     position: [-6.192, 0.111, 14.388],
@@ -120,6 +130,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-11',
+    node: 'ZONE_Конференц_зал 3',
     name: 'Конференц-зал IV',
     color: '#96ceb4',
     position: [-6.264, 0.111, -10.895],
@@ -132,6 +143,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-12',
+    node: 'ZONE_Лайндж_зона_2',
     name: 'Лаунж-зона 1',
     color: '#45b7d1',
     position: [-24.793, 0.068, 11.824],
@@ -143,6 +155,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-13',
+    node: 'ZONE_Лайндж_зона_1',
     name: 'Лаунж-зона 2',
     color: '#4ecdc4',
     position: [-22.792, 0.066, -7.632],
@@ -154,6 +167,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-14',
+    node: 'ZONE_Овальный зал',
     name: 'Овальный зал',
     color: '#cc6600',
     position: [-62.340, 0.019, 12.455],
@@ -166,6 +180,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-15',
+    node: 'ZONE_Переговорная_1',
     name: 'Переговорная 1',
     color: '#8e44ad',
     position: [-70.673, 0.019, -14.370],
@@ -177,6 +192,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-16',
+    node: 'ZONE_Переговорная_2',
     name: 'Переговорная 2',
     color: '#9b59b6',
     position: [-64.919, 0.019, -15.099],
@@ -188,6 +204,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-17',
+    node: 'ZONE_Стенд_спонсора',
     name: 'Экспозиция',
     color: '#cc0066',
     position: [-29.288, 0.119, 2.094],
@@ -199,6 +216,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-18',
+    node: 'ZONE_Фойе',
     name: 'Фойе',
     color: '#33cccc',
     position: [-87.889, 0.019, 1.460],
@@ -209,6 +227,7 @@ export const zones: Zone[] = [
   },
   {
     id: 'zone-19',
+    node: 'ZONE_Фото_зона',
     name: 'Фото-зона',
     color: '#ff69b4',
     position: [2.896, 0.348, 1.442],
@@ -0,0 +1,8 @@
+// Generated by the asset pipeline. Do not edit by hand.
+
+import type { NavGraph } from '../types'
+
+export const navGraph: NavGraph = {
+  nodes: [],
+  edges: []
+}
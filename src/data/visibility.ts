@@ -0,0 +1,8 @@
+// Generated by the asset pipeline. Do not edit by hand.
+
+import type { VisibilityTable } from '../types'
+
+export const visibility: VisibilityTable = {
+  nodes: [],
+  viewpoints: []
+}
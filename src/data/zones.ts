@@ -0,0 +1,5 @@
+// Generated by the asset pipeline. Do not edit by hand.
+
+import type { Zone } from '../types'
+
+export const zones: Zone[] = []
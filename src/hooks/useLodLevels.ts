@@ -0,0 +1,103 @@
+import { useFrame } from '@react-three/fiber'
+import { useEffect, useRef } from 'react'
+import * as THREE from 'three'
+
+/** One decimated level of a node, as glb_lod.py writes it into node extras */
+export interface LodLevel {
+  /** glTF mesh index of the level */
+  mesh: number
+  triangles: number
+  ratio: number
+  /** RMS deviation from full detail in meters */
+  error: number
+  /** Camera distance from which this level is used */
+  distance: number
+}
+
+/** The part of GLTFLoader's parser used to load level meshes */
+export interface MeshLoader {
+  getDependency(type: 'mesh', index: number): Promise<THREE.Object3D>
+}
+
+interface LodEntry {
+  node: THREE.Object3D
+  /** Meshes drawing the node's primitives, in primitive order */
+  meshes: THREE.Mesh[]
+  /** Geometries per level (0 = full detail), in primitive order */
+  geometries: THREE.BufferGeometry[][]
+  distances: number[]
+  current: number
+}
+
+/**
+ * Meshes drawing the first `count` primitives of a node: the node itself for
+ * single-primitive meshes, otherwise the leading children of its group
+ * (child nodes come after them)
+ */
+function primitiveMeshes(object: THREE.Object3D, count: number): THREE.Mesh[] {
+  if ((object as THREE.Mesh).isMesh) return [object as THREE.Mesh]
+  return object.children
+    .filter((child): child is THREE.Mesh => (child as THREE.Mesh).isMesh)
+    .slice(0, count)
+}
+
+const nodePosition = new THREE.Vector3()
+
+/**
+ * Swap the geometry of nodes that carry LOD levels (glb_lod.py) by camera
+ * distance. Nodes keep their place in the scene graph, names and
+ * materials, so culling and material overrides keep working; models
+ * without levels are left alone.
+ */
+export function useLodLevels(scene: THREE.Object3D, parser: MeshLoader) {
+  const entries = useRef<LodEntry[]>([])
+
+  useEffect(() => {
+    let cancelled = false
+    const nodes: THREE.Object3D[] = []
+    scene.traverse(object => {
+      if (Array.isArray(object.userData.lod) && object.userData.lod.length > 0) nodes.push(object)
+    })
+
+    Promise.all(nodes.map(async node => {
+      const levels = node.userData.lod as LodLevel[]
+      const loaded = await Promise.all(levels.map(level => parser.getDependency('mesh', level.mesh)))
+      const levelMeshes = loaded.map(object => primitiveMeshes(object, object.children.length || 1))
+      const meshes = primitiveMeshes(node, levelMeshes[0].length)
+      if (levelMeshes.some(level => level.length !== meshes.length)) return null
+
+      return {
+        node,
+        meshes,
+        geometries: [meshes.map(mesh => mesh.geometry), ...levelMeshes.map(level => level.map(mesh => mesh.geometry))],
+        distances: levels.map(level => level.distance),
+        current: 0,
+      }
+    })).then(result => {
+      if (!cancelled) entries.current = result.filter((entry): entry is LodEntry => entry !== null)
+    }).catch(error => console.warn('LOD levels could not be loaded:', error))
+
+    return () => {
+      cancelled = true
+      // Put full detail back before the scene is reused
+      for (const entry of entries.current) {
+        entry.meshes.forEach((mesh, i) => { mesh.geometry = entry.geometries[0][i] })
+      }
+      entries.current = []
+    }
+  }, [scene, parser])
+
+  useFrame(({ camera }) => {
+    for (const entry of entries.current) {
+      entry.node.getWorldPosition(nodePosition)
+      const distance = camera.position.distanceTo(nodePosition)
+
+      let level = 0
+      while (level < entry.distances.length && distance >= entry.distances[level]) level++
+      if (level === entry.current) continue
+
+      entry.current = level
+      entry.meshes.forEach((mesh, i) => { mesh.geometry = entry.geometries[level][i] })
+    }
+  })
+}
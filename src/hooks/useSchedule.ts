@@ -0,0 +1,46 @@
+import { useEffect, useMemo, useState } from 'react'
+import { useAppStore } from '../store/appStore'
+import type { Event, EventSchedule } from '../types'
+import { assetUrl, hasAsset } from '../utils/assets'
+import { scheduleEvents } from '../utils/schedule'
+import { demoEvents } from '../utils/venueZones'
+
+// Written to public/ by events_importer.py
+const SCHEDULE = 'schedule.json'
+
+let request: Promise<EventSchedule | null> | null = null
+
+function loadSchedule() {
+  if (!request) {
+    request = hasAsset(SCHEDULE)
+      ? fetch(assetUrl(SCHEDULE))
+        .then(response => {
+          if (!response.ok) throw new Error(`${response.status} ${response.statusText}`)
+          return response.json() as Promise<EventSchedule>
+        })
+        .catch(error => {
+          console.warn('Schedule could not be loaded:', error)
+          return null
+        })
+      : Promise.resolve(null)
+  }
+  return request
+}
+
+/**
+ * The imported schedule (events_importer.py) and its events in start order,
+ * or no schedule and the demo events when the build has none
+ */
+export function useSchedule(): { schedule: EventSchedule | null; events: Event[] } {
+  const [schedule, setSchedule] = useState<EventSchedule | null>(null)
+  const zones = useAppStore(state => state.zones)
+
+  useEffect(() => {
+    let active = true
+    loadSchedule().then(loaded => { if (active) setSchedule(loaded) })
+    return () => { active = false }
+  }, [])
+
+  const events = useMemo(() => schedule ? scheduleEvents(schedule) : demoEvents(zones), [schedule, zones])
+  return { schedule, events }
+}
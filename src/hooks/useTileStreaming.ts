@@ -0,0 +1,105 @@
+import { useFrame, useThree } from '@react-three/fiber'
+import { useEffect, useRef, useState } from 'react'
+import * as THREE from 'three'
+import { GLTFLoader, type GLTF } from 'three/examples/jsm/loaders/GLTFLoader.js'
+import { DRACOLoader } from 'three/examples/jsm/loaders/DRACOLoader.js'
+import { MeshoptDecoder } from 'three/examples/jsm/libs/meshopt_decoder.module.js'
+import type { Tileset, TilesetTile } from '../types'
+import { assetUrl } from '../utils/assets'
+import { ktx2Loader } from '../utils/ktx2'
+
+// Tiles fetched at once; the rest wait so the nearest ones get the bandwidth
+const MAX_CONCURRENT_LOADS = 3
+
+// Same decoder drei's useGLTF uses
+const DRACO_DECODER_PATH = 'https://www.gstatic.com/draco/versioned/decoders/1.5.5/'
+
+export interface LoadedTile {
+  tile: TilesetTile
+  gltf: GLTF
+}
+
+let loader: GLTFLoader | null = null
+
+function tileLoader(renderer: THREE.WebGLRenderer) {
+  if (!loader) {
+    const draco = new DRACOLoader()
+    draco.setDecoderPath(DRACO_DECODER_PATH)
+    loader = new GLTFLoader().setDRACOLoader(draco).setMeshoptDecoder(MeshoptDecoder)
+      .setKTX2Loader(ktx2Loader(renderer))
+  }
+  return loader
+}
+
+/** Squared distance from `point` to a tile's bounding box (0 inside it) */
+export function tileDistanceSq(tile: TilesetTile, point: THREE.Vector3) {
+  let sum = 0
+  const p = [point.x, point.y, point.z]
+  for (let axis = 0; axis < 3; axis++) {
+    const d = Math.max(tile.min[axis] - p[axis], 0, p[axis] - tile.max[axis])
+    sum += d * d
+  }
+  return sum
+}
+
+/**
+ * Stream the tiles of a split venue model (glb_tiles.py), nearest to the
+ * camera first, a few at a time. `tilesetPath` is relative to public/;
+ * returns the tiles loaded so far, in load order.
+ */
+export function useTileStreaming(tilesetPath: string | null): LoadedTile[] {
+  const [loaded, setLoaded] = useState<LoadedTile[]>([])
+  const pending = useRef<TilesetTile[]>([])
+  const inFlight = useRef(0)
+  // Bumped per tileset so loads started for a previous one are dropped
+  const generation = useRef(0)
+  const renderer = useThree(state => state.gl)
+
+  useEffect(() => {
+    const current = ++generation.current
+    pending.current = []
+    setLoaded([])
+    if (!tilesetPath) return
+
+    fetch(assetUrl(tilesetPath))
+      .then(response => {
+        if (!response.ok) throw new Error(`${response.status} ${response.statusText}`)
+        return response.json() as Promise<Tileset>
+      })
+      .then(tileset => {
+        if (current === generation.current) pending.current = [...tileset.tiles]
+      })
+      .catch(error => console.warn('Tileset could not be loaded:', error))
+
+    return () => { generation.current++ }
+  }, [tilesetPath])
+
+  useFrame(({ camera }) => {
+    if (!tilesetPath) return
+    const base = tilesetPath.slice(0, tilesetPath.lastIndexOf('/') + 1)
+
+    while (inFlight.current < MAX_CONCURRENT_LOADS && pending.current.length > 0) {
+      let nearest = 0
+      let nearestDistance = Infinity
+      pending.current.forEach((tile, i) => {
+        const distance = tileDistanceSq(tile, camera.position)
+        if (distance < nearestDistance) {
+          nearest = i
+          nearestDistance = distance
+        }
+      })
+
+      const [tile] = pending.current.splice(nearest, 1)
+      const current = generation.current
+      inFlight.current++
+      tileLoader(renderer).loadAsync(assetUrl(base + tile.file))
+        .then(gltf => {
+          if (current === generation.current) setLoaded(tiles => [...tiles, { tile, gltf }])
+        })
+        .catch(error => console.warn(`Tile ${tile.id} could not be loaded:`, error))
+        .finally(() => { inFlight.current-- })
+    }
+  })
+
+  return loaded
+}
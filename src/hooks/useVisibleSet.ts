@@ -0,0 +1,71 @@
+import { useFrame } from '@react-three/fiber'
+import { useMemo, useRef, useState } from 'react'
+import * as THREE from 'three'
+import { visibility } from '../data/visibility'
+import type { VisibilityTable, VisibilityViewpoint } from '../types'
+
+// Farther than this from every viewpoint (overview, orbiting above the hall) nothing is culled
+const VIEWPOINT_RADIUS = 15
+
+export interface VisibleSet {
+  /** ZONE_ node names (Zone.node) visible from the current viewpoint */
+  zones: Set<string>
+  /** Mesh names (as three.js names them) hidden from the current viewpoint */
+  hiddenNodes: Set<string>
+}
+
+/**
+ * Viewpoint of the table nearest to `position`, or null if none is within `maxDistance`
+ */
+export function nearestViewpoint(
+  table: VisibilityTable,
+  position: [number, number, number],
+  maxDistance = VIEWPOINT_RADIUS
+): VisibilityViewpoint | null {
+  let best: VisibilityViewpoint | null = null
+  let bestDistance = maxDistance * maxDistance
+  for (const viewpoint of table.viewpoints) {
+    const dx = viewpoint.position[0] - position[0]
+    const dy = viewpoint.position[1] - position[1]
+    const dz = viewpoint.position[2] - position[2]
+    const distance = dx * dx + dy * dy + dz * dz
+    if (distance <= bestDistance) {
+      best = viewpoint
+      bestDistance = distance
+    }
+  }
+  return best
+}
+
+/**
+ * Precomputed visible set (visibility_sets.py) for the viewpoint nearest to
+ * the camera. Null means "show everything": no table, an orthographic
+ * camera, or a camera far from every viewpoint.
+ */
+export function useVisibleSet(table: VisibilityTable = visibility): VisibleSet | null {
+  const [viewpoint, setViewpoint] = useState<VisibilityViewpoint | null>(null)
+  const current = useRef<VisibilityViewpoint | null>(null)
+
+  useFrame(({ camera }) => {
+    if (table.viewpoints.length === 0) return
+
+    const next = camera instanceof THREE.OrthographicCamera
+      ? null
+      : nearestViewpoint(table, [camera.position.x, camera.position.y, camera.position.z])
+    // Only re-render when the camera moves to another viewpoint
+    if (next !== current.current) {
+      current.current = next
+      setViewpoint(next)
+    }
+  })
+
+  return useMemo(() => {
+    if (!viewpoint) return null
+
+    // Nodes can share a name, so a name is hidden only if none of its nodes is visible
+    const sanitized = table.nodes.map(name => THREE.PropertyBinding.sanitizeNodeName(name))
+    const visibleNames = new Set(viewpoint.nodes.map(i => sanitized[i]))
+    const hiddenNodes = new Set(sanitized.filter(name => !visibleNames.has(name)))
+    return { zones: new Set(viewpoint.zones), hiddenNodes }
+  }, [viewpoint, table])
+}
@@ -233,7 +233,7 @@ export const useAppStore = create<AppState>()(persist((set) => ({
   userLocation: null,
   setUserLocation: (location) => set({ userLocation: location }),
 
-  // Zones - initialized with empty array, will be loaded from mockData
+  // Zones - initialized with empty array, loaded from utils/venueZones.ts
   zones: [],
   selectedZone: null,
   setSelectedZone: (zone) => set({ selectedZone: zone }),
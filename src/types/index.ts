@@ -1,5 +1,7 @@
 export interface Zone {
   id: string
+  /** Name of the zone's ZONE_ empty in the venue model; pipeline tables refer to zones by it */
+  node?: string
   name: string
   color: string
   position: [number, number, number]
@@ -66,6 +68,119 @@ export interface Route {
   estimatedTime: number
 }
 
+export interface NavGraphNode {
+  id: string
+  position: [number, number, number]
+  /** ZONE_ node name (Zone.node) of the zone this node is linked to */
+  zone?: string
+}
+
+export interface NavGraph {
+  nodes: NavGraphNode[]
+  edges: [string, string][]
+}
+
+export interface VisibilityViewpoint {
+  id: string
+  position: [number, number, number]
+  /** ZONE_ node names (Zone.node) of the zones visible from here */
+  zones: string[]
+  /** Indices into VisibilityTable.nodes of the visible meshes */
+  nodes: number[]
+}
+
+export interface VisibilityTable {
+  /** Names of every mesh node the table covers */
+  nodes: string[]
+  viewpoints: VisibilityViewpoint[]
+}
+
+/** A prefiltered HDRI (hdri_prefilter.py) */
+export interface PrefilteredEnvironment {
+  /** .pmrem container, relative to public/ */
+  file: string
+  /** Face size of the sharpest level */
+  cubeSize: number
+  /** 9 RGB spherical-harmonic radiance coefficients (SphericalHarmonics3 order) */
+  sh: [number, number, number][]
+}
+
+/** One tile of a venue model split by glb_tiles.py */
+export interface TilesetTile {
+  id: string
+  /** Tile GLB, relative to the tileset */
+  file: string
+  /** World-space bounds of the tile's meshes */
+  min: [number, number, number]
+  max: [number, number, number]
+  bytes: number
+  triangles: number
+  /** Names of the mesh nodes in the tile */
+  nodes: string[]
+}
+
+/** tileset.json written by glb_tiles.py */
+export interface Tileset {
+  version: number
+  /** Model the tiles were split from */
+  model: string
+  /** Mesh-free model with the ZONE_ empties and cameras */
+  index: string
+  min: [number, number, number]
+  max: [number, number, number]
+  tiles: TilesetTile[]
+}
+
+/** Interval index of one zone and day of an EventSchedule */
+export interface ScheduleIndex {
+  /** Sorted start and end times in minutes after midnight; consecutive ones bound a segment */
+  bounds: number[]
+  /** Segment i runs the events active[offsets[i]] up to active[offsets[i + 1]] */
+  offsets: number[]
+  /** Positions in the schedule's events */
+  active: number[]
+}
+
+/** Imported events (events_importer.py): one array per field, sorted by day and start */
+export interface EventSchedule {
+  version: number
+  days: string[]
+  zones: string[]
+  events: {
+    id: string[]
+    title: string[]
+    description: string[]
+    /** Indices into zones */
+    zone: number[]
+    /** Indices into days */
+    day: number[]
+    /** Minutes after midnight */
+    start: number[]
+    end: number[]
+    speakers: string[][]
+    capacity: (number | null)[]
+    tags: string[][]
+  }
+  /** Zone id -> day (YYYY-MM-DD) -> interval index */
+  index: Record<string, Record<string, ScheduleIndex>>
+}
+
+/** Load priority of a served asset, most urgent first */
+export type AssetPriority = 'critical' | 'high' | 'normal' | 'lazy'
+
+/** A file from public/ in the asset manifest (asset_manifest.py) */
+export interface AssetEntry {
+  /** Content-addressed URL, relative to the site root; safe to cache forever */
+  url: string
+  bytes: number
+  hash: string
+  priority: AssetPriority
+  /** Public paths of the assets this one needs (asset pipeline outputs of a model) */
+  dependencies: string[]
+  /** URLs of the external buffers/images a model loads, copied next to it */
+  resources: string[]
+}
+
 export interface Notification {
   id: string
   type: 'event' | 'navigation' | 'friend' | 'general'
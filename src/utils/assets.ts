@@ -0,0 +1,78 @@
+// Resolves public/ paths through the asset manifest (asset_manifest.py) and
+// preloads assets by priority. Hashed URLs are immutable, so the browser keeps
+// them cached across deploys until their content actually changes.
+
+import { assets } from '../data/assetManifest'
+import type { AssetPriority } from '../types'
+
+const PRIORITY_ORDER: AssetPriority[] = ['critical', 'high', 'normal', 'lazy']
+
+const requested = new Set<string>()
+
+function normalize(path: string) {
+  return path.replace(/^\/+/, '')
+}
+
+/** URL to fetch a public/ asset from: its hashed copy when the manifest has one */
+export function assetUrl(path: string): string {
+  const entry = assets[normalize(path)]
+  return `/${entry ? entry.url : normalize(path)}`
+}
+
+/** Whether the manifest lists a file (e.g. an optional tileset) */
+export function hasAsset(path: string): boolean {
+  return normalize(path) in assets
+}
+
+/** Paths with priority up to `upTo`, plus everything they depend on, most urgent first */
+export function assetsToPreload(upTo: AssetPriority): string[] {
+  const limit = PRIORITY_ORDER.indexOf(upTo)
+  const rank = new Map<string, number>()
+
+  const visit = (path: string, level: number) => {
+    if (!assets[path] || (rank.get(path) ?? Infinity) <= level) return
+    rank.set(path, level)
+    for (const dependency of assets[path].dependencies) visit(dependency, level)
+  }
+
+  for (const [path, entry] of Object.entries(assets)) {
+    const level = PRIORITY_ORDER.indexOf(entry.priority)
+    if (level <= limit) visit(path, level)
+  }
+
+  return [...rank.entries()].sort((a, b) => a[1] - b[1]).map(([path]) => path)
+}
+
+function addLink(rel: 'preload' | 'prefetch', url: string, priority: AssetPriority) {
+  if (requested.has(url)) return
+  requested.add(url)
+
+  const link = document.createElement('link')
+  link.rel = rel
+  link.href = url
+  // Loaders fetch() in CORS mode; the hint has to match to be reused
+  link.as = 'fetch'
+  link.crossOrigin = 'anonymous'
+  link.setAttribute('fetchpriority', priority === 'critical' ? 'high' : priority === 'high' ? 'auto' : 'low')
+  document.head.appendChild(link)
+}
+
+/**
+ * Start fetching critical and high-priority assets in parallel right away,
+ * and prefetch normal-priority ones once the page is idle. Lazy assets are
+ * left to their loaders.
+ */
+export function preloadAssets() {
+  const request = (rel: 'preload' | 'prefetch', upTo: AssetPriority) => {
+    for (const path of assetsToPreload(upTo)) {
+      const { priority, resources } = assets[path]
+      addLink(rel, assetUrl(path), priority)
+      for (const resource of resources) addLink(rel, `/${resource}`, priority)
+    }
+  }
+
+  request('preload', 'high')
+  const prefetch = () => request('prefetch', 'normal')
+  if ('requestIdleCallback' in window) window.requestIdleCallback(prefetch, { timeout: 5000 })
+  else setTimeout(prefetch, 2000)
+}
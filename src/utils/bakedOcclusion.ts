@@ -0,0 +1,42 @@
+// Per-vertex ambient occlusion baked by glb_ao.py. GLTFLoader exposes the
+// model's _OCCLUSION accessor as the `_occlusion` geometry attribute; the
+// patched shader darkens indirect light with it the way an aoMap would, so
+// the look no longer depends on the per-frame SSAO pass.
+
+import * as THREE from 'three'
+
+export const OCCLUSION_ATTRIBUTE = '_occlusion'
+
+/** Whether a geometry carries baked occlusion */
+export function hasBakedOcclusion(geometry: THREE.BufferGeometry) {
+  return geometry.hasAttribute(OCCLUSION_ATTRIBUTE)
+}
+
+/**
+ * Make a standard material read baked occlusion from its geometry. Only use
+ * it on meshes whose geometry has the attribute; `intensity` blends between
+ * no occlusion (0) and the baked value (1).
+ */
+export function applyBakedOcclusion(material: THREE.MeshStandardMaterial, intensity = 1) {
+  material.onBeforeCompile = shader => {
+    shader.uniforms.bakedOcclusionIntensity = { value: intensity }
+    shader.vertexShader = shader.vertexShader
+      .replace('#include <common>', `#include <common>
+attribute float ${OCCLUSION_ATTRIBUTE};
+varying float vBakedOcclusion;`)
+      .replace('#include <begin_vertex>', `#include <begin_vertex>
+vBakedOcclusion = ${OCCLUSION_ATTRIBUTE};`)
+    shader.fragmentShader = shader.fragmentShader
+      .replace('#include <common>', `#include <common>
+uniform float bakedOcclusionIntensity;
+varying float vBakedOcclusion;`)
+      .replace('#include <aomap_fragment>', `#include <aomap_fragment>
+float bakedOcclusion = mix(1.0, vBakedOcclusion, bakedOcclusionIntensity);
+reflectedLight.indirectDiffuse *= bakedOcclusion;
+reflectedLight.indirectSpecular *= bakedOcclusion;`)
+  }
+  // Keep the patched program apart from the plain one
+  material.customProgramCacheKey = () => 'bakedOcclusion'
+  material.needsUpdate = true
+  return material
+}
@@ -0,0 +1,19 @@
+// KTX2/Basis Universal textures written by glb_textures.py
+// (KHR_texture_basisu). KTX2Loader transcodes them in a worker to a
+// compressed format the GPU supports, so it has to see the renderer first.
+
+import * as THREE from 'three'
+import { KTX2Loader } from 'three/examples/jsm/loaders/KTX2Loader.js'
+
+// Same transcoder drei's useKTX2 uses
+const BASIS_TRANSCODER_PATH = 'https://cdn.jsdelivr.net/gh/pmndrs/drei-assets/basis/'
+
+let loader: KTX2Loader | null = null
+
+/** Shared KTX2 loader for GLTFLoader.setKTX2Loader(), set up for the renderer on first use */
+export function ktx2Loader(renderer: THREE.WebGLRenderer) {
+  if (!loader) {
+    loader = new KTX2Loader().setTranscoderPath(BASIS_TRANSCODER_PATH).detectSupport(renderer)
+  }
+  return loader
+}
@@ -0,0 +1,52 @@
+// Geometry merged by glb_merge.py: one primitive per material, with a range
+// table in its extras (GLTFLoader puts them in geometry.userData) telling
+// which index range came from which source node. hideRanges() uses it to
+// hide single nodes inside a merged mesh.
+
+import * as THREE from 'three'
+
+export interface MergedRange {
+  node: string
+  start: number
+  count: number
+}
+
+/** The range table of a merged geometry, or null for ordinary geometry */
+export function mergedRanges(geometry: THREE.BufferGeometry): MergedRange[] | null {
+  const ranges = geometry.userData.ranges
+  return Array.isArray(ranges) && geometry.index ? ranges as MergedRange[] : null
+}
+
+/** Whether a geometry was merged from several nodes */
+export function isMergedGeometry(geometry: THREE.BufferGeometry) {
+  return mergedRanges(geometry) !== null
+}
+
+/**
+ * Leave the ranges of the given nodes out of a merged geometry's index. The
+ * full index is kept in userData, so hiding fewer nodes later restores them;
+ * an empty set restores the geometry as loaded.
+ */
+export function hideRanges(geometry: THREE.BufferGeometry, hidden: Set<string>) {
+  const ranges = mergedRanges(geometry)
+  if (!ranges || !geometry.index) return
+
+  const full: THREE.TypedArray = geometry.userData.fullIndex ?? geometry.index.array
+  geometry.userData.fullIndex = full
+
+  const kept = ranges.filter(range => !hidden.has(range.node))
+  if (kept.length === ranges.length && geometry.index.array === full) return
+
+  let array = full
+  if (kept.length < ranges.length) {
+    array = new (full.constructor as new (length: number) => THREE.TypedArray)(
+      kept.reduce((sum, range) => sum + range.count, 0))
+    let offset = 0
+    for (const range of kept) {
+      array.set(full.subarray(range.start, range.start + range.count), offset)
+      offset += range.count
+    }
+  }
+
+  geometry.setIndex(new THREE.BufferAttribute(array, 1))
+}
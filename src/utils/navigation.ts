@@ -1,15 +1,35 @@
-import type { Route } from '../types'
+import type { Route, Zone } from '../types'
+import { navGraph } from '../data/navGraph'
+import { assetUrl, hasAsset } from './assets'
+import { loadRouteTable, pathToZone } from './routeTable'
+import type { RouteTable } from './routeTable'
+
+// Zone route table precomputed by route_table.py, written next to the model
+// by asset_pipeline.py --routes. Routes to zones are table walks once it has
+// loaded; the graph search below is the fallback without one.
+const ROUTE_TABLE = 'SM_MFF/routes.bin'
+
+let routeTable: RouteTable | null = null
+if (hasAsset(ROUTE_TABLE)) {
+  loadRouteTable(assetUrl(ROUTE_TABLE))
+    .then(table => { routeTable = table })
+    .catch(error => console.warn('Route table could not be loaded:', error))
+}
 
 interface NavNode {
   id: string
   position: [number, number, number]
 }
 
+// Graph generated from the venue's floor geometry by navmesh_builder.py.
+// While src/data/navGraph.ts is empty the hand-placed graph below is used.
+const useGeneratedGraph = navGraph.nodes.length > 0
+
 // Enhanced navigation graph with corridor spine + branch corridors to rooms
 // The building runs X: -128 to +56, with rooms branching off the main corridor (Z=0)
 // Branches lead through doorways to zones on both sides (Z: -15 to +15)
 
-const navNodes: NavNode[] = [
+const handPlacedNodes: NavNode[] = [
   // === Main corridor spine (Z = 0, ground level) ===
   { id: 'spine-1', position: [-127, 0, 0] },    // Registration end
   { id: 'spine-2', position: [-105, 0, 0] },
@@ -84,6 +104,11 @@ const navNodes: NavNode[] = [
   { id: 'room-vip-end', position: [55, 0, 8] },
 ]
 
+const navNodes: NavNode[] = useGeneratedGraph ? navGraph.nodes : handPlacedNodes
+
+// Generated graph nodes linked to a zone, by ZONE_ node name (Zone.node)
+const zoneNavNodes = new Map(navGraph.nodes.filter(node => node.zone).map(node => [node.zone!, node.id]))
+
 // Build adjacency: spine chain + door branches + room connections
 const navEdges: Record<string, string[]> = {}
 
@@ -94,46 +119,52 @@ function addEdge(a: string, b: string) {
   if (!navEdges[b].includes(a)) navEdges[b].push(a)
 }
 
-// Spine chain
-for (let i = 1; i <= 11; i++) {
-  addEdge(`spine-${i}`, `spine-${i + 1}`)
-}
-
-// Door connections: spine <-> door <-> room
-const branchConnections: [string, string, string][] = [
-  // [spineNode, doorNode, roomNode]
-  ['spine-1', 'door-reg-1', 'room-reg'],
-
-  ['spine-2', 'door-conf-n1', 'room-conf-n1'],
-  ['spine-2', 'door-conf-s1', 'room-conf-s1'],
-  ['spine-3', 'door-conf-n2', 'room-conf-n2'],
-  ['spine-3', 'door-conf-s2', 'room-conf-s2'],
-  ['spine-4', 'door-conf-n3', 'room-conf-n3'],
-  ['spine-4', 'door-conf-s3', 'room-conf-s3'],
-
-  ['spine-5', 'door-exh-n1', 'room-exh-n1'],
-  ['spine-5', 'door-exh-s1', 'room-exh-s1'],
-  ['spine-6', 'door-food-n', 'room-food-n'],
-  ['spine-6', 'door-food-s', 'room-food-s'],
-  ['spine-7', 'door-exh-n2', 'room-exh-n2'],
-  ['spine-7', 'door-exh-s2', 'room-exh-s2'],
-
-  ['spine-8', 'door-central-n', 'room-central-n'],
-  ['spine-8', 'door-central-s', 'room-central-s'],
-  ['spine-9', 'door-press-n', 'room-press-n'],
-  ['spine-9', 'door-press-s', 'room-press-s'],
-
-  ['spine-10', 'door-plenary-n', 'room-plenary-n'],
-  ['spine-10', 'door-plenary-s', 'room-plenary-s'],
-
-  ['spine-11', 'door-vip-n', 'room-vip-n'],
-  ['spine-11', 'door-vip-s', 'room-vip-s'],
-  ['spine-12', 'door-vip-end', 'room-vip-end'],
-]
+if (useGeneratedGraph) {
+  for (const [a, b] of navGraph.edges) {
+    addEdge(a, b)
+  }
+} else {
+  // Spine chain
+  for (let i = 1; i <= 11; i++) {
+    addEdge(`spine-${i}`, `spine-${i + 1}`)
+  }
 
-for (const [spine, door, room] of branchConnections) {
-  addEdge(spine, door)
-  addEdge(door, room)
+  // Door connections: spine <-> door <-> room
+  const branchConnections: [string, string, string][] = [
+    // [spineNode, doorNode, roomNode]
+    ['spine-1', 'door-reg-1', 'room-reg'],
+
+    ['spine-2', 'door-conf-n1', 'room-conf-n1'],
+    ['spine-2', 'door-conf-s1', 'room-conf-s1'],
+    ['spine-3', 'door-conf-n2', 'room-conf-n2'],
+    ['spine-3', 'door-conf-s2', 'room-conf-s2'],
+    ['spine-4', 'door-conf-n3', 'room-conf-n3'],
+    ['spine-4', 'door-conf-s3', 'room-conf-s3'],
+
+    ['spine-5', 'door-exh-n1', 'room-exh-n1'],
+    ['spine-5', 'door-exh-s1', 'room-exh-s1'],
+    ['spine-6', 'door-food-n', 'room-food-n'],
+    ['spine-6', 'door-food-s', 'room-food-s'],
+    ['spine-7', 'door-exh-n2', 'room-exh-n2'],
+    ['spine-7', 'door-exh-s2', 'room-exh-s2'],
+
+    ['spine-8', 'door-central-n', 'room-central-n'],
+    ['spine-8', 'door-central-s', 'room-central-s'],
+    ['spine-9', 'door-press-n', 'room-press-n'],
+    ['spine-9', 'door-press-s', 'room-press-s'],
+
+    ['spine-10', 'door-plenary-n', 'room-plenary-n'],
+    ['spine-10', 'door-plenary-s', 'room-plenary-s'],
+
+    ['spine-11', 'door-vip-n', 'room-vip-n'],
+    ['spine-11', 'door-vip-s', 'room-vip-s'],
+    ['spine-12', 'door-vip-end', 'room-vip-end'],
+  ]
+
+  for (const [spine, door, room] of branchConnections) {
+    addEdge(spine, door)
+    addEdge(door, room)
+  }
 }
 
 // Index nodes for fast lookup
@@ -209,6 +240,25 @@ function findPath(startId: string, endId: string): [number, number, number][] {
   return path
 }
 
+/**
+ * Waypoints from `from` to `to`: a route table walk when the destination is
+ * a zone the table knows, otherwise Dijkstra on the navigation graph
+ */
+function graphPath(
+  from: [number, number, number],
+  to: [number, number, number],
+  zone?: Zone
+): [number, number, number][] {
+  if (routeTable && zone?.node) {
+    const path = pathToZone(routeTable, from, zone.node)
+    if (path) return path
+  }
+
+  const startNodeId = findNearestNode(from)
+  const endNodeId = (zone?.node && zoneNavNodes.get(zone.node)) || findNearestNode(to)
+  return findPath(startNodeId, endNodeId)
+}
+
 /**
  * Simplify path by removing collinear waypoints (straight segments)
  */
@@ -253,18 +303,17 @@ function simplifyPath(points: [number, number, number][]): [number, number, numb
 /**
  * Calculate route between two points using the navigation graph.
  * Paths go through corridors and door openings, avoiding walls.
+ * When `to` is a zone's position, pass the zone too: the route table and
+ * the generated graph link it to a walkable node, which beats the one
+ * nearest its position.
  */
 export function calculateRoute(
   from: [number, number, number],
-  to: [number, number, number]
+  to: [number, number, number],
+  zone?: Zone
 ): Route {
-  const startNodeId = findNearestNode(from)
-  const endNodeId = findNearestNode(to)
-
-  const graphPath = findPath(startNodeId, endNodeId)
-
   // Remove waypoints too close to start or end
-  const cleanedWaypoints = graphPath.filter(p =>
+  const cleanedWaypoints = graphPath(from, to, zone).filter(p =>
     calculateDistance(from, p) > 2 && calculateDistance(to, p) > 2
   )
 
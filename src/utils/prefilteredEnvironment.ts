@@ -0,0 +1,152 @@
+// Loader for the prefiltered environment containers written by
+// hdri_prefilter.py (see that file for the byte layout). Rebuilds the cubeUV
+// atlas PMREMGenerator would render, so three.js uses it as an environment
+// map directly, without prefiltering on the GPU.
+
+import * as THREE from 'three'
+
+const MAGIC = 'PMRM'
+const VERSION = 1
+const HEADER_SIZE = 20
+const SH_SIZE = 9 * 3 * 4
+
+const ENCODING_RGB9E5 = 0
+const ENCODING_HALF = 1
+
+// PMREMGenerator constants
+const LOD_MIN = 4
+const EXTRA_LODS = 6
+
+const HALF_ONE = 0x3c00
+
+export interface CubeUVLevel {
+  size: number
+  x: number
+  y: number
+}
+
+/** Placement of every level in the cubeUV atlas; mirrors cube_uv_layout() in Python */
+export function cubeUVLayout(cubeSize: number) {
+  const lodMax = Math.log2(cubeSize)
+  const levels: CubeUVLevel[] = []
+  for (let i = 0; i <= lodMax - LOD_MIN; i++) {
+    const size = 2 ** (lodMax - i)
+    levels.push({ size, x: 0, y: 4 * (cubeSize - size) })
+  }
+  const extraSize = 2 ** LOD_MIN
+  for (let extra = 1; extra <= EXTRA_LODS; extra++) {
+    levels.push({ size: extraSize, x: 3 * extraSize * extra, y: 4 * (cubeSize - extraSize) })
+  }
+  return { width: 3 * Math.max(cubeSize, extraSize * (EXTRA_LODS + 1)), height: 4 * cubeSize, levels }
+}
+
+/** Half-float RGBA cubeUV texture from a .pmrem container */
+export function decodePrefilteredEnvironment(buffer: ArrayBuffer): THREE.DataTexture {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  if (magic !== MAGIC || view.getUint16(4, true) !== VERSION) {
+    throw new Error('Not a prefiltered environment container')
+  }
+
+  const encoding = view.getUint16(6, true)
+  const cubeSize = view.getUint32(8, true)
+  const { width, height, levels } = cubeUVLayout(cubeSize)
+  if (view.getUint32(12, true) !== width || view.getUint32(16, true) !== height) {
+    throw new Error('Prefiltered environment atlas size does not match its cube size')
+  }
+  if (encoding !== ENCODING_RGB9E5 && encoding !== ENCODING_HALF) {
+    throw new Error(`Unknown prefiltered environment encoding ${encoding}`)
+  }
+
+  const offset = HEADER_SIZE + SH_SIZE
+  const packed = encoding === ENCODING_RGB9E5 ? new Uint32Array(buffer, offset) : null
+  const halves = encoding === ENCODING_HALF ? new Uint16Array(buffer, offset) : null
+  const data = new Uint16Array(width * height * 4)
+  const toHalf = THREE.DataUtils.toHalfFloat
+
+  let texel = 0
+  for (const { size, x, y } of levels) {
+    for (let face = 0; face < 6; face++) {
+      const x0 = x + (face % 3) * size
+      const y0 = y + Math.floor(face / 3) * size
+      for (let row = 0; row < size; row++) {
+        let out = ((y0 + row) * width + x0) * 4
+        for (let col = 0; col < size; col++, texel++, out += 4) {
+          if (packed) {
+            const value = packed[texel]
+            const scale = 2 ** ((value >>> 27) - 24)
+            data[out] = toHalf((value & 0x1ff) * scale)
+            data[out + 1] = toHalf(((value >>> 9) & 0x1ff) * scale)
+            data[out + 2] = toHalf(((value >>> 18) & 0x1ff) * scale)
+          } else if (halves) {
+            data[out] = halves[texel * 3]
+            data[out + 1] = halves[texel * 3 + 1]
+            data[out + 2] = halves[texel * 3 + 2]
+          }
+          data[out + 3] = HALF_ONE
+        }
+      }
+    }
+  }
+
+  const texture = new THREE.DataTexture(data, width, height, THREE.RGBAFormat, THREE.HalfFloatType)
+  texture.mapping = THREE.CubeUVReflectionMapping
+  texture.colorSpace = THREE.LinearSRGBColorSpace
+  texture.minFilter = THREE.LinearFilter
+  texture.magFilter = THREE.LinearFilter
+  texture.generateMipmaps = false
+  texture.needsUpdate = true
+  return texture
+}
+
+/**
+ * Spherical harmonics for a THREE.LightProbe from the coefficients
+ * hdri_prefilter.py stores, turned about Y like an environment map with
+ * environmentRotation [0, rotationY, 0]
+ */
+export function environmentHarmonics(sh: [number, number, number][], rotationY = 0) {
+  const harmonics = new THREE.SphericalHarmonics3().fromArray(sh.flat())
+  if (rotationY === 0) return harmonics
+
+  // three.js samples the map along R_y(-rotationY) * direction, so the
+  // coefficients are those of f(R_y(-rotationY) d): band 0 and the y-only
+  // terms stay put, the rest mix in (z, x), (xy, yz) and (3z²-1, xz, x²-y²)
+  const c = Math.cos(-rotationY)
+  const s = Math.sin(-rotationY)
+  const sqrt3 = Math.sqrt(3)
+  const [, , z, x, xy, yz, zz, xz, xxyy] = sh.map(rgb => new THREE.Vector3(...rgb))
+  const out = harmonics.coefficients
+  out[2].copy(z).multiplyScalar(c).addScaledVector(x, s)
+  out[3].copy(x).multiplyScalar(c).addScaledVector(z, -s)
+  out[4].copy(xy).multiplyScalar(c).addScaledVector(yz, -s)
+  out[5].copy(yz).multiplyScalar(c).addScaledVector(xy, s)
+  out[6].copy(zz).multiplyScalar(c * c - s * s / 2).addScaledVector(xz, sqrt3 * s * c).addScaledVector(xxyy, sqrt3 / 2 * s * s)
+  out[7].copy(xz).multiplyScalar(c * c - s * s).addScaledVector(zz, -sqrt3 * s * c).addScaledVector(xxyy, s * c)
+  out[8].copy(xxyy).multiplyScalar((1 + c * c) / 2).addScaledVector(zz, sqrt3 / 2 * s * s).addScaledVector(xz, -s * c)
+  return harmonics
+}
+
+/** THREE.Loader for .pmrem files, usable with useLoader() */
+export class PrefilteredEnvironmentLoader extends THREE.Loader<THREE.DataTexture> {
+  load(
+    url: string,
+    onLoad: (texture: THREE.DataTexture) => void,
+    onProgress?: (event: ProgressEvent) => void,
+    onError?: (error: unknown) => void
+  ) {
+    const loader = new THREE.FileLoader(this.manager)
+    loader.setPath(this.path)
+    loader.setResponseType('arraybuffer')
+    loader.setRequestHeader(this.requestHeader)
+    loader.setWithCredentials(this.withCredentials)
+    loader.load(url, buffer => {
+      try {
+        onLoad(decodePrefilteredEnvironment(buffer as ArrayBuffer))
+      } catch (error) {
+        if (onError) onError(error)
+        else console.error(error)
+        this.manager.itemError(url)
+      }
+    }, onProgress, onError)
+  }
+}
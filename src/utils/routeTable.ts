@@ -0,0 +1,208 @@
+// Decoder and lookups for the precomputed route table written by
+// route_table.py (see that file for the byte layout). Routes to zones are
+// table walks: no graph search happens in the browser. Zones are keyed by
+// their ZONE_ node name (Zone.node).
+
+const MAGIC = 'ZRT1'
+const VERSION = 1
+const HEADER_SIZE = 28
+
+const FLAG_WIDE_INDEX = 1 << 0
+const FLAG_POLYLINES = 1 << 1
+
+type Vec3 = [number, number, number]
+
+export interface RouteTable {
+  positions: Float32Array
+  /** ZONE_ node names of the table's zones */
+  zoneIds: string[]
+  zoneIndex: Map<string, number>
+  zoneNodes: Uint32Array
+  distances: Float32Array
+  nextHop: Uint16Array | Uint32Array
+  none: number
+  polylineOffsets: Uint32Array | null
+  polylinePoints: Uint16Array | Uint32Array | null
+}
+
+/**
+ * Sequential little-endian reader over the table buffer
+ */
+class TableReader {
+  offset = 0
+
+  constructor(private readonly buffer: ArrayBuffer) {}
+
+  take<T>(ctor: { new (buffer: ArrayBuffer, offset: number, length: number): T; BYTES_PER_ELEMENT: number }, count: number): T {
+    const end = this.offset + ctor.BYTES_PER_ELEMENT * count
+    if (end > this.buffer.byteLength) {
+      throw new Error(`Route table truncated at byte ${this.offset}`)
+    }
+    // Copy so every typed array is correctly aligned regardless of section offsets
+    const view = new ctor(this.buffer.slice(this.offset, end), 0, count)
+    this.offset = end
+    return view
+  }
+
+  align() {
+    this.offset += (4 - (this.offset % 4)) % 4
+  }
+}
+
+/**
+ * Decode a route table (.bin) produced by the asset pipeline
+ */
+export function decodeRouteTable(buffer: ArrayBuffer): RouteTable {
+  if (buffer.byteLength < HEADER_SIZE) {
+    throw new Error('Route table too small')
+  }
+
+  const header = new DataView(buffer, 0, HEADER_SIZE)
+  const magic = String.fromCharCode(
+    header.getUint8(0), header.getUint8(1), header.getUint8(2), header.getUint8(3)
+  )
+  if (magic !== MAGIC) throw new Error(`Bad route table magic "${magic}"`)
+
+  const version = header.getUint16(4, true)
+  if (version !== VERSION) throw new Error(`Unsupported route table version ${version}`)
+
+  const flags = header.getUint16(6, true)
+  const nodeCount = header.getUint32(8, true)
+  const zoneCount = header.getUint32(12, true)
+  const stringCount = header.getUint32(16, true)
+  const stringBytes = header.getUint32(20, true)
+  const polylinePointCount = header.getUint32(24, true)
+
+  const wide = (flags & FLAG_WIDE_INDEX) !== 0
+  const Index = wide ? Uint32Array : Uint16Array
+
+  const reader = new TableReader(buffer)
+  reader.offset = HEADER_SIZE
+
+  const offsets = reader.take(Uint32Array, stringCount + 1)
+  const blob = reader.take(Uint8Array, stringBytes)
+  const decoder = new TextDecoder()
+  const strings: string[] = []
+  for (let i = 0; i < stringCount; i++) {
+    strings.push(decoder.decode(blob.subarray(offsets[i], offsets[i + 1])))
+  }
+  reader.align()
+
+  const positions = reader.take(Float32Array, nodeCount * 3)
+  const zoneStrings = reader.take(Uint32Array, zoneCount)
+  const zoneNodes = reader.take(Uint32Array, zoneCount)
+  const distances = reader.take(Float32Array, zoneCount * zoneCount)
+  const nextHop = reader.take(Index, nodeCount * zoneCount)
+  reader.align()
+
+  let polylineOffsets: Uint32Array | null = null
+  let polylinePoints: Uint16Array | Uint32Array | null = null
+  if (flags & FLAG_POLYLINES) {
+    const pairs = (zoneCount * (zoneCount - 1)) / 2
+    polylineOffsets = reader.take(Uint32Array, pairs + 1)
+    polylinePoints = reader.take(Index, polylinePointCount)
+  }
+
+  const zoneIds = Array.from(zoneStrings, i => strings[i])
+
+  return {
+    positions,
+    zoneIds,
+    zoneIndex: new Map(zoneIds.map((id, i) => [id, i])),
+    zoneNodes,
+    distances,
+    nextHop,
+    none: wide ? 0xffffffff : 0xffff,
+    polylineOffsets,
+    polylinePoints
+  }
+}
+
+/**
+ * Fetch and decode a route table
+ */
+export async function loadRouteTable(url: string): Promise<RouteTable> {
+  const response = await fetch(url)
+  if (!response.ok) {
+    throw new Error(`Failed to load route table ${url}: ${response.status}`)
+  }
+  return decodeRouteTable(await response.arrayBuffer())
+}
+
+function nodePosition(table: RouteTable, node: number): Vec3 {
+  return [table.positions[node * 3], table.positions[node * 3 + 1], table.positions[node * 3 + 2]]
+}
+
+/**
+ * Stored polyline between two different zones; null without polylines
+ */
+function zonePolyline(table: RouteTable, from: number, to: number): Vec3[] | null {
+  if (!table.polylineOffsets || !table.polylinePoints) return null
+
+  // Polylines are stored once per pair s < t in row-major order
+  const zoneCount = table.zoneIds.length
+  const s = Math.min(from, to)
+  const t = Math.max(from, to)
+  const pair = s * zoneCount - (s * (s + 1)) / 2 + (t - s - 1)
+  const points: Vec3[] = []
+  for (let i = table.polylineOffsets[pair]; i < table.polylineOffsets[pair + 1]; i++) {
+    points.push(nodePosition(table, table.polylinePoints[i]))
+  }
+  if (from > to) points.reverse()
+  return points.length >= 2 ? points : null
+}
+
+/**
+ * Follow next hops from a graph node to a zone; null if unreachable
+ */
+function walkToZone(table: RouteTable, start: number, zone: number): Vec3[] | null {
+  const zoneCount = table.zoneIds.length
+  const target = table.zoneNodes[zone]
+  const points: Vec3[] = [nodePosition(table, start)]
+
+  let node = start
+  while (node !== target) {
+    node = table.nextHop[node * zoneCount + zone]
+    if (node === table.none || points.length > table.positions.length / 3) return null
+    points.push(nodePosition(table, node))
+  }
+  return points
+}
+
+/**
+ * Index of the graph node closest to a position
+ */
+export function nearestRouteNode(table: RouteTable, pos: Vec3): number {
+  let nearest = 0
+  let minDistance = Infinity
+  for (let i = 0; i < table.positions.length / 3; i++) {
+    const dx = table.positions[i * 3] - pos[0]
+    const dy = table.positions[i * 3 + 1] - pos[1]
+    const dz = table.positions[i * 3 + 2] - pos[2]
+    const d = dx * dx + dy * dy + dz * dz
+    if (d < minDistance) {
+      minDistance = d
+      nearest = i
+    }
+  }
+  return nearest
+}
+
+/**
+ * Graph path from an arbitrary position (user, friend, last destination) to
+ * a zone, given by its ZONE_ node name: the stored polyline when the nearest
+ * node is another zone's, otherwise a walk along the next-hop table. Null if
+ * the zone is unknown or unreachable.
+ */
+export function pathToZone(table: RouteTable, from: Vec3, zoneNode: string): Vec3[] | null {
+  const zone = table.zoneIndex.get(zoneNode)
+  if (zone === undefined) return null
+
+  const start = nearestRouteNode(table, from)
+  const fromZone = table.zoneNodes.indexOf(start)
+  if (fromZone >= 0 && fromZone !== zone) {
+    const polyline = zonePolyline(table, fromZone, zone)
+    if (polyline) return polyline
+  }
+  return walkToZone(table, start, zone)
+}
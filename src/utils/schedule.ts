@@ -0,0 +1,92 @@
+// Schedule written by events_importer.py: events pre-sorted by start plus a
+// per-zone, per-day interval index, so "what is on" is a few binary searches
+// instead of filtering and sorting every event.
+
+import type { Event, EventSchedule } from '../types'
+
+const MINUTE = 60000
+
+function dayKey(time: Date) {
+  const month = String(time.getMonth() + 1).padStart(2, '0')
+  const day = String(time.getDate()).padStart(2, '0')
+  return `${time.getFullYear()}-${month}-${day}`
+}
+
+/** Local midnight of a YYYY-MM-DD day */
+function dayStart(day: string) {
+  const [year, month, date] = day.split('-').map(Number)
+  return new Date(year, month - 1, date).getTime()
+}
+
+/** Last position in an ascending array holding a value <= `value`, or -1 */
+function lastAtOrBefore(values: ArrayLike<number>, value: number) {
+  let lo = 0
+  let hi = values.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (values[mid] <= value) lo = mid + 1
+    else hi = mid
+  }
+  return lo - 1
+}
+
+// Start times (ms) of a schedule's events, ascending like the events
+const startTimes = new WeakMap<EventSchedule, Float64Array>()
+
+function eventStarts(schedule: EventSchedule) {
+  let starts = startTimes.get(schedule)
+  if (!starts) {
+    const { day, start } = schedule.events
+    const midnights = schedule.days.map(dayStart)
+    starts = Float64Array.from(start, (minute, i) => midnights[day[i]] + minute * MINUTE)
+    startTimes.set(schedule, starts)
+  }
+  return starts
+}
+
+/** The schedule's events as app events, in start order (positions match the schedule's) */
+export function scheduleEvents(schedule: EventSchedule): Event[] {
+  const { id, title, description, zone, day, start, end, speakers, capacity, tags } = schedule.events
+  const midnights = schedule.days.map(dayStart)
+  return id.map((eventId, i): Event => ({
+    id: eventId,
+    title: title[i],
+    description: description[i],
+    zoneId: schedule.zones[zone[i]],
+    startTime: new Date(midnights[day[i]] + start[i] * MINUTE),
+    endTime: new Date(midnights[day[i]] + end[i] * MINUTE),
+    status: 'upcoming',
+    tags: tags[i],
+    speakers: speakers[i].length > 0 ? speakers[i] : undefined,
+    capacity: capacity[i] ?? undefined,
+  }))
+}
+
+/** Positions of the events running in a zone at `time` */
+export function eventsInZoneAt(schedule: EventSchedule, zoneId: string, time: Date): number[] {
+  const index = schedule.index[zoneId]?.[dayKey(time)]
+  if (!index) return []
+
+  const minute = time.getHours() * 60 + time.getMinutes() + time.getSeconds() / 60
+  const segment = lastAtOrBefore(index.bounds, minute)
+  if (segment < 0 || segment >= index.bounds.length - 1) return []
+  return index.active.slice(index.offsets[segment], index.offsets[segment + 1])
+}
+
+/**
+ * Positions of the events running anywhere at `time` or starting within
+ * `withinMinutes` after it, in start order
+ */
+export function eventsAround(schedule: EventSchedule, time: Date, withinMinutes: number): number[] {
+  const found = new Set<number>()
+  for (const zoneId of schedule.zones) {
+    for (const position of eventsInZoneAt(schedule, zoneId, time)) found.add(position)
+  }
+
+  const starts = eventStarts(schedule)
+  const first = lastAtOrBefore(starts, time.getTime()) + 1
+  const last = lastAtOrBefore(starts, time.getTime() + withinMinutes * MINUTE)
+  for (let position = first; position <= last; position++) found.add(position)
+
+  return [...found].sort((a, b) => a - b)
+}
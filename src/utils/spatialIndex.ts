@@ -0,0 +1,135 @@
+// Nearest-marker and radius queries over the uniform grid that
+// spatial_index.py builds into the zone bundle. Mirrors SpatialIndex in
+// Python: markers are zones first, then POIs (indexed at their targets).
+
+import type { ZoneBundle, BundleZone, BundlePOI } from './zoneBundle'
+
+type Vec3 = [number, number, number]
+
+export interface SpatialGrid {
+  origin: Vec3
+  cellSize: number
+  dims: Vec3
+  /** Offsets into `items` per cell, length cells + 1 */
+  cellStart: Uint32Array
+  /** Marker indices sorted by cell */
+  items: Uint32Array
+  /** Marker positions, xyz interleaved */
+  positions: Float32Array
+  /** Markers below this index are zones, the rest are POIs */
+  zoneCount: number
+}
+
+export interface MarkerHit {
+  index: number
+  distance: number
+}
+
+function cellCoord(grid: SpatialGrid, value: number, axis: number): number {
+  const cell = Math.floor((value - grid.origin[axis]) / grid.cellSize)
+  return Math.min(Math.max(cell, 0), grid.dims[axis] - 1)
+}
+
+function markerDistance(grid: SpatialGrid, marker: number, point: Vec3): number {
+  const dx = grid.positions[marker * 3] - point[0]
+  const dy = grid.positions[marker * 3 + 1] - point[1]
+  const dz = grid.positions[marker * 3 + 2] - point[2]
+  return Math.sqrt(dx * dx + dy * dy + dz * dz)
+}
+
+/**
+ * Visit every marker stored in the inclusive cell box lo..hi
+ */
+function forEachInBox(grid: SpatialGrid, lo: Vec3, hi: Vec3, visit: (marker: number) => void) {
+  const [, dimY, dimZ] = grid.dims
+  for (let x = lo[0]; x <= hi[0]; x++) {
+    for (let y = lo[1]; y <= hi[1]; y++) {
+      // Cells along Z are contiguous, so each (x, y) row is one slice
+      const row = (x * dimY + y) * dimZ
+      const end = grid.cellStart[row + hi[2] + 1]
+      for (let slot = grid.cellStart[row + lo[2]]; slot < end; slot++) {
+        visit(grid.items[slot])
+      }
+    }
+  }
+}
+
+/**
+ * Markers within `radius` of `point`, nearest first
+ */
+export function markersWithin(grid: SpatialGrid, point: Vec3, radius: number): MarkerHit[] {
+  const hits: MarkerHit[] = []
+  if (grid.items.length === 0) return hits
+
+  const lo = [0, 1, 2].map(axis => cellCoord(grid, point[axis] - radius, axis)) as Vec3
+  const hi = [0, 1, 2].map(axis => cellCoord(grid, point[axis] + radius, axis)) as Vec3
+  forEachInBox(grid, lo, hi, marker => {
+    const distance = markerDistance(grid, marker, point)
+    if (distance <= radius) hits.push({ index: marker, distance })
+  })
+  return hits.sort((a, b) => a.distance - b.distance)
+}
+
+/**
+ * The `k` markers nearest to `point`, nearest first. Searches growing cell
+ * boxes and stops once no unvisited cell can hold anything closer.
+ */
+export function nearestMarkers(grid: SpatialGrid, point: Vec3, k = 1, maxDistance = Infinity): MarkerHit[] {
+  if (grid.items.length === 0 || k <= 0) return []
+
+  const center = [0, 1, 2].map(axis => Math.floor((point[axis] - grid.origin[axis]) / grid.cellSize))
+  const last = grid.dims.map(d => d - 1)
+
+  for (let ring = 0; ; ring = ring ? ring * 2 : 1) {
+    const lo = center.map((c, axis) => Math.min(Math.max(c - ring, 0), last[axis])) as Vec3
+    const hi = center.map((c, axis) => Math.min(Math.max(c + ring, 0), last[axis])) as Vec3
+    const coversGrid = lo.every(v => v === 0) && hi.every((v, axis) => v === last[axis])
+
+    const hits: MarkerHit[] = []
+    forEachInBox(grid, lo, hi, marker => hits.push({ index: marker, distance: markerDistance(grid, marker, point) }))
+    if (hits.length < k && !coversGrid) continue
+
+    hits.sort((a, b) => a.distance - b.distance)
+    const best = hits.slice(0, k)
+
+    // Anything outside the box is at least this far away
+    let reach = Infinity
+    for (let axis = 0; axis < 3; axis++) {
+      if (lo[axis] > 0) reach = Math.min(reach, point[axis] - (grid.origin[axis] + lo[axis] * grid.cellSize))
+      if (hi[axis] < last[axis]) reach = Math.min(reach, grid.origin[axis] + (hi[axis] + 1) * grid.cellSize - point[axis])
+    }
+
+    if (coversGrid || best[best.length - 1].distance <= reach) {
+      return best.filter(hit => hit.distance <= maxDistance)
+    }
+    if (reach > maxDistance && best[0].distance > maxDistance) return []
+  }
+}
+
+/**
+ * Zone nearest to `point`, or null when the bundle has no index or no zone
+ * lies within `maxDistance`
+ */
+export function nearestZone(bundle: ZoneBundle, point: Vec3, maxDistance = Infinity): BundleZone | null {
+  const grid = bundle.index
+  if (!grid || grid.zoneCount === 0) return null
+
+  // POIs share the grid, so widen k until a zone turns up
+  for (let k = 1; ; k *= 4) {
+    const hits = nearestMarkers(grid, point, k, maxDistance)
+    const zoneHit = hits.find(hit => hit.index < grid.zoneCount)
+    if (zoneHit) return bundle.zones[zoneHit.index]
+    if (hits.length < k) return null
+  }
+}
+
+/**
+ * POIs whose targets lie within `radius` of `point`, nearest first
+ */
+export function poisWithin(bundle: ZoneBundle, point: Vec3, radius: number): BundlePOI[] {
+  const grid = bundle.index
+  if (!grid) return []
+  return markersWithin(grid, point, radius)
+    .filter(hit => hit.index >= grid.zoneCount)
+    .map(hit => bundle.pois[hit.index - grid.zoneCount])
+}
@@ -0,0 +1,81 @@
+// The venue's zones. The asset pipeline generates src/data/zones.ts from the
+// model's ZONE_ empties; the hand-written details in mockData (name, type,
+// floor, equipment, POI, ...) are merged onto them by ZONE_ node name. While
+// zones.ts is empty the hand-written zones are used as they are. A zone
+// bundle shipped next to the model (zones.bin) replaces both at runtime.
+
+import { zones as modelZones } from '../data/zones'
+import { zones as curatedZones, events as curatedEvents } from '../data/mockData'
+import type { Event, Zone } from '../types'
+import { assetUrl, hasAsset } from './assets'
+import { loadZoneBundle } from './zoneBundle'
+import type { ZoneBundle } from './zoneBundle'
+
+// Written next to the model by asset_pipeline.py (zone_bundle.py)
+const ZONE_BUNDLE = 'SM_MFF/zones.bin'
+
+const DEFAULT_ZONE_COLOR = '#0066cc'
+
+const curatedByNode = new Map(curatedZones.filter(zone => zone.node).map(zone => [zone.node!, zone]))
+
+/**
+ * Zones read from the model with the curated details of the same ZONE_ node;
+ * id and position stay the model's
+ */
+export function withCuratedDetails(zones: Zone[]): Zone[] {
+  return zones.map(zone => {
+    const curated = zone.node ? curatedByNode.get(zone.node) : undefined
+    return curated ? { ...curated, id: zone.id, node: zone.node, position: zone.position } : zone
+  })
+}
+
+export const venueZones: Zone[] = modelZones.length > 0 ? withCuratedDetails(modelZones) : curatedZones
+
+/**
+ * Zones of a decoded bundle; each gets the POI camera named like its node
+ * (ZONE_<name> -> <name>), as the model's cameras are
+ */
+export function bundleZones(bundle: ZoneBundle): Zone[] {
+  const pois = new Map(bundle.pois.map(poi => [poi.name, poi]))
+  return bundle.zones.map((zone): Zone => {
+    const poi = pois.get(zone.originalName.replace(/^ZONE_/, ''))
+    return {
+      id: zone.id,
+      node: zone.originalName,
+      name: zone.displayName,
+      color: poi?.color ?? DEFAULT_ZONE_COLOR,
+      position: zone.position,
+      description: `Описание зоны ${zone.displayName}`,
+      type: 'other',
+      poi: poi && {
+        cameraPosition: poi.cameraPosition,
+        targetPosition: poi.targetPosition,
+        distance: poi.distance,
+        azimuthDeg: poi.azimuthDeg,
+        elevationDeg: poi.elevationDeg
+      }
+    }
+  })
+}
+
+/**
+ * Zones of the shipped zone bundle with the curated details merged in; null
+ * when the build has no bundle
+ */
+export async function loadBundledZones(): Promise<Zone[] | null> {
+  if (!hasAsset(ZONE_BUNDLE)) return null
+  return withCuratedDetails(bundleZones(await loadZoneBundle(assetUrl(ZONE_BUNDLE))))
+}
+
+/**
+ * Demo events with their (curated) zone ids mapped onto the ids of `zones`
+ * through the ZONE_ node both share
+ */
+export function demoEvents(zones: Zone[]): Event[] {
+  const idByNode = new Map(zones.filter(zone => zone.node).map(zone => [zone.node!, zone.id]))
+  const ids = new Map(curatedZones.map(zone => [zone.id, zone.node && idByNode.get(zone.node)]))
+  return curatedEvents.map(event => {
+    const zoneId = ids.get(event.zoneId)
+    return zoneId && zoneId !== event.zoneId ? { ...event, zoneId } : event
+  })
+}
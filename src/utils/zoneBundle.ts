@@ -0,0 +1,205 @@
+// Decoder for the compact zone/POI bundle written by zone_bundle.py
+// (see that file for the byte layout). Mirrors decode_bundle() in Python.
+
+import type { SpatialGrid } from './spatialIndex'
+
+const MAGIC = 'ZPB1'
+const VERSION = 1
+const HEADER_SIZE = 48
+const QUANT_MAX = 65535
+
+const FLAG_QUANTIZED = 1 << 0
+const FLAG_ZONE_ROTATION = 1 << 1
+const FLAG_ZONE_SCALE = 1 << 2
+const FLAG_SPATIAL_INDEX = 1 << 3
+const INDEX_HEADER_SIZE = 28
+
+type Vec3 = [number, number, number]
+type Quat = [number, number, number, number]
+
+export interface BundleZone {
+  id: string
+  originalName: string
+  displayName: string
+  position: Vec3
+  rotation: Quat
+  scale: Vec3
+}
+
+export interface BundlePOI {
+  id: string
+  name: string
+  color: string
+  cameraPosition: Vec3
+  targetPosition: Vec3
+  description: string
+  distance: number
+  azimuthDeg: number
+  elevationDeg: number
+}
+
+export interface ZoneBundle {
+  zones: BundleZone[]
+  pois: BundlePOI[]
+  /** Grid over zone positions then POI targets (see spatialIndex.ts) */
+  index: SpatialGrid | null
+}
+
+/**
+ * Sequential little-endian reader over the bundle buffer
+ */
+class BundleReader {
+  offset = 0
+
+  constructor(private readonly buffer: ArrayBuffer) {}
+
+  take<T>(ctor: { new (buffer: ArrayBuffer, offset: number, length: number): T; BYTES_PER_ELEMENT: number }, count: number): T {
+    const end = this.offset + ctor.BYTES_PER_ELEMENT * count
+    if (end > this.buffer.byteLength) {
+      throw new Error(`Zone bundle truncated at byte ${this.offset}`)
+    }
+    // Copy so every typed array is correctly aligned regardless of section offsets
+    const view = new ctor(this.buffer.slice(this.offset, end), 0, count)
+    this.offset = end
+    return view
+  }
+
+  align() {
+    this.offset += (4 - (this.offset % 4)) % 4
+  }
+}
+
+/**
+ * Decode a zone/POI bundle (.bin) produced by the asset pipeline
+ */
+export function decodeZoneBundle(buffer: ArrayBuffer): ZoneBundle {
+  if (buffer.byteLength < HEADER_SIZE) {
+    throw new Error('Zone bundle too small')
+  }
+
+  const header = new DataView(buffer, 0, HEADER_SIZE)
+  const magic = String.fromCharCode(
+    header.getUint8(0), header.getUint8(1), header.getUint8(2), header.getUint8(3)
+  )
+  if (magic !== MAGIC) throw new Error(`Bad zone bundle magic "${magic}"`)
+
+  const version = header.getUint16(4, true)
+  if (version !== VERSION) throw new Error(`Unsupported zone bundle version ${version}`)
+
+  const flags = header.getUint16(6, true)
+  const zoneCount = header.getUint32(8, true)
+  const poiCount = header.getUint32(12, true)
+  const stringCount = header.getUint32(16, true)
+  const stringBytes = header.getUint32(20, true)
+  const boundsMin = [0, 1, 2].map(i => header.getFloat32(24 + i * 4, true))
+  const boundsMax = [0, 1, 2].map(i => header.getFloat32(36 + i * 4, true))
+
+  const reader = new BundleReader(buffer)
+  reader.offset = HEADER_SIZE
+
+  const offsets = reader.take(Uint32Array, stringCount + 1)
+  const blob = reader.take(Uint8Array, stringBytes)
+  const decoder = new TextDecoder()
+  const strings: string[] = []
+  for (let i = 0; i < stringCount; i++) {
+    strings.push(decoder.decode(blob.subarray(offsets[i], offsets[i + 1])))
+  }
+  reader.align()
+
+  const zoneIds = reader.take(Uint32Array, zoneCount)
+  const zoneNames = reader.take(Uint32Array, zoneCount)
+  const zoneDisplay = reader.take(Uint32Array, zoneCount)
+
+  let positions: Float32Array
+  if (flags & FLAG_QUANTIZED) {
+    const quantized = reader.take(Uint16Array, zoneCount * 3)
+    reader.align()
+    positions = new Float32Array(zoneCount * 3)
+    for (let i = 0; i < zoneCount * 3; i++) {
+      const axis = i % 3
+      positions[i] = boundsMin[axis] + (quantized[i] / QUANT_MAX) * (boundsMax[axis] - boundsMin[axis])
+    }
+  } else {
+    positions = reader.take(Float32Array, zoneCount * 3)
+  }
+
+  const rotations = flags & FLAG_ZONE_ROTATION ? reader.take(Float32Array, zoneCount * 4) : null
+  const scales = flags & FLAG_ZONE_SCALE ? reader.take(Float32Array, zoneCount * 3) : null
+
+  const poiIds = reader.take(Uint32Array, poiCount)
+  const poiNames = reader.take(Uint32Array, poiCount)
+  const poiDesc = reader.take(Uint32Array, poiCount)
+  const poiColors = reader.take(Uint32Array, poiCount)
+  const cameras = reader.take(Float32Array, poiCount * 3)
+  const targets = reader.take(Float32Array, poiCount * 3)
+  const metrics = reader.take(Float32Array, poiCount * 3)
+
+  let index: SpatialGrid | null = null
+  if (flags & FLAG_SPATIAL_INDEX) {
+    if (reader.offset + INDEX_HEADER_SIZE > buffer.byteLength) {
+      throw new Error(`Zone bundle truncated at byte ${reader.offset}`)
+    }
+    const view = new DataView(buffer, reader.offset, INDEX_HEADER_SIZE)
+    const origin: Vec3 = [view.getFloat32(0, true), view.getFloat32(4, true), view.getFloat32(8, true)]
+    const cellSize = view.getFloat32(12, true)
+    const dims: Vec3 = [view.getUint32(16, true), view.getUint32(20, true), view.getUint32(24, true)]
+    reader.offset += INDEX_HEADER_SIZE
+
+    const markerPositions = new Float32Array((zoneCount + poiCount) * 3)
+    markerPositions.set(positions)
+    markerPositions.set(targets, zoneCount * 3)
+    index = {
+      origin,
+      cellSize,
+      dims,
+      cellStart: reader.take(Uint32Array, dims[0] * dims[1] * dims[2] + 1),
+      items: reader.take(Uint32Array, zoneCount + poiCount),
+      positions: markerPositions,
+      zoneCount
+    }
+  }
+
+  const vec3 = (array: Float32Array, i: number): Vec3 => [array[i * 3], array[i * 3 + 1], array[i * 3 + 2]]
+
+  const zones: BundleZone[] = []
+  for (let i = 0; i < zoneCount; i++) {
+    zones.push({
+      id: strings[zoneIds[i]],
+      originalName: strings[zoneNames[i]],
+      displayName: strings[zoneDisplay[i]],
+      position: vec3(positions, i),
+      rotation: rotations
+        ? [rotations[i * 4], rotations[i * 4 + 1], rotations[i * 4 + 2], rotations[i * 4 + 3]]
+        : [0, 0, 0, 1],
+      scale: scales ? vec3(scales, i) : [1, 1, 1]
+    })
+  }
+
+  const pois: BundlePOI[] = []
+  for (let i = 0; i < poiCount; i++) {
+    pois.push({
+      id: strings[poiIds[i]],
+      name: strings[poiNames[i]],
+      color: `#${poiColors[i].toString(16).padStart(6, '0')}`,
+      cameraPosition: vec3(cameras, i),
+      targetPosition: vec3(targets, i),
+      description: strings[poiDesc[i]],
+      distance: metrics[i],
+      azimuthDeg: metrics[poiCount + i],
+      elevationDeg: metrics[poiCount * 2 + i]
+    })
+  }
+
+  return { zones, pois, index }
+}
+
+/**
+ * Fetch and decode a zone bundle
+ */
+export async function loadZoneBundle(url: string): Promise<ZoneBundle> {
+  const response = await fetch(url)
+  if (!response.ok) {
+    throw new Error(`Failed to load zone bundle ${url}: ${response.status}`)
+  }
+  return decodeZoneBundle(await response.arrayBuffer())
+}
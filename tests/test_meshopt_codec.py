@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from meshopt_codec import (MeshoptError, decode_index_sequence, decode_vertex_buffer,
+                           encode_index_sequence, encode_vertex_buffer, vertex_block_size)
+
+
+def vertices(count, stride, step, seed=0):
+    """Random walk of byte vertices: `step` sets how far apart neighbours are"""
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.integers(-step, step + 1, (count, stride)), axis=0).astype(np.uint8)
+
+
+@pytest.mark.parametrize('count, stride', [(0, 12), (1, 4), (15, 8), (16, 12), (257, 16),
+                                           (1000, 12), (5000, 20), (20000, 4)])
+@pytest.mark.parametrize('step', [0, 1, 3, 20, 128])
+def test_vertex_round_trip(count, stride, step):
+    original = vertices(count, stride, step)
+    decoded = decode_vertex_buffer(encode_vertex_buffer(original), count, stride)
+    assert decoded.dtype == np.uint8
+    np.testing.assert_array_equal(decoded, original)
+
+
+def test_vertex_round_trip_spans_blocks_with_a_short_last_block():
+    stride = 8
+    count = 3 * vertex_block_size(stride) + 17
+    original = vertices(count, stride, 10, seed=1)
+    np.testing.assert_array_equal(decode_vertex_buffer(encode_vertex_buffer(original), count, stride), original)
+
+
+def test_truncated_vertex_stream_is_rejected():
+    encoded = encode_vertex_buffer(vertices(1000, 12, 20))
+    with pytest.raises(MeshoptError, match='truncated'):
+        decode_vertex_buffer(encoded[:len(encoded) // 2] + encoded[-32:], 1000, 12)
+
+
+def test_vertex_stream_with_trailing_data_is_rejected():
+    encoded = encode_vertex_buffer(vertices(100, 4, 3))
+    with pytest.raises(MeshoptError, match='trailing'):
+        decode_vertex_buffer(encoded[:1] + bytes(8) + encoded[1:], 100, 4)
+
+
+def test_vertex_stream_needs_its_header():
+    encoded = encode_vertex_buffer(vertices(10, 4, 3))
+    with pytest.raises(MeshoptError):
+        decode_vertex_buffer(b'\x00' + encoded[1:], 10, 4)
+
+
+@pytest.mark.parametrize('count', [0, 1, 5, 1000, 100000])
+def test_index_round_trip(count):
+    rng = np.random.default_rng(count)
+    indices = rng.integers(0, 1 << 28 if count % 2 else 70000, count)
+    decoded = decode_index_sequence(encode_index_sequence(indices), count)
+    assert decoded.dtype == np.uint32
+    np.testing.assert_array_equal(decoded, indices)
+
+
+def test_index_count_mismatch_is_rejected():
+    with pytest.raises(MeshoptError, match='expected 4'):
+        decode_index_sequence(encode_index_sequence([0, 1, 2]), 4)
@@ -0,0 +1,225 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import zone_bundle
+from zone_bundle import (BundleError, decode_bundle, encode_bundle, normalize_color,
+                         position_tolerance, verify_bundle, write_bundle)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_zone(i, position, rotation=(0, 0, 0, 1), scale=(1, 1, 1)):
+    x, y, z = position
+    return {
+        'id': f"zone-{i}",
+        'original_name': f"ZONE_Зал_{i}",
+        'display_name': f"Зал {i}",
+        'position': {'x': round(x, 3), 'y': round(y, 3), 'z': round(z, 3)},
+        'blender_coords': list(position),
+        'rotation': list(rotation),
+        'scale': list(scale),
+    }
+
+
+def make_poi(i, target, color='#ff8800'):
+    return {
+        'id': f"poi-{i}",
+        'name': f"Камера {i}",
+        'color': color,
+        'camera_position': [target[0] + 5.0, target[1] + 10.0, target[2] - 5.0],
+        'target_position': list(target),
+        'description': f"POI: Камера {i}",
+        'distance': 12.5,
+        'azimuth_deg': 45.0,
+        'elevation_deg': -60.0,
+    }
+
+
+@pytest.fixture
+def zones():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform([-130, -1, -20], [60, 3, 20], size=(25, 3))
+    return [make_zone(i + 1, p.tolist()) for i, p in enumerate(positions)]
+
+
+@pytest.fixture
+def pois():
+    rng = np.random.default_rng(1)
+    targets = rng.uniform([-130, 0, -20], [60, 2, 20], size=(10, 3))
+    return [make_poi(i + 1, t.tolist()) for i, t in enumerate(targets)]
+
+
+@pytest.mark.parametrize('quantize', [True, False])
+def test_round_trip(zones, pois, quantize):
+    data = encode_bundle(zones, pois, quantize=quantize)
+    decoded = verify_bundle(data, zones, pois, quantize=quantize)
+
+    tolerance = position_tolerance(zones, quantize)
+    assert [z['id'] for z in decoded['zones']] == [z['id'] for z in zones]
+    assert [z['original_name'] for z in decoded['zones']] == [z['original_name'] for z in zones]
+    assert [z['display_name'] for z in decoded['zones']] == [z['display_name'] for z in zones]
+    restored = np.array([z['blender_coords'] for z in decoded['zones']])
+    assert np.abs(restored - [z['blender_coords'] for z in zones]).max() <= tolerance
+
+    for original, poi in zip(pois, decoded['pois']):
+        assert poi['id'] == original['id']
+        assert poi['name'] == original['name']
+        assert poi['description'] == original['description']
+        assert poi['color'] == original['color']
+        assert np.allclose(poi['camera_position'], original['camera_position'], atol=1e-4)
+        assert np.allclose(poi['target_position'], original['target_position'], atol=1e-4)
+        assert poi['distance'] == pytest.approx(original['distance'])
+        assert poi['azimuth_deg'] == pytest.approx(original['azimuth_deg'])
+        assert poi['elevation_deg'] == pytest.approx(original['elevation_deg'])
+
+
+def test_quantized_is_smaller(zones, pois):
+    assert len(encode_bundle(zones, pois)) < len(encode_bundle(zones, pois, quantize=False))
+
+
+def test_rotation_and_scale_sections(zones):
+    # Identity transforms leave both sections out
+    plain = encode_bundle(zones)
+    flags = zone_bundle.HEADER.unpack_from(plain, 0)[2]
+    assert not flags & (zone_bundle.FLAG_ZONE_ROTATION | zone_bundle.FLAG_ZONE_SCALE)
+
+    zones[3] = make_zone(4, zones[3]['blender_coords'], rotation=(0, 0.7071068, 0, 0.7071068),
+                         scale=(2, 1, 0.5))
+    data = encode_bundle(zones)
+    flags = zone_bundle.HEADER.unpack_from(data, 0)[2]
+    assert flags & zone_bundle.FLAG_ZONE_ROTATION and flags & zone_bundle.FLAG_ZONE_SCALE
+
+    decoded = verify_bundle(data, zones)
+    assert np.allclose(decoded['zones'][3]['rotation'], [0, 0.7071068, 0, 0.7071068])
+    assert np.allclose(decoded['zones'][3]['scale'], [2, 1, 0.5])
+    assert decoded['zones'][0]['rotation'] == [0, 0, 0, 1]
+
+
+def test_strings_are_deduplicated(zones):
+    for zone in zones:
+        zone['display_name'] = 'Зал'
+    data = encode_bundle(zones, spatial_index=False)
+    string_count = zone_bundle.HEADER.unpack_from(data, 0)[5]
+    # '', 'Зал', then one id and one original name per zone
+    assert string_count == 2 + 2 * len(zones)
+    assert all(z['display_name'] == 'Зал' for z in decode_bundle(data)['zones'])
+
+
+def test_spatial_index_matches_brute_force(zones, pois):
+    decoded = verify_bundle(encode_bundle(zones, pois), zones, pois)
+    index = decoded['index']
+    markers = np.concatenate([
+        [z['blender_coords'] for z in decoded['zones']],
+        [p['target_position'] for p in decoded['pois']],
+    ])
+    assert len(index) == len(zones) + len(pois)
+
+    rng = np.random.default_rng(2)
+    for point in rng.uniform([-140, -2, -25], [70, 4, 25], size=(50, 3)):
+        brute = int(np.argmin(np.linalg.norm(markers - point, axis=1)))
+        found = index.nearest(point)
+        assert found[0][0] == brute
+
+
+def test_no_index(zones, pois):
+    data = encode_bundle(zones, pois, spatial_index=False)
+    assert decode_bundle(data)['index'] is None
+    verify_bundle(data, zones, pois, spatial_index=False)
+    with pytest.raises(BundleError, match="spatial index missing"):
+        verify_bundle(data, zones, pois)
+
+
+def test_empty_bundle():
+    decoded = verify_bundle(encode_bundle([], []), [], [])
+    assert decoded['zones'] == [] and decoded['pois'] == []
+
+
+def test_position_dict_without_blender_coords():
+    zone = make_zone(1, [1.5, 0.25, -3.0])
+    del zone['blender_coords']
+    zone['position'] = {'x': 1.5, 'y': 0.25, 'z': -3.0}
+    decoded = verify_bundle(encode_bundle([zone]), [zone])
+    assert np.allclose(decoded['zones'][0]['blender_coords'], [1.5, 0.25, -3.0])
+
+
+@pytest.mark.parametrize('color, expected', [
+    ('#fff', '#ffffff'),
+    ('#F0a', '#ff00aa'),
+    ('#FFAA00', '#ffaa00'),
+    ('00cc66', '#00cc66'),
+    ('#ffaa0080', '#ffaa00'),
+    (None, '#000000'),
+    ('', '#000000'),
+])
+def test_colors(pois, color, expected):
+    assert normalize_color(color) == expected
+    pois[0]['color'] = color
+    decoded = verify_bundle(encode_bundle([], pois), [], pois)
+    assert decoded['pois'][0]['color'] == expected
+
+
+@pytest.mark.parametrize('color', ['red', '#ggg', '#12345', 'rgb(1, 2, 3)'])
+def test_invalid_color(pois, color):
+    pois[0]['color'] = color
+    with pytest.raises(BundleError, match="invalid color"):
+        encode_bundle([], pois)
+
+
+def test_rejects_corrupt_bundles(zones, pois):
+    data = encode_bundle(zones, pois)
+
+    with pytest.raises(BundleError, match="magic"):
+        decode_bundle(b'XXXX' + data[4:])
+    with pytest.raises(BundleError, match="version"):
+        decode_bundle(data[:4] + (99).to_bytes(2, 'little') + data[6:])
+    with pytest.raises(BundleError, match="too small"):
+        decode_bundle(data[:10])
+    with pytest.raises(BundleError, match="truncated"):
+        decode_bundle(data[:len(data) // 2])
+
+
+def test_verify_catches_mismatch(zones, pois):
+    data = encode_bundle(zones, pois)
+    changed = [dict(z) for z in zones]
+    changed[0]['display_name'] = 'Другой зал'
+    with pytest.raises(BundleError, match="display_name differs"):
+        verify_bundle(data, changed, pois)
+
+    moved = [dict(z) for z in zones]
+    moved[1]['blender_coords'] = [c + 1.0 for c in moved[1]['blender_coords']]
+    with pytest.raises(BundleError, match="position error"):
+        verify_bundle(data, moved, pois)
+
+
+def test_write_and_dump(tmp_path, zones, pois, capsys):
+    zone_file = tmp_path / 'zone_coordinates.json'
+    poi_file = tmp_path / 'poi_cameras_export.json'
+    zone_file.write_text(json.dumps({'zones': zones}, ensure_ascii=False), encoding='utf-8')
+    poi_file.write_text(json.dumps({'pois': pois}, ensure_ascii=False), encoding='utf-8')
+    output = tmp_path / 'zones.bin'
+
+    assert zone_bundle.main([str(zone_file), str(poi_file), '-o', str(output)]) == 0
+    assert output.read_bytes() == encode_bundle(zones, pois)
+    capsys.readouterr()
+
+    assert zone_bundle.main(['--dump', str(output)]) == 0
+    dumped = json.loads(capsys.readouterr().out)
+    assert [z['id'] for z in dumped['zones']] == [z['id'] for z in zones]
+    assert [p['id'] for p in dumped['pois']] == [p['id'] for p in pois]
+    assert 'spatial_index' in dumped
+
+
+def test_write_bundle_returns_bytes(tmp_path, zones):
+    path = tmp_path / 'zones.bin'
+    data = write_bundle(str(path), zones)
+    assert path.read_bytes() == data
+
+
+def test_shipped_zone_coordinates():
+    with open(os.path.join(REPO_ROOT, 'zone_coordinates.json'), encoding='utf-8') as f:
+        zones = json.load(f)['zones']
+    decoded = verify_bundle(encode_bundle(zones), zones)
+    assert {z['original_name'] for z in decoded['zones']} == {z['original_name'] for z in zones}
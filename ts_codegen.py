@@ -0,0 +1,236 @@
+"""
+TypeScript module generation for src/data
+Writes typed zone/POI modules directly instead of printing code to paste
+into mockData.ts/poiData.ts. Strings are escaped properly, records are
+emitted in a stable order, and files are only rewritten when their content
+changes, which keeps Vite hot-reload and incremental tsc builds fast.
+
+USAGE:
+    from ts_codegen import pois_module, write_module
+    write_module('src/data/poiData.ts', pois_module(pois))
+"""
+
+import math
+import re
+
+from asset_cache import write_if_changed
+
+GENERATED_HEADER = "// Generated by the asset pipeline. Do not edit by hand.\n"
+
+ZONE_TYPES = ('conference', 'exhibition', 'food', 'registration', 'lounge', 'other')
+
+# Same palette the Python zone exporter has always used
+ZONE_COLORS = ['#0066cc', '#00cc66', '#cc6600', '#cc0066', '#ffaa00', '#9933cc', '#33cccc',
+               '#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#ffeaa7']
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_$][A-Za-z0-9_$]*$')
+
+_ESCAPES = {
+    '\\': '\\\\',
+    "'": "\\'",
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+    '\b': '\\b',
+    '\f': '\\f',
+    '\v': '\\v',
+    '\u2028': '\\u2028',
+    '\u2029': '\\u2029',
+}
+
+
+def ts_string(value):
+    """Single-quoted TypeScript string literal"""
+
+    out = []
+    for ch in str(value):
+        if ch in _ESCAPES:
+            out.append(_ESCAPES[ch])
+        elif ord(ch) < 0x20 or ord(ch) == 0x7f:
+            out.append(f"\\x{ord(ch):02x}")
+        else:
+            out.append(ch)
+    return "'" + ''.join(out) + "'"
+
+
+def ts_number(value, digits=4):
+    """Shortest stable literal for a number rounded to `digits`"""
+
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"cannot emit non-finite number {value!r}")
+
+    value = round(value, digits) + 0.0  # drops negative zero
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def ts_key(key):
+    return key if _IDENTIFIER.match(key) else ts_string(key)
+
+
+def ts_value(value, indent=0, digits=4):
+    """Serialize JSON-like data as a TypeScript literal"""
+
+    pad = '  ' * indent
+    inner = '  ' * (indent + 1)
+
+    if value is None:
+        return 'undefined'
+    if isinstance(value, str):
+        return ts_string(value)
+    if isinstance(value, (bool, int, float)):
+        return ts_number(value, digits)
+
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return '[]'
+        # Short numeric vectors and id pairs stay on one line: [x, y, z], ['a', 'b']
+        if len(value) <= 4 and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+            return '[' + ', '.join(ts_number(v, digits) for v in value) + ']'
+        if len(value) <= 4 and all(isinstance(v, str) for v in value):
+            return '[' + ', '.join(ts_string(v) for v in value) + ']'
+        items = [inner + ts_value(v, indent + 1, digits) for v in value]
+        return '[\n' + ',\n'.join(items) + '\n' + pad + ']'
+
+    if isinstance(value, dict):
+        items = [f"{inner}{ts_key(k)}: {ts_value(v, indent + 1, digits)}"
+                 for k, v in value.items() if v is not None]
+        if not items:
+            return '{}'
+        return '{\n' + ',\n'.join(items) + '\n' + pad + '}'
+
+    raise TypeError(f"cannot emit {type(value).__name__} as TypeScript")
+
+
+def render_module(exports, type_imports=(), types_path='../types'):
+    """
+    Render a module with `import type { ... }` and `export const` lines.
+    `exports` is a list of (name, type, value).
+    """
+
+    lines = [GENERATED_HEADER]
+    if type_imports:
+        lines.append(f"import type {{ {', '.join(sorted(set(type_imports)))} }} from {ts_string(types_path)}\n")
+
+    for name, type_name, value in exports:
+        lines.append(f"export const {name}: {type_name} = {ts_value(value)}\n")
+
+    return '\n'.join(lines)
+
+
+def _natural_key(text):
+    """zone-2 sorts before zone-10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', str(text))]
+
+
+def zone_app_position(zone):
+    """
+    App position of a zone. GLB-extracted coords are glTF world space,
+    which is already Y-up like three.js, so they are used as they are.
+    """
+
+    return list(zone['blender_coords'])
+
+
+def zones_module(zones, colors=ZONE_COLORS):
+    """TypeScript source for a `zones: Zone[]` module"""
+
+    records = []
+    for i, zone in enumerate(sorted(zones, key=lambda z: _natural_key(z['id']))):
+        zone_type = zone.get('type', 'conference')
+        if zone_type not in ZONE_TYPES:
+            zone_type = 'other'
+
+        records.append({
+            'id': zone['id'],
+            'node': zone.get('original_name'),
+            'name': zone['display_name'],
+            'color': zone.get('color') or colors[i % len(colors)],
+            'position': zone_app_position(zone),
+            'description': zone.get('description') or f"Описание зоны {zone['display_name']}",
+            'type': zone_type,
+        })
+
+    return render_module([('zones', 'Zone[]', records)], type_imports=['Zone'])
+
+
+def pois_module(pois):
+    """TypeScript source for a `pois: POICamera[]` module (poiData.ts)"""
+
+    records = []
+    for poi in sorted(pois, key=lambda p: (p['name'], _natural_key(p['id']))):
+        records.append({
+            'id': poi['id'],
+            'name': poi['name'],
+            'color': poi['color'],
+            'cameraPosition': list(poi['camera_position']),
+            'targetPosition': list(poi['target_position']),
+            'description': poi.get('description') or f"POI: {poi['name']}",
+            'distance': poi.get('distance'),
+            'azimuthDeg': poi.get('azimuth_deg'),
+            'elevationDeg': poi.get('elevation_deg'),
+        })
+
+    return render_module([('pois', 'POICamera[]', records)], type_imports=['POICamera'])
+
+
+def nav_graph_module(graph):
+    """TypeScript source for a `navGraph: NavGraph` module (navGraph.ts)"""
+
+    value = {
+        'nodes': [{'id': n['id'], 'position': n['position'], 'zone': n.get('zone')}
+                  for n in graph['nodes']],
+        'edges': [list(edge) for edge in graph['edges']],
+    }
+    return render_module([('navGraph', 'NavGraph', value)], type_imports=['NavGraph'])
+
+
+def visibility_module(table):
+    """TypeScript source for a `visibility: VisibilityTable` module (visibility.ts)"""
+
+    value = {
+        'nodes': list(table['nodes']),
+        'viewpoints': [{'id': v['id'], 'position': v['position'], 'zones': v['zones'], 'nodes': v['nodes']}
+                       for v in table['viewpoints']],
+    }
+    return render_module([('visibility', 'VisibilityTable', value)], type_imports=['VisibilityTable'])
+
+
+def environments_module(entries):
+    """
+    TypeScript source for an `environments` manifest (environments.ts):
+    source HDRI path -> prefiltered container (hdri_prefilter.py)
+    """
+
+    value = {source: {'file': entry['file'], 'cubeSize': entry['cubeSize'], 'sh': entry['sh']}
+             for source, entry in sorted(entries.items())}
+    return render_module([('environments', 'Record<string, PrefilteredEnvironment>', value)],
+                         type_imports=['PrefilteredEnvironment'])
+
+
+def asset_manifest_module(manifest):
+    """
+    TypeScript source for the `assets` manifest (assetManifest.ts): public
+    path -> hashed URL, size, hash, priority, dependencies and the URLs of a
+    model's external resources (asset_manifest.py)
+    """
+
+    value = {}
+    for path, entry in sorted(manifest.items()):
+        base = entry['url'][:-len(path)]
+        value[path] = {'url': entry['url'], 'bytes': entry['bytes'], 'hash': entry['hash'],
+                       'priority': entry['priority'], 'dependencies': entry['dependencies'],
+                       'resources': [base + resource for resource in entry['resources']]}
+    return render_module([('assets', 'Record<string, AssetEntry>', value)], type_imports=['AssetEntry'])
+
+
+def write_module(path, source):
+    """Write a generated module; returns True only if the file changed"""
+    return write_if_changed(path, source)
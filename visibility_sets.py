@@ -0,0 +1,349 @@
+"""
+Potentially visible sets (PVS) from GLB geometry
+Ray-casts the venue triangles from every viewpoint -- each ZONE_ empty at
+eye height and each POI camera -- through a BVH (glb_bvh.py) and records
+which zones and which mesh nodes can be seen from there. The client culls
+zone markers and venue meshes with the set of the viewpoint nearest to the
+camera (src/hooks/useVisibleSet.ts). Zones are named by their ZONE_ node,
+which the app's zones carry as `node`, so the table does not depend on how
+either side numbers its zones.
+
+A zone counts as visible when any of its marker points (MARKER_HEIGHTS
+above the zone, where ZoneMarkers draws the pin and label) has a clear
+line of sight. A mesh node counts as visible when a ray of the viewpoint's
+direction sphere, or a ray aimed at one of the node's surface samples, hits
+it first. Sampling can miss slivers, so the sets are "potentially" visible.
+
+Viewpoints are independent and are spread over a process pool. The BVH is
+cached per model (glb_bvh.load_scene_bvh), so changing only the sampling
+settings skips the tree build.
+
+Requires: numpy
+
+USAGE:
+    python visibility_sets.py public/SM_MFF.glb
+    python visibility_sets.py venue.glb -o visibility.json -j 4
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from asset_cache import DEFAULT_CACHE_DIR, write_if_changed
+from extract_pois_from_glb import extract_pois
+from extract_zones_from_glb import extract_zones
+from glb_bvh import BVH, load_scene_bvh
+from glb_geometry import scene_triangles
+from glb_reader import GLBFile
+from glb_scene import SceneGraph
+from ts_codegen import visibility_module, write_module
+
+# Bump when the visibility algorithm changes so cached tables are rebuilt
+VISIBILITY_VERSION = 2
+
+# The module the app imports
+DEFAULT_TS_OUTPUT = os.path.join('src', 'data', 'visibility.ts')
+
+# Heights above a zone that ZoneMarkers draws at (pin, hit area, label)
+MARKER_HEIGHTS = (1.0, 4.0, 8.0)
+
+# glTF is Y-up
+UP = np.array([0.0, 1.0, 0.0])
+
+# Viewpoints per worker task
+_BATCH = 4
+
+
+class VisibilitySettings:
+    """Sampling parameters (meters / ray counts)"""
+
+    def __init__(self, eye_height=1.6, sphere_rays=4096, node_samples=16,
+                 max_distance=None, seed=0):
+        self.eye_height = eye_height
+        self.sphere_rays = sphere_rays
+        self.node_samples = node_samples
+        self.max_distance = max_distance
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def sphere_directions(count):
+    """`count` unit vectors spread evenly over the sphere (Fibonacci lattice)"""
+
+    i = np.arange(count) + 0.5
+    y = 1 - 2 * i / count
+    radius = np.sqrt(np.maximum(0.0, 1 - y * y))
+    phi = np.pi * (3 - np.sqrt(5)) * i
+    return np.column_stack([radius * np.cos(phi), y, radius * np.sin(phi)])
+
+
+def node_surface_samples(soup, samples, seed=0):
+    """
+    `samples` area-weighted random points on the triangles of each mesh
+    node: (points (k, 3), owning node (k,))
+    """
+
+    rng = np.random.default_rng(seed)
+    corners = soup.corners()
+    areas = 0.5 * np.linalg.norm(
+        np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+
+    points, owners = [], []
+    for node in np.unique(soup.node_ids):
+        triangles = np.flatnonzero((soup.node_ids == node) & (areas > 0))
+        if not len(triangles):
+            continue
+        weights = areas[triangles] / areas[triangles].sum()
+        picked = rng.choice(triangles, size=samples, p=weights)
+
+        # Uniform barycentrics (folded back into the triangle)
+        u, v = rng.random(samples), rng.random(samples)
+        fold = u + v > 1
+        u, v = np.where(fold, 1 - u, u), np.where(fold, 1 - v, v)
+        c = corners[picked]
+        points.append(c[:, 0] + u[:, None] * (c[:, 1] - c[:, 0]) + v[:, None] * (c[:, 2] - c[:, 0]))
+        owners.append(np.full(samples, node, dtype=np.int64))
+
+    if not points:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int64)
+    return np.concatenate(points), np.concatenate(owners)
+
+
+def build_viewpoints(zones, pois, settings):
+    """Zone empties at eye height, then POI cameras"""
+
+    viewpoints = []
+    for zone in zones:
+        position = np.asarray(zone['blender_coords'], dtype=np.float64) + UP * settings.eye_height
+        viewpoints.append({'id': zone['original_name'], 'kind': 'zone', 'position': position})
+    for poi in pois:
+        viewpoints.append({'id': poi['id'], 'kind': 'poi',
+                           'position': np.asarray(poi['camera_position'], dtype=np.float64)})
+    return viewpoints
+
+
+_WORKER = None
+
+
+def _init_worker(bvh, triangle_nodes, marker_points, marker_zones, zone_count,
+                 sample_points, sample_nodes, directions, max_distance):
+    global _WORKER
+    _WORKER = {
+        'bvh': bvh,
+        'triangle_nodes': triangle_nodes,
+        'marker_points': marker_points,
+        'marker_zones': marker_zones,
+        'zone_count': zone_count,
+        'sample_points': sample_points,
+        'sample_nodes': sample_nodes,
+        'directions': directions,
+        'max_distance': np.inf if max_distance is None else max_distance,
+    }
+
+
+def _visible_from(origin):
+    """(visible zone indices, visible node indices) for one viewpoint"""
+
+    w = _WORKER
+    bvh = w['bvh']
+
+    # Zones: segment to each marker point, blocked by anything in between
+    if len(w['marker_points']):
+        delta = w['marker_points'] - origin
+        within = np.linalg.norm(delta, axis=1) <= w['max_distance']
+        clear = within & ~bvh.occluded(np.broadcast_to(origin, delta.shape), delta, t_max=1 - 1e-4)
+        zone_seen = np.zeros(w['zone_count'], dtype=bool)
+        zone_seen[w['marker_zones'][clear]] = True
+        zones = np.flatnonzero(zone_seen)
+    else:
+        zones = np.zeros(0, dtype=np.int64)
+
+    # Nodes: first hits of the direction sphere ...
+    directions = w['directions']
+    _, hit = bvh.intersect(np.broadcast_to(origin, directions.shape), directions, t_max=w['max_distance'])
+    seen = [w['triangle_nodes'][hit[hit >= 0]]]
+
+    # ... plus surface samples whose ray reaches their own node first
+    if len(w['sample_points']):
+        delta = w['sample_points'] - origin
+        within = np.linalg.norm(delta, axis=1) <= w['max_distance']
+        _, hit = bvh.intersect(np.broadcast_to(origin, delta.shape)[within], delta[within], t_max=1 + 1e-4)
+        owners = w['sample_nodes'][within]
+        reached = (hit >= 0) & (w['triangle_nodes'][np.maximum(hit, 0)] == owners)
+        seen.append(owners[reached])
+
+    return zones, np.unique(np.concatenate(seen))
+
+
+def _visible_batch(origins):
+    return [_visible_from(origin) for origin in origins]
+
+
+def build_visibility(glb, scene, zones=None, pois=None, settings=None, jobs=None, geometry=None):
+    """
+    Visibility table for an open GLBFile and its SceneGraph. `geometry` is
+    an already built (bvh, soup) pair for the scene, e.g. from
+    load_scene_bvh(); otherwise the tree is built here.
+
+    Returns a JSON-ready dict: zones (ZONE_ node names), nodes (mesh node
+    names) and viewpoints [{id, kind, position, zones: [zone node names],
+    nodes: [indices into nodes]}] plus statistics. Zone viewpoints are
+    named after their zone node, POI viewpoints take the POI id.
+    """
+
+    settings = settings or VisibilitySettings()
+    if zones is None:
+        zones = extract_zones(scene.gltf, scene=scene)
+    if pois is None:
+        pois = extract_pois(scene)
+
+    if geometry:
+        bvh, soup = geometry
+    else:
+        soup = scene_triangles(glb, scene)
+        bvh = None
+    if not len(soup):
+        if soup.skipped_draco:
+            raise ValueError(f"no decodable geometry: {soup.skipped_draco} primitive(s) use "
+                             f"KHR_draco_mesh_compression; export the model without Draco")
+        raise ValueError("model has no triangle geometry")
+
+    if bvh is None:
+        bvh = BVH(soup.corners())
+
+    # Mesh nodes get dense indices in node order
+    mesh_nodes = np.unique(soup.node_ids)
+    dense = np.full(len(scene.nodes), -1, dtype=np.int64)
+    dense[mesh_nodes] = np.arange(len(mesh_nodes))
+    triangle_nodes = dense[soup.node_ids]
+
+    sample_points, sample_owners = node_surface_samples(soup, settings.node_samples, settings.seed)
+
+    zone_positions = np.array([z['blender_coords'] for z in zones], dtype=np.float64).reshape(-1, 3)
+    heights = np.asarray(MARKER_HEIGHTS)
+    marker_points = (zone_positions[:, None, :] + heights[None, :, None] * UP).reshape(-1, 3)
+    marker_zones = np.repeat(np.arange(len(zones)), len(heights))
+
+    viewpoints = build_viewpoints(zones, pois, settings)
+    origins = [v['position'] for v in viewpoints]
+    init = (bvh, triangle_nodes, marker_points, marker_zones, len(zones),
+            sample_points, dense[sample_owners], sphere_directions(settings.sphere_rays),
+            settings.max_distance)
+
+    batches = [origins[i:i + _BATCH] for i in range(0, len(origins), _BATCH)]
+    if jobs == 1 or len(batches) <= 1:
+        _init_worker(*init)
+        results = map(_visible_batch, batches)
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                      initargs=init)
+        results = pool.map(_visible_batch, batches)
+
+    visible = []
+    try:
+        for batch in results:
+            visible.extend(batch)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    zone_names = [z['original_name'] for z in zones]
+    records = []
+    for viewpoint, (zone_idx, node_idx) in zip(viewpoints, visible):
+        records.append({
+            'id': viewpoint['id'],
+            'kind': viewpoint['kind'],
+            'position': [round(float(v), 4) for v in viewpoint['position']],
+            'zones': [zone_names[i] for i in zone_idx.tolist()],
+            'nodes': node_idx.tolist(),
+        })
+
+    return {
+        'settings': settings.as_dict(),
+        'triangles': len(soup),
+        'skipped_draco': soup.skipped_draco,
+        'bvh_nodes': bvh.node_count,
+        'zones': zone_names,
+        'nodes': [scene.index.names[i] for i in mesh_nodes.tolist()],
+        'viewpoints': records,
+    }
+
+
+def build_visibility_for_file(glb_file, settings=None, zones=None, pois=None, jobs=None,
+                              cache_dir=DEFAULT_CACHE_DIR):
+    bvh, soup, _ = load_scene_bvh(glb_file, cache_dir)
+    with GLBFile(glb_file) as glb:
+        return build_visibility(glb, SceneGraph(glb.json), zones=zones, pois=pois,
+                                settings=settings, jobs=jobs, geometry=(bvh, soup))
+
+
+def build_visibility_output(glb_file, table):
+    return dict(table, model_file=os.path.basename(glb_file))
+
+
+def main(argv=None):
+    defaults = VisibilitySettings()
+    parser = argparse.ArgumentParser(description="Precompute per-zone/POI visibility sets from GLB geometry")
+    parser.add_argument('glb_file', nargs='?', default='SM_MFF.glb')
+    parser.add_argument('-o', '--output', default='visibility.json', help="table JSON (default: visibility.json)")
+    parser.add_argument('--ts-output', default=DEFAULT_TS_OUTPUT,
+                        help=f"TypeScript module (default: {DEFAULT_TS_OUTPUT})")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--eye-height', type=float, default=defaults.eye_height,
+                        help="viewpoint height above each zone in meters")
+    parser.add_argument('--rays', type=int, default=defaults.sphere_rays,
+                        help="direction rays per viewpoint")
+    parser.add_argument('--samples', type=int, default=defaults.node_samples,
+                        help="surface samples per mesh node")
+    parser.add_argument('--max-distance', type=float, default=defaults.max_distance,
+                        help="ignore anything farther than this from a viewpoint")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"where built BVHs are cached (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="always rebuild the BVH")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.glb_file):
+        print(f"❌ File not found: {args.glb_file}")
+        return 1
+
+    settings = VisibilitySettings(args.eye_height, args.rays, args.samples, args.max_distance)
+
+    print(f"📂 Computing visibility sets for {args.glb_file}...")
+    started = time.perf_counter()
+    try:
+        table = build_visibility_for_file(args.glb_file, settings, jobs=args.jobs,
+                                          cache_dir=None if args.no_cache else args.cache_dir)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    viewpoints = table['viewpoints']
+    print(f"✅ {table['triangles']} triangles -> BVH with {table['bvh_nodes']} nodes")
+    if viewpoints:
+        zones = np.mean([len(v['zones']) for v in viewpoints])
+        nodes = np.mean([len(v['nodes']) for v in viewpoints])
+        print(f"✅ {len(viewpoints)} viewpoints: on average {zones:.1f}/{len(table['zones'])} zones, "
+              f"{nodes:.1f}/{len(table['nodes'])} mesh nodes visible "
+              f"({time.perf_counter() - started:.2f}s)")
+    else:
+        print("⚠️ No ZONE_ empties or cameras to compute visibility from")
+
+    output = build_visibility_output(args.glb_file, table)
+    if write_if_changed(args.output, json.dumps(output, indent=2, ensure_ascii=False)):
+        print(f"💾 Saved to: {args.output}")
+    if write_module(args.ts_output, visibility_module(table)):
+        print(f"📝 TypeScript module: {args.ts_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+"""
+Compact binary bundle for zone and POI data
+A versioned alternative to zone_coordinates.json for the client: one
+deduplicated UTF-8 string table, float32 arrays and uint16-quantized zone
+positions. src/utils/zoneBundle.ts decodes the same format in the browser;
+the app loads the bundle the asset pipeline writes next to the model
+(src/utils/venueZones.ts).
+
+LAYOUT (little-endian, every section 4-byte aligned):
+    header      magic 'ZPB1', u16 version, u16 flags,
+                u32 zone_count, u32 poi_count, u32 string_count, u32 string_bytes,
+                f32 bounds_min[3], f32 bounds_max[3]               (48 bytes)
+    strings     u32 offsets[string_count + 1], UTF-8 bytes
+    zones       u32 id[n], u32 original_name[n], u32 display_name[n]
+                positions: u16[n*3] quantized to bounds (FLAG_QUANTIZED)
+                           or f32[n*3]
+                f32 rotation[n*4]                   (FLAG_ZONE_ROTATION)
+                f32 scale[n*3]                      (FLAG_ZONE_SCALE)
+    pois        u32 id[m], u32 name[m], u32 description[m], u32 color_rgb[m]
+                f32 camera_position[m*3], f32 target_position[m*3]
+                f32 distance[m], f32 azimuth_deg[m], f32 elevation_deg[m]
+    index       f32 origin[3], f32 cell_size, u32 dims[3]   (FLAG_SPATIAL_INDEX)
+                u32 cell_start[cells + 1], u32 items[n + m]
+
+Rotation/scale sections are omitted when every zone has the identity value.
+The index is the uniform grid from spatial_index.py over the decoded zone
+positions and POI targets (markers numbered zones first, then POIs).
+
+USAGE:
+    python zone_bundle.py zone_coordinates.json [poi_cameras_export.json] -o zones.bin
+    python zone_bundle.py --dump zones.bin
+"""
+
+import argparse
+import json
+import struct
+import sys
+
+import numpy as np
+
+from spatial_index import SpatialIndex
+
+MAGIC = b'ZPB1'
+VERSION = 1
+
+FLAG_QUANTIZED = 1 << 0
+FLAG_ZONE_ROTATION = 1 << 1
+FLAG_ZONE_SCALE = 1 << 2
+FLAG_SPATIAL_INDEX = 1 << 3
+
+HEADER = struct.Struct('<4sHHIIII3f3f')
+INDEX_HEADER = struct.Struct('<4f3I')
+
+QUANT_MAX = 65535
+
+
+class BundleError(ValueError):
+    """Raised for malformed bundles or failed round-trip checks"""
+
+
+def _pad4(buf):
+    buf.extend(b'\0' * (-len(buf) % 4))
+
+
+class _StringTable:
+    """Deduplicated string table; index 0 is always the empty string"""
+
+    def __init__(self):
+        self.strings = ['']
+        self._ids = {'': 0}
+
+    def add(self, value):
+        value = '' if value is None else str(value)
+        if value not in self._ids:
+            self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return self._ids[value]
+
+    def encode(self):
+        encoded = [s.encode('utf-8') for s in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        return offsets.tobytes() + b''.join(encoded), int(offsets[-1])
+
+
+_HEX_DIGITS = set('0123456789abcdefABCDEF')
+
+
+def normalize_color(color):
+    """
+    '#rgb', '#rrggbb' (or either with alpha, which the bundle drops) as
+    lowercase '#rrggbb'; a missing color is black. Raises BundleError for
+    anything that is not a hex color.
+    """
+
+    if not color:
+        return '#000000'
+    digits = str(color).strip().lstrip('#')
+    if len(digits) not in (3, 4, 6, 8) or not set(digits) <= _HEX_DIGITS:
+        raise BundleError(f"invalid color {color!r}: expected #rgb or #rrggbb")
+    if len(digits) <= 4:
+        digits = ''.join(c * 2 for c in digits)
+    return '#' + digits[:6].lower()
+
+
+def _color_to_int(color):
+    return int(normalize_color(color)[1:], 16)
+
+
+def _int_to_color(value):
+    return f"#{int(value):06x}"
+
+
+def _vec3(value):
+    """Accept [x, y, z] lists or {'x', 'y', 'z'} dicts"""
+    if isinstance(value, dict):
+        return [value['x'], value['y'], value['z']]
+    return value
+
+
+def _zone_position(zone):
+    if 'blender_coords' in zone:
+        return zone['blender_coords']
+    return _vec3(zone['position'])
+
+
+def _index_section(zone_positions, targets):
+    """Spatial index over the marker positions exactly as the decoder sees them"""
+
+    index = SpatialIndex(np.concatenate([zone_positions, targets.astype(np.float64)]))
+    out = bytearray(INDEX_HEADER.pack(*index.origin, index.cell_size, *index.dims.tolist()))
+    out.extend(index.cell_start.astype('<u4').tobytes())
+    out.extend(index.items.astype('<u4').tobytes())
+    return out
+
+
+def encode_bundle(zones, pois=(), quantize=True, spatial_index=True):
+    """Encode zone and POI records (pipeline JSON shape) into bundle bytes"""
+
+    zones = list(zones)
+    pois = list(pois)
+    strings = _StringTable()
+
+    zone_ids = np.array([strings.add(z['id']) for z in zones], dtype='<u4')
+    zone_names = np.array([strings.add(z.get('original_name')) for z in zones], dtype='<u4')
+    zone_display = np.array([strings.add(z.get('display_name')) for z in zones], dtype='<u4')
+    positions = np.array([_zone_position(z) for z in zones], dtype=np.float64).reshape(-1, 3)
+    rotations = np.array([z.get('rotation', (0, 0, 0, 1)) for z in zones], dtype='<f4').reshape(-1, 4)
+    scales = np.array([z.get('scale', (1, 1, 1)) for z in zones], dtype='<f4').reshape(-1, 3)
+
+    poi_ids = np.array([strings.add(p['id']) for p in pois], dtype='<u4')
+    poi_names = np.array([strings.add(p.get('name')) for p in pois], dtype='<u4')
+    poi_desc = np.array([strings.add(p.get('description')) for p in pois], dtype='<u4')
+    poi_colors = np.array([_color_to_int(p.get('color')) for p in pois], dtype='<u4')
+    cameras = np.array([_vec3(p['camera_position']) for p in pois], dtype='<f4').reshape(-1, 3)
+    targets = np.array([_vec3(p['target_position']) for p in pois], dtype='<f4').reshape(-1, 3)
+    metrics = np.array([[p.get('distance', 0), p.get('azimuth_deg', 0), p.get('elevation_deg', 0)]
+                        for p in pois], dtype='<f4').reshape(-1, 3)
+
+    flags = 0
+    if quantize and len(zones):
+        flags |= FLAG_QUANTIZED
+    if len(zones) and not np.allclose(rotations, (0, 0, 0, 1)):
+        flags |= FLAG_ZONE_ROTATION
+    if len(zones) and not np.allclose(scales, 1):
+        flags |= FLAG_ZONE_SCALE
+    if spatial_index and (len(zones) or len(pois)):
+        flags |= FLAG_SPATIAL_INDEX
+
+    if len(zones):
+        # Quantize against the float32 bounds the decoder will actually see
+        bounds_min = positions.min(axis=0).astype('<f4').astype(np.float64)
+        bounds_max = positions.max(axis=0).astype('<f4').astype(np.float64)
+    else:
+        bounds_min = bounds_max = np.zeros(3)
+
+    string_blob, string_bytes = strings.encode()
+
+    out = bytearray(HEADER.pack(
+        MAGIC, VERSION, flags, len(zones), len(pois), len(strings.strings), string_bytes,
+        *bounds_min.astype('<f4'), *bounds_max.astype('<f4'),
+    ))
+    out.extend(string_blob)
+    _pad4(out)
+
+    for array in (zone_ids, zone_names, zone_display):
+        out.extend(array.tobytes())
+
+    if flags & FLAG_QUANTIZED:
+        extent = np.where(bounds_max > bounds_min, bounds_max - bounds_min, 1.0)
+        quantized = np.rint((positions - bounds_min) / extent * QUANT_MAX)
+        quantized = np.clip(quantized, 0, QUANT_MAX).astype('<u2')
+        out.extend(quantized.tobytes())
+        _pad4(out)
+        decoded_positions = bounds_min + quantized / QUANT_MAX * (bounds_max - bounds_min)
+    else:
+        out.extend(positions.astype('<f4').tobytes())
+        decoded_positions = positions.astype('<f4').astype(np.float64)
+
+    if flags & FLAG_ZONE_ROTATION:
+        out.extend(rotations.tobytes())
+    if flags & FLAG_ZONE_SCALE:
+        out.extend(scales.tobytes())
+
+    for array in (poi_ids, poi_names, poi_desc, poi_colors, cameras, targets):
+        out.extend(array.tobytes())
+    out.extend(np.ascontiguousarray(metrics.T).tobytes())
+
+    if flags & FLAG_SPATIAL_INDEX:
+        out.extend(_index_section(decoded_positions, targets))
+
+    return bytes(out)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def take(self, dtype, count):
+        dtype = np.dtype(dtype)
+        end = self.offset + dtype.itemsize * count
+        if end > len(self.data):
+            raise BundleError(f"bundle truncated at byte {self.offset}")
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset = end
+        return array
+
+    def align(self):
+        self.offset += -self.offset % 4
+
+
+def decode_bundle(data):
+    """Decode bundle bytes back into zone/POI records (pipeline JSON shape)"""
+
+    if len(data) < HEADER.size:
+        raise BundleError("bundle too small")
+
+    (magic, version, flags, zone_count, poi_count, string_count, string_bytes,
+     *bounds) = HEADER.unpack_from(data, 0)
+
+    if magic != MAGIC:
+        raise BundleError(f"bad magic {magic!r}")
+    if version != VERSION:
+        raise BundleError(f"unsupported bundle version {version}")
+
+    bounds_min = np.array(bounds[:3], dtype=np.float64)
+    bounds_max = np.array(bounds[3:], dtype=np.float64)
+
+    reader = _Reader(data)
+    reader.offset = HEADER.size
+
+    offsets = reader.take('<u4', string_count + 1)
+    blob = bytes(reader.take('u1', string_bytes))
+    strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(string_count)]
+    reader.align()
+
+    zone_ids = reader.take('<u4', zone_count)
+    zone_names = reader.take('<u4', zone_count)
+    zone_display = reader.take('<u4', zone_count)
+
+    if flags & FLAG_QUANTIZED:
+        quantized = reader.take('<u2', zone_count * 3).reshape(-1, 3).astype(np.float64)
+        reader.align()
+        positions = bounds_min + quantized / QUANT_MAX * (bounds_max - bounds_min)
+    else:
+        positions = reader.take('<f4', zone_count * 3).reshape(-1, 3).astype(np.float64)
+
+    if flags & FLAG_ZONE_ROTATION:
+        rotations = reader.take('<f4', zone_count * 4).reshape(-1, 4)
+    else:
+        rotations = np.tile(np.array([0, 0, 0, 1], dtype='<f4'), (zone_count, 1))
+
+    if flags & FLAG_ZONE_SCALE:
+        scales = reader.take('<f4', zone_count * 3).reshape(-1, 3)
+    else:
+        scales = np.ones((zone_count, 3), dtype='<f4')
+
+    poi_ids = reader.take('<u4', poi_count)
+    poi_names = reader.take('<u4', poi_count)
+    poi_desc = reader.take('<u4', poi_count)
+    poi_colors = reader.take('<u4', poi_count)
+    cameras = reader.take('<f4', poi_count * 3).reshape(-1, 3)
+    targets = reader.take('<f4', poi_count * 3).reshape(-1, 3)
+    metrics = reader.take('<f4', poi_count * 3).reshape(3, -1)
+
+    index = None
+    if flags & FLAG_SPATIAL_INDEX:
+        if reader.offset + INDEX_HEADER.size > len(data):
+            raise BundleError(f"bundle truncated at byte {reader.offset}")
+        *origin, cell_size, dx, dy, dz = INDEX_HEADER.unpack_from(data, reader.offset)
+        reader.offset += INDEX_HEADER.size
+        cell_start = reader.take('<u4', dx * dy * dz + 1)
+        items = reader.take('<u4', zone_count + poi_count)
+        index = SpatialIndex.from_arrays(
+            np.concatenate([positions, targets.astype(np.float64)]),
+            origin, cell_size, (dx, dy, dz), cell_start, items)
+
+    zones = []
+    for i in range(zone_count):
+        x, y, z = (float(v) for v in positions[i])
+        zones.append({
+            'id': strings[zone_ids[i]],
+            'original_name': strings[zone_names[i]],
+            'display_name': strings[zone_display[i]],
+            'position': {'x': round(x, 3), 'y': round(y, 3), 'z': round(z, 3)},
+            'blender_coords': [x, y, z],
+            'rotation': [float(v) for v in rotations[i]],
+            'scale': [float(v) for v in scales[i]],
+        })
+
+    pois = []
+    for i in range(poi_count):
+        pois.append({
+            'id': strings[poi_ids[i]],
+            'name': strings[poi_names[i]],
+            'color': _int_to_color(poi_colors[i]),
+            'camera_position': [float(v) for v in cameras[i]],
+            'target_position': [float(v) for v in targets[i]],
+            'description': strings[poi_desc[i]],
+            'distance': float(metrics[0, i]),
+            'azimuth_deg': float(metrics[1, i]),
+            'elevation_deg': float(metrics[2, i]),
+        })
+
+    return {'zones': zones, 'pois': pois, 'index': index}
+
+
+def check_index(index):
+    """Structural check of a decoded spatial index; raises BundleError"""
+
+    count = len(index)
+    if len(index.cell_start) != index.cell_count + 1 or index.cell_start[0] != 0 or \
+            index.cell_start[-1] != count or np.any(np.diff(index.cell_start) < 0):
+        raise BundleError("spatial index cell offsets are inconsistent")
+    if not np.array_equal(np.sort(index.items), np.arange(count)):
+        raise BundleError("spatial index does not list every marker exactly once")
+
+    # Every marker must sit in the cell its slot belongs to
+    slot_cells = np.repeat(np.arange(index.cell_count), np.diff(index.cell_start))
+    if not np.array_equal(index.cell_ids(index.positions[index.items]), slot_cells):
+        raise BundleError("spatial index has markers in the wrong cell")
+
+
+def position_tolerance(zones, quantize=True):
+    """Largest position error the encoding may introduce for these zones"""
+
+    if not zones:
+        return 0.0
+    positions = np.array([_zone_position(z) for z in zones], dtype=np.float64)
+    magnitude = float(np.abs(positions).max())
+    # float32 rounding of the bounds/values themselves
+    tolerance = max(magnitude, 1.0) * 2 ** -22
+    if quantize:
+        extent = float((positions.max(axis=0) - positions.min(axis=0)).max())
+        tolerance += extent / QUANT_MAX
+    return tolerance
+
+
+def verify_bundle(data, zones, pois=(), quantize=True, spatial_index=True):
+    """Decode `data` and check it round-trips `zones`/`pois`; raises BundleError"""
+
+    zones = list(zones)
+    pois = list(pois)
+    decoded = decode_bundle(data)
+    tolerance = position_tolerance(zones, quantize)
+
+    if len(decoded['zones']) != len(zones) or len(decoded['pois']) != len(pois):
+        raise BundleError("record counts differ after round trip")
+
+    if decoded['index'] is not None:
+        check_index(decoded['index'])
+    elif spatial_index and (zones or pois):
+        raise BundleError("spatial index missing after round trip")
+
+    for original, restored in zip(zones, decoded['zones']):
+        for key in ('id', 'original_name', 'display_name'):
+            if (original.get(key) or '') != restored[key]:
+                raise BundleError(f"zone {original['id']}: {key} differs after round trip")
+        error = np.abs(np.subtract(_zone_position(original), restored['blender_coords'])).max()
+        if error > tolerance:
+            raise BundleError(f"zone {original['id']}: position error {error} > {tolerance}")
+        for key, identity in (('rotation', (0, 0, 0, 1)), ('scale', (1, 1, 1))):
+            if not np.allclose(original.get(key, identity), restored[key], atol=1e-6):
+                raise BundleError(f"zone {original['id']}: {key} differs after round trip")
+
+    for original, restored in zip(pois, decoded['pois']):
+        for key in ('id', 'name', 'description'):
+            if (original.get(key) or '') != restored[key]:
+                raise BundleError(f"POI {original['id']}: {key} differs after round trip")
+        if normalize_color(original.get('color')) != restored['color']:
+            raise BundleError(f"POI {original['id']}: color differs after round trip")
+        for key in ('camera_position', 'target_position'):
+            if not np.allclose(_vec3(original[key]), restored[key], rtol=1e-6, atol=1e-4):
+                raise BundleError(f"POI {original['id']}: {key} differs after round trip")
+
+    return decoded
+
+
+def write_bundle(path, zones, pois=(), quantize=True, spatial_index=True):
+    """Encode, verify and write a bundle; returns the encoded bytes"""
+
+    data = encode_bundle(zones, pois, quantize, spatial_index)
+    verify_bundle(data, zones, pois, quantize, spatial_index)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert zone/POI JSON to a compact binary bundle")
+    parser.add_argument('inputs', nargs='+',
+                        help="zone_coordinates.json and optionally a POI export JSON "
+                             "(or a bundle with --dump)")
+    parser.add_argument('-o', '--output', default='zones.bin', help="bundle to write")
+    parser.add_argument('--float', action='store_true', help="store float32 instead of quantized positions")
+    parser.add_argument('--no-index', action='store_true', help="leave out the spatial index section")
+    parser.add_argument('--dump', action='store_true', help="decode a bundle and print it as JSON")
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        with open(args.inputs[0], 'rb') as f:
+            decoded = decode_bundle(f.read())
+        index = decoded.pop('index')
+        if index is not None:
+            decoded['spatial_index'] = {
+                'origin': index.origin.tolist(),
+                'cell_size': index.cell_size,
+                'dims': index.dims.tolist(),
+            }
+        print(json.dumps(decoded, indent=2, ensure_ascii=False))
+        return 0
+
+    with open(args.inputs[0], 'r', encoding='utf-8') as f:
+        zones = json.load(f)['zones']
+    pois = []
+    if len(args.inputs) > 1:
+        with open(args.inputs[1], 'r', encoding='utf-8') as f:
+            pois = json.load(f)['pois']
+
+    data = write_bundle(args.output, zones, pois, quantize=not args.float, spatial_index=not args.no_index)
+    print(f"✅ {len(zones)} zones, {len(pois)} POIs -> {args.output} ({len(data)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())